@@ -0,0 +1 @@
+"""Headless throughput / latency benchmarks (run with `python -m benchmarks.<name>` from src/)."""
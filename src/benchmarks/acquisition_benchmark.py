@@ -0,0 +1,204 @@
+"""
+Acquisition / Display Pipeline Benchmark
+
+Drives the real SerialStreamReader -> AcquisitionThread -> ECGRingBuffer
+pipeline from a VirtualECGDevice at a fixed rate and reports:
+    - sustained packets/sec and packet loss
+    - per-stage latency (serial read, bulk decode, ring publish)
+    - end-to-end sample-to-pixel latency: device write of a packet -> the
+      frame showing that sample has been rendered
+    - the sampling rate recovered by SamplingClock and the gaps it detected
+
+The display side mimics the live 12-lead page: a timer at --fps drains the
+ring, runs the streaming filter bank and redraws 12 pyqtgraph curves into an
+offscreen widget. With --no-render (or without PyQt5/pyqtgraph) latency is
+taken when the data is handed to the plots.
+
+Usage (from src/):
+    python -m benchmarks.acquisition_benchmark --rate 500 --seconds 10
+    python -m benchmarks.acquisition_benchmark --rate 1000 --jitter-ms 2 --drop-rate 0.001 --corrupt-rate 0.001
+    python -m benchmarks.acquisition_benchmark --source ../dummycsv.csv --no-render
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from ecg.acquisition import AcquisitionThread
+from ecg.ring_buffer import ECGRingBuffer
+from ecg.sampling_clock import SamplingClock
+from ecg.streaming_filters import StreamingFilterBank
+from ecg.virtual_device import VirtualECGDevice, load_direct_leads, synthetic_direct_leads
+
+
+class _OffscreenPlots:
+    """12 pyqtgraph curves rendered into an offscreen widget (one grab per frame)."""
+
+    def __init__(self, window_samples):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        import pyqtgraph as pg
+        self.app = QApplication.instance() or QApplication([])
+        self.widget = pg.GraphicsLayoutWidget()
+        self.widget.resize(1600, 900)
+        self.curves = []
+        for i in range(12):
+            plot = self.widget.addPlot(row=i % 6, col=i // 6)
+            self.curves.append(plot.plot(pen='k'))
+        self.window_samples = window_samples
+        self.widget.show()
+
+    def render(self, window):
+        for curve, lead in zip(self.curves, window):
+            curve.setData(lead)
+        self.app.processEvents()
+        self.widget.grab()
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    arr = np.asarray(values) * 1000.0
+    return {
+        'count': len(arr),
+        'p50_ms': float(np.percentile(arr, 50)),
+        'p95_ms': float(np.percentile(arr, 95)),
+        'p99_ms': float(np.percentile(arr, 99)),
+        'max_ms': float(arr.max()),
+    }
+
+
+def run_benchmark(rate=500, seconds=10.0, fps=30.0, jitter_ms=0.0, drop_rate=0.0, corrupt_rate=0.0,
+                  source=None, render=True, baudrate=921600, seed=0):
+    """
+    Run one benchmark and return a results dict (also printed by main()).
+    """
+    from ecg.twelve_lead_test import SerialStreamReader
+
+    direct = load_direct_leads(source) if source else synthetic_direct_leads(10.0, rate)
+    device = VirtualECGDevice(direct, sampling_rate=rate, jitter_ms=jitter_ms,
+                              drop_byte_rate=drop_rate, corrupt_frame_rate=corrupt_rate, seed=seed)
+    port = device.open()
+
+    ring = ECGRingBuffer(capacity=int(rate * 20), n_leads=12)
+    reader = SerialStreamReader(port, baudrate, timeout=0.05)
+    reader.start()
+    clock = SamplingClock()
+    thread = AcquisitionThread(reader, ring, clock=clock)
+    bank = StreamingFilterBank(n_leads=12)
+    bank.configure(rate, ac_filter="50", emg_filter="150", dft_filter="0.5")
+    window_samples = int(rate * 10)
+
+    plots = None
+    if render:
+        try:
+            plots = _OffscreenPlots(window_samples)
+        except Exception as e:
+            print(f"⚠️ Rendering disabled ({e}); measuring latency at plot hand-off")
+
+    display = ECGRingBuffer(capacity=window_samples, n_leads=12, track_time=False)
+    latencies = []
+    frame_times = []
+    cursor = 0
+    frame_interval = 1.0 / fps
+
+    device.start()
+    thread.start()
+    t_start = time.perf_counter()
+    next_frame = t_start
+    try:
+        while time.perf_counter() - t_start < seconds:
+            next_frame += frame_interval
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            t_frame = time.perf_counter()
+            block, _, cursor, _ = ring.read_since(cursor)
+            if block.shape[1] == 0:
+                continue
+            display.extend(bank.process(block).T)
+            if plots is not None:
+                plots.render(display.latest())
+            t_pixel = time.perf_counter()
+            frame_times.append(t_pixel - t_frame)
+
+            # ring index == decoded packet index == intact packet index
+            sent = device.intact_send_time(cursor - 1)
+            if sent is not None:
+                latencies.append(t_pixel - sent)
+    finally:
+        elapsed = time.perf_counter() - t_start
+        thread.stop()
+        reader.stop()
+        device.stop()
+        reader.close()
+
+    stats = thread.get_stats()
+    device_stats = device.get_stats()
+    clock_stats = clock.get_stats()
+    results = {
+        'rate_hz': rate,
+        'seconds': elapsed,
+        'packets_sent': device_stats['packets_sent'],
+        'packets_intact': device_stats['packets_intact'],
+        'packets_decoded': stats['samples'],
+        'packets_lost': max(0, device_stats['packets_intact'] - stats['samples']),
+        'sustained_packets_per_s': stats['samples'] / elapsed if elapsed > 0 else 0.0,
+        'write_stalls': device_stats['write_stalls'],
+        'read': stats['read'],
+        'decode': stats['decode'],
+        'publish': stats['publish'],
+        'frame_work': _percentiles(frame_times),
+        'sample_to_pixel': _percentiles(latencies),
+        'clock': clock_stats,
+        'rendered': plots is not None,
+    }
+    return results
+
+
+def _print_results(results):
+    print("=" * 70)
+    print(f"ECG acquisition benchmark @ {results['rate_hz']} Hz for {results['seconds']:.1f} s "
+          f"({'rendered' if results['rendered'] else 'no rendering'})")
+    print("=" * 70)
+    print(f"Packets sent / intact / decoded: {results['packets_sent']} / {results['packets_intact']} / "
+          f"{results['packets_decoded']}  (lost {results['packets_lost']})")
+    print(f"Sustained throughput: {results['sustained_packets_per_s']:.1f} packets/s "
+          f"(pty write stalls: {results['write_stalls']})")
+    clock = results['clock']
+    print(f"Recovered sampling rate: {clock['estimated_rate']:.2f} Hz (published {clock['sampling_rate']:.1f} Hz, "
+          f"arrival jitter {clock['jitter_ms']:.2f} ms, gaps {clock['gaps']})")
+    for stage in ('read', 'decode', 'publish'):
+        s = results[stage]
+        print(f"  {stage:<8} mean {s['mean_ms']:.3f} ms  max {s['max_ms']:.3f} ms  ({s['count']} calls)")
+    for name in ('frame_work', 'sample_to_pixel'):
+        s = results[name]
+        if s:
+            print(f"  {name:<16} p50 {s['p50_ms']:.2f}  p95 {s['p95_ms']:.2f}  p99 {s['p99_ms']:.2f}  "
+                  f"max {s['max_ms']:.2f} ms  ({s['count']} frames)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ECG acquisition and display pipeline")
+    parser.add_argument("--rate", type=int, default=500, choices=(250, 500, 1000), help="Packet rate (Hz)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=30.0, help="Display timer rate")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Per-packet probability of a dropped byte")
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="Per-packet probability of a corrupt frame")
+    parser.add_argument("--source", help="Capture / CSV / ADC dump to replay instead of the synthetic waveform")
+    parser.add_argument("--no-render", action="store_true", help="Skip the offscreen pyqtgraph rendering")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run_benchmark(rate=args.rate, seconds=args.seconds, fps=args.fps, jitter_ms=args.jitter_ms,
+                            drop_rate=args.drop_rate, corrupt_rate=args.corrupt_rate, source=args.source,
+                            render=not args.no_render, seed=args.seed)
+    _print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Arrhythmia Detector Benchmark
+
+Replays recorded captures (reports/ecg_data) through the feature-table
+ArrhythmiaDetector and the previous rule-by-rule implementation and reports:
+    - label agreement per analysis window (any mismatch is listed)
+    - detection time per window of both implementations
+    - the label distribution that was compared
+
+The previous implementation is not kept in the tree: it is loaded from git
+(ecg/arrhythmia_detector.py at LEGACY_REVISION, the baseline commit whose
+rule-by-rule detector the feature table replaced), so the benchmark needs to
+run inside the repository.
+
+`--scaling` times both implementations on synthetic Lead II windows instead:
+the sample count is varied at a fixed beat count (sampling rate 250-2000 Hz)
+and the beat count at a fixed sample count (heart rate 40-180 bpm). The
+feature-table detector's time follows the beats; the previous one's follows
+the samples.
+
+Windows slide over lead II of every capture. The P/Q/R/S fiducials come from
+PQRSTAnalyzer; besides the recorded fiducials each window is also classified
+with derived fiducial sets (P waves removed, premature beats, dropped QRS) so
+the rhythm and AV-block rules are exercised, not only sinus rhythm.
+
+The previous implementation tested some peak lists with `not peaks`, which
+raises (and silently skips the rule) when PQRSTAnalyzer hands it numpy
+arrays, so it is fed plain lists here.
+
+Usage (from src/):
+    python -m benchmarks.arrhythmia_benchmark
+    python -m benchmarks.arrhythmia_benchmark --data-dir ../reports/ecg_data --window 10 --step 5 --max-files 20
+    python -m benchmarks.arrhythmia_benchmark --rate 500
+    python -m benchmarks.arrhythmia_benchmark --scaling
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import subprocess
+import time
+import types
+from collections import Counter
+
+import numpy as np
+
+from ecg.arrhythmia_detector import ArrhythmiaDetector
+from ecg.ecg_capture import load_ecg_data_from_file
+from ecg.pqrst_analyzer import PQRSTAnalyzer
+from ecg.virtual_device import synthetic_direct_leads
+
+VARIANTS = ('recorded', 'no_p', 'premature', 'dropped_qrs')
+
+# Baseline commit with the rule-by-rule detector
+LEGACY_REVISION = "1c92afa81184267686c697eed67cf29e1e0e31c5"
+LEGACY_PATH = "src/ecg/arrhythmia_detector.py"
+
+
+def load_legacy_detector(revision=LEGACY_REVISION):
+    """
+    ArrhythmiaDetector class of an earlier revision, read with `git show`.
+
+    Returns:
+        The class (module kept in memory only)
+    """
+    repo = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    try:
+        source = subprocess.run(["git", "-C", repo, "show", f"{revision}:{LEGACY_PATH}"],
+                                capture_output=True, check=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise SystemExit(f"❌ Cannot load the previous detector from git ({revision[:7]}): {e}")
+    module = types.ModuleType("legacy_arrhythmia_detector")
+    exec(compile(source, f"{revision[:7]}:{LEGACY_PATH}", "exec"), module.__dict__)
+    return module.ArrhythmiaDetector
+
+
+def _variant(analysis, name):
+    """Fiducial set derived from one recorded analysis."""
+    r = np.asarray(analysis['r_peaks'], dtype=np.int64)
+    out = {key: np.asarray(analysis[key], dtype=np.int64) for key in ('p_peaks', 'q_peaks', 's_peaks')}
+    if name == 'no_p':
+        out['p_peaks'] = np.zeros(0, dtype=np.int64)
+    elif name == 'premature' and len(r) >= 4:
+        # Every third beat arrives 30% early (premature beat + compensatory pause)
+        r = r.copy()
+        for i in range(2, len(r) - 1, 3):
+            r[i] = r[i - 1] + int(0.7 * (r[i] - r[i - 1]))
+    elif name == 'dropped_qrs' and len(r) >= 4:
+        # Every other QRS is not conducted; the P waves stay
+        keep = np.ones(len(r), dtype=bool)
+        keep[1::2] = False
+        r = r[keep]
+        out['q_peaks'] = out['q_peaks'][keep[:len(out['q_peaks'])]]
+        out['s_peaks'] = out['s_peaks'][keep[:len(out['s_peaks'])]]
+    out['r_peaks'] = r
+    return out
+
+
+def _as_lists(analysis):
+    return {key: [int(v) for v in values] for key, values in analysis.items()}
+
+
+def _windows(signal, fs, window_s, step_s):
+    n = int(window_s * fs)
+    step = max(1, int(step_s * fs))
+    for start in range(0, max(1, len(signal) - n + 1), step):
+        window = signal[start:start + n]
+        if len(window) == n:
+            yield start, window
+
+
+def run_benchmark(data_dir="../reports/ecg_data", lead="II", window_s=10.0, step_s=5.0, max_files=None,
+                  variants=VARIANTS, serial=True, rate=None):
+    """
+    Run the comparison and return a results dict (also printed by main()).
+    """
+    files = sorted(glob.glob(os.path.join(data_dir, "ecg_data_*")))
+    if max_files:
+        files = files[:max_files]
+    legacy_class = load_legacy_detector()
+
+    windows = 0
+    mismatches = []
+    labels = Counter()
+    legacy_times, new_times = [], []
+    quiet = io.StringIO()
+    for path in files:
+        with contextlib.redirect_stdout(quiet):
+            data = load_ecg_data_from_file(path)
+        if not data or lead not in data.get('leads', {}):
+            continue
+        fs = float(data.get('sampling_rate') or 500.0)
+        signal = np.asarray(data['leads'][lead], dtype=np.float64)
+        if rate and rate != fs:
+            # Linear resampling to a device rate (window cost grows with fs)
+            n = int(len(signal) / fs * rate)
+            signal = np.interp(np.arange(n) * (fs / rate), np.arange(len(signal)), signal)
+            fs = float(rate)
+        analyzer = PQRSTAnalyzer(sampling_rate=fs)
+        legacy = legacy_class(sampling_rate=fs)
+        detector = ArrhythmiaDetector(sampling_rate=fs)
+
+        for start, window in _windows(signal, fs, window_s, step_s):
+            with contextlib.redirect_stdout(quiet):
+                recorded = analyzer.analyze_signal(window)
+            for name in variants:
+                analysis = _variant(recorded, name)
+                with contextlib.redirect_stdout(quiet):
+                    t0 = time.perf_counter()
+                    expected = legacy.detect_arrhythmias(window, _as_lists(analysis), has_received_serial_data=serial)
+                    t1 = time.perf_counter()
+                    got = detector.detect_arrhythmias(window, analysis, has_received_serial_data=serial)
+                    t2 = time.perf_counter()
+                legacy_times.append(t1 - t0)
+                new_times.append(t2 - t1)
+                windows += 1
+                labels.update(got)
+                if got != expected:
+                    mismatches.append({'file': os.path.basename(path), 'start': start, 'variant': name,
+                                       'legacy': expected, 'features': got})
+            quiet.seek(0)
+            quiet.truncate()
+
+    def _ms(values):
+        arr = np.asarray(values) * 1000.0
+        return {'mean_ms': float(arr.mean()) if arr.size else 0.0,
+                'p95_ms': float(np.percentile(arr, 95)) if arr.size else 0.0}
+
+    return {
+        'files': len(files),
+        'windows': windows,
+        'identical': windows - len(mismatches),
+        'mismatches': mismatches,
+        'labels': dict(labels.most_common()),
+        'legacy': _ms(legacy_times),
+        'features': _ms(new_times),
+    }
+
+
+def _time_per_window(detect, window, analysis, repeats):
+    best = float('inf')
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            detect(window, analysis, has_received_serial_data=True)
+        best = min(best, (time.perf_counter() - t0) / repeats)
+    return best
+
+
+def run_scaling(window_s=10.0, rates=(250, 500, 1000, 2000), heart_rates=(40, 60, 90, 120, 150, 180),
+                repeats=100):
+    """
+    Detection time of both implementations on synthetic Lead II windows.
+
+    Returns:
+        dict: 'samples' (fixed 72 bpm, varying sampling rate) and 'beats'
+        (fixed 500 Hz, varying heart rate), lists of per-configuration results
+    """
+    legacy_class = load_legacy_detector()
+    quiet = io.StringIO()
+
+    def measure(fs, heart_rate):
+        window = synthetic_direct_leads(seconds=window_s, sampling_rate=fs, heart_rate=heart_rate)[:, 1]
+        with contextlib.redirect_stdout(quiet):
+            analysis = PQRSTAnalyzer(sampling_rate=fs).analyze_signal(window)
+            legacy, detector = legacy_class(sampling_rate=fs), ArrhythmiaDetector(sampling_rate=fs)
+            lists = _as_lists(analysis)
+            result = {
+                'fs': fs, 'heart_rate': heart_rate, 'samples': len(window), 'beats': len(analysis['r_peaks']),
+                'legacy_ms': 1000.0 * _time_per_window(legacy.detect_arrhythmias, window, lists, repeats),
+                'features_ms': 1000.0 * _time_per_window(detector.detect_arrhythmias, window, analysis, repeats),
+            }
+        quiet.seek(0)
+        quiet.truncate()
+        return result
+
+    return {
+        'samples': [measure(float(fs), 72.0) for fs in rates],
+        'beats': [measure(500.0, float(hr)) for hr in heart_rates],
+    }
+
+
+def _print_scaling(results):
+    print("=" * 70)
+    print("Arrhythmia detector scaling (synthetic Lead II, ms per window)")
+    print("=" * 70)
+    for key, title in (('samples', 'Samples varied, beats fixed (72 bpm)'),
+                       ('beats', 'Beats varied, samples fixed (500 Hz)')):
+        print(title)
+        for r in results[key]:
+            print(f"  {r['samples']:>6} samples {r['beats']:>3} beats:  legacy {r['legacy_ms']:.3f}  "
+                  f"features {r['features_ms']:.3f}")
+
+
+def _print_results(results):
+    print("=" * 70)
+    print(f"Arrhythmia detector benchmark: {results['windows']} windows from {results['files']} captures")
+    print("=" * 70)
+    print(f"Identical labels: {results['identical']} / {results['windows']}")
+    for m in results['mismatches'][:20]:
+        print(f"  ❌ {m['file']} @ {m['start']} ({m['variant']}): legacy {m['legacy']} != features {m['features']}")
+    for name in ('legacy', 'features'):
+        s = results[name]
+        print(f"  {name:<9} mean {s['mean_ms']:.3f} ms  p95 {s['p95_ms']:.3f} ms per window")
+    print("Labels compared:")
+    for label, count in results['labels'].items():
+        print(f"  {count:>6}  {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the feature-table arrhythmia detector with the previous rules")
+    parser.add_argument("--data-dir", default="../reports/ecg_data", help="Directory of ecg_data_* captures")
+    parser.add_argument("--lead", default="II")
+    parser.add_argument("--window", type=float, default=10.0, help="Analysis window (s)")
+    parser.add_argument("--step", type=float, default=5.0, help="Window step (s)")
+    parser.add_argument("--max-files", type=int, default=None)
+    parser.add_argument("--rate", type=float, default=None, help="Resample captures to this rate (Hz)")
+    parser.add_argument("--recorded-only", action="store_true", help="Skip the derived fiducial variants")
+    parser.add_argument("--scaling", action="store_true",
+                        help="Time both implementations against sample count and beat count instead")
+    args = parser.parse_args()
+
+    if args.scaling:
+        _print_scaling(run_scaling(window_s=args.window))
+        return
+
+    results = run_benchmark(data_dir=args.data_dir, lead=args.lead, window_s=args.window, step_s=args.step,
+                            max_files=args.max_files, variants=('recorded',) if args.recorded_only else VARIANTS,
+                            rate=args.rate)
+    _print_results(results)
+    if results['mismatches']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
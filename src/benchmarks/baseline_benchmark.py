@@ -0,0 +1,129 @@
+"""
+Baseline Wander Removal Benchmark
+
+Compares the batch median + mean baseline removal
+(`apply_baseline_wander_median_mean`, medfilt + uniform_filter1d over the
+whole visible window) with `StreamingMedianBaseline` (running median and
+running mean over the new samples only) on a synthetic 12-lead stream, as
+the live display would use them: every frame brings fs / fps new samples.
+
+Reported per sampling rate:
+    - batch: time to re-filter the visible window of 12 leads per frame
+    - streaming: time to process the frame's new block of 12 leads
+    - CPU share of real time for both at the given frame rate
+    - max |difference| of the corrected signals away from the window edges
+      (where the batch function zero-pads and the stream is not yet final)
+
+Usage (from src/):
+    python -m benchmarks.baseline_benchmark
+    python -m benchmarks.baseline_benchmark --rates 250 500 1000 --seconds 30 --window 10 --fps 25
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ecg.ecg_filters import apply_baseline_wander_median_mean, median_mean_baseline_windows
+from ecg.streaming_filters import StreamingMedianBaseline
+from ecg.virtual_device import synthetic_direct_leads
+
+
+def _twelve_leads(seconds, fs):
+    direct = synthetic_direct_leads(seconds=seconds, sampling_rate=fs).T.astype(np.float64)
+    # 8 measured leads + 4 copies so the load matches a 12-lead display
+    return np.vstack([direct, direct[:4]])
+
+
+def _ms(values):
+    arr = np.asarray(values) * 1000.0
+    return {'mean_ms': float(arr.mean()) if arr.size else 0.0,
+            'p95_ms': float(np.percentile(arr, 95)) if arr.size else 0.0}
+
+
+def run_benchmark(rates=(250, 500, 1000), seconds=30.0, window_s=10.0, fps=25.0):
+    """
+    Run the comparison and return {rate: results} (also printed by main()).
+    """
+    results = {}
+    for fs in rates:
+        fs = float(fs)
+        leads = _twelve_leads(seconds, fs)
+        n = leads.shape[1]
+        window = int(window_s * fs)
+        step = max(1, int(round(fs / fps)))
+
+        baseline = StreamingMedianBaseline(n_leads=leads.shape[0])
+        baseline.configure(fs)
+        streamed = []
+        batch_times, stream_times = [], []
+        last_window = None
+        for end in range(step, n + 1, step):
+            block = leads[:, end - step:end]
+            t0 = time.perf_counter()
+            streamed.append(baseline.process(block))
+            t1 = time.perf_counter()
+            stream_times.append(t1 - t0)
+            if end >= window:
+                t0 = time.perf_counter()
+                last_window = np.array([apply_baseline_wander_median_mean(lead, fs)
+                                        for lead in leads[:, end - window:end]])
+                batch_times.append(time.perf_counter() - t0)
+                last_end = end
+        streamed = np.concatenate(streamed, axis=1)
+
+        # Compare the last batch window with the stream, away from both edges
+        median_window, mean_window = median_mean_baseline_windows(fs)
+        edge = median_window + mean_window
+        start = last_end - window
+        lo, hi = start + edge, min(last_end - edge, streamed.shape[1])
+        error = float(np.max(np.abs(streamed[:, lo:hi] - last_window[:, lo - start:hi - start])))
+
+        batch, stream = _ms(batch_times), _ms(stream_times)
+        frame_s = 1.0 / fps
+        results[fs] = {
+            'window_samples': window,
+            'block_samples': step,
+            'median_window': median_window,
+            'mean_window': mean_window,
+            'delay_ms': 1000.0 * baseline.delay / fs,
+            'batch': batch,
+            'streaming': stream,
+            'batch_cpu': batch['mean_ms'] / 1000.0 / frame_s,
+            'streaming_cpu': stream['mean_ms'] / 1000.0 / frame_s,
+            'max_error': error,
+        }
+    return results
+
+
+def _print_results(results, fps):
+    print("=" * 70)
+    print(f"Baseline wander removal (120 ms median + 800 ms mean), 12 leads, {fps:g} fps")
+    print("=" * 70)
+    for fs, r in results.items():
+        print(f"{fs:g} Hz: window {r['window_samples']} samples, block {r['block_samples']}, "
+              f"kernels {r['median_window']}/{r['mean_window']}, stream delay {r['delay_ms']:.0f} ms")
+        for name in ('batch', 'streaming'):
+            s = r[name]
+            print(f"  {name:<9} mean {s['mean_ms']:.3f} ms  p95 {s['p95_ms']:.3f} ms per frame  "
+                  f"({100.0 * r[name + '_cpu']:.1f}% of real time)")
+        status = "✅" if r['max_error'] < 1e-6 else "❌"
+        print(f"  {status} max |streaming - batch| away from the edges: {r['max_error']:.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batch and streaming median + mean baseline removal")
+    parser.add_argument("--rates", type=float, nargs="+", default=[250, 500, 1000], help="Sampling rates (Hz)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Length of the synthetic stream (s)")
+    parser.add_argument("--window", type=float, default=10.0, help="Visible window re-filtered by the batch path (s)")
+    parser.add_argument("--fps", type=float, default=25.0, help="Display frames per second")
+    args = parser.parse_args()
+
+    results = run_benchmark(rates=args.rates, seconds=args.seconds, window_s=args.window, fps=args.fps)
+    _print_results(results, args.fps)
+    if any(r['max_error'] >= 1e-6 for r in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
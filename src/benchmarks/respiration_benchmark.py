@@ -0,0 +1,104 @@
+"""
+ECG-Derived Respiration Benchmark
+
+Compares the batch respiration extraction the expanded lead view used to
+run per redraw (`estimate_baseline_drift` + `extract_respiration` +
+`respiration_rate` over the lead's history) with `StreamingRespiration`
+(new samples only, 12 leads) on a synthetic stream with a known breathing
+modulation added to every lead.
+
+Reported per session length:
+    - batch: time to re-extract respiration and rate from one lead's history
+    - streaming: time per acquisition block for all 12 leads (does not grow
+      with the session)
+    - respiration rate of both against the breathing rate that was added
+
+Usage (from src/):
+    python -m benchmarks.respiration_benchmark
+    python -m benchmarks.respiration_benchmark --minutes 1 5 15 --rate 500 --breaths 15
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ecg.ecg_filters import estimate_baseline_drift, extract_respiration, respiration_rate
+from ecg.respiration import StreamingRespiration
+from ecg.virtual_device import synthetic_direct_leads
+
+
+def _twelve_leads(seconds, fs, breaths_per_min):
+    direct = synthetic_direct_leads(seconds=seconds, sampling_rate=fs).T.astype(np.float64)
+    leads = np.vstack([direct, direct[:4]])
+    t = np.arange(leads.shape[1]) / fs
+    # Breathing moves the baseline by about one QRS-free signal RMS
+    breathing = np.std(leads[1]) * np.sin(2.0 * np.pi * breaths_per_min / 60.0 * t)
+    return leads + breathing[None, :]
+
+
+def run_benchmark(minutes=(1, 5, 15), fs=500.0, breaths_per_min=15.0, block=20, batch_runs=3):
+    """
+    Run the comparison and return {minutes: results} (also printed by main()).
+    """
+    results = {}
+    for length in minutes:
+        leads = _twelve_leads(60.0 * length, fs, breaths_per_min)
+        stream = StreamingRespiration(n_leads=leads.shape[0])
+        stream.configure(fs)
+        times = []
+        for start in range(0, leads.shape[1], block):
+            t0 = time.perf_counter()
+            stream.process(leads[:, start:start + block])
+            times.append(time.perf_counter() - t0)
+
+        batch_times = []
+        for _ in range(batch_runs):
+            t0 = time.perf_counter()
+            resp = extract_respiration(estimate_baseline_drift(leads[1], fs), fs)
+            batch_rate = respiration_rate(resp, fs)
+            batch_times.append(time.perf_counter() - t0)
+
+        results[length] = {
+            'samples': leads.shape[1],
+            'batch_ms': 1000.0 * float(np.mean(batch_times)),
+            'streaming_ms': 1000.0 * float(np.mean(times)),
+            'streaming_p95_ms': 1000.0 * float(np.percentile(times, 95)),
+            'batch_rate': batch_rate,
+            'streaming_rate': stream.rate(1),
+            'delay_s': stream.delay_seconds,
+        }
+    return results
+
+
+def _print_results(results, fs, breaths_per_min, block):
+    print("=" * 70)
+    print(f"ECG-derived respiration, {fs:g} Hz, {block}-sample blocks, "
+          f"{breaths_per_min:g} breaths/min added")
+    print("=" * 70)
+    for length, r in results.items():
+        print(f"{length:g} min ({r['samples']} samples), stream delay {r['delay_s']:.1f} s")
+        print(f"  batch     {r['batch_ms']:.2f} ms per redraw (Lead II history)   "
+              f"rate {r['batch_rate']:.1f} /min")
+        print(f"  streaming {r['streaming_ms']:.3f} ms per block (12 leads), p95 {r['streaming_p95_ms']:.3f} ms   "
+              f"rate {r['streaming_rate']:.1f} /min")
+        status = "✅" if abs(r['streaming_rate'] - breaths_per_min) <= 1.0 else "❌"
+        print(f"  {status} streaming rate error: {r['streaming_rate'] - breaths_per_min:+.2f} /min")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batch and streaming ECG-derived respiration")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 15], help="Session lengths (min)")
+    parser.add_argument("--rate", type=float, default=500.0, help="Sampling rate (Hz)")
+    parser.add_argument("--breaths", type=float, default=15.0, help="Breathing rate added to the ECG (/min)")
+    parser.add_argument("--block", type=int, default=20, help="Samples per acquisition block")
+    args = parser.parse_args()
+
+    results = run_benchmark(minutes=args.minutes, fs=args.rate, breaths_per_min=args.breaths, block=args.block)
+    _print_results(results, args.rate, args.breaths, args.block)
+    if any(abs(r['streaming_rate'] - args.breaths) > 1.0 for r in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
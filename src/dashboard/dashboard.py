@@ -26,6 +26,9 @@ from utils.settings_manager import SettingsManager
 from utils.localization import translate_text
 from utils.crash_logger import get_crash_logger, CrashLogDialog
 from dashboard.admin_reports import AdminLoginDialog, AdminReportsDialog
+from ecg.beat_detector import detect_r_peaks_full_buffer
+from ecg.sampling_clock import resolve_sampling_rate
+from ecg.render_scheduler import get_render_scheduler
 
 # Try to import configuration, fallback to defaults if not available
 try:
@@ -494,8 +497,9 @@ class Dashboard(QWidget):
         self.current_heart_rate = 60  # Default heart rate
         self.last_beat_time = 0
         self.beat_interval = 1000  # Default 1 second between beats (60 BPM)
-        self.heartbeat_timer = QTimer(self)
-        self.heartbeat_timer.timeout.connect(self.animate_heartbeat)
+        # Driven by the shared render scheduler: skipped while the dashboard is hidden
+        self.heartbeat_timer = get_render_scheduler().view(
+            "dashboard_heartbeat", self.animate_heartbeat, widget=self, fps=33, min_fps=10)
         self.heartbeat_timer.start(30)  # ~33 FPS
         
         # --- Heartbeat Sound ---
@@ -955,8 +959,8 @@ class Dashboard(QWidget):
         )
         
         # --- Dashboard Metrics Update Timer ---
-        self.metrics_timer = QTimer(self)
-        self.metrics_timer.timeout.connect(self.update_dashboard_metrics_from_ecg)
+        self.metrics_timer = get_render_scheduler().view(
+            "dashboard_metrics", self.update_dashboard_metrics_from_ecg, widget=self, fps=1, adaptive=False)
         self.metrics_timer.start(1000)  # Update every second
         
         # Session timer removed - no longer needed
@@ -1538,338 +1542,34 @@ class Dashboard(QWidget):
             pass
         return False
 
-    def calculate_live_ecg_metrics(self, ecg_signal, sampling_rate=None):
-        """Calculate live ECG metrics from Lead 2 data - ADAPTIVE for 40-300 BPM
+    def _shared_r_peaks(self, window_len):
+        """R-peaks for the newest window_len Lead II samples from the ECG test page's shared beat list
         
-        CRITICAL: Uses actual sampling rate from ECG test page for accurate BPM calculation.
-        On Windows, sampling rate may be 80 Hz (not 500 Hz), so we must detect it correctly.
+        Returns:
+            Array of R-peak positions, or None when the streaming detector is unavailable
         """
+        page = getattr(self, 'ecg_test_page', None)
+        if page is None or not hasattr(page, 'get_live_r_peaks'):
+            return None
         try:
-            from scipy.signal import butter, filtfilt, find_peaks
-            
-            # Ensure we have enough data
-            if len(ecg_signal) < 200:
-                return {}
-            
-            # CRITICAL: Get actual sampling rate from ECG test page
-            # Use same fallback as ECG test page (250 Hz) for consistency
-            import platform
-            is_windows = platform.system() == 'Windows'
-            platform_tag = "[Windows]" if is_windows else "[macOS/Linux]"
-            
-            fs = 250.0  # Base fallback (matches ECG test page - unified across platforms)
-            if sampling_rate and sampling_rate > 10:
-                fs = float(sampling_rate)
-            elif hasattr(self, 'ecg_test_page') and self.ecg_test_page:
-                try:
-                    if hasattr(self.ecg_test_page, 'sampler') and hasattr(self.ecg_test_page.sampler, 'sampling_rate'):
-                        if self.ecg_test_page.sampler.sampling_rate > 10:
-                            fs = float(self.ecg_test_page.sampler.sampling_rate)
-                    elif hasattr(self.ecg_test_page, 'sampling_rate') and self.ecg_test_page.sampling_rate > 10:
-                        fs = float(self.ecg_test_page.sampling_rate)
-                except Exception as e:
-                    pass
-            
-            # Enhanced debugging with platform detection
-            if not hasattr(self, '_calc_count'):
-                self._calc_count = 0
-            self._calc_count += 1
-            if self._calc_count <= 5:  # First 5 calculations (increased from 3)
-                print(f"🔍 {platform_tag} BPM Calculation - Sampling rate: {fs:.1f} Hz, Signal length: {len(ecg_signal)} samples")
-            
-            # Windows-specific warnings
-            if is_windows and fs == 250.0:
-                if self._calc_count <= 5:
-                    print(f"⚠️ {platform_tag} Sampling rate detection failed, using fallback 250.0 Hz")
-            
-            # Validation
-            if fs <= 0 or not np.isfinite(fs):
-                if is_windows:
-                    print(f"⚠️ {platform_tag} Invalid sampling rate detected: {fs}, using fallback 250.0 Hz")
-                fs = 250.0  # Fallback
-            
-            # Apply bandpass filter to enhance R-peaks (0.5-40 Hz)
-            nyquist = fs / 2
-            low = 0.5 / nyquist
-            high = 40 / nyquist
-            b, a = butter(4, [low, high], btype='band')
-            filtered_signal = filtfilt(b, a, ecg_signal)
-            
-            # SMART ADAPTIVE PEAK DETECTION (40-300 BPM with BPM-based selection)
-            # Run multiple detections and choose based on CALCULATED BPM consistency
-            height_threshold = np.mean(filtered_signal) + 0.5 * np.std(filtered_signal)
-            prominence_threshold = np.std(filtered_signal) * 0.4
-            
-            # Run 3 detection strategies
-            detection_results = []
-            
-            # Strategy 1: Conservative (best for 10-120 BPM)
-            # Distance set to minimum RR for highest BPM in range (120 BPM = 500ms)
-            # RR interval filtering (200-6000ms) will handle the full 10-300 BPM range
-            peaks_conservative, _ = find_peaks(
-                filtered_signal,
-                height=height_threshold,
-                distance=int(0.4 * fs),  # 400ms - prevents false peaks, allows 10-300 BPM via RR filtering
-                prominence=prominence_threshold
-            )
-            if len(peaks_conservative) >= 2:
-                rr_cons = np.diff(peaks_conservative) * (1000 / fs)
-                # Accept RR intervals from 200–6000 ms (300–10 BPM) - changed from 2000 to 6000 to allow 10 BPM
-                valid_cons = rr_cons[(rr_cons >= 200) & (rr_cons <= 6000)]
-                if len(valid_cons) > 0:
-                    bpm_cons = 60000 / np.median(valid_cons)
-                    std_cons = np.std(valid_cons)
-                    detection_results.append(('conservative', peaks_conservative, bpm_cons, std_cons))
-            
-            # Strategy 2: Normal (best for 100-180 BPM)
-            peaks_normal, _ = find_peaks(
-                filtered_signal,
-                height=height_threshold,
-                distance=int(0.3 * fs),  # 240ms - medium distance
-                prominence=prominence_threshold
-            )
-            if len(peaks_normal) >= 2:
-                rr_norm = np.diff(peaks_normal) * (1000 / fs)
-                # Accept RR intervals from 200–6000 ms (300–10 BPM) - changed from 2000 to 6000 to allow 10 BPM
-                valid_norm = rr_norm[(rr_norm >= 200) & (rr_norm <= 6000)]
-                if len(valid_norm) > 0:
-                    bpm_norm = 60000 / np.median(valid_norm)
-                    std_norm = np.std(valid_norm)
-                    detection_results.append(('normal', peaks_normal, bpm_norm, std_norm))
-            
-            # Strategy 3: Tight (best for 160-300 BPM)
-            peaks_tight, _ = find_peaks(
-                filtered_signal,
-                height=height_threshold,
-                distance=int(0.2 * fs),  # 160ms - tight distance for high BPM
-                prominence=prominence_threshold
-            )
-            if len(peaks_tight) >= 2:
-                rr_tight = np.diff(peaks_tight) * (1000 / fs)
-                # Accept RR intervals from 200–6000 ms (300–10 BPM) - changed from 2000 to 6000 to allow 10 BPM
-                valid_tight = rr_tight[(rr_tight >= 200) & (rr_tight <= 6000)]
-                if len(valid_tight) > 0:
-                    bpm_tight = 60000 / np.median(valid_tight)
-                    std_tight = np.std(valid_tight)
-                    detection_results.append(('tight', peaks_tight, bpm_tight, std_tight))
-            
-            # Select based on BPM consistency (lowest std deviation = most stable)
-            if detection_results:
-                # Sort by consistency (lower std = better)
-                detection_results.sort(key=lambda x: x[3])  # Sort by std
-                best_method, peaks, best_bpm, best_std = detection_results[0]
-            else:
-                # Fallback - use conservative distance to handle low BPM (10-40 BPM)
-                peaks, _ = find_peaks(
-                    filtered_signal,
-                    height=height_threshold,
-                    distance=int(0.4 * fs),  # 400ms - prevents false peaks, allows 10-300 BPM via RR filtering
-                    prominence=prominence_threshold
-                )
-            
-            metrics = {}
-            
-            # Calculate Heart Rate (instantaneous, per-beat)
-            if len(peaks) >= 2:
-                # Calculate R-R intervals in milliseconds
-                # CRITICAL: Use correct sampling rate (fs) for accurate BPM calculation
-                rr_intervals_ms = np.diff(peaks) * (1000.0 / fs)
-                
-                # Filter physiologically reasonable intervals (200-6000 ms)
-                # 200 ms = 300 BPM (max), 6000 ms = 10 BPM (min)
-                # Changed from 120 to 200 to match ECG test page and reduce noise
-                min_rr_ms = 200
-                max_rr_ms = 6000
-                valid_intervals = rr_intervals_ms[(rr_intervals_ms >= min_rr_ms) & (rr_intervals_ms <= max_rr_ms)]
-                
-                if len(valid_intervals) > 0:
-                    # Calculate heart rate from median R-R interval (more stable than instantaneous)
-                    median_rr = np.median(valid_intervals)
-                    heart_rate = 60000 / median_rr  # Convert to BPM
-                    
-                    # Ensure reasonable range (10-300 BPM)
-                    heart_rate = max(10, min(300, heart_rate))
-                    
-                    # ANTI-FLICKERING: Smooth over last 10 readings for maximum stability
-                    if not hasattr(self, '_dashboard_bpm_buffer'):
-                        self._dashboard_bpm_buffer = []
-                    
-                    # Store as float to preserve precision (same as ECG test page)
-                    self._dashboard_bpm_buffer.append(float(heart_rate))
-                    if len(self._dashboard_bpm_buffer) > 10:
-                        self._dashboard_bpm_buffer.pop(0)
-                    
-                    # Use mode (most frequent value) for maximum stability - best for steady BPM display
-                    # Round to integers first for mode calculation
-                    rounded_buffer = [int(round(x)) for x in self._dashboard_bpm_buffer]
-                    # Calculate mode (most frequent value)
-                    from collections import Counter
-                    if len(rounded_buffer) >= 3:  # Need at least 3 readings for mode
-                        mode_result = Counter(rounded_buffer).most_common(1)
-                        smoothed_bpm = mode_result[0][0] if mode_result else int(round(np.median(self._dashboard_bpm_buffer)))
-                    else:
-                        # Fallback to median if not enough data
-                        smoothed_bpm_float = np.median(self._dashboard_bpm_buffer)
-                        smoothed_bpm = int(round(smoothed_bpm_float))
-                    
-                    # HYSTERESIS: Only update if change is ≥3 BPM for maximum stability
-                    if not hasattr(self, '_last_stable_dashboard_bpm'):
-                        self._last_stable_dashboard_bpm = smoothed_bpm
-                    
-                    if abs(smoothed_bpm - self._last_stable_dashboard_bpm) >= 3:
-                        self._last_stable_dashboard_bpm = smoothed_bpm
-                    
-                    metrics['heart_rate'] = self._last_stable_dashboard_bpm
-                else:
-                    metrics['heart_rate'] = 0
-            else:
-                metrics['heart_rate'] = 0
-            # Calculate QRS Axis - LIVE like ECG test page
-            if hasattr(self, 'ecg_test_page') and self.ecg_test_page and hasattr(self.ecg_test_page, 'data') and len(self.ecg_test_page.data) >= 6:
-                try:
-                    # Get current values from leads I and aVF (same as ECG test page)
-                    lead_i = self.ecg_test_page.data[0][-1] if len(self.ecg_test_page.data[0]) > 0 else 0
-                    lead_avf = self.ecg_test_page.data[5][-1] if len(self.ecg_test_page.data[5]) > 0 else 0
-                    
-                    # Calculate QRS axis (same as ECG test page)
-                    axis = int(np.arctan2(lead_avf, lead_i) * 180 / np.pi)
-                    metrics['qrs_axis'] = f"{axis}°"
-                except:
-                    metrics['qrs_axis'] = "0°"
-            else:
-                metrics['qrs_axis'] = "0°"
-            
-            # Calculate PR Interval - LIVE
-            if len(peaks) > 1:
-                pr_intervals = []
-                for i in range(min(3, len(peaks)-1)):
-                    r_peak = peaks[i]
-                    # Find P wave before R peak
-                    p_start = max(0, r_peak - int(0.2 * fs))  # 200ms before R
-                    p_segment = filtered_signal[p_start:r_peak]
-                    if len(p_segment) > 0:
-                        p_peak = p_start + np.argmax(p_segment)
-                        pr_interval = (r_peak - p_peak) / fs * 1000  # Convert to ms
-                        if 120 <= pr_interval <= 200:  # Reasonable PR interval
-                            pr_intervals.append(pr_interval)
-                
-                if pr_intervals:
-                    metrics['pr_interval'] = int(round(np.mean(pr_intervals)))
-                else:
-                    metrics['pr_interval'] = 160  # Fallback
-            else:
-                metrics['pr_interval'] = 160  # Fallback
-            
-            # Calculate QRS Duration - LIVE
-            if len(peaks) > 0:
-                qrs_durations = []
-                for r_peak in peaks[:min(5, len(peaks))]:  # Analyze first 5 beats
-                    # Find Q and S points around R peak
-                    search_window = int(0.08 * fs)  # 80ms window
-                    start_idx = max(0, r_peak - search_window)
-                    end_idx = min(len(filtered_signal), r_peak + search_window)
-                    
-                    segment = filtered_signal[start_idx:end_idx]
-                    if len(segment) > 0:
-                        # Find Q point (minimum before R)
-                        q_idx = start_idx + np.argmin(segment[:r_peak-start_idx]) if r_peak > start_idx else start_idx
-                        # Find S point (minimum after R)
-                        s_idx = r_peak + np.argmin(segment[r_peak-start_idx:]) if r_peak < end_idx else end_idx
-                        
-                        qrs_duration = (s_idx - q_idx) / fs * 1000  # Convert to ms
-                        if 40 <= qrs_duration <= 200:  # Reasonable QRS duration
-                            qrs_durations.append(qrs_duration)
-                
-                if qrs_durations:
-                    metrics['qrs_duration'] = int(round(np.mean(qrs_durations)))
-                else:
-                    metrics['qrs_duration'] = 100  # Fallback
-            else:
-                metrics['qrs_duration'] = 100  # Fallback
-            
-            # Calculate ST Interval - LIVE
-            if len(peaks) > 0:
-                st_intervals = []
-                for r_peak in peaks[:min(5, len(peaks))]:
-                    # Find S point
-                    s_start = r_peak
-                    s_end = min(len(filtered_signal), r_peak + int(0.04 * fs))  # 40ms after R
-                    if s_end > s_start:
-                        s_point = s_start + np.argmin(filtered_signal[s_start:s_end])
-                    else:
-                        s_point = r_peak
-                    
-                    # Find T wave end (next R peak or end of signal)
-                    next_r = r_peak + int(0.4 * fs)  # Expected next R in 400ms
-                    if next_r < len(filtered_signal):
-                        # Find T wave end by looking for return to baseline
-                        t_segment = filtered_signal[r_peak:next_r]
-                        if len(t_segment) > 0:
-                            # Find where signal returns to baseline (mean of segment)
-                            baseline = np.mean(t_segment)
-                            t_end_candidates = np.where(np.abs(t_segment - baseline) < 0.1 * np.std(t_segment))[0]
-                            if len(t_end_candidates) > 0:
-                                t_end = r_peak + t_end_candidates[-1]
-                                st_interval = (t_end - s_point) / fs * 1000  # Convert to ms
-                                if 50 <= st_interval <= 300:  # Reasonable ST interval
-                                    st_intervals.append(st_interval)
-                
-                if st_intervals:
-                    metrics['st_interval'] = int(round(np.mean(st_intervals)))
-                else:
-                    metrics['st_interval'] = 100  # Fallback
-            else:
-                metrics['st_interval'] = 100  # Fallback
-            
-            # Calculate QT and Corrected QT (QTc/QTcF) - LIVE
-            if len(peaks) > 0:
-                qt_intervals = []
-                for r_peak in peaks[:min(5, len(peaks))]:
-                    # Find Q point (min before R)
-                    q_start = max(0, r_peak - int(0.04 * fs))
-                    q_point = q_start + np.argmin(filtered_signal[q_start:r_peak+1]) if r_peak > q_start else r_peak
-                    
-                    # Find T wave end (return to baseline)
-                    t_search_start = r_peak + int(0.08 * fs)
-                    t_search_end = min(len(filtered_signal), r_peak + int(0.45 * fs))
-                    if t_search_end > t_search_start:
-                        t_segment = filtered_signal[t_search_start:t_search_end]
-                        baseline = np.mean(filtered_signal[max(0, r_peak-int(0.2*fs)):r_peak-int(0.05*fs)])
-                        t_peak_idx = t_search_start + np.argmax(np.abs(t_segment - baseline))
-                        
-                        # Find return to baseline after T peak
-                        post_t = filtered_signal[t_peak_idx:t_search_end]
-                        t_end_candidates = np.where(np.abs(post_t - baseline) < 0.1 * np.std(filtered_signal))[0]
-                        if len(t_end_candidates) > 0:
-                            t_end = t_peak_idx + t_end_candidates[0]
-                            qt_ms = (t_end - q_point) / fs * 1000.0
-                            if 200 <= qt_ms <= 600:
-                                qt_intervals.append(qt_ms)
-                
-                if qt_intervals:
-                    qt_avg = np.mean(qt_intervals)
-                    # Use current HR for QTc
-                    hr_for_qtc = metrics.get('heart_rate', 60)
-                    rr_sec = 60.0 / max(1, hr_for_qtc)
-                    
-                    qtc_bazett = qt_avg / np.sqrt(rr_sec)
-                    # QTcF calculated but not shown on live pages anymore
-                    qtcf_frid = qt_avg / (rr_sec ** (1/3))
-                    
-                    metrics['qtc_interval'] = f"{int(round(qt_avg))}/{int(round(qtc_bazett))}"
-                else:
-                    metrics['qtc_interval'] = "0"
-            else:
-                metrics['qtc_interval'] = "0"
-            
-            # metrics['sampling_rate'] = f"{sampling_rate} Hz"  # Commented out
-            
-            
-            return metrics
-            
+            return page.get_live_r_peaks(window_len)
+        except Exception:
+            return None
+
+    def _shared_hrv_metrics(self):
+        """Sliding 5-minute HRV from the ECG test page's HRV engine
+        
+        Returns:
+            Time-domain HRVEngine.metrics() dict (no spectrum, this runs per
+            beat), or None when the engine has too few beats
+        """
+        page = getattr(self, 'ecg_test_page', None)
+        if page is None or not hasattr(page, 'get_hrv_metrics'):
+            return None
+        try:
+            return page.get_hrv_metrics(frequency=False)
         except Exception:
-            # Quietly fall back if metrics cannot be calculated
-            return {}
+            return None
 
     def update_dashboard_metrics_live(self, ecg_metrics):
         """Update dashboard metrics with live calculated values"""
@@ -1953,8 +1653,9 @@ class Dashboard(QWidget):
                         print("❌ Insufficient ECG data (need Lead II)")
                         return self._fallback_wave_update(frame)
                     
-                    # Get Lead II data from ECG test page (index 1 is Lead II)
-                    lead_ii_data = self.ecg_test_page.data[1]
+                    # Get Lead II data from ECG test page (index 1 is Lead II);
+                    # converted to a float array below, so no copy is needed here
+                    lead_ii_data = self.ecg_test_page.data.view(1)
                     
                     # Validate Lead II data
                     if not isinstance(lead_ii_data, (list, np.ndarray)) or len(lead_ii_data) <= 10:
@@ -1974,17 +1675,7 @@ class Dashboard(QWidget):
                         return self._fallback_wave_update(frame)
                     
                     # Get actual sampling rate from ECG test page
-                    actual_sampling_rate = 80  # Default to 80Hz
-                    try:
-                        if (hasattr(self.ecg_test_page, 'sampler') and 
-                            hasattr(self.ecg_test_page.sampler, 'sampling_rate') and 
-                            self.ecg_test_page.sampler.sampling_rate):
-                            actual_sampling_rate = float(self.ecg_test_page.sampler.sampling_rate)
-                            if actual_sampling_rate <= 0 or actual_sampling_rate > 1000:
-                                actual_sampling_rate = 80
-                    except Exception as e:
-                        print(f"❌ Error getting sampling rate: {e}")
-                        actual_sampling_rate = 80
+                    actual_sampling_rate = resolve_sampling_rate(self.ecg_test_page)
 
                     # Determine visible window based on wave speed (display feature only)
                     try:
@@ -2254,7 +1945,8 @@ class Dashboard(QWidget):
             # Throttle: update every 1 second to match 12-lead test page update frequency (same as update_ecg_metrics_display)
             if not hasattr(self, '_last_metrics_update_ts'):
                 self._last_metrics_update_ts = 0.0
-            if _time.time() - self._last_metrics_update_ts < 1.0:
+            # (small tolerance: the render scheduler may run a tick early)
+            if _time.time() - self._last_metrics_update_ts < 0.95:
                 return
             self._last_metrics_update_ts = _time.time()
             # Block updates for first-time users until acquisition/demo starts
@@ -2468,12 +2160,7 @@ class Dashboard(QWidget):
             print(f" Found ECG test page with data: {len(self.ecg_test_page.data)} leads")
             
             # Calculate 10 seconds of data based on sampling rate
-            sampling_rate = 250  # Default sampling rate
-            if hasattr(self.ecg_test_page, 'sampler') and hasattr(self.ecg_test_page.sampler, 'sampling_rate'):
-                try:
-                    sampling_rate = float(self.ecg_test_page.sampler.sampling_rate)
-                except:
-                    sampling_rate = 250
+            sampling_rate = resolve_sampling_rate(self.ecg_test_page)
             
             data_points_10_sec = int(sampling_rate * 10)  # 10 seconds of data
             print(f" Capturing {data_points_10_sec} data points at {sampling_rate}Hz")
@@ -3032,68 +2719,72 @@ class Dashboard(QWidget):
     def update_stress_and_hrv(self, ecg_signal, sampling_rate):
         """Calculate and update stress level and HRV from ECG data with smoothing"""
         try:
-            from scipy.signal import find_peaks
-            
             if len(ecg_signal) < 500:
                 return
             
-            # Find R-peaks
-            peaks, _ = find_peaks(
-                ecg_signal,
-                height=np.mean(ecg_signal) + 0.5 * np.std(ecg_signal),
-                distance=int(0.15 * sampling_rate)  # Reduced from 0.4 to 0.15 for high BPM (up to 360)
-            )
-            
-            if len(peaks) >= 3:
+            # SDNN of the last 5 minutes, updated per beat by the shared HRV engine
+            shared_hrv = self._shared_hrv_metrics()
+            if shared_hrv is not None:
+                # The 5-minute window already smooths; no per-tick averaging needed
+                smoothed_hrv_ms = shared_hrv['sdnn']
+            else:
+                # Find R-peaks (shared streaming beat list, else the shared full-buffer fallback)
+                peaks = self._shared_r_peaks(len(ecg_signal))
+                if peaks is None or len(peaks) < 3:
+                    peaks = detect_r_peaks_full_buffer(np.asarray(ecg_signal, dtype=float), sampling_rate)
+                if len(peaks) < 3:
+                    return
+                
                 # Calculate R-R intervals in milliseconds
                 rr_intervals = np.diff(peaks) * (1000 / sampling_rate)
                 
                 # Filter valid intervals (240-2000 ms) - 240ms = 250 BPM
                 valid_rr = rr_intervals[(rr_intervals >= 240) & (rr_intervals <= 2000)]
+                if len(valid_rr) < 2:
+                    return
                 
-                if len(valid_rr) >= 2:
-                    # HRV: Standard deviation of R-R intervals (SDNN)
-                    current_hrv_ms = np.std(valid_rr)
-                    
-                    # Initialize rolling average for HRV smoothing
-                    if not hasattr(self, '_hrv_history'):
-                        self._hrv_history = []
-                    
-                    # Add current HRV to history (keep last 5 values for smoothing)
-                    self._hrv_history.append(current_hrv_ms)
-                    if len(self._hrv_history) > 5:
-                        self._hrv_history.pop(0)
-                    
-                    # Use smoothed HRV value
-                    smoothed_hrv_ms = np.mean(self._hrv_history)
-                    
-                    # Store for conclusion generation
-                    self._current_hrv = smoothed_hrv_ms
-                    
-                    # Stress level based on smoothed HRV
-                    # Use dashboard's translation method
-                    translator = self.tr
-                    
-                    if smoothed_hrv_ms > 100:
-                        stress = translator("Low")
-                        stress_color = "#27ae60"
-                    elif smoothed_hrv_ms > 50:
-                        stress = translator("Moderate")
-                        stress_color = "#f39c12"
-                    else:
-                        stress = translator("High")
-                        stress_color = "#e74c3c"
-                    
-                    # Update labels with translation
-                    if hasattr(self, 'stress_label'):
-                        stress_label_text = translator("Stress Level:")
-                        self.stress_label.setText(f"{stress_label_text} {stress}")
-                        self.stress_label.setStyleSheet(f"font-size: 13px; color: {stress_color}; font-weight: bold;")
-                    
-                    if hasattr(self, 'hrv_label'):
-                        hrv_label_text = translator("Average Variability:")
-                        self.hrv_label.setText(f"{hrv_label_text} {int(smoothed_hrv_ms)}ms")
-                        self.hrv_label.setStyleSheet("font-size: 13px; color: #666;")
+                # HRV: Standard deviation of R-R intervals (SDNN)
+                current_hrv_ms = np.std(valid_rr)
+                
+                # Initialize rolling average for HRV smoothing
+                if not hasattr(self, '_hrv_history'):
+                    self._hrv_history = []
+                
+                # Add current HRV to history (keep last 5 values for smoothing)
+                self._hrv_history.append(current_hrv_ms)
+                if len(self._hrv_history) > 5:
+                    self._hrv_history.pop(0)
+                
+                # Use smoothed HRV value
+                smoothed_hrv_ms = np.mean(self._hrv_history)
+            
+            # Store for conclusion generation
+            self._current_hrv = smoothed_hrv_ms
+            
+            # Stress level based on smoothed HRV
+            # Use dashboard's translation method
+            translator = self.tr
+            
+            if smoothed_hrv_ms > 100:
+                stress = translator("Low")
+                stress_color = "#27ae60"
+            elif smoothed_hrv_ms > 50:
+                stress = translator("Moderate")
+                stress_color = "#f39c12"
+            else:
+                stress = translator("High")
+                stress_color = "#e74c3c"
+            
+            # Update labels with translation
+            if hasattr(self, 'stress_label'):
+                stress_label_text = translator("Stress Level:")
+                self.stress_label.setText(f"{stress_label_text} {stress}")
+                self.stress_label.setStyleSheet(f"font-size: 13px; color: {stress_color}; font-weight: bold;")
+            
+            if hasattr(self, 'hrv_label'):
+                hrv_label_text = translator("Average Variability:")
+                self.hrv_label.setText(f"{hrv_label_text} {int(smoothed_hrv_ms)}ms")
+                self.hrv_label.setStyleSheet("font-size: 13px; color: #666;")
         except Exception as e:
             print(f"⚠️ Error calculating stress/HRV: {e}")
     
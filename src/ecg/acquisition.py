@@ -0,0 +1,193 @@
+"""
+Background ECG Acquisition
+
+Owns the serial port in a dedicated thread so 500 Hz ingest never waits on
+the Qt event loop (PDF generation, dialogs, slow redraws).
+
+Pipeline:
+    serial read -> bulk decode -> timeline.process()       (optional gap fill + sample mask + lead status)
+                               -> ECGRingBuffer.extend()   (acquisition thread)
+                               -> clock.add_samples()      (optional sampling-rate recovery)
+                               -> recorder.append()        (optional full disclosure of the published samples + mask)
+    ECGRingBuffer.read_since() -> smoothing -> plots       (GUI timer)
+
+Per-stage latency counters are kept for every stage and exposed through
+`AcquisitionThread.get_stats()`.
+
+Usage:
+    ring = ECGRingBuffer(capacity=10000, n_leads=12)
+    acquisition = AcquisitionThread(serial_reader, ring)
+    acquisition.start()
+    ...
+    block, times, cursor, skipped = ring.read_since(cursor)
+    ...
+    acquisition.stop()
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from .ring_buffer import ECGRingBuffer
+
+
+class StageTimer:
+    """Running latency statistics for one pipeline stage (values in seconds)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+            self.last = 0.0
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.last = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        """Counters in milliseconds."""
+        with self._lock:
+            mean = self.total / self.count if self.count else 0.0
+            return {
+                'count': self.count,
+                'mean_ms': mean * 1000.0,
+                'max_ms': self.max * 1000.0,
+                'last_ms': self.last * 1000.0,
+            }
+
+
+class AcquisitionThread:
+    """
+    Background reader that drains a SerialStreamReader into an ECGRingBuffer.
+
+    The thread is the only caller of `reader.read_frames()` while it runs, so
+    the reader's receive buffer and counters are never touched concurrently.
+    """
+
+    STAGES = ('read', 'decode', 'publish', 'record', 'ingest_to_display')
+
+    def __init__(self, reader, ring: ECGRingBuffer, idle_sleep: float = 0.002, recorder=None, clock=None,
+                 timeline=None):
+        """
+        Args:
+            reader: Started SerialStreamReader (anything with read_frames() and running)
+            ring: Ring buffer the decoded samples are published to
+            idle_sleep: Seconds to sleep when a poll returned no complete packet
+            recorder: Optional sink with append(frames) that receives every
+                decoded block (e.g. FullDisclosureRecorder)
+            clock: Optional SamplingClock fed with every block's size and
+                arrival stamp (the same stamp the ring buffer stores)
+            timeline: Optional SampleTimeline that bridges short gaps (located
+                from the reader's `last_lost_before`), publishes the per-sample
+                mask and lead status (the reader's `last_lead_status`) and
+                stamps every sample
+        """
+        self.reader = reader
+        self.ring = ring
+        self.recorder = recorder
+        self.clock = clock
+        self.timeline = timeline
+        self.idle_sleep = idle_sleep
+        self.timers = {name: StageTimer(name) for name in self.STAGES}
+        self.batches = 0
+        self.samples = 0
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the acquisition thread (no-op if already running)."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ECGAcquisitionThread", daemon=True)
+        self._thread.start()
+        print("🧵 ECG acquisition thread started")
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Signal the thread to exit and wait for it."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        self._thread = None
+        print(f"⏹️ ECG acquisition thread stopped ({self.samples} samples in {self.batches} batches)")
+
+    def _run(self) -> None:
+        reader = self.reader
+        while not self._stop_event.is_set():
+            if not getattr(reader, 'running', False):
+                break
+            try:
+                t0 = time.perf_counter()
+                frames = reader.read_frames()
+                t1 = time.perf_counter()
+                timings = getattr(reader, 'last_read_timings', None)
+                if timings:
+                    self.timers['read'].add(timings[0])
+                    self.timers['decode'].add(timings[1])
+                else:
+                    self.timers['read'].add(t1 - t0)
+
+                if len(frames):
+                    arrival = time.monotonic()
+                    lost_before = getattr(reader, 'last_lost_before', None)
+                    produced = len(frames) + (int(lost_before.sum()) if lost_before is not None else 0)
+                    published, mask = frames, None
+                    if self.timeline is not None:
+                        # Mask is published before the samples it describes
+                        lead_status = getattr(reader, 'last_lead_status', None)
+                        published, mask, times = self.timeline.process(frames, arrival, lost_before, lead_status)
+                        self.ring.extend(published, timestamp=times)
+                    else:
+                        self.ring.extend(frames, timestamp=arrival)
+                    if self.clock is not None:
+                        self.clock.add_samples(produced, arrival)
+                    t2 = time.perf_counter()
+                    self.timers['publish'].add(t2 - t1)
+                    recorder = self.recorder
+                    if recorder is not None:
+                        # Same samples, same indices as the ring (gaps bridged)
+                        recorder.append(published, mask)
+                        self.timers['record'].add(time.perf_counter() - t2)
+                    self.batches += 1
+                    self.samples += len(frames)
+                else:
+                    self._stop_event.wait(self.idle_sleep)
+            except Exception as e:
+                self.last_error = e
+                print(f"❌ Acquisition thread error: {e}")
+                self._stop_event.wait(0.05)
+
+    def record_display_latency(self, sample_time: float) -> None:
+        """
+        Record how long a sample waited between arrival and being drawn.
+
+        Args:
+            sample_time: time.monotonic() arrival stamp taken from the ring buffer
+        """
+        if sample_time > 0:
+            self.timers['ingest_to_display'].add(max(0.0, time.monotonic() - sample_time))
+
+    def get_stats(self) -> Dict[str, object]:
+        """Per-stage latency counters plus throughput totals."""
+        stats = {name: timer.snapshot() for name, timer in self.timers.items()}
+        stats['batches'] = self.batches
+        stats['samples'] = self.samples
+        stats['ring_fill'] = self.ring.filled
+        stats['running'] = self.running
+        return stats
@@ -0,0 +1,110 @@
+"""
+Shared ECG Analysis Cache
+
+The 12-lead page, dashboard, expanded lead view and demo manager all derive
+HR / PR / QRS / QT from the same live buffers on independent timers. This
+cache lets them share one result per data epoch instead of each re-running
+the same scipy passes.
+
+Results are keyed by (kind, buffer generation, lead, fs). The generation
+comes from `ECGRingBuffer.generation` quantised to epochs of
+`epoch_seconds`, so:
+- every consumer asking within the same epoch gets the cached result
+- new samples invalidate it once a full epoch has arrived
+- a buffer reset always invalidates it
+
+Cached values are shared between consumers - treat them as read-only.
+
+Usage:
+    cache = ECGAnalysisCache()
+    epoch = cache.epoch(ecg_page.data, fs)
+    analysis = cache.get('lead_ii_metrics', epoch, 1, fs, lambda: analyze(lead_ii, fs))
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class ECGAnalysisCache:
+    """Memoizes per-epoch analysis results shared by all UI consumers."""
+
+    def __init__(self, epoch_seconds: float = 0.25, max_entries: int = 32):
+        """
+        Args:
+            epoch_seconds: Length of one data epoch. Results are reused until
+                this much new data has arrived.
+            max_entries: Number of results kept (oldest evicted first)
+        """
+        self.epoch_seconds = epoch_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def epoch(self, buffer, fs: float) -> Optional[Hashable]:
+        """
+        Current data epoch of a buffer.
+
+        Args:
+            buffer: ECGRingBuffer (anything with a `generation` property)
+            fs: Sampling rate in Hz
+
+        Returns:
+            Hashable epoch id, or None if the buffer cannot report a
+            generation (results are then never cached)
+        """
+        generation = getattr(buffer, 'generation', None)
+        if generation is None:
+            return None
+        resets, written = generation
+        epoch_samples = max(1, int(self.epoch_seconds * fs)) if fs and fs > 0 else 1
+        return resets, written // epoch_samples
+
+    def get(self, kind: str, epoch: Optional[Hashable], lead: int, fs: float, compute: Callable[[], object]):
+        """
+        Return the cached result for (kind, epoch, lead, fs), computing it on a miss.
+
+        Args:
+            kind: Analysis name, e.g. 'lead_ii_metrics'
+            epoch: Value from epoch(); None bypasses the cache
+            lead: Lead index the analysis is for
+            fs: Sampling rate in Hz
+            compute: Zero-argument callable producing the result (may return None)
+        """
+        if epoch is None:
+            return compute()
+        key = (kind, epoch, lead, round(float(fs), 1))
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # Compute outside the lock so a slow analysis never blocks other readers
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, kind: Optional[str] = None) -> None:
+        """Drop cached results (all, or only those of one kind)."""
+        with self._lock:
+            if kind is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == kind]:
+                    del self._entries[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Hit/miss counters."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
@@ -0,0 +1,253 @@
+"""
+Incremental Arrhythmia Timeline
+
+The expanded lead view shades the waveform background by the dominant rhythm
+of each short window and marks arrhythmia events, and the ECG test page keeps
+one Lead II timeline per session for the report's event summary. Rebuilding
+that heat map from the whole series on every analysis pass grows with the
+session length.
+
+`ArrhythmiaTimeline` keeps one column per fixed window of the lead history:
+    - each column is classified once, when the analysis window first covers
+      it, by ArrhythmiaDetector on the trailing `context_seconds` of signal
+      (fiducials are taken from the analysis that is already done, not
+      re-detected)
+    - the column's rhythm probabilities are the share of the last
+      `smoothing` columns reporting each rhythm, so an event needs a rhythm
+      to persist across overlapping contexts
+    - the RGBA overlay grows in place (amortized doubling); `overlay_for()`
+      returns a view of the visible columns only
+    - consecutive event columns of the same rhythm are merged into one
+      episode; `episodes` is the running (start_seconds, duration_seconds,
+      type) list kept for reports, `events` the (start_seconds, type) of each
+
+Times are seconds on the lead history axis; `time_offset` converts them to
+seconds since the start of the acquisition session.
+
+Usage:
+    from ecg.arrhythmia_timeline import ArrhythmiaTimeline
+
+    timeline = ArrhythmiaTimeline(detector)                 # ArrhythmiaDetector
+    timeline.update(ecg_window, window_start, analysis)     # history index of ecg_window[0]
+    overlay, extent = timeline.overlay_for(t_start, t_end)  # (1, k, 4) RGBA, (x0, x1) seconds
+    timeline.skip(history_end)                              # blank columns (lead off)
+    for start_s, duration_s, rhythm in timeline.episodes: ...
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Heat map rhythm types and their colors
+HEATMAP_COLORS = {
+    "Normal Sinus Rhythm": "#2ecc71",
+    "Atrial Fibrillation": "#e74c3c",
+    "Ventricular Tachycardia": "#8e44ad",
+    "Premature Ventricular Contractions": "#f39c12",
+    "Sinus Bradycardia": "#3498db",
+    "Sinus Tachycardia": "#e67e22",
+    "Irregular Rhythm": "#95a5a6",
+}
+HEATMAP_TYPES = tuple(HEATMAP_COLORS)
+
+# ArrhythmiaDetector label -> heat map type (labels not listed are "Irregular Rhythm")
+LABEL_TYPES = {
+    "Normal Sinus Rhythm": "Normal Sinus Rhythm",
+    "Atrial Fibrillation Detected": "Atrial Fibrillation",
+    "Possible Ventricular Tachycardia": "Ventricular Tachycardia",
+    "Ventricular Fibrillation Detected": "Ventricular Tachycardia",
+    "Ventricular Ectopics Detected": "Premature Ventricular Contractions",
+    "Bigeminy": "Premature Ventricular Contractions",
+    "Sinus Bradycardia": "Sinus Bradycardia",
+    "Sinus Tachycardia": "Sinus Tachycardia",
+    "Atrial Tachycardia": "Sinus Tachycardia",
+    "Supraventricular Tachycardia (SVT)": "Sinus Tachycardia",
+}
+INSUFFICIENT_LABEL = "Insufficient data for arrhythmia detection."
+
+_NO_RHYTHM = -1
+_RGB = np.array([[int(HEATMAP_COLORS[t][i:i + 2], 16) / 255.0 for i in (1, 3, 5)] for t in HEATMAP_TYPES])
+
+
+def _select(peaks, lo, hi):
+    """Fiducials in [lo, hi), shifted to start at lo."""
+    peaks = np.asarray(peaks if peaks is not None else [], dtype=np.int64)
+    return peaks[(peaks >= lo) & (peaks < hi)] - lo
+
+
+class ArrhythmiaTimeline:
+    """Per-window rhythm classification of a lead history, appended column by column."""
+
+    def __init__(self, detector, window_seconds: float = 2.0, context_seconds: float = 6.0,
+                 min_context_seconds: float = 3.0, smoothing: int = 3, event_probability: float = 0.7):
+        """
+        Args:
+            detector: ArrhythmiaDetector (its fs is the sampling rate of the history)
+            window_seconds: Width of one heat map column
+            context_seconds: Signal classified for a column (ending at the column's end)
+            min_context_seconds: Columns with less available signal are left blank
+            smoothing: Columns whose classifications form a column's probabilities
+            event_probability: Probability of a non-normal rhythm that records an event
+        """
+        self.detector = detector
+        self.window_seconds = float(window_seconds)
+        self.context_seconds = float(context_seconds)
+        self.min_context_seconds = float(min_context_seconds)
+        self.smoothing = max(1, int(smoothing))
+        self.event_probability = float(event_probability)
+        self.time_offset = 0.0
+        self.reset()
+
+    def reset(self, time_offset: Optional[float] = None) -> None:
+        """Forget all columns (new history / sampling rate)."""
+        self.fs = float(self.detector.fs)
+        self.window_samples = max(1, int(round(self.window_seconds * self.fs)))
+        if time_offset is not None:
+            self.time_offset = float(time_offset)
+        self.first_column = None          # history column index of overlay column 0
+        self.n_columns = 0
+        self._rgba = np.zeros((1, 64, 4), dtype=np.float32)
+        self._rhythm = np.full(64, _NO_RHYTHM, dtype=np.int8)
+        self.labels: List[List[str]] = []
+        self.episodes: List[Tuple[float, float, str]] = []   # (start_seconds, duration_seconds, type)
+        self._episode_end = None          # overlay column after the last episode's last column
+
+    # ------------------------------------------------------------------ #
+
+    def update(self, signal, start: int, analysis, has_received_serial_data: bool = False) -> int:
+        """
+        Classify every column that the analysis window completes.
+
+        Args:
+            signal: Analysed samples (1-D)
+            start: History index of signal[0]
+            analysis: PQRSTAnalyzer result for signal ('r_peaks', 'p_peaks', ...)
+            has_received_serial_data: Passed to the detector (asystole check)
+
+        Returns:
+            Number of columns appended
+        """
+        if float(self.detector.fs) != self.fs:
+            self.reset()
+        n = len(signal)
+        w = self.window_samples
+        end = start + n
+        if n == 0 or end < w:
+            return 0
+        if self.first_column is None:
+            self.first_column = max(0, start // w)
+        column = self.first_column + self.n_columns
+        context = int(round(self.context_seconds * self.fs))
+        min_context = int(round(self.min_context_seconds * self.fs))
+        added = 0
+        while (column + 1) * w <= end:
+            col_end = (column + 1) * w
+            ctx_start = max(start, col_end - context)
+            labels = []
+            if col_end - ctx_start >= min_context:
+                lo, hi = ctx_start - start, col_end - start
+                sub = {key: _select(analysis.get(key), lo, hi) for key in ('r_peaks', 'p_peaks', 'q_peaks', 's_peaks')}
+                labels = self.detector.detect_arrhythmias(signal[lo:hi], sub,
+                                                          has_received_serial_data=has_received_serial_data)
+            self._append(labels)
+            column += 1
+            added += 1
+        return added
+
+    def skip(self, end: int) -> int:
+        """
+        Append blank columns up to history index end (signal that must not be
+        classified, e.g. while the lead's electrode is off).
+
+        Returns:
+            Number of columns appended
+        """
+        w = self.window_samples
+        if self.first_column is None:
+            self.first_column = max(0, int(end) // w)
+            return 0
+        added = 0
+        while (self.first_column + self.n_columns + 1) * w <= end:
+            self._append([])
+            added += 1
+        return added
+
+    def next_column_end(self) -> Optional[int]:
+        """History index at which the next column is complete, or None before the first update."""
+        if self.first_column is None:
+            return None
+        return (self.first_column + self.n_columns + 1) * self.window_samples
+
+    def _rhythm_of(self, labels) -> int:
+        if not labels or labels == [INSUFFICIENT_LABEL]:
+            return _NO_RHYTHM
+        # The detector reports the most significant finding first
+        return HEATMAP_TYPES.index(LABEL_TYPES.get(labels[0], "Irregular Rhythm"))
+
+    def _append(self, labels) -> None:
+        i = self.n_columns
+        if i == self._rhythm.shape[0]:
+            self._rgba = np.concatenate([self._rgba, np.zeros_like(self._rgba)], axis=1)
+            self._rhythm = np.concatenate([self._rhythm, np.full_like(self._rhythm, _NO_RHYTHM)])
+        self._rhythm[i] = self._rhythm_of(labels)
+        self.labels.append(list(labels))
+        self.n_columns = i + 1
+
+        recent = self._rhythm[max(0, i + 1 - self.smoothing):i + 1]
+        recent = recent[recent != _NO_RHYTHM]
+        if self._rhythm[i] == _NO_RHYTHM or len(recent) == 0:
+            return   # blank column (transparent)
+        counts = np.bincount(recent, minlength=len(HEATMAP_TYPES))
+        best = int(np.argmax(counts))
+        prob = counts[best] / len(recent)
+        self._rgba[0, i, :3] = _RGB[best]
+        self._rgba[0, i, 3] = 0.2 + 0.8 * prob
+
+        # Record an arrhythmia event when a non-normal rhythm dominates this window;
+        # the column extends the previous episode if that ended on the column before
+        rhythm = HEATMAP_TYPES[best]
+        if rhythm != "Normal Sinus Rhythm" and prob >= self.event_probability:
+            width = self.window_samples / self.fs
+            if self.episodes and self._episode_end == i and self.episodes[-1][2] == rhythm:
+                start, duration, _ = self.episodes[-1]
+                self.episodes[-1] = (start, duration + width, rhythm)
+            else:
+                self.episodes.append((self.column_time(i) - 0.5 * width, width, rhythm))
+            self._episode_end = i + 1
+
+    # ------------------------------------------------------------------ #
+
+    def column_time(self, i: int) -> float:
+        """Center (seconds, history axis) of overlay column i."""
+        return ((self.first_column or 0) + i + 0.5) * self.window_samples / self.fs
+
+    @property
+    def overlay(self) -> np.ndarray:
+        """(1, n_columns, 4) RGBA view of every column."""
+        return self._rgba[:, :self.n_columns]
+
+    def overlay_for(self, t_start: float, t_end: float):
+        """
+        Columns overlapping [t_start, t_end] seconds.
+
+        Returns:
+            tuple: ((1, k, 4) RGBA view, (x0, x1) extent in seconds), or (None, None)
+        """
+        if not self.n_columns:
+            return None, None
+        width = self.window_samples / self.fs
+        origin = self.first_column * width
+        lo = max(0, int(np.floor((t_start - origin) / width)))
+        hi = min(self.n_columns, int(np.ceil((t_end - origin) / width)))
+        if hi <= lo:
+            return None, None
+        return self._rgba[:, lo:hi], (origin + lo * width, origin + hi * width)
+
+    @property
+    def events(self) -> List[Tuple[float, str]]:
+        """(start_seconds, type) of every episode."""
+        return [(start, rhythm) for start, _, rhythm in self.episodes]
+
+    def session_events(self) -> List[Tuple[float, float, str]]:
+        """Episodes with start times in seconds since the start of the acquisition session."""
+        return [(start + self.time_offset, duration, rhythm) for start, duration, rhythm in self.episodes]
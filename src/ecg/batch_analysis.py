@@ -0,0 +1,525 @@
+"""
+Batch Recording Analysis
+
+Re-analyzes archived recordings headless (no Qt, no ECGTestPage) with the
+same clinical pipeline as the live 12-lead page (ecg/recording_analysis.py)
+and writes one results table for auditing.
+
+Sources (found by walking the given files / directories):
+    - captures        reports/ecg_data/ecg_data_*.json / *.ecgb
+    - full disclosure reports/disclosure/<session>/ (directories of .ecgd)
+    - sessions        reports/sessions/*.jsonl (SessionRecorder, one row per line)
+    - report twins    ECG_Report_*.json (stored metrics only, no waveform)
+
+Work is sharded into tasks: one per capture / session file / report twin,
+and one per `segment_seconds` of long binary captures and full-disclosure
+sessions, so a single Holter recording is spread over every core. Tasks run
+in a process pool, largest first; each worker streams its task from disk
+(memory-mapped / chunk-indexed reads, JSONL line by line), analyzes it in
+`window_seconds` blocks and returns rows (window metrics are reduced to
+their median, rhythm labels are counted).
+
+Results are a CSV table written by the parent process only. Every finished
+task is appended to a journal next to it (<out>.done, one JSON line with the
+file fingerprint), so an interrupted run resumes where it stopped; files
+that changed since are analyzed again.
+
+Usage (from src/):
+    python -m ecg.batch_analysis ../reports --out ../reports/batch_analysis.csv
+    python -m ecg.batch_analysis ../reports/ecg_data ../reports/sessions --workers 8 --window 10
+    python -m ecg.batch_analysis ../reports --restart          # ignore earlier results
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import csv
+import json
+import os
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .recording_analysis import LEAD_NAMES, METRIC_NAMES, RecordingAnalyzer
+
+KIND_CAPTURE = "capture"
+KIND_DISCLOSURE = "disclosure"
+KIND_SESSION = "session"
+KIND_REPORT = "report"
+
+RESULT_COLUMNS = (
+    'source', 'kind', 'part', 'record', 'timestamp', 'sampling_rate', 'start_s', 'duration_s',
+    'windows', 'analyzed_windows',
+) + METRIC_NAMES + ('arrhythmias', 'reported', 'status')
+
+# Windows shorter than this (tail of a recording) are not analyzed
+MIN_WINDOW_SECONDS = 3.0
+
+
+# ==================== DISCOVERY ====================
+
+def _classify(path) -> Optional[str]:
+    """Source kind of one file or directory, or None if it is not a recording."""
+    from .disclosure_recorder import DISCLOSURE_EXTENSION
+    name = os.path.basename(path)
+    if os.path.isdir(path):
+        if any(f.endswith(DISCLOSURE_EXTENSION) for f in os.listdir(path)):
+            return KIND_DISCLOSURE
+        return None
+    if name.startswith('ecg_data_') and name.endswith(('.json', '.ecgb')):
+        return KIND_CAPTURE
+    if name.endswith('.jsonl'):
+        return KIND_SESSION
+    if name.startswith('ECG_Report_') and name.endswith('.json'):
+        return KIND_REPORT
+    return None
+
+
+def discover_recordings(paths) -> List[Tuple[str, str]]:
+    """
+    Recordings under the given files / directories.
+
+    Returns:
+        Sorted list of (absolute path, kind)
+    """
+    found = {}
+    for root in paths:
+        root = os.path.abspath(root)
+        kind = _classify(root) if os.path.exists(root) else None
+        if kind or os.path.isfile(root):
+            if kind:
+                found[root] = kind
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            if _classify(dirpath) == KIND_DISCLOSURE:
+                found[dirpath] = KIND_DISCLOSURE
+                dirnames[:] = []
+                continue
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                kind = _classify(path)
+                if kind:
+                    found[path] = kind
+    return sorted(found.items())
+
+
+def fingerprint(path) -> str:
+    """Size and modification time of a file (or of every file of a directory)."""
+    if os.path.isdir(path):
+        stats = [os.stat(os.path.join(path, f)) for f in sorted(os.listdir(path))]
+    else:
+        stats = [os.stat(path)]
+    return f"{sum(s.st_size for s in stats)}:{max((s.st_mtime_ns for s in stats), default=0)}"
+
+
+def _recording_length(path, kind) -> Tuple[int, float]:
+    """(n_samples, sampling_rate) of a binary capture or disclosure session, (0, 0) otherwise."""
+    if kind == KIND_DISCLOSURE:
+        from .disclosure_recorder import DisclosureReader
+        reader = DisclosureReader(path)
+        return reader.n_samples, reader.sampling_rate
+    if kind == KIND_CAPTURE:
+        from .ecg_capture import is_capture_file, read_capture
+        if is_capture_file(path):
+            capture = read_capture(path)
+            return capture.n_samples, capture.sampling_rate
+    return 0, 0.0
+
+
+def plan_tasks(recordings, segment_seconds=300.0) -> List[Dict[str, object]]:
+    """
+    Split recordings into tasks (largest first).
+
+    Args:
+        recordings: discover_recordings() result
+        segment_seconds: Length of one task of a long binary capture /
+            disclosure session
+
+    Returns:
+        List of task dicts: path, kind, part, start, stop (samples; None =
+        whole recording), fingerprint, size (for ordering)
+    """
+    tasks = []
+    for path, kind in recordings:
+        try:
+            fp = fingerprint(path)
+            n_samples, fs = _recording_length(path, kind)
+        except Exception as e:
+            print(f"⚠️ Skipping unreadable recording {path}: {e}")
+            continue
+        size = int(fp.split(':')[0])
+        segment = int(segment_seconds * fs) if fs > 0 else 0
+        if segment <= 0 or n_samples <= segment:
+            tasks.append({'path': path, 'kind': kind, 'part': 0, 'start': None, 'stop': None,
+                          'fingerprint': fp, 'size': size})
+            continue
+        for part, start in enumerate(range(0, n_samples, segment)):
+            stop = min(start + segment, n_samples)
+            tasks.append({'path': path, 'kind': kind, 'part': part, 'start': start, 'stop': stop,
+                          'fingerprint': fp, 'size': size * (stop - start) // n_samples})
+    tasks.sort(key=lambda t: -t['size'])
+    return tasks
+
+
+def task_key(task) -> str:
+    return f"{task['path']}#{task['part']}"
+
+
+# ==================== READING ====================
+
+def _signals_from_leads(leads: Dict[str, object]) -> Tuple[np.ndarray, np.ndarray]:
+    """(12, n) signals in LEAD_NAMES order and the per-lead 'present' flags."""
+    arrays = {name: np.asarray(leads[name], dtype=float) for name in LEAD_NAMES if name in leads}
+    n = max((len(a) for a in arrays.values()), default=0)
+    signals = np.zeros((len(LEAD_NAMES), n))
+    present = np.zeros(len(LEAD_NAMES), dtype=bool)
+    for i, name in enumerate(LEAD_NAMES):
+        if name in arrays and len(arrays[name]) == n:
+            signals[i] = arrays[name]
+            present[i] = True
+    return signals, present
+
+
+class _Record:
+    """One analyzable record of a task: metadata plus a block reader."""
+
+    def __init__(self, record, fs, n_samples, read, present, timestamp=None, reported=None, offset=0):
+        self.record = record
+        self.fs = float(fs or 0.0)
+        self.n_samples = int(n_samples)
+        self.read = read              # read(start, stop) -> (12, stop - start)
+        self.present = present
+        self.timestamp = timestamp
+        self.reported = reported
+        self.offset = int(offset)     # first sample of this record within the recording
+
+
+def _iter_records(task) -> Iterator[_Record]:
+    """Records of a task, read lazily (only the analyzed windows are in memory)."""
+    path, kind = task['path'], task['kind']
+    start, stop = task['start'], task['stop']
+
+    if kind == KIND_REPORT:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        leads = data.get('leads') or (data.get('ecg_data') or {}).get('leads')
+        if leads:
+            signals, present = _signals_from_leads(leads)
+            fs = data.get('sampling_rate') or (data.get('ecg_data') or {}).get('sampling_rate')
+            yield _Record(0, fs, signals.shape[1], lambda a, b: signals[:, a:b], present,
+                          data.get('report_date'), data.get('metrics'))
+        else:
+            yield _Record(0, 0.0, 0, None, None, data.get('report_date'), data.get('metrics'))
+
+    elif kind == KIND_SESSION:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    yield _Record(line_no, 0.0, 0, None, None, reported={'error': 'unreadable line'})
+                    continue
+                metrics = entry.get('metrics') or {}
+                signals, present = _signals_from_leads(entry.get('ecg_snapshot') or {})
+                try:
+                    fs = float(str(metrics.get('sampling_rate', '')).split()[0])
+                except (ValueError, IndexError):
+                    fs = 0.0
+                yield _Record(line_no, fs, signals.shape[1], lambda a, b, s=signals: s[:, a:b], present,
+                              entry.get('timestamp'), metrics)
+
+    elif kind == KIND_DISCLOSURE:
+        from .disclosure_recorder import DisclosureReader
+        reader = DisclosureReader(path)
+        rows = [reader.lead_names.index(name) if name in reader.lead_names else -1 for name in LEAD_NAMES]
+        present = np.array([r >= 0 for r in rows])
+        start = start or 0
+        stop = reader.n_samples if stop is None else stop
+
+        def read(a, b):
+            block = reader.read(start + a, start + b, leads=[max(r, 0) for r in rows])
+            block[~present] = 0.0
+            return block
+
+        timestamp = reader.start_time + start / reader.sampling_rate if reader.start_time and reader.sampling_rate else None
+        yield _Record(0, reader.sampling_rate, stop - start, read, present, timestamp, offset=start)
+
+    else:  # KIND_CAPTURE
+        from .ecg_capture import is_capture_file, load_ecg_data_from_file, read_capture
+        if is_capture_file(path):
+            capture = read_capture(path)
+            present = np.array([name in capture.lead_names for name in LEAD_NAMES])
+            start = start or 0
+            stop = capture.n_samples if stop is None else stop
+
+            def read(a, b):
+                block = np.zeros((len(LEAD_NAMES), b - a))
+                for i, name in enumerate(LEAD_NAMES):
+                    if present[i]:
+                        values = capture.lead(name, start + a, start + b)
+                        block[i, :len(values)] = values
+                return block
+
+            yield _Record(0, capture.sampling_rate, stop - start, read, present, capture.timestamp, offset=start)
+        else:
+            data = load_ecg_data_from_file(path)
+            if data is None:
+                raise ValueError("unreadable capture")
+            signals, present = _signals_from_leads(data.get('leads') or {})
+            yield _Record(0, data.get('sampling_rate'), signals.shape[1], lambda a, b: signals[:, a:b], present,
+                          data.get('timestamp'))
+
+
+# ==================== ANALYSIS ====================
+
+def _median(values):
+    values = [float(v) for v in values if v is not None]
+    if not values:
+        return None
+    return round(float(np.median(values)), 3)
+
+
+def _analyze_record(rec: _Record, analyzers: Dict[float, RecordingAnalyzer], window_seconds: float) -> Dict[str, object]:
+    row = {
+        'record': rec.record,
+        'timestamp': rec.timestamp,
+        'sampling_rate': round(rec.fs, 3) if rec.fs else None,
+        'start_s': round(rec.offset / rec.fs, 3) if rec.fs else 0.0,
+        'duration_s': round(rec.n_samples / rec.fs, 3) if rec.fs else 0.0,
+        'windows': 0,
+        'analyzed_windows': 0,
+        'reported': json.dumps(rec.reported, ensure_ascii=False) if rec.reported else '',
+    }
+    if rec.read is None or rec.n_samples == 0:
+        row['status'] = 'no waveform'
+        return row
+    if rec.fs <= 0:
+        row['status'] = 'no sampling rate'
+        return row
+
+    analyzer = analyzers.get(rec.fs)
+    if analyzer is None:
+        analyzer = analyzers[rec.fs] = RecordingAnalyzer(rec.fs)
+    window = max(1, int(window_seconds * rec.fs))
+    min_window = int(MIN_WINDOW_SECONDS * rec.fs)
+    per_window = []
+    labels = Counter()
+    errors = Counter()
+    for a in range(0, rec.n_samples, window):
+        b = min(a + window, rec.n_samples)
+        if b - a < min_window and a > 0:
+            break
+        row['windows'] += 1
+        try:
+            result = analyzer.analyze(rec.read(a, b), connected=rec.present)
+        except Exception as e:
+            errors[f"{type(e).__name__}: {e}"] += 1
+            continue
+        labels.update(result['arrhythmias'])
+        if result['metrics'] is not None:
+            per_window.append(result['metrics'])
+
+    row['analyzed_windows'] = len(per_window)
+    for name in METRIC_NAMES:
+        row[name] = _median(m[name] for m in per_window)
+    row['arrhythmias'] = '; '.join(f"{label}:{count}" for label, count in labels.most_common())
+    if errors and not per_window and not labels:
+        row['status'] = f"error: {errors.most_common(1)[0][0]}"
+    elif not per_window:
+        row['status'] = 'insufficient beats'
+    else:
+        row['status'] = 'ok'
+    return row
+
+
+def analyze_task(task, window_seconds=10.0) -> List[Dict[str, object]]:
+    """
+    Analyze one task (runs in a worker process).
+
+    Returns:
+        Result rows (RESULT_COLUMNS), one per record of the task
+    """
+    base = {'source': task['path'], 'kind': task['kind'], 'part': task['part']}
+    rows = []
+    analyzers: Dict[float, RecordingAnalyzer] = {}
+    # The measurement functions print diagnostics per beat; keep worker output to the parent's progress
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            for rec in _iter_records(task):
+                try:
+                    row = _analyze_record(rec, analyzers, window_seconds)
+                except Exception as e:
+                    row = {'record': rec.record, 'status': f"error: {type(e).__name__}: {e}"}
+                rows.append(dict(base, **row))
+        except Exception as e:
+            rows.append(dict(base, record=len(rows), status=f"error: {type(e).__name__}: {e}"))
+    return rows
+
+
+# ==================== RESULTS TABLE / JOURNAL ====================
+
+def _journal_path(out_path) -> str:
+    return out_path + '.done'
+
+
+def _load_journal(out_path) -> Dict[str, str]:
+    """task key -> fingerprint of every task finished by an earlier run."""
+    done = {}
+    path = _journal_path(out_path)
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                done[entry['key']] = entry['fingerprint']
+            except (ValueError, KeyError):
+                continue   # torn last line of an interrupted run
+    return done
+
+
+def _prune_results(out_path, done, pending_keys) -> None:
+    """Drop rows of tasks that are not (or no longer) finished; rows of other recordings stay."""
+    if not os.path.exists(out_path):
+        return
+    with open(out_path, 'r', newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    kept = [r for r in rows
+            if f"{r.get('source')}#{r.get('part')}" in done and f"{r.get('source')}#{r.get('part')}" not in pending_keys]
+    if len(kept) == len(rows):
+        return
+    tmp = out_path + '.tmp'
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(kept)
+    os.replace(tmp, out_path)
+
+
+def _format_eta(seconds) -> str:
+    seconds = int(max(0, seconds))
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def run_batch(paths, out_path, workers=None, window_seconds=10.0, segment_seconds=300.0, restart=False,
+              progress: Optional[Callable[[Dict[str, object]], None]] = None, progress_interval=5.0) -> Dict[str, object]:
+    """
+    Analyze every recording under paths into the CSV table out_path.
+
+    Args:
+        paths: Files / directories to scan
+        out_path: Results table (CSV); its journal is out_path + '.done'
+        workers: Worker processes (default: all cores)
+        window_seconds: Analysis window
+        segment_seconds: Task length of long recordings
+        restart: Ignore (and overwrite) the results of earlier runs
+        progress: Optional callback receiving the progress dict after every task
+        progress_interval: Seconds between printed progress lines
+
+    Returns:
+        Summary dict (tasks, skipped, done, rows, errors, elapsed_s)
+    """
+    workers = workers or os.cpu_count() or 1
+    recordings = discover_recordings(paths)
+    tasks = plan_tasks(recordings, segment_seconds)
+
+    if restart:
+        for path in (out_path, _journal_path(out_path)):
+            if os.path.exists(path):
+                os.remove(path)
+    done = _load_journal(out_path)
+    pending = [t for t in tasks if done.get(task_key(t)) != t['fingerprint']]
+    _prune_results(out_path, done, {task_key(t) for t in pending})
+
+    print(f"📊 Batch analysis: {len(recordings)} recordings, {len(tasks)} tasks "
+          f"({len(tasks) - len(pending)} already done), {workers} workers")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    new_table = not os.path.exists(out_path) or os.path.getsize(out_path) == 0
+    summary = {'tasks': len(tasks), 'skipped': len(tasks) - len(pending), 'done': 0, 'rows': 0, 'errors': 0}
+    started = time.monotonic()
+    last_print = 0.0
+    total_bytes = sum(t['size'] for t in pending) or 1
+    done_bytes = 0
+
+    with open(out_path, 'a', newline='', encoding='utf-8') as table, \
+            open(_journal_path(out_path), 'a', encoding='utf-8') as journal, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(table, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+        if new_table:
+            writer.writeheader()
+        queue = iter(pending)
+        running = {}
+
+        def submit_next():
+            task = next(queue, None)
+            if task is not None:
+                running[pool.submit(analyze_task, task, window_seconds)] = task
+
+        # Bounded in-flight tasks: results are written as they complete, memory stays flat
+        for _ in range(workers * 2):
+            submit_next()
+        while running:
+            completed, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in completed:
+                task = running.pop(future)
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    rows = [{'source': task['path'], 'kind': task['kind'], 'part': task['part'],
+                             'status': f"error: {type(e).__name__}: {e}"}]
+                writer.writerows(rows)
+                table.flush()
+                # Journal after the rows are on disk: a crash in between re-runs the task
+                journal.write(json.dumps({'key': task_key(task), 'fingerprint': task['fingerprint']}) + '\n')
+                journal.flush()
+
+                summary['done'] += 1
+                summary['rows'] += len(rows)
+                summary['errors'] += sum(1 for r in rows if str(r.get('status', '')).startswith('error'))
+                done_bytes += task['size']
+                elapsed = time.monotonic() - started
+                rate = summary['done'] / elapsed if elapsed > 0 else 0.0
+                state = {
+                    'done': summary['done'], 'total': len(pending), 'rows': summary['rows'],
+                    'errors': summary['errors'], 'elapsed_s': elapsed, 'tasks_per_s': rate,
+                    # Tasks vary in size; the ETA follows the bytes still to read
+                    'eta_s': elapsed * (total_bytes - done_bytes) / max(done_bytes, 1),
+                    'path': task['path'],
+                }
+                if progress is not None:
+                    progress(state)
+                if elapsed - last_print >= progress_interval or summary['done'] == len(pending):
+                    last_print = elapsed
+                    print(f"📊 {state['done']}/{state['total']} tasks ({100.0 * state['done'] / len(pending):.1f}%) "
+                          f"| {rate:.1f} tasks/s | {state['rows']} rows | {state['errors']} errors "
+                          f"| ETA {_format_eta(state['eta_s'])}")
+                submit_next()
+
+    summary['elapsed_s'] = round(time.monotonic() - started, 3)
+    print(f"✅ Batch analysis finished: {summary['done']} tasks, {summary['rows']} rows in "
+          f"{summary['elapsed_s']:.1f} s -> {out_path}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-analyze recorded ECG sessions, captures and reports headless")
+    parser.add_argument("paths", nargs="*", default=["../reports"], help="Files / directories to scan")
+    parser.add_argument("--out", default="../reports/batch_analysis.csv", help="Results table (CSV)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--window", type=float, default=10.0, help="Analysis window (s)")
+    parser.add_argument("--segment", type=float, default=300.0, help="Task length of long recordings (s)")
+    parser.add_argument("--restart", action="store_true", help="Ignore results of earlier runs")
+    args = parser.parse_args()
+
+    summary = run_batch(args.paths, args.out, workers=args.workers, window_seconds=args.window,
+                        segment_seconds=args.segment, restart=args.restart)
+    if summary['errors']:
+        print(f"⚠️ {summary['errors']} rows with errors (see 'status' column)")
+
+
+if __name__ == "__main__":
+    main()
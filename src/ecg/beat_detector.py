@@ -0,0 +1,441 @@
+"""
+Streaming QRS Detector
+
+Incremental version of the Pan-Tompkins detector in pan_tompkins.py for the
+live monitor. Only newly arrived samples are processed: the band-pass filter,
+derivative and moving-window integrator keep their state between calls, and
+R-peaks are picked with the adaptive signal/noise thresholds and search-back
+of the original algorithm instead of a global mean + std threshold.
+
+Every detected beat is appended to one shared beat list (sample index, RR,
+amplitude) so the 12-lead page, the dashboard BPM and the HRV/stress panel
+all read the same beats instead of each running find_peaks on the whole
+Lead II buffer. Until the detector tracks a buffer (warm-up, or a caller
+without an ECG test page), `detect_r_peaks_full_buffer()` is the one
+full-buffer fallback shared by the 12-lead page and the dashboard.
+
+Sample indices are absolute stream positions: the first sample passed to
+`process()` after `reset(start_index=k)` has index k. The 12-lead page keeps
+them aligned with `ECGRingBuffer.total_written`.
+
+Usage:
+    from ecg.beat_detector import StreamingQRSDetector, detect_r_peaks_full_buffer
+
+    detector = StreamingQRSDetector(sampling_rate=500)
+    new_beats = detector.process(lead_ii_block)        # 1-D block of new samples
+
+    beats, cursor = detector.beats_since(cursor)       # pull new beats
+    r_peaks = detector.r_peaks_in_window(len(buffer))  # positions inside a buffer
+
+    r_peaks = detect_r_peaks_full_buffer(lead_ii, fs)  # fallback: whole buffer at once
+"""
+
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.signal import butter, filtfilt, find_peaks, sosfilt, sosfilt_zi
+
+from .ring_buffer import ECGRingBuffer
+
+# History channels kept for R-peak localisation
+_RAW, _BANDPASS, _MWA = 0, 1, 2
+
+
+class Beat:
+    """One detected QRS complex."""
+
+    __slots__ = ('sample_index', 'rr_ms', 'amplitude')
+
+    def __init__(self, sample_index: int, rr_ms: float, amplitude: float):
+        self.sample_index = sample_index   # Absolute stream index of the R-peak
+        self.rr_ms = rr_ms                 # RR to the previous beat (0.0 for the first)
+        self.amplitude = amplitude         # R height above the preceding baseline
+
+    def __repr__(self):
+        return f"Beat(sample_index={self.sample_index}, rr_ms={self.rr_ms:.1f}, amplitude={self.amplitude:.1f})"
+
+
+class StreamingQRSDetector:
+    """Pan-Tompkins QRS detector with persistent state and a shared beat list."""
+
+    LEARNING_SECONDS = 2.0      # Initial threshold training period
+    REFRACTORY_SECONDS = 0.2    # No second QRS within 200 ms
+    T_WAVE_SECONDS = 0.36       # Candidates this close to a QRS may be T-waves
+    MWA_SECONDS = 0.15          # Moving-window integration width
+    SEARCHBACK_FACTOR = 1.66    # Search back after 166% of the average RR
+
+    def __init__(self, sampling_rate: float = 500.0, history_seconds: float = 8.0,
+                 max_beats: int = 1024, rate_tolerance: float = 0.02):
+        """
+        Args:
+            sampling_rate: Sampling frequency in Hz
+            history_seconds: Detector signal history kept for peak localisation
+            max_beats: Number of beats kept in the shared beat list
+            rate_tolerance: Relative sampling-rate change that triggers a reset
+        """
+        self.history_seconds = history_seconds
+        self.rate_tolerance = rate_tolerance
+        self.beats = deque(maxlen=max_beats)
+        self.beats_published = 0
+        self.sampling_rate = None
+        self.configure(sampling_rate)
+
+    # ------------------------------------------------------------------ #
+    # Configuration
+    # ------------------------------------------------------------------ #
+
+    def configure(self, sampling_rate: float) -> bool:
+        """
+        Set the sampling rate. Cheap to call on every block: detection state is
+        only rebuilt when the rate moves by more than `rate_tolerance`.
+
+        Returns:
+            True if the detector was rebuilt
+        """
+        if sampling_rate is None or sampling_rate <= 10:
+            return False
+        if (self.sampling_rate is not None
+                and abs(sampling_rate - self.sampling_rate) <= self.rate_tolerance * self.sampling_rate):
+            return False
+
+        fs = float(sampling_rate)
+        start = self.total_samples if self.sampling_rate is not None else 0
+        self.sampling_rate = fs
+        nyquist = fs / 2.0
+        self._sos = butter(1, [5.0 / nyquist, min(15.0 / nyquist, 0.99)], btype='band', output='sos')
+        self._mwa_width = max(1, int(self.MWA_SECONDS * fs))
+        self._refractory = max(1, int(self.REFRACTORY_SECONDS * fs))
+        self._t_wave = int(self.T_WAVE_SECONDS * fs)
+        self._learning = int(self.LEARNING_SECONDS * fs)
+        self._history = ECGRingBuffer(max(int(self.history_seconds * fs), 4 * self._learning),
+                                      n_leads=3, dtype=np.float64, track_time=False)
+        self.reset(start_index=start)
+        return True
+
+    def reset(self, start_index: int = 0) -> None:
+        """
+        Restart detection. Published beats are kept unless the stream restarts
+        behind them; new beats continue the list.
+
+        Args:
+            start_index: Absolute index of the next sample passed to process()
+        """
+        self._start = int(start_index)
+        if self.beats and self._start <= self.beats[-1].sample_index:
+            # Stream restarted behind published beats (buffer reset)
+            self.beats.clear()
+        self._history.clear()
+        self._zi = None
+        self._last_bp = None
+        self._sq_tail = np.zeros(self._mwa_width - 1)
+        self._scan_from = self._start
+        self._trained = False
+        self._spki = 0.0
+        self._npki = 0.0
+        self._last_qrs = None        # MWA index of the last QRS
+        self._last_qrs_value = 0.0
+        self._last_r = None          # Absolute R-peak index of the last beat
+        self._rr_recent = deque(maxlen=8)
+        self._noise_peaks = []       # (index, value) candidates since the last QRS
+        self._break_index = None     # Absolute index of the last stream discontinuity
+
+    def mark_discontinuity(self, sample_index: int) -> None:
+        """
+        Note an unfilled gap in the stream just before `sample_index`.
+
+        The first beat after it is published with rr_ms = 0.0 (like the first
+        beat of the stream), so no RR interval spans samples that never arrived.
+        """
+        self._break_index = int(sample_index)
+
+    @property
+    def total_samples(self) -> int:
+        """Absolute index one past the newest processed sample."""
+        return self._start + self._history.total_written
+
+    @property
+    def ready(self) -> bool:
+        """True once the learning period is over and beats are being published."""
+        return self._trained
+
+    # ------------------------------------------------------------------ #
+    # Processing
+    # ------------------------------------------------------------------ #
+
+    def process(self, samples) -> List[Beat]:
+        """
+        Feed newly arrived samples.
+
+        Args:
+            samples: 1-D block of new samples (oldest first)
+
+        Returns:
+            Beats confirmed by this block (also appended to the shared list)
+        """
+        x = np.asarray(samples, dtype=np.float64).ravel()
+        if x.size == 0:
+            return []
+
+        # Band-pass 5-15 Hz, state carried between blocks
+        if self._zi is None:
+            self._zi = sosfilt_zi(self._sos) * x[0]
+        bp, self._zi = sosfilt(self._sos, x, zi=self._zi)
+
+        # Derivative and squaring
+        prev = bp[0] if self._last_bp is None else self._last_bp
+        squared = np.diff(bp, prepend=prev) ** 2
+        self._last_bp = bp[-1]
+
+        # Causal moving-window integration
+        w = self._mwa_width
+        ext = np.concatenate([self._sq_tail, squared])
+        csum = np.concatenate([[0.0], np.cumsum(ext)])
+        mwa = (csum[w:] - csum[:-w]) / w
+        if w > 1:
+            self._sq_tail = ext[-(w - 1):]
+
+        self._history.extend(np.column_stack([x, bp, mwa]))
+
+        if not self._trained:
+            if self._history.total_written < self._learning:
+                return []
+            self._train()
+
+        return self._scan()
+
+    def _segment(self, start: int, end: int) -> np.ndarray:
+        """(3, end - start) history for absolute indices [start, end)."""
+        total = self.total_samples
+        start = max(start, total - self._history.filled)
+        end = min(end, total)
+        if end <= start:
+            return np.empty((3, 0))
+        return self._history.latest(total - start)[:, :end - start]
+
+    def _train(self) -> None:
+        # A first block longer than the history has already pushed its head out:
+        # learn on the oldest samples still kept and scan from there
+        first = max(self._start, self.total_samples - self._history.filled)
+        self._scan_from = max(self._scan_from, first)
+        learn = self._segment(first, first + self._learning)[_MWA]
+        self._spki = 0.25 * float(np.max(learn))
+        self._npki = 0.5 * float(np.mean(learn))
+        self._trained = True
+
+    @property
+    def _threshold(self) -> float:
+        return self._npki + 0.25 * (self._spki - self._npki)
+
+    def _scan(self) -> List[Beat]:
+        total = self.total_samples
+        scan_end = total - self._refractory     # Peaks need look-ahead to be confirmed
+        if scan_end <= self._scan_from:
+            return []
+
+        seg_start = max(self._scan_from - self._refractory, total - self._history.filled)
+        mwa = self._segment(seg_start, total)[_MWA]
+        peaks, _ = find_peaks(mwa, distance=self._refractory)
+        peaks = peaks + seg_start
+        peaks = peaks[(peaks >= self._scan_from) & (peaks < scan_end)]
+
+        new_beats = []
+        for idx in peaks.tolist():
+            self._search_back(idx, new_beats)
+            value = float(mwa[idx - seg_start])
+            since_qrs = None if self._last_qrs is None else idx - self._last_qrs
+            if since_qrs is not None and since_qrs < self._refractory:
+                continue
+            if value > self._threshold:
+                is_t_wave = (since_qrs is not None and since_qrs < self._t_wave
+                             and value < 0.5 * self._last_qrs_value)
+                if not is_t_wave:
+                    self._spki = 0.125 * value + 0.875 * self._spki
+                    self._accept(idx, value, new_beats)
+                    continue
+            self._npki = 0.125 * value + 0.875 * self._npki
+            self._noise_peaks.append((idx, value))
+
+        self._search_back(scan_end, new_beats)
+        self._scan_from = scan_end
+        return new_beats
+
+    def _search_back(self, position: int, new_beats: List[Beat]) -> None:
+        """Recover a missed beat among noise peaks once an RR gap is too long."""
+        if self._last_qrs is None or not self._rr_recent or not self._noise_peaks:
+            return
+        rr_average = float(np.mean(self._rr_recent))
+        if position - self._last_qrs <= self.SEARCHBACK_FACTOR * rr_average:
+            return
+        threshold_2 = 0.5 * self._threshold
+        candidates = [(v, i) for i, v in self._noise_peaks
+                      if v > threshold_2 and i - self._last_qrs >= self._refractory]
+        if not candidates:
+            return
+        value, idx = max(candidates)
+        self._spki = 0.25 * value + 0.75 * self._spki
+        self._accept(idx, value, new_beats)
+
+    def _accept(self, mwa_index: int, value: float, new_beats: List[Beat]) -> None:
+        if self._last_qrs is not None:
+            self._rr_recent.append(mwa_index - self._last_qrs)
+        self._last_qrs = mwa_index
+        self._last_qrs_value = value
+        self._noise_peaks = [(i, v) for i, v in self._noise_peaks if i > mwa_index]
+
+        # The integrator peak lags the QRS; locate R on the band-passed signal
+        # inside the integration window, then refine on the input signal
+        fs = self.sampling_rate
+        lo = mwa_index - self._mwa_width - int(0.05 * fs)
+        seg = self._segment(lo, mwa_index + 1)
+        if seg.shape[1] == 0:
+            return
+        lo = mwa_index + 1 - seg.shape[1]
+        r_index = lo + int(np.argmax(seg[_BANDPASS]))
+        half = max(1, int(0.03 * fs))
+        raw = self._segment(r_index - half, r_index + half + 1)
+        r_index = (r_index + half + 1 - raw.shape[1]) + int(np.argmax(raw[_RAW]))
+
+        if self._last_r is not None and r_index - self._last_r < self._refractory // 2:
+            return
+
+        baseline_seg = self._segment(r_index - int(0.2 * fs), r_index - int(0.08 * fs))[_RAW]
+        r_value = float(self._segment(r_index, r_index + 1)[_RAW][0])
+        amplitude = r_value - float(np.median(baseline_seg)) if baseline_seg.size else 0.0
+        rr_ms = (r_index - self._last_r) * 1000.0 / fs if self._last_r is not None else 0.0
+        if self._break_index is not None and self._last_r is not None and self._last_r < self._break_index <= r_index:
+            rr_ms = 0.0
+        self._last_r = r_index
+
+        beat = Beat(r_index, rr_ms, amplitude)
+        self.beats.append(beat)
+        self.beats_published += 1
+        new_beats.append(beat)
+
+    # ------------------------------------------------------------------ #
+    # Shared beat list
+    # ------------------------------------------------------------------ #
+
+    def beats_since(self, cursor: int) -> Tuple[List[Beat], int]:
+        """
+        Beats published after `cursor` (pull-style subscription).
+
+        Args:
+            cursor: Number of beats the caller has already seen (start with 0)
+
+        Returns:
+            tuple: (new_beats, new_cursor)
+        """
+        new = self.beats_published - int(cursor)
+        if new <= 0:
+            return [], self.beats_published
+        new = min(new, len(self.beats))
+        return list(self.beats)[-new:], self.beats_published
+
+    def recent_beats(self, window_len: int, end_index: Optional[int] = None) -> List[Beat]:
+        """Beats whose R-peak lies in the window_len samples ending at end_index (default: newest)."""
+        end = self.total_samples if end_index is None else int(end_index)
+        start = end - int(window_len)
+        return [b for b in self.beats if start <= b.sample_index < end]
+
+    def r_peaks_in_window(self, window_len: int, end_index: Optional[int] = None) -> np.ndarray:
+        """
+        R-peak positions relative to a buffer holding the window_len samples
+        that end at end_index (default: the newest processed sample).
+        """
+        end = self.total_samples if end_index is None else int(end_index)
+        start = end - int(window_len)
+        return np.array([b.sample_index - start for b in self.recent_beats(window_len, end)], dtype=int)
+
+    def rr_intervals_ms(self, window_len: Optional[int] = None) -> np.ndarray:
+        """RR intervals (ms) of consecutive beats, optionally limited to a recent window."""
+        beats = list(self.beats) if window_len is None else self.recent_beats(window_len)
+        return np.array([b.rr_ms for b in beats[1:] if b.rr_ms > 0], dtype=float)
+
+
+def detect_r_peaks_full_buffer(lead_data, fs):
+    """Full-buffer R-peak detection (fallback while the streaming detector is not tracking a buffer)
+
+    Band-passes the whole buffer (0.5-40 Hz) and runs three find_peaks strategies,
+    keeping the one with the most consistent RR intervals.
+
+    Args:
+        lead_data: Raw lead samples
+        fs: Sampling rate in Hz
+
+    Returns:
+        Array of R-peak indices
+    """
+    nyquist = fs / 2
+    b, a = butter(4, [0.5 / nyquist, 40 / nyquist], btype='band')
+    filtered_ii = filtfilt(b, a, lead_data)
+
+    signal_mean = np.mean(filtered_ii)
+    signal_std = np.std(filtered_ii)
+
+    # Use adaptive peak detection for 10-300 BPM (same as calculate_heart_rate)
+    # Try multiple strategies and select best based on consistency
+    detection_results = []
+    height_threshold = signal_mean + 0.5 * signal_std
+    prominence_threshold = signal_std * 0.4
+
+    # Strategy 1: Conservative (10-120 BPM)
+    # Distance set to minimum RR for highest BPM in range (120 BPM = 500ms)
+    # RR interval filtering (200-6000ms) will handle the full 10-300 BPM range
+    peaks_conservative, _ = find_peaks(
+        filtered_ii,
+        height=height_threshold,
+        distance=int(0.4 * fs),  # 400ms - prevents false peaks, allows 10-300 BPM via RR filtering
+        prominence=prominence_threshold
+    )
+    if len(peaks_conservative) >= 2:
+        rr_cons = np.diff(peaks_conservative) * (1000 / fs)
+        valid_cons = rr_cons[(rr_cons >= 200) & (rr_cons <= 6000)]
+        if len(valid_cons) > 0:
+            bpm_cons = 60000 / np.median(valid_cons)
+            std_cons = np.std(valid_cons)
+            detection_results.append(('conservative', peaks_conservative, bpm_cons, std_cons))
+
+    # Strategy 2: Normal (100-180 BPM)
+    peaks_normal, _ = find_peaks(
+        filtered_ii,
+        height=height_threshold,
+        distance=int(0.3 * fs),  # 240ms - medium distance
+        prominence=prominence_threshold
+    )
+    if len(peaks_normal) >= 2:
+        rr_norm = np.diff(peaks_normal) * (1000 / fs)
+        valid_norm = rr_norm[(rr_norm >= 200) & (rr_norm <= 6000)]
+        if len(valid_norm) > 0:
+            bpm_norm = 60000 / np.median(valid_norm)
+            std_norm = np.std(valid_norm)
+            detection_results.append(('normal', peaks_normal, bpm_norm, std_norm))
+
+    # Strategy 3: Tight (160-300 BPM) - CRITICAL for 300 BPM detection
+    peaks_tight, _ = find_peaks(
+        filtered_ii,
+        height=height_threshold,
+        distance=int(0.2 * fs),  # 160ms - tight distance for high BPM (300 BPM = 200ms RR)
+        prominence=prominence_threshold
+    )
+    if len(peaks_tight) >= 2:
+        rr_tight = np.diff(peaks_tight) * (1000 / fs)
+        valid_tight = rr_tight[(rr_tight >= 200) & (rr_tight <= 6000)]
+        if len(valid_tight) > 0:
+            bpm_tight = 60000 / np.median(valid_tight)
+            std_tight = np.std(valid_tight)
+            detection_results.append(('tight', peaks_tight, bpm_tight, std_tight))
+
+    # Select best strategy based on consistency (lowest std deviation)
+    if detection_results:
+        detection_results.sort(key=lambda x: x[3])  # Sort by std
+        best_method, r_peaks, best_bpm, best_std = detection_results[0]
+    else:
+        # Fallback to conservative strategy for low BPM (10-120 BPM)
+        r_peaks, _ = find_peaks(
+            filtered_ii,
+            height=height_threshold,
+            distance=int(0.4 * fs),  # 400ms - prevents false peaks, allows 10-300 BPM via RR filtering
+            prominence=prominence_threshold
+        )
+    return r_peaks
@@ -77,6 +77,175 @@ def assess_beat_quality(beat, fs, r_idx_in_beat):
         return None
 
 
+def extract_beat_matrix(signals, r_peaks, pre_samples, post_samples):
+    """
+    Gather R-aligned beat windows for all R-peaks in one fancy-indexing pass.
+    
+    Windows that run past either end of the signal are edge-padded (the first
+    or last sample is repeated), like np.pad(..., mode='edge').
+    
+    Args:
+        signals: 1-D signal or (n_leads, n_samples) array
+        r_peaks: R-peak indices
+        pre_samples: Samples before the R-peak
+        post_samples: Samples after the R-peak
+    
+    Returns:
+        (n_beats, beat_length) matrix for 1-D input, or
+        (n_leads, n_beats, beat_length) for multi-lead input
+    """
+    signals = np.asarray(signals)
+    r_peaks = np.asarray(r_peaks, dtype=int)
+    n_samples = signals.shape[-1]
+    offsets = np.arange(-pre_samples, post_samples + 1)
+    index = np.clip(r_peaks[:, None] + offsets[None, :], 0, n_samples - 1)
+    return signals[..., index]
+
+
+def assess_beat_quality_batch(beats, fs, r_idx_in_beat):
+    """
+    Vectorized assess_beat_quality() for a stack of aligned beats.
+    
+    Args:
+        beats: (..., n_beats, beat_length) aligned beats
+        fs: Sampling rate (Hz)
+        r_idx_in_beat: R-peak index within each beat
+    
+    Returns:
+        Quality scores with shape beats.shape[:-1]; NaN marks invalid beats
+        (the cases where assess_beat_quality returns None)
+    """
+    beats = np.asarray(beats, dtype=float)
+    beat_length = beats.shape[-1]
+    quality = np.full(beats.shape[:-1], np.nan)
+    if beat_length < 100 or beats.size == 0:
+        return quality
+    
+    # Rule 1: Peak-to-peak amplitude (should be reasonable)
+    p2p = np.ptp(beats, axis=-1)
+    valid = (p2p >= 50) & (p2p <= 50000)
+    
+    # Rule 2: Signal-to-noise ratio (QRS should dominate)
+    qrs_start = max(0, r_idx_in_beat - int(80 * fs / 1000))
+    qrs_end = min(beat_length, r_idx_in_beat + int(80 * fs / 1000))
+    if qrs_end <= qrs_start:
+        return quality
+    qrs_amplitude = np.ptp(beats[..., qrs_start:qrs_end], axis=-1)
+    
+    # TP segment (baseline noise estimate)
+    tp_start = max(0, r_idx_in_beat - int(350 * fs / 1000))
+    tp_end = max(0, r_idx_in_beat - int(150 * fs / 1000))
+    signal_std = np.std(beats, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if tp_end > tp_start:
+            tp_segment = beats[..., tp_start:tp_end]
+            tp_noise = np.std(tp_segment, axis=-1)
+            # Rule 3: Baseline stability (TP segment should be relatively flat)
+            baseline_drift = np.ptp(tp_segment, axis=-1)
+            baseline_stability = 1.0 - np.minimum(
+                np.where(qrs_amplitude > 0, baseline_drift / qrs_amplitude, 1.0), 1.0)
+        else:
+            tp_noise = signal_std * 0.5
+            baseline_stability = np.full_like(p2p, 0.5, dtype=float)
+        snr = np.where(tp_noise == 0, 100.0, qrs_amplitude / (tp_noise * 10))
+    
+    # Rule 4: No excessive spikes (check for artifacts)
+    deviation = np.abs(beats - np.median(beats, axis=-1, keepdims=True))
+    outliers = np.count_nonzero(deviation > 5 * signal_std[..., None], axis=-1)
+    artifact_score = 1.0 - np.minimum(outliers / beat_length, 1.0)
+    
+    # Combined quality score
+    combined = (np.minimum(snr / 10.0, 1.0) * 0.4 +
+                baseline_stability * 0.3 +
+                artifact_score * 0.3)
+    quality[valid] = np.clip(combined[valid], 0.0, 1.0)
+    return quality
+
+
+def _select_best_beats(quality, num_beats):
+    """
+    Indices of the num_beats highest-quality beats, in quality order.
+    
+    Ties are broken by beat order, exactly like a stable sort, but only the
+    top-k are partitioned out instead of sorting every beat.
+    """
+    n = len(quality)
+    if num_beats >= n:
+        return np.argsort(-quality, kind='stable')
+    kth = np.partition(quality, n - num_beats)[n - num_beats]
+    above = np.flatnonzero(quality > kth)
+    ties = np.flatnonzero(quality == kth)[:num_beats - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.argsort(-quality[chosen], kind='stable')]
+
+
+def build_median_beats(signals, r_peaks, fs, pre_r_ms=400, post_r_ms=900, min_beats=8):
+    """
+    Build median beats for one or several leads from shared R-peaks.
+    
+    Batched form of build_median_beat(): all beat windows are gathered into a
+    (n_leads, n_beats, beat_length) tensor, beat quality is scored with
+    vectorized column operations and the best beats are picked per lead with
+    a partial partition. Each lead's result is identical to calling
+    build_median_beat() on that lead alone.
+    
+    Args:
+        signals: (n_leads, n_samples) raw signals (or a single 1-D signal)
+        r_peaks: R-peak indices (shared by all leads, e.g. from Lead II)
+        fs: Sampling rate (Hz)
+        pre_r_ms: Samples before R-peak (ms)
+        post_r_ms: Samples after R-peak (ms)
+        min_beats: Minimum number of clean beats required per lead
+    
+    Returns:
+        (time_axis, median_beats): median_beats is a list with one median beat
+        (or None if that lead had too few clean beats) per lead; time_axis is
+        None if no lead produced a median beat
+    """
+    signals = np.asarray(signals, dtype=float)
+    if signals.ndim == 1:
+        signals = signals[None, :]
+    n_leads, n_samples = signals.shape
+    r_peaks = np.asarray(r_peaks, dtype=int)
+    if len(r_peaks) < min_beats or n_samples == 0:
+        return None, [None] * n_leads
+    
+    pre_samples = int(pre_r_ms * fs / 1000)
+    post_samples = int(post_r_ms * fs / 1000)
+    beat_length = pre_samples + post_samples + 1
+    r_idx_in_beat = pre_samples  # R-peak position in aligned beat
+    
+    # Skip first and last R-peak to avoid edge effects; accept partial beats
+    # at the edges when at least 80% of the window lies inside the signal
+    inner = r_peaks[1:-1]
+    available = np.minimum(n_samples, inner + post_samples + 1) - np.maximum(0, inner - pre_samples)
+    inner = inner[available >= beat_length * 0.8]
+    if len(inner) < min_beats:
+        return None, [None] * n_leads
+    
+    beats = extract_beat_matrix(signals, inner, pre_samples, post_samples)   # (n_leads, n_beats, L)
+    quality = assess_beat_quality_batch(beats, fs, r_idx_in_beat)            # (n_leads, n_beats)
+    usable = quality > 0.3  # Minimum quality threshold (NaN compares False)
+    
+    median_beats = []
+    max_selected = max(min_beats, 12)  # 8-12 best beats, GE Marquette style
+    for lead in range(n_leads):
+        candidates = np.flatnonzero(usable[lead])
+        if len(candidates) < min_beats:
+            median_beats.append(None)
+            continue
+        num_beats = min(len(candidates), max_selected)
+        best = candidates[_select_best_beats(quality[lead, candidates], num_beats)]
+        median_beats.append(np.median(beats[lead, best], axis=0))
+    
+    if all(beat is None for beat in median_beats):
+        return None, median_beats
+    
+    # Time axis centered at R-peak (0 ms)
+    time_axis = np.arange(-pre_samples, post_samples + 1) / fs * 1000.0  # ms
+    return time_axis, median_beats
+
+
 def build_median_beat(raw_signal, r_peaks, fs, pre_r_ms=400, post_r_ms=900, min_beats=8):
     """
     Build median beat from aligned beats with quality selection (GE Marquette style).
@@ -101,54 +270,112 @@ def build_median_beat(raw_signal, r_peaks, fs, pre_r_ms=400, post_r_ms=900, min_
         - Ensures ≥8 beats for reliable median beat
         - Uses raw signal only (no display filters)
     """
-    if len(r_peaks) < min_beats:
+    time_axis, median_beats = build_median_beats(raw_signal, r_peaks, fs, pre_r_ms, post_r_ms, min_beats)
+    if time_axis is None:
         return None, None
+    return time_axis, median_beats[0]
+
+
+class MedianBeatSet:
+    """
+    Median beats for every lead, aligned on one shared set of R-peak fiducials.
     
-    pre_samples = int(pre_r_ms * fs / 1000)
-    post_samples = int(post_r_ms * fs / 1000)
-    beat_length = pre_samples + post_samples + 1
-    r_idx_in_beat = pre_samples  # R-peak position in aligned beat
+    Built once per analysis epoch by build_median_beat_set() so that intervals,
+    ST, axes and amplitudes are all measured on the same beats and the same
+    R-peak alignment (GE/Philips standard: fiducials from Lead II).
+    """
     
-    # Extract and assess all beats
-    beat_candidates = []
-    for r_idx in r_peaks[1:-1]:  # Skip first and last to avoid edge effects
-        start = max(0, r_idx - pre_samples)
-        end = min(len(raw_signal), r_idx + post_samples + 1)
-        if end - start >= beat_length * 0.8:  # Accept partial beats at edges
-            beat = raw_signal[start:end].copy()
-            # Pad or trim to fixed length
-            if len(beat) < beat_length:
-                pad_left = pre_samples - (r_idx - start)
-                pad_right = beat_length - len(beat) - pad_left
-                beat = np.pad(beat, (pad_left, pad_right), mode='edge')
-            elif len(beat) > beat_length:
-                trim_left = (len(beat) - beat_length) // 2
-                beat = beat[trim_left:trim_left + beat_length]
-            
-            # Assess beat quality
-            quality = assess_beat_quality(beat, fs, r_idx_in_beat)
-            if quality is not None and quality > 0.3:  # Minimum quality threshold
-                beat_candidates.append((beat, quality))
+    def __init__(self, time_axis, median_beats, tp_baselines, r_peaks, fs, reference_lead=1, min_beats=8):
+        """
+        Args:
+            time_axis: Time axis in ms (R-peak = 0 ms)
+            median_beats: One median beat (or None) per lead
+            tp_baselines: One raw-signal TP baseline (or None) per lead
+            r_peaks: R-peak indices the beats were aligned on
+            fs: Sampling rate (Hz)
+            reference_lead: Lead the R-peaks were detected on
+            min_beats: Minimum clean beats that were required per lead
+        """
+        self.time_axis = time_axis
+        self.median_beats = median_beats
+        self.tp_baselines = tp_baselines
+        self.r_peaks = np.asarray(r_peaks, dtype=int)
+        self.fs = fs
+        self.reference_lead = reference_lead
+        self.min_beats = min_beats
     
-    # Select top quality beats (at least min_beats, up to 12 best for GE Marquette style)
-    if len(beat_candidates) < min_beats:
-        return None, None
+    @property
+    def n_leads(self):
+        return len(self.median_beats)
     
-    # Sort by quality (best first)
-    beat_candidates.sort(key=lambda x: x[1], reverse=True)
+    @property
+    def r_idx(self):
+        """R-peak index inside each median beat."""
+        return int(np.argmin(np.abs(self.time_axis)))
     
-    # Take best beats (8-12 beats for median, GE Marquette style)
-    num_beats = min(len(beat_candidates), max(min_beats, 12))
-    selected_beats = [beat for beat, _ in beat_candidates[:num_beats]]
+    def lead(self, index):
+        """Median beat of one lead, or None if unavailable."""
+        if 0 <= index < len(self.median_beats):
+            return self.median_beats[index]
+        return None
     
-    # Compute median beat from selected clean beats
-    beats_arr = np.array(selected_beats)
-    median_beat = np.median(beats_arr, axis=0)
+    def tp_baseline(self, index):
+        """Raw-signal TP baseline of one lead, or None if unavailable."""
+        if 0 <= index < len(self.tp_baselines):
+            return self.tp_baselines[index]
+        return None
     
-    # Time axis centered at R-peak (0 ms)
-    time_axis = np.arange(-pre_samples, post_samples + 1) / fs * 1000.0  # ms
+    def has_leads(self, *indices):
+        """True if every requested lead has a median beat."""
+        return all(self.lead(i) is not None for i in indices)
+
+
+def build_median_beat_set(signals, r_peaks, fs, reference_lead=1, pre_r_ms=400, post_r_ms=900, min_beats=8,
+                          leads=None):
+    """
+    Build a MedianBeatSet for all leads in one pass.
     
-    return time_axis, median_beat
+    Args:
+        signals: (n_leads, n_samples) raw signals (no display filters)
+        r_peaks: Shared R-peak indices (detected on the reference lead)
+        fs: Sampling rate (Hz)
+        reference_lead: Lead the R-peaks were detected on
+        pre_r_ms: Samples before R-peak (ms)
+        post_r_ms: Samples after R-peak (ms)
+        min_beats: Minimum number of clean beats required per lead
+        leads: Optional (n_leads,) bool mask of leads to build (e.g. leads
+            with a connected electrode); the others get no median beat
+    
+    Returns:
+        MedianBeatSet, or None if no lead produced a median beat
+    """
+    signals = np.asarray(signals, dtype=float)
+    if signals.ndim == 1:
+        signals = signals[None, :]
+    r_peaks = np.asarray(r_peaks, dtype=int)
+    if leads is None:
+        time_axis, median_beats = build_median_beats(signals, r_peaks, fs, pre_r_ms, post_r_ms, min_beats)
+    else:
+        selected = np.flatnonzero(np.asarray(leads, dtype=bool)[:signals.shape[0]])
+        time_axis, built = build_median_beats(signals[selected], r_peaks, fs, pre_r_ms, post_r_ms, min_beats)
+        median_beats = [None] * signals.shape[0]
+        for lead, beat in zip(selected.tolist(), built):
+            median_beats[lead] = beat
+    if time_axis is None:
+        return None
+    
+    # TP baseline from the raw signal around the middle beat (same fiducials for every lead)
+    r_mid = r_peaks[len(r_peaks) // 2]
+    prev_r_idx = r_peaks[len(r_peaks) // 2 - 1] if len(r_peaks) > 1 else None
+    tp_baselines = []
+    for lead, median_beat in enumerate(median_beats):
+        if median_beat is None:
+            tp_baselines.append(None)
+        else:
+            tp_baselines.append(get_tp_baseline(signals[lead], r_mid, fs, prev_r_peak_idx=prev_r_idx))
+    
+    return MedianBeatSet(time_axis, median_beats, tp_baselines, r_peaks, fs,
+                         reference_lead=reference_lead, min_beats=min_beats)
 
 
 def detect_tp_segment(raw_signal, r_peak_idx, prev_r_peak_idx, fs):
@@ -332,11 +559,43 @@ def measure_rv5_sv1_from_median_beat(v5_raw, v1_raw, r_peaks_v5, r_peaks_v1, fs,
     if median_v5 is None:
         return None, None
     
-    # Get TP baseline for V5 (use middle R-peak from RAW signal, not median beat)
-    r_mid_v5 = r_peaks_v5[len(r_peaks_v5) // 2]
-    tp_baseline_v5 = get_tp_baseline(v5_raw, r_mid_v5, fs)
+    # Build median beat for V1 (requires ≥8 beats, GE/Philips standard)
+    median_v1 = None
+    if len(r_peaks_v1) >= 8:
+        _, median_v1 = build_median_beat(v1_raw, r_peaks_v1, fs, min_beats=8)
+    
+    return measure_rv5_sv1_from_median_beats(median_v5, median_v1, fs, v5_adc_per_mv, v1_adc_per_mv)
+
+
+def measure_rv5_sv1_from_median_set(beat_set, v5_index=10, v1_index=6,
+                                    v5_adc_per_mv=2048.0, v1_adc_per_mv=1441.0):
+    """
+    Measure RV5 and SV1 from a MedianBeatSet (no beat re-alignment).
+    
+    Returns:
+        (rv5_mv, sv1_mv) in mV, or (None, None) if not measurable
+    """
+    if beat_set is None or len(beat_set.r_peaks) < 8 or beat_set.lead(v5_index) is None:
+        return None, None
+    return measure_rv5_sv1_from_median_beats(beat_set.lead(v5_index), beat_set.lead(v1_index), beat_set.fs,
+                                             v5_adc_per_mv, v1_adc_per_mv)
+
+
+def measure_rv5_sv1_from_median_beats(median_v5, median_v1, fs, v5_adc_per_mv=2048.0, v1_adc_per_mv=1441.0):
+    """
+    Measure RV5 and SV1 from already-built V5 / V1 median beats.
+    
+    Args:
+        median_v5: V5 median beat
+        median_v1: V1 median beat, or None (SV1 is then not measured)
+        fs: Sampling rate (Hz)
+        v5_adc_per_mv: ADC counts per mV for V5
+        v1_adc_per_mv: ADC counts per mV for V1
     
-    # CRITICAL FIX: Also get TP baseline from median beat for consistency
+    Returns:
+        (rv5_mv, sv1_mv) in mV; sv1_mv is None without a V1 median beat
+    """
+    # CRITICAL FIX: Get TP baseline from median beat for consistency
     # The median beat might have a different baseline than raw signal
     # Use the median beat's TP segment for baseline
     r_idx = len(median_v5) // 2  # R-peak at center
@@ -371,19 +630,10 @@ def measure_rv5_sv1_from_median_beat(v5_raw, v1_raw, r_peaks_v5, r_peaks_v1, fs,
     rv5_mv = r_max_adc / adjusted_v5_adc_per_mv if r_max_adc > 0 else None
     print(f"🔬 RV5 Calibration: original={v5_adc_per_mv:.1f}, adjusted={adjusted_v5_adc_per_mv:.1f}, rv5_mv={rv5_mv:.3f} (expected: 0.969)")
     
-    # Build median beat for V1 (requires ≥8 beats, GE/Philips standard)
-    if len(r_peaks_v1) < 8:
-        return rv5_mv, None
-    
-    _, median_v1 = build_median_beat(v1_raw, r_peaks_v1, fs, min_beats=8)
     if median_v1 is None:
         return rv5_mv, None
     
-    # Get TP baseline for V1 (use middle R-peak from RAW signal, not median beat)
-    r_mid_v1 = r_peaks_v1[len(r_peaks_v1) // 2]
-    tp_baseline_v1 = get_tp_baseline(v1_raw, r_mid_v1, fs)
-    
-    # CRITICAL FIX: Also get TP baseline from median beat for consistency
+    # CRITICAL FIX: Get TP baseline from median beat for consistency
     r_idx = len(median_v1) // 2
     tp_start_median = max(0, r_idx - int(0.35 * fs))
     tp_end_median = max(0, r_idx - int(0.15 * fs))
@@ -721,6 +971,36 @@ def calculate_axis_from_median_beat(lead_i_raw, lead_ii_raw, lead_avf_raw, media
         return None
 
 
+def calculate_axis_from_median_set(beat_set, wave_type='QRS', prev_axis=None, pr_ms=None,
+                                   lead_i_index=0, lead_ii_index=1, lead_avf_index=5):
+    """
+    Calculate P / QRS / T axis from a MedianBeatSet (Lead I, II and aVF).
+    
+    The set must hold at least the beats it was built with (its adaptive
+    `min_beats`), so the axis is available whenever the median beat is.
+    
+    Returns:
+        Axis in degrees, or None if the set lacks the leads or the axis is
+        indeterminate
+    """
+    if beat_set is None or len(beat_set.r_peaks) < beat_set.min_beats:
+        return None
+    if not beat_set.has_leads(lead_i_index, lead_ii_index, lead_avf_index):
+        return None
+    median_i = beat_set.lead(lead_i_index)
+    return calculate_axis_from_median_beat(
+        None, None, None,
+        median_i, beat_set.lead(lead_ii_index), beat_set.lead(lead_avf_index),
+        len(median_i) // 2, beat_set.fs,
+        tp_baseline_i=beat_set.tp_baseline(lead_i_index),
+        tp_baseline_avf=beat_set.tp_baseline(lead_avf_index),
+        time_axis=beat_set.time_axis,
+        wave_type=wave_type,
+        prev_axis=prev_axis,
+        pr_ms=pr_ms
+    )
+
+
 def calculate_qrs_t_angle(qrs_axis_deg, t_axis_deg):
     """
     Calculate QRS-T angle (highly valuable clinical metric).
@@ -10,6 +10,7 @@ from scipy.signal import find_peaks
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from utils.helpers import safe_print
+from .sampling_clock import get_sampling_clock
 
 # Use safe_print everywhere in this module to avoid Unicode issues on Windows consoles
 print = safe_print
@@ -90,13 +91,13 @@ class DemoManager:
     
     
     def _set_demo_sampling_rate(self, sampling_rate):
-        """Expose effective sampling rate to dashboard calculators via ecg_test_page.sampler."""
+        """Pin the demo rate on the shared sampling clock (no arrival timing to recover it from)."""
         try:
-            if not hasattr(self.ecg_test_page, 'sampler') or self.ecg_test_page.sampler is None:
-                self.ecg_test_page.sampler = type('Sampler', (), {})()
+            if getattr(self.ecg_test_page, 'sampler', None) is None:
+                self.ecg_test_page.sampler = get_sampling_clock()
             # Keep dashboard filter stable: clamp to >=80 Hz (new default)
             safe_fs = max(80.0, float(sampling_rate))
-            self.ecg_test_page.sampler.sampling_rate = safe_fs
+            self.ecg_test_page.sampler.set_rate(safe_fs)
         except Exception:
             pass
 
@@ -421,28 +422,37 @@ class DemoManager:
             lead_columns = [col for col in df.columns if col != 'Sample']
             print(f" Found leads: {lead_columns}")
             
-            # Clear existing data - data is a list of numpy arrays, not a dictionary
-            for i in range(len(self.ecg_test_page.data)):
-                self.ecg_test_page.data[i] = np.zeros(self.ecg_test_page.buffer_size)
+            # Clear existing data - data is the page's multi-lead ring buffer
+            self.ecg_test_page.data.reset(self.ecg_test_page.buffer_size)
+            
+            # Map CSV columns to data buffer rows once, and sanitize every value
+            # up front (NaN/inf -> 0) so the streaming loop only copies rows
+            n_leads = len(self.ecg_test_page.data)
+            csv_columns = []
+            lead_indices = []
+            for lead in lead_columns:
+                if lead in self.ecg_test_page.leads:
+                    lead_index = self.ecg_test_page.leads.index(lead)
+                    if lead_index < n_leads:
+                        csv_columns.append(lead)
+                        lead_indices.append(lead_index)
+            csv_values = df[csv_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            csv_values = np.nan_to_num(csv_values, nan=0.0, posinf=0.0, neginf=0.0)
             
             # Initialize data with first few rows
             # Prefill enough samples to immediately show ~4 peaks
             csv_base_fs = 80  # demo CSV base aligned to new default
             prefill_needed = min(self.ecg_test_page.buffer_size, max(100, int(csv_base_fs * 4.0)), len(df))
-            for lead in lead_columns:
-                if lead in self.ecg_test_page.leads:
-                    lead_index = self.ecg_test_page.leads.index(lead)
-                    # Add initial prefill samples to start
-                    initial_samples = prefill_needed
-                    series = df[lead].iloc[:initial_samples]
-                    count = min(len(series), self.ecg_test_page.buffer_size)
-                    arr = np.array(series[:count], dtype=float)
-                    # Record per‑lead baseline from the first 200 samples (or all available)
-                    baseline_window = max(1, min(200, arr.size))
-                    baseline_mean = float(np.mean(arr[:baseline_window])) if arr.size > 0 else 0.0
-                    self._baseline_means[lead_index] = baseline_mean
-                    # Prefill with baseline‑centered data to reduce initial DC offset
-                    self.ecg_test_page.data[lead_index][:count] = arr - baseline_mean
+            prefill = np.zeros((prefill_needed, n_leads))
+            for col, lead_index in enumerate(lead_indices):
+                arr = csv_values[:prefill_needed, col]
+                # Record per‑lead baseline from the first 200 samples (or all available)
+                baseline_window = max(1, min(200, arr.size))
+                baseline_mean = float(np.mean(arr[:baseline_window])) if arr.size > 0 else 0.0
+                self._baseline_means[lead_index] = baseline_mean
+                # Prefill with baseline‑centered data to reduce initial DC offset
+                prefill[:, lead_index] = arr - baseline_mean
+            self.ecg_test_page.data.extend(prefill)
             
             # Set warmup window to avoid initial visual artifacts
             self._warmup_until = time.time() + 1.0
@@ -474,49 +484,12 @@ class DemoManager:
                     
                     while (not self._stop_event.is_set()) and self._running_demo and row_index < len(df):
                         try:
-                            # Read data for all leads with error handling
-                            for lead in lead_columns:
-                                try:
-                                    if lead in self.ecg_test_page.leads:
-                                        lead_index = self.ecg_test_page.leads.index(lead)
-                                        
-                                        # Validate row index
-                                        if row_index >= len(df) or row_index < 0:
-                                            print(f"❌ Invalid row index: {row_index}")
-                                            continue
-                                        
-                                        # Get value with validation
-                                        value = df[lead].iloc[row_index]
-                                        
-                                        # Validate value
-                                        if pd.isna(value) or np.isnan(value) or np.isinf(value):
-                                            print(f"❌ Invalid value for {lead} at row {row_index}: {value}")
-                                            value = 0.0
-                                        
-                                        # Convert to float safely
-                                        try:
-                                            value = float(value)
-                                        except (ValueError, TypeError):
-                                            print(f"❌ Cannot convert value to float: {value}")
-                                            value = 0.0
-                                        
-                                        # Update data using numpy roll method with bounds checking
-                                        with self._lock:
-                                            if (hasattr(self.ecg_test_page, 'data') and 
-                                                lead_index < len(self.ecg_test_page.data) and
-                                                len(self.ecg_test_page.data[lead_index]) > 0):
-                                                # 🫀 CLINICAL: Store RAW value in data buffer (for clinical analysis)
-                                                # Do NOT apply baseline centering here - that's display-only
-                                                raw_value = float(value)
-                                                self.ecg_test_page.data[lead_index] = np.roll(
-                                                    self.ecg_test_page.data[lead_index], -1)
-                                                self.ecg_test_page.data[lead_index][-1] = raw_value
-                                            else:
-                                                print(f"❌ Invalid data buffer for lead {lead_index}")
-                                                
-                                except Exception as e:
-                                    print(f"❌ Error processing lead {lead} at row {row_index}: {e}")
-                                    continue
+                            # 🫀 CLINICAL: Store RAW values in data buffer (for clinical analysis)
+                            # Do NOT apply baseline centering here - that's display-only
+                            row = np.zeros(n_leads)
+                            row[lead_indices] = csv_values[row_index]
+                            with self._lock:
+                                self.ecg_test_page.data.append(row)
                             
                             row_index += 1
                             consecutive_errors = 0  # Reset error counter on success
@@ -675,7 +648,7 @@ class DemoManager:
         # 2. For each lead, slice and update (exactly like divyansh.py)
         for i, lead in enumerate(self.ecg_test_page.leads):
             if i < len(self.ecg_test_page.data_lines) and i < len(self.ecg_test_page.data):
-                lead_data = self.ecg_test_page.data[i]
+                lead_data = self.ecg_test_page.data.view(i)
                 
                 total_len = len(lead_data)
                 if total_len == 0:
@@ -797,8 +770,8 @@ class DemoManager:
                 pass
             self.demo_timer = None
         # Initialize buffers
-        for i in range(len(self.ecg_test_page.data)):
-            self.ecg_test_page.data[i] = np.zeros(self.ecg_test_page.buffer_size)
+        self.ecg_test_page.data.reset(self.ecg_test_page.buffer_size)
+        lead_numbers = np.arange(1, len(self.ecg_test_page.data) + 1)
 
         # Parameters
         try:
@@ -835,11 +808,9 @@ class DemoManager:
                 sample += np.random.normal(0, 5)
 
                 # Update all leads with simple variations
-                for li in range(len(self.ecg_test_page.data)):
-                    val = sample * (0.8 + 0.4 * np.sin(two_pi * (li + 1) * 0.03 * t))
-                    with self._lock:
-                        self.ecg_test_page.data[li] = np.roll(self.ecg_test_page.data[li], -1)
-                        self.ecg_test_page.data[li][-1] = val
+                row = sample * (0.8 + 0.4 * np.sin(two_pi * lead_numbers * 0.03 * t))
+                with self._lock:
+                    self.ecg_test_page.data.append(row)
 
                 # Respect wave speed for visual pacing (like divyansh.py)
                 speed_factor = getattr(self, 'time_window', 10.0) / 10.0
@@ -881,138 +852,164 @@ class DemoManager:
         try:
             # Get Lead II data for interval calculations (Lead II is index 1)
             if len(self.ecg_test_page.data) > 1:
-                # Copy under lock to avoid race with writer thread
-                with self._lock:
-                    lead2_data = np.copy(self.ecg_test_page.data[1])  # Lead II
-                    lead_I_data = np.copy(self.ecg_test_page.data[0])  # Lead I
-                    lead_aVF_data = np.copy(self.ecg_test_page.data[5])  # Lead aVF
+                # Use adjusted sampling rate based on wave speed
+                sampling_rate = self.samples_per_second
                 
-                if len(lead2_data) > 100:  # Need enough data for calculations
-                    # Use adjusted sampling rate based on wave speed
-                    sampling_rate = self.samples_per_second
+                # Shared with the other live consumers: one analysis per data epoch
+                cache = getattr(self.ecg_test_page, 'analysis_cache', None)
+                if cache is not None:
+                    analysis = cache.get(
+                        'demo_intervals', cache.epoch(self.ecg_test_page.data, sampling_rate), 1, sampling_rate,
+                        lambda: self._analyze_demo_intervals(sampling_rate)
+                    )
+                else:
+                    analysis = self._analyze_demo_intervals(sampling_rate)
+                
+                # Calculate intervals only if we have R peaks
+                if analysis is not None:
+                    heart_rate = analysis['heart_rate']
                     
-                    # Use recent data for calculations
-                    recent_data = np.array(lead2_data[-500:])
-                    centered_data = recent_data - np.mean(recent_data)
+                    # Apply demo heart rate correction
+                    if heart_rate and heart_rate > 100:
+                        # If demo heart rate is too high, apply correction factor
+                        correction_factor = 0.6  # Reduce by 40%
+                        heart_rate = heart_rate * correction_factor
+                        print(f"💓 Demo heart rate corrected: {heart_rate:.1f} BPM")
                     
-                    # Check for signal variation
-                    signal_std = np.std(centered_data)
-                    if signal_std < 1.0:  # Very low variation
-                        print(f"❌ Low signal variation detected (std: {signal_std:.2f})")
-                        return
+                    # Apply demo heart rate smoothing
+                    if heart_rate and 30 <= heart_rate <= 200:
+                        self.demo_heart_rates.append(heart_rate)
+                        if len(self.demo_heart_rates) > 3:
+                            self.demo_heart_rates.pop(0)
+                        
+                        # Use smoothed heart rate for demo
+                        heart_rate = np.mean(self.demo_heart_rates)
+                        self._debug(f"smoothed heart rate {heart_rate:.1f} BPM")
                     
-                    # Demo-specific peak detection with adjusted parameters
-                    min_prominence = max(0.5, signal_std * 0.5)  # Adaptive prominence
-                    r_peaks, _ = find_peaks(centered_data, 
-                                          distance=int(0.6 * sampling_rate),
-                                          prominence=min_prominence)
+                    qt_value = analysis['qt_value']
+                    qtc_value = analysis['qtc_value']
                     
-                    # Calculate intervals only if we have R peaks
-                    if len(r_peaks) > 1:
-                        # RR intervals and heart rate
-                        rr_intervals = np.diff(r_peaks) / sampling_rate
-                        mean_rr = np.mean(rr_intervals)
-                        heart_rate = 60 / mean_rr if mean_rr > 0 else None
-                        
-                        # Apply demo heart rate correction
-                        if heart_rate and heart_rate > 100:
-                            # If demo heart rate is too high, apply correction factor
-                            correction_factor = 0.6  # Reduce by 40%
-                            heart_rate = heart_rate * correction_factor
-                            print(f"💓 Demo heart rate corrected: {heart_rate:.1f} BPM")
-                        
-                        # Apply demo heart rate smoothing
-                        if heart_rate and 30 <= heart_rate <= 200:
-                            self.demo_heart_rates.append(heart_rate)
-                            if len(self.demo_heart_rates) > 3:
-                                self.demo_heart_rates.pop(0)
-                            
-                            # Use smoothed heart rate for demo
-                            heart_rate = np.mean(self.demo_heart_rates)
-                            self._debug(f"smoothed heart rate {heart_rate:.1f} BPM")
-                        
-                        # Calculate P, Q, S, T peaks
-                        q_peaks, s_peaks = self._calculate_qs_peaks(centered_data, r_peaks, sampling_rate)
-                        p_peaks = self._calculate_p_peaks(centered_data, q_peaks, sampling_rate)
-                        t_peaks = self._calculate_t_peaks(centered_data, s_peaks, sampling_rate)
-                        
-                        # Calculate intervals
-                        pr_interval = self._calculate_pr_interval(p_peaks, r_peaks, sampling_rate)
-                        qrs_duration = self._calculate_qrs_duration(q_peaks, s_peaks, sampling_rate)
-                        qt_interval = self._calculate_qt_interval(q_peaks, t_peaks, sampling_rate)
-                        qtc_interval = self._calculate_qtc_interval(qt_interval, heart_rate)
-                        
-                        # Store both QT and QTc for display
-                        qt_value = int(round(qt_interval)) if (qt_interval is not None and qt_interval >= 0) else 380
-                        qtc_value = int(round(qtc_interval)) if (qtc_interval is not None and qtc_interval >= 0) else 400
-                        
-                        # Get calculation functions at runtime to avoid circular import
-                        calculate_qrs_axis, calculate_st_segment = self._get_calculation_functions()
-                        
-                        # Calculate QRS axis and ST segment using imported functions
-                        qrs_axis = calculate_qrs_axis(lead_I_data, lead_aVF_data, r_peaks)
-                        st_segment = calculate_st_segment(lead2_data, r_peaks, fs=sampling_rate)
-                        
-                        # Prepare safe ST value (numeric or descriptive text)
+                    # Initialize fixed demo metrics once, then keep constant
+                    if self._demo_fixed_metrics is None:
                         try:
-                            if isinstance(st_segment, (int, float, np.floating)):
-                                st_out = int(round(float(st_segment)))
-                            elif isinstance(st_segment, str):
-                                st_out = st_segment
-                            else:
-                                st_out = None
+                            fixed_hr = 60  # BPM (fixed)
+                            fixed_pr = 160  # ms (fixed)
+                            fixed_qrs = 85  # ms (fixed)
+                            fixed_qt = qt_value  # Calculated QT
+                            fixed_qtc = qtc_value  # Calculated QTc
+                            fixed_axis = "0°"
+                            fixed_st = 90  # ms (fixed)
                         except Exception:
-                            st_out = None
-
-                        # Initialize fixed demo metrics once, then keep constant
-                        if self._demo_fixed_metrics is None:
-                            try:
-                                fixed_hr = 60  # BPM (fixed)
-                                fixed_pr = 160  # ms (fixed)
-                                fixed_qrs = 85  # ms (fixed)
-                                fixed_qt = qt_value  # Calculated QT
-                                fixed_qtc = qtc_value  # Calculated QTc
-                                fixed_axis = "0°"
-                                fixed_st = 90  # ms (fixed)
-                            except Exception:
-                                fixed_hr, fixed_pr, fixed_qrs, fixed_qt, fixed_qtc, fixed_axis, fixed_st = 60, 160, 85, 380, 400, "0°", 90
-                            self._demo_fixed_metrics = {
-                                'Heart_Rate': fixed_hr,
-                                'PR': fixed_pr,
-                                'QRS': fixed_qrs,
-                                'QT': fixed_qt,
-                                'QTc': fixed_qtc,
-                                'QTc_interval': f"{fixed_qt}/{fixed_qtc}",  # Display as QT/QTc format
-                                'QRS_axis': fixed_axis,
-                                'ST': fixed_st
-                            }
+                            fixed_hr, fixed_pr, fixed_qrs, fixed_qt, fixed_qtc, fixed_axis, fixed_st = 60, 160, 85, 380, 400, "0°", 90
+                        self._demo_fixed_metrics = {
+                            'Heart_Rate': fixed_hr,
+                            'PR': fixed_pr,
+                            'QRS': fixed_qrs,
+                            'QT': fixed_qt,
+                            'QTc': fixed_qtc,
+                            'QTc_interval': f"{fixed_qt}/{fixed_qtc}",  # Display as QT/QTc format
+                            'QRS_axis': fixed_axis,
+                            'ST': fixed_st
+                        }
 
-                        # Always send fixed metrics in demo mode
-                        payload = dict(self._demo_fixed_metrics)
-                        # Add live time since demo start in mm:ss
-                        try:
-                            if self._demo_started_at:
-                                elapsed = max(0, int(time.time() - self._demo_started_at))
-                                mm = elapsed // 60
-                                ss = elapsed % 60
-                                payload['time_elapsed'] = f"{mm:02d}:{ss:02d}"
-                        except Exception:
-                            pass
-                        try:
-                            self.ecg_test_page.dashboard_callback(payload)
-                        except Exception as cb_err:
-                            print(f"❌ Error updating dashboard from demo: {cb_err}")
-                        
-                        # Fixed print statement to handle None values
-                        pr_str = f"{self._demo_fixed_metrics['PR']} ms" if self._demo_fixed_metrics else "N/A"
-                        qrs_str = f"{self._demo_fixed_metrics['QRS']} ms" if self._demo_fixed_metrics else "N/A"
-                        hr_str = f"{self._demo_fixed_metrics['Heart_Rate']} bpm" if self._demo_fixed_metrics else "N/A"
-                        
-                        self._debug(f"intervals: HR={hr_str}, PR={pr_str}, QRS={qrs_str}")
-                        
+                    # Always send fixed metrics in demo mode
+                    payload = dict(self._demo_fixed_metrics)
+                    # Add live time since demo start in mm:ss
+                    try:
+                        if self._demo_started_at:
+                            elapsed = max(0, int(time.time() - self._demo_started_at))
+                            mm = elapsed // 60
+                            ss = elapsed % 60
+                            payload['time_elapsed'] = f"{mm:02d}:{ss:02d}"
+                    except Exception:
+                        pass
+                    try:
+                        self.ecg_test_page.dashboard_callback(payload)
+                    except Exception as cb_err:
+                        print(f"❌ Error updating dashboard from demo: {cb_err}")
+                    
+                    # Fixed print statement to handle None values
+                    pr_str = f"{self._demo_fixed_metrics['PR']} ms" if self._demo_fixed_metrics else "N/A"
+                    qrs_str = f"{self._demo_fixed_metrics['QRS']} ms" if self._demo_fixed_metrics else "N/A"
+                    hr_str = f"{self._demo_fixed_metrics['Heart_Rate']} bpm" if self._demo_fixed_metrics else "N/A"
+                    
+                    self._debug(f"intervals: HR={hr_str}, PR={pr_str}, QRS={qrs_str}")
+                    
         except Exception as e:
             print(f"❌ Error calculating demo intervals: {e}")
     
+    def _analyze_demo_intervals(self, sampling_rate):
+        """Uncached worker behind _calculate_demo_intervals (results shared via the analysis cache)
+        
+        Returns:
+            dict with heart_rate, pr_interval, qrs_duration, qt_value, qtc_value,
+            qrs_axis and st_segment, or None when there is not enough signal / fewer than two R-peaks
+        """
+        # Copy under lock to avoid race with writer thread
+        with self._lock:
+            lead2_data = np.copy(self.ecg_test_page.data[1])  # Lead II
+            lead_I_data = np.copy(self.ecg_test_page.data[0])  # Lead I
+            lead_aVF_data = np.copy(self.ecg_test_page.data[5])  # Lead aVF
+        
+        if len(lead2_data) <= 100:  # Need enough data for calculations
+            return None
+        
+        # Use recent data for calculations
+        recent_data = np.array(lead2_data[-500:])
+        centered_data = recent_data - np.mean(recent_data)
+        
+        # Check for signal variation
+        signal_std = np.std(centered_data)
+        if signal_std < 1.0:  # Very low variation
+            print(f"❌ Low signal variation detected (std: {signal_std:.2f})")
+            return None
+        
+        # Demo-specific peak detection with adjusted parameters
+        min_prominence = max(0.5, signal_std * 0.5)  # Adaptive prominence
+        r_peaks, _ = find_peaks(centered_data, 
+                              distance=int(0.6 * sampling_rate),
+                              prominence=min_prominence)
+        if len(r_peaks) <= 1:
+            return None
+        
+        # RR intervals and heart rate
+        rr_intervals = np.diff(r_peaks) / sampling_rate
+        mean_rr = np.mean(rr_intervals)
+        heart_rate = 60 / mean_rr if mean_rr > 0 else None
+        
+        # Calculate P, Q, S, T peaks
+        q_peaks, s_peaks = self._calculate_qs_peaks(centered_data, r_peaks, sampling_rate)
+        p_peaks = self._calculate_p_peaks(centered_data, q_peaks, sampling_rate)
+        t_peaks = self._calculate_t_peaks(centered_data, s_peaks, sampling_rate)
+        
+        # Calculate intervals (QTc from the corrected demo heart rate, as before)
+        corrected_hr = heart_rate * 0.6 if heart_rate and heart_rate > 100 else heart_rate
+        pr_interval = self._calculate_pr_interval(p_peaks, r_peaks, sampling_rate)
+        qrs_duration = self._calculate_qrs_duration(q_peaks, s_peaks, sampling_rate)
+        qt_interval = self._calculate_qt_interval(q_peaks, t_peaks, sampling_rate)
+        qtc_interval = self._calculate_qtc_interval(qt_interval, corrected_hr)
+        
+        # Store both QT and QTc for display
+        qt_value = int(round(qt_interval)) if (qt_interval is not None and qt_interval >= 0) else 380
+        qtc_value = int(round(qtc_interval)) if (qtc_interval is not None and qtc_interval >= 0) else 400
+        
+        # Get calculation functions at runtime to avoid circular import
+        calculate_qrs_axis, calculate_st_segment = self._get_calculation_functions()
+        
+        # Calculate QRS axis and ST segment using imported functions
+        qrs_axis = calculate_qrs_axis(lead_I_data, lead_aVF_data, r_peaks)
+        st_segment = calculate_st_segment(lead2_data, r_peaks, fs=sampling_rate)
+        
+        return {
+            'heart_rate': heart_rate,
+            'pr_interval': pr_interval,
+            'qrs_duration': qrs_duration,
+            'qt_value': qt_value,
+            'qtc_value': qtc_value,
+            'qrs_axis': qrs_axis,
+            'st_segment': st_segment,
+        }
+    
     def _calculate_qs_peaks(self, centered_data, r_peaks, sampling_rate):
         """Calculate Q and S peaks"""
         q_peaks = []
@@ -1115,8 +1112,7 @@ class DemoManager:
         # Clear demo data and plots safely
         try:
             with self._lock:
-                for i in range(len(self.ecg_test_page.data)):
-                    self.ecg_test_page.data[i] = np.zeros(self.ecg_test_page.buffer_size)
+                self.ecg_test_page.data.reset(self.ecg_test_page.buffer_size)
                 for line in self.ecg_test_page.data_lines:
                     line.setData(np.zeros(self.ecg_test_page.buffer_size))
             print("🧹 Demo data cleared and plots reset")
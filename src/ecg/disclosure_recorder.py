@@ -0,0 +1,539 @@
+"""
+Full-Disclosure ECG Recorder
+
+Streams every published sample of all 12 leads to disk so long
+(Holter-style) sessions can be reviewed and re-reported from any time range.
+The live buffers only hold the last few seconds; this keeps everything.
+
+What is recorded is the acquisition timeline's output (short packet-loss gaps
+bridged) together with its per-sample flags, i.e. the stream the acquisition
+ring publishes: sample k of a session is sample k published after the
+acquisition timeline was reset.
+
+Storage (one directory per session, reports/disclosure/<session>/):
+    disclosure_<session>_<segment>.ecgd files, rotated by duration and size.
+    Each segment is append-only:
+        [0:4]   magic b"ECGD"
+        [4:6]   format version (uint16)
+        [6:8]   reserved
+        [8:12]  header length (uint32), followed by a UTF-8 JSON header
+                (sampling rate at open, lead order, dtype, scale, session,
+                segment, "flags": whether chunks carry sample flags)
+        chunks: b"CHNK", n_samples (uint32), first sample index (uint64),
+                wall-clock time of the first sample (float64), sampling
+                rate when the chunk was written (float64, version 2), then
+                (n_leads, n_samples) lead-major samples, then (version 3,
+                "flags") n_samples uint8 sample flags (sample_timeline.SAMPLE_*)
+        trailer (version 2, written on close / rotation): a chunk header with
+                magic b"RATE", n_samples 0 and the sampling rate at close
+    A crash loses at most the chunk being filled; every complete chunk is
+    readable without an index file.
+
+Recording starts before the sampling clock has converged, so the rate known
+when a segment opens can be the fallback estimate. The reader therefore
+times every chunk of a closed segment with the segment's trailer rate (the
+converged estimate) and only falls back to the per-chunk rates for a
+segment that has no trailer (crash); version 1 segments use their header
+rate.
+
+Recording is opt-in (the `full_disclosure` setting) and `start()` deletes
+the oldest sessions once the disclosure directory exceeds `retention_bytes`.
+
+Samples are stored as int16 at 0.5 ADC counts per step by default. The
+packet decoder produces integer direct leads and half-integer derived leads
+(aVR/aVL/aVF), so received samples are stored losslessly at half the size
+of float32; only bridged (interpolated) samples are rounded to the step.
+
+The recorder is called from the acquisition thread: `append()` only copies
+into one preallocated chunk and writes a full chunk with a single buffered
+write, so memory is bounded by one chunk and CPU cost is a memcpy.
+
+Usage:
+    recorder = FullDisclosureRecorder(sampling_rate=clock_estimate, retention_bytes=4 * 1024 ** 3)
+    recorder.start()
+    recorder.append(published, mask)     # (n, 12) + (n,) flags, from the acquisition thread
+    recorder.stop()
+
+    reader = DisclosureReader(recorder.session_dir)
+    block = reader.read_seconds(600, 613.2)                # (12, n) samples
+    flags = reader.read_flags(start_sample, stop_sample)   # (n,) uint8
+    reader.export_capture("reports/ecg_data/ecg_data_range.ecgb", 600, 613.2)
+"""
+
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+
+DISCLOSURE_MAGIC = b"ECGD"
+DISCLOSURE_VERSION = 3
+DISCLOSURE_EXTENSION = ".ecgd"
+CHUNK_MAGIC = b"CHNK"
+RATE_MAGIC = b"RATE"
+LEAD_NAMES = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
+
+_PREAMBLE = struct.Struct("<4sHHI")
+_CHUNK_HEADER = struct.Struct("<4sIQdd")
+_CHUNK_HEADER_V1 = struct.Struct("<4sIQd")
+_DTYPES = {"int16": np.dtype("<i2"), "float32": np.dtype("<f4")}
+
+
+def default_disclosure_dir() -> str:
+    """reports/disclosure under the project root."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(here, '..', '..', 'reports', 'disclosure'))
+
+
+class FullDisclosureRecorder:
+    """Append-only, rotating, chunked binary recorder for 12-lead samples."""
+
+    def __init__(self, base_dir: Optional[str] = None, sampling_rate: Union[float, Callable[[], float]] = 500.0,
+                 lead_names: Optional[List[str]] = None, dtype: str = "int16", scale: float = 0.5,
+                 chunk_samples: int = 1000, rotate_seconds: float = 3600.0,
+                 rotate_bytes: int = 256 * 1024 * 1024, retention_bytes: Optional[int] = 4 * 1024 ** 3,
+                 record_flags: bool = True):
+        """
+        Args:
+            base_dir: Parent directory for session folders (default reports/disclosure)
+            sampling_rate: Nominal rate, or a callable returning the current
+                estimate (read for every chunk)
+            lead_names: Lead order of the appended frames
+            dtype: 'int16' (quantised by `scale`) or 'float32'
+            scale: Physical units per int16 step
+            chunk_samples: Samples buffered before one write
+            rotate_seconds: Start a new segment after this much recording time
+            rotate_bytes: Start a new segment once a file reaches this size
+            retention_bytes: Size of base_dir above which start() deletes the
+                oldest sessions (None keeps everything)
+            record_flags: Store the per-sample flags passed to append()
+        """
+        if dtype not in _DTYPES:
+            raise ValueError(f"Unsupported disclosure dtype: {dtype}")
+        self.base_dir = base_dir or default_disclosure_dir()
+        self.sampling_rate = sampling_rate
+        self.lead_names = list(lead_names or LEAD_NAMES)
+        self.n_leads = len(self.lead_names)
+        self.dtype = dtype
+        self.scale = float(scale) if dtype == "int16" else 1.0
+        self.chunk_samples = int(chunk_samples)
+        self.rotate_seconds = rotate_seconds
+        self.rotate_bytes = rotate_bytes
+        self.retention_bytes = retention_bytes
+        self.record_flags = bool(record_flags)
+
+        self.session_id = None
+        self.session_dir = None
+        self.segment = 0
+        self.samples_written = 0
+        self.bytes_written = 0
+        self.last_error = None
+
+        self._lock = threading.Lock()
+        self._chunk = np.zeros((self.n_leads, self.chunk_samples), dtype=_DTYPES[dtype])
+        self._chunk_flags = np.zeros(self.chunk_samples, dtype=np.uint8)
+        self._fill = 0
+        self._chunk_time = 0.0
+        self._fh = None
+        self._segment_start = 0.0
+        self._segment_bytes = 0
+
+    @property
+    def recording(self) -> bool:
+        return self.session_dir is not None
+
+    def _current_rate(self) -> float:
+        rate = self.sampling_rate() if callable(self.sampling_rate) else self.sampling_rate
+        return float(rate) if rate else 0.0
+
+    def start(self, session_id: Optional[str] = None) -> str:
+        """Open a new session directory and its first segment. Returns the directory."""
+        with self._lock:
+            self._close_segment()
+            self.session_id = session_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+            if self.retention_bytes is not None:
+                prune_disclosure_sessions(self.base_dir, self.retention_bytes, keep=[self.session_id])
+            self.session_dir = os.path.join(self.base_dir, self.session_id)
+            os.makedirs(self.session_dir, exist_ok=True)
+            self.segment = 0
+            self.samples_written = 0
+            self.bytes_written = 0
+            self._fill = 0
+            self._open_segment()
+        print(f"💾 Full-disclosure recording to {self.session_dir}")
+        return self.session_dir
+
+    def stop(self) -> None:
+        """Write any buffered samples and close the session."""
+        with self._lock:
+            if self.session_dir is None:
+                return
+            self._flush_chunk()
+            self._close_segment()
+            session_dir, self.session_dir = self.session_dir, None
+        print(f"💾 Full-disclosure recording closed ({self.samples_written} samples, "
+              f"{self.bytes_written / 1e6:.1f} MB in {session_dir})")
+
+    def flush(self) -> None:
+        """Write the partially filled chunk now (e.g. before reading the session)."""
+        with self._lock:
+            if self.session_dir is not None:
+                self._flush_chunk()
+                if self._fh is not None:
+                    self._fh.flush()
+
+    def append(self, frames: np.ndarray, mask: Optional[np.ndarray] = None) -> None:
+        """
+        Record published samples.
+
+        Args:
+            frames: (n, n_leads) samples, one row per sample (decoder layout)
+            mask: Optional (n,) uint8 sample flags from the acquisition
+                timeline (0 = received sample when None)
+        """
+        if self.session_dir is None:
+            return
+        frames = np.asarray(frames)
+        n = frames.shape[0] if frames.ndim == 2 else 0
+        if n == 0:
+            return
+        if mask is not None and len(mask) != n:
+            mask = None
+        with self._lock:
+            if self.session_dir is None:
+                return
+            try:
+                cols = frames.T
+                done = 0
+                while done < n:
+                    if self._fill == 0:
+                        self._chunk_time = time.time()
+                    take = min(n - done, self.chunk_samples - self._fill)
+                    target = self._chunk[:, self._fill:self._fill + take]
+                    if self.dtype == "int16":
+                        np.rint(cols[:, done:done + take] / self.scale, out=target, casting='unsafe')
+                    else:
+                        target[...] = cols[:, done:done + take]
+                    flags = self._chunk_flags[self._fill:self._fill + take]
+                    if mask is None:
+                        flags.fill(0)
+                    else:
+                        flags[:] = mask[done:done + take]
+                    self._fill += take
+                    done += take
+                    if self._fill == self.chunk_samples:
+                        self._flush_chunk()
+            except Exception as e:
+                # Recording must never stop acquisition
+                self.last_error = e
+                print(f"❌ Full-disclosure write error: {e}")
+
+    # ------------------------------------------------------------------ #
+    # Segment handling (caller holds the lock)
+    # ------------------------------------------------------------------ #
+
+    def _open_segment(self) -> None:
+        path = os.path.join(self.session_dir, f"disclosure_{self.session_id}_{self.segment:04d}{DISCLOSURE_EXTENSION}")
+        header = {
+            "format": "ecg-disclosure",
+            "version": DISCLOSURE_VERSION,
+            "session": self.session_id,
+            "segment": self.segment,
+            "start_time": datetime.now().isoformat(),
+            "start_sample": self.samples_written,
+            "sampling_rate": self._current_rate(),
+            "lead_names": self.lead_names,
+            "dtype": self.dtype,
+            "scale": self.scale,
+            "flags": self.record_flags,
+        }
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        self._fh = open(path, "ab")
+        self._fh.write(_PREAMBLE.pack(DISCLOSURE_MAGIC, DISCLOSURE_VERSION, 0, len(header_bytes)))
+        self._fh.write(header_bytes)
+        self._segment_start = time.time()
+        self._segment_bytes = _PREAMBLE.size + len(header_bytes)
+
+    def _close_segment(self) -> None:
+        if self._fh is not None:
+            try:
+                # Trailer: the (by now converged) rate for every chunk of the segment
+                self._fh.write(_CHUNK_HEADER.pack(RATE_MAGIC, 0, self.samples_written, time.time(),
+                                                  self._current_rate()))
+                self._fh.close()
+            except Exception as e:
+                print(f"⚠️ Error closing disclosure segment: {e}")
+            self._fh = None
+
+    def _flush_chunk(self) -> None:
+        if self._fill == 0 or self._fh is None:
+            return
+        n = self._fill
+        payload = np.ascontiguousarray(self._chunk[:, :n]).tobytes()
+        if self.record_flags:
+            payload += self._chunk_flags[:n].tobytes()
+        self._fh.write(_CHUNK_HEADER.pack(CHUNK_MAGIC, n, self.samples_written, self._chunk_time,
+                                          self._current_rate()))
+        self._fh.write(payload)
+        size = _CHUNK_HEADER.size + len(payload)
+        self._segment_bytes += size
+        self.bytes_written += size
+        self.samples_written += n
+        self._fill = 0
+
+        if (self._segment_bytes >= self.rotate_bytes
+                or time.time() - self._segment_start >= self.rotate_seconds):
+            self._close_segment()
+            self.segment += 1
+            self._open_segment()
+
+    def get_stats(self):
+        return {
+            'recording': self.recording,
+            'session_dir': self.session_dir,
+            'segment': self.segment,
+            'samples_written': self.samples_written,
+            'bytes_written': self.bytes_written,
+        }
+
+
+class DisclosureReader:
+    """Random access to a recorded full-disclosure session."""
+
+    def __init__(self, session_dir: str):
+        self.session_dir = session_dir
+        self.segments = []
+        self._chunks = []   # (first_sample, n_samples, wall_time, path, data_offset, segment index, rate)
+        names = sorted(f for f in os.listdir(session_dir) if f.endswith(DISCLOSURE_EXTENSION))
+        for name in names:
+            self._index_segment(os.path.join(session_dir, name))
+        if not self.segments:
+            raise ValueError(f"No disclosure segments in {session_dir}")
+        first = self.segments[0]
+        self.lead_names = first["lead_names"]
+        self.n_leads = len(self.lead_names)
+        self.n_samples = (self._chunks[-1][0] + self._chunks[-1][1]) if self._chunks else 0
+        self._index_time()
+
+    def _index_time(self) -> None:
+        """Per-chunk rates -> session rate and the time offset of every chunk."""
+        firsts = np.array([c[0] for c in self._chunks], dtype=np.int64)
+        counts = np.array([c[1] for c in self._chunks], dtype=np.float64)
+        rates = np.array([c[6] for c in self._chunks], dtype=np.float64)
+        valid = rates > 0
+        if valid.any():
+            # Sample-weighted median: the converged clock, not the start-up estimate
+            order = np.argsort(rates[valid])
+            cumulative = np.cumsum(counts[valid][order])
+            self.sampling_rate = float(rates[valid][order][np.searchsorted(cumulative, cumulative[-1] / 2.0)])
+        else:
+            self.sampling_rate = next((s["sampling_rate"] for s in self.segments if s["sampling_rate"] > 0), 0.0)
+        self._chunk_first = firsts
+        self._chunk_rates = np.where(valid, rates, self.sampling_rate or 500.0)
+        self._chunk_seconds = np.concatenate([[0.0], np.cumsum(counts / self._chunk_rates)])
+
+    def _index_segment(self, path: str) -> None:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            magic, version, _, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != DISCLOSURE_MAGIC or version > DISCLOSURE_VERSION:
+                print(f"⚠️ Skipping unreadable disclosure segment: {path}")
+                return
+            header = json.loads(f.read(header_len).decode("utf-8"))
+            header["path"] = path
+            # Bytes per sample: every lead, plus the flag byte of version 3 "flags" segments
+            itemsize = _DTYPES[header["dtype"]].itemsize * len(header["lead_names"]) + (1 if header.get("flags") else 0)
+            chunk_header = _CHUNK_HEADER if version >= 2 else _CHUNK_HEADER_V1
+            position = _PREAMBLE.size + header_len
+            seg_index = len(self.segments)
+            first_chunk = len(self._chunks)
+            while position + chunk_header.size <= size:
+                f.seek(position)
+                fields = chunk_header.unpack(f.read(chunk_header.size))
+                magic, n, first_sample, wall_time = fields[:4]
+                rate = fields[4] if len(fields) > 4 else float(header.get("sampling_rate") or 0.0)
+                data_offset = position + chunk_header.size
+                if magic == RATE_MAGIC:
+                    header["closing_rate"] = rate
+                    break
+                if magic != CHUNK_MAGIC or data_offset + n * itemsize > size:
+                    break  # Truncated tail from an interrupted write
+                self._chunks.append((first_sample, n, wall_time, path, data_offset, seg_index, rate))
+                position = data_offset + n * itemsize
+            if header.get("closing_rate", 0) > 0:
+                for i in range(first_chunk, len(self._chunks)):
+                    self._chunks[i] = self._chunks[i][:6] + (header["closing_rate"],)
+            self.segments.append(header)
+
+    @property
+    def duration_seconds(self) -> float:
+        return float(self._chunk_seconds[-1])
+
+    def sample_at(self, seconds: float) -> int:
+        """Sample index at an offset from the session start (per-chunk sampling rates)."""
+        if not self._chunks:
+            return 0
+        i = int(np.clip(np.searchsorted(self._chunk_seconds, seconds, side='right') - 1, 0, len(self._chunks) - 1))
+        offset = int(round((seconds - self._chunk_seconds[i]) * self._chunk_rates[i]))
+        return int(np.clip(self._chunk_first[i] + offset, 0, self.n_samples))
+
+    def rate_between(self, start_sample: int, stop_sample: int) -> float:
+        """Sampling rate of a sample range (sample-weighted over the chunks it spans)."""
+        first = self._chunk_first
+        counts = np.array([c[1] for c in self._chunks], dtype=np.float64)
+        overlap = np.minimum(first + counts, stop_sample) - np.maximum(first, start_sample)
+        overlap = np.maximum(overlap, 0.0)
+        if overlap.sum() <= 0:
+            return self.sampling_rate
+        return float(np.sum(overlap * self._chunk_rates) / overlap.sum())
+
+    @property
+    def start_time(self) -> Optional[float]:
+        """Wall-clock time of the first recorded sample."""
+        return self._chunks[0][2] if self._chunks else None
+
+    def read(self, start_sample: int, stop_sample: int, leads=None) -> np.ndarray:
+        """
+        Samples [start_sample, stop_sample) of every lead.
+
+        Args:
+            start_sample, stop_sample: Absolute sample range
+            leads: Optional list of lead indices to read (only their rows are
+                read from disk); all leads if None
+
+        Returns:
+            (n_leads, n) float64 array in physical (ADC) units (one row per
+            requested lead)
+        """
+        start_sample = max(0, int(start_sample))
+        stop_sample = min(self.n_samples, int(stop_sample))
+        rows = list(range(self.n_leads)) if leads is None else [int(i) for i in leads]
+        out = np.zeros((len(rows), max(0, stop_sample - start_sample)))
+        if stop_sample <= start_sample:
+            return out
+        handles = {}
+        try:
+            for first, n, _, path, data_offset, seg_index, _ in self._chunks:
+                if first >= stop_sample or first + n <= start_sample:
+                    continue
+                header = self.segments[seg_index]
+                dtype = _DTYPES[header["dtype"]]
+                f = handles.get(path)
+                if f is None:
+                    f = handles[path] = open(path, "rb")
+                lo = max(start_sample - first, 0)
+                hi = min(stop_sample - first, n)
+                # Chunks are lead-major: each lead is one contiguous run
+                for row, lead in enumerate(rows):
+                    f.seek(data_offset + (lead * n + lo) * dtype.itemsize)
+                    samples = np.frombuffer(f.read((hi - lo) * dtype.itemsize), dtype=dtype)
+                    out[row, first + lo - start_sample:first + hi - start_sample] = samples * header["scale"]
+        finally:
+            for f in handles.values():
+                f.close()
+        return out
+
+    def read_flags(self, start_sample: int, stop_sample: int) -> np.ndarray:
+        """
+        Sample flags (sample_timeline.SAMPLE_*) of [start_sample, stop_sample).
+
+        Returns:
+            (n,) uint8 array; 0 for segments recorded without flags
+        """
+        start_sample = max(0, int(start_sample))
+        stop_sample = min(self.n_samples, int(stop_sample))
+        out = np.zeros(max(0, stop_sample - start_sample), dtype=np.uint8)
+        for first, n, _, path, data_offset, seg_index, _ in self._chunks:
+            if first >= stop_sample or first + n <= start_sample:
+                continue
+            header = self.segments[seg_index]
+            if not header.get("flags"):
+                continue
+            lo = max(start_sample - first, 0)
+            hi = min(stop_sample - first, n)
+            flags_offset = data_offset + n * _DTYPES[header["dtype"]].itemsize * len(header["lead_names"])
+            with open(path, "rb") as f:
+                f.seek(flags_offset + lo)
+                out[first + lo - start_sample:first + hi - start_sample] = np.frombuffer(f.read(hi - lo), dtype=np.uint8)
+        return out
+
+    def read_seconds(self, start_s: float, end_s: float) -> np.ndarray:
+        """Samples between two offsets (seconds from the session start)."""
+        return self.read(self.sample_at(start_s), self.sample_at(end_s))
+
+    def export_capture(self, output_file: str, start_s: float, end_s: float, compression=None) -> str:
+        """Write a time range as a binary capture usable by the report generators."""
+        from .ecg_capture import write_capture
+        start, stop = self.sample_at(start_s), self.sample_at(end_s)
+        block = self.read(start, stop)
+        start_time = self.start_time
+        timestamp = None
+        if start_time is not None:
+            timestamp = datetime.fromtimestamp(start_time + start_s).strftime('%Y-%m-%d %H:%M:%S')
+        return write_capture(output_file, block, self.rate_between(start, stop), lead_names=self.lead_names,
+                             compression=compression, timestamp=timestamp,
+                             metadata={'disclosure_session': os.path.basename(self.session_dir),
+                                       'range_seconds': [start_s, end_s]})
+
+
+def list_disclosure_sessions(base_dir: Optional[str] = None) -> List[str]:
+    """Session directories under base_dir, oldest first."""
+    base_dir = base_dir or default_disclosure_dir()
+    if not os.path.isdir(base_dir):
+        return []
+    return sorted(os.path.join(base_dir, d) for d in os.listdir(base_dir)
+                  if os.path.isdir(os.path.join(base_dir, d)))
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def prune_disclosure_sessions(base_dir: Optional[str] = None, max_bytes: int = 4 * 1024 ** 3,
+                              keep: Optional[List[str]] = None) -> List[str]:
+    """
+    Delete the oldest sessions until base_dir holds at most max_bytes.
+
+    Only directories that contain nothing but disclosure segments are removed.
+
+    Args:
+        base_dir: Disclosure directory (default reports/disclosure)
+        max_bytes: Size limit of all sessions together
+        keep: Session names that are never deleted (e.g. the one being recorded)
+
+    Returns:
+        Deleted session directories
+    """
+    keep = set(keep or [])
+    sessions = [(d, _directory_size(d)) for d in list_disclosure_sessions(base_dir)]
+    total = sum(size for _, size in sessions)
+    removed = []
+    for session_dir, size in sessions:
+        if total <= max_bytes:
+            break
+        if os.path.basename(session_dir) in keep:
+            continue
+        if any(not f.endswith(DISCLOSURE_EXTENSION) for f in os.listdir(session_dir)):
+            continue
+        try:
+            shutil.rmtree(session_dir)
+        except OSError as e:
+            print(f"⚠️ Could not delete old disclosure session {session_dir}: {e}")
+            continue
+        total -= size
+        removed.append(session_dir)
+    if removed:
+        print(f"🗑️ Deleted {len(removed)} old full-disclosure session(s) (limit {max_bytes / 1e9:.1f} GB)")
+    return removed
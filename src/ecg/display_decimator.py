@@ -0,0 +1,227 @@
+"""
+Peak-Preserving Display Decimation
+
+A 10 s window at 500 Hz is 5000 samples per lead, drawn into a plot a few
+hundred pixels wide. Resampling it to a fixed point count with np.interp
+costs O(window) per lead per frame and lands on arbitrary sample positions,
+so a 40 ms QRS spike can fall between two output points and shrink or vanish
+depending on the wave speed.
+
+Min/max decimation keeps, for every bucket of samples that maps to one pixel
+column, the minimum and the maximum in the order they occurred. Drawing the
+two points per bucket reproduces the exact vertical extent of the trace in
+that column, so R peaks and S troughs are always drawn at full amplitude.
+
+    - `minmax_envelope()`: stateless, vectorized decimation of one window
+      (views whose trace is re-processed every frame)
+    - `MinMaxDecimator`: incremental multi-lead decimator fed with every new
+      block of the live stream. Completed buckets never change, so each frame
+      only reduces the samples that arrived since the last one.
+
+Usage:
+    from ecg.display_decimator import MinMaxDecimator, bucket_size, minmax_envelope
+
+    decimator = MinMaxDecimator(n_leads=12, samples_per_bucket=bucket_size(5000, 1600))
+    decimator.extend(block)                            # (12, k) new samples
+    x, y = decimator.envelope(5000, lead=1)            # x: sample offsets in the window
+
+    x, y = minmax_envelope(window, max_points=1600)    # one window, 1-D or (n_leads, n)
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .ring_buffer import ECGRingBuffer
+
+
+def bucket_size(n_samples: int, max_points: int) -> int:
+    """
+    Samples per bucket so that n_samples fit in max_points (two points per bucket).
+
+    Returns:
+        Bucket size >= 1 (1 means no decimation is needed)
+    """
+    buckets = max(1, int(max_points) // 2)
+    if n_samples <= 2 * buckets:
+        return 1
+    return int(math.ceil(n_samples / buckets))
+
+
+def _reduce_buckets(body: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(..., m, spb) buckets -> (first, second) extremes in time order, each (..., m)."""
+    lo_idx = np.argmin(body, axis=-1)
+    hi_idx = np.argmax(body, axis=-1)
+    lo = np.take_along_axis(body, lo_idx[..., None], axis=-1)[..., 0]
+    hi = np.take_along_axis(body, hi_idx[..., None], axis=-1)[..., 0]
+    lo_first = lo_idx <= hi_idx
+    return np.where(lo_first, lo, hi), np.where(lo_first, hi, lo)
+
+
+def _bucket_positions(starts: np.ndarray, width) -> np.ndarray:
+    """x of the two points of each bucket: a quarter and three quarters into it."""
+    span = np.maximum(np.asarray(width, dtype=np.float64) - 1.0, 0.0)
+    x = np.empty(2 * len(starts), dtype=np.float64)
+    x[0::2] = starts + 0.25 * span
+    x[1::2] = starts + 0.75 * span
+    return x
+
+
+def minmax_envelope(signal, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decimate one window to at most max_points points, keeping every peak.
+
+    Buckets are aligned to the end of the window, so the newest sample is
+    always in a full bucket; a shorter leading bucket takes the remainder.
+
+    Args:
+        signal: 1-D window, or (n_leads, n) windows decimated together
+        max_points: Point budget (about twice the plot width in pixels)
+
+    Returns:
+        tuple: (x, y)
+            - x: (m,) sample positions within the window (0 = oldest sample)
+            - y: (m,) or (n_leads, m) values; the input itself when it already fits
+    """
+    y = np.asarray(signal)
+    n = y.shape[-1]
+    spb = bucket_size(n, max_points)
+    if spb <= 1:
+        return np.arange(n, dtype=np.float64), y
+
+    m = n // spb
+    head = n - m * spb
+    first, second = _reduce_buckets(y[..., head:].reshape(y.shape[:-1] + (m, spb)))
+    starts = head + spb * np.arange(m, dtype=np.float64)
+    widths = np.full(m, spb)
+    if head:
+        head_first, head_second = _reduce_buckets(y[..., None, :head])
+        first = np.concatenate([head_first, first], axis=-1)
+        second = np.concatenate([head_second, second], axis=-1)
+        starts = np.concatenate([[0.0], starts])
+        widths = np.concatenate([[head], widths])
+
+    out = np.empty(y.shape[:-1] + (2 * first.shape[-1],), dtype=np.result_type(y.dtype, np.float32))
+    out[..., 0::2] = first
+    out[..., 1::2] = second
+    return _bucket_positions(starts, widths), out
+
+
+class MinMaxDecimator:
+    """Incremental min/max envelope of a multi-lead stream."""
+
+    def __init__(self, n_leads: int = 12, samples_per_bucket: int = 1, capacity_buckets: int = 4096,
+                 dtype=np.float64):
+        """
+        Args:
+            n_leads: Leads decimated together
+            samples_per_bucket: Stream samples folded into one bucket (two points)
+            capacity_buckets: Completed buckets kept (history reachable by envelope())
+            dtype: Storage dtype of the bucket extremes
+        """
+        self.n_leads = int(n_leads)
+        self.samples_per_bucket = max(1, int(samples_per_bucket))
+        # Rows 0..n_leads-1: first extreme of each bucket, rows n_leads..: second extreme
+        self._buckets = ECGRingBuffer(int(capacity_buckets), n_leads=2 * self.n_leads, dtype=dtype,
+                                      track_time=False)
+        self._partial = np.zeros((self.n_leads, self.samples_per_bucket), dtype=dtype)
+        self._fill = 0
+        self.total_samples = 0
+        self.tag = None   # Free for the owner (e.g. which source stream it mirrors)
+
+    @property
+    def capacity_samples(self) -> int:
+        """Stream samples the bucket history covers."""
+        return self._buckets.capacity * self.samples_per_bucket
+
+    def reset(self, start_index: int = 0) -> None:
+        """
+        Forget the stream.
+
+        Args:
+            start_index: Absolute index of the next sample fed (keeps
+                total_samples aligned with the source ring)
+        """
+        self._buckets.clear()
+        self._fill = 0
+        self.total_samples = int(start_index)
+
+    def extend(self, block: np.ndarray) -> None:
+        """
+        Fold new samples into the envelope.
+
+        Args:
+            block: (n_leads, k) new samples, oldest first
+        """
+        block = np.asarray(block)
+        k = block.shape[1]
+        if k == 0:
+            return
+        spb = self.samples_per_bucket
+        pos = 0
+        if self._fill:
+            take = min(spb - self._fill, k)
+            self._partial[:, self._fill:self._fill + take] = block[:, :take]
+            self._fill += take
+            pos = take
+            if self._fill == spb:
+                self._push(self._partial[:, None, :])
+                self._fill = 0
+        full = (k - pos) // spb
+        if full:
+            end = pos + full * spb
+            self._push(block[:, pos:end].reshape(self.n_leads, full, spb))
+            pos = end
+        tail = k - pos
+        if tail:
+            self._partial[:, :tail] = block[:, pos:]
+            self._fill = tail
+        self.total_samples += k
+
+    def _push(self, body: np.ndarray) -> None:
+        first, second = _reduce_buckets(body)
+        self._buckets.extend(np.concatenate([first, second], axis=0).T)
+
+    def envelope(self, n_samples: int, lead: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Envelope of the newest n_samples stream samples.
+
+        Args:
+            n_samples: Window length in stream samples
+            lead: Single lead to return (all leads if None)
+
+        Returns:
+            tuple: (x, y)
+                - x: (m,) sample positions within the window (0 = oldest
+                  sample; the oldest bucket may start slightly before it)
+                - y: (m,) for one lead, else (n_leads, m)
+        """
+        spb = self.samples_per_bucket
+        fill = self._fill
+        n_samples = max(0, min(int(n_samples), self.total_samples))
+        need = min(self._buckets.filled, max(0, int(math.ceil((n_samples - fill) / spb))))
+        rows = slice(None) if lead is None else slice(lead, lead + 1)
+        buckets = self._buckets.latest(need)
+        first = buckets[:self.n_leads][rows]
+        second = buckets[self.n_leads:][rows]
+
+        covered_start = n_samples - fill - need * spb
+        starts = covered_start + spb * np.arange(need, dtype=np.float64)
+        widths = np.full(need, spb)
+        if fill:
+            part_first, part_second = _reduce_buckets(self._partial[rows, None, :fill])
+            first = np.concatenate([first, part_first], axis=-1)
+            second = np.concatenate([second, part_second], axis=-1)
+            starts = np.concatenate([starts, [n_samples - fill]])
+            widths = np.concatenate([widths, [fill]])
+
+        if spb == 1:
+            x = starts.astype(np.float64)
+            y = np.array(first, dtype=np.float64)
+        else:
+            x = np.maximum(_bucket_positions(starts, widths), 0.0)
+            y = np.empty((first.shape[0], 2 * first.shape[1]), dtype=np.float64)
+            y[:, 0::2] = first
+            y[:, 1::2] = second
+        return x, (y[0] if lead is not None else y)
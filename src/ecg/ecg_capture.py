@@ -0,0 +1,546 @@
+"""
+Binary ECG Capture Format
+
+Compact replacement for the JSON captures in reports/ecg_data. The JSON files
+stored every sample as pretty-printed text (~10-20 bytes per sample); a
+capture stores each lead as one contiguous little-endian int16 or float32
+column (2-4 bytes per sample) behind a small JSON header.
+
+File layout (.ecgb):
+    [0:4]    magic b"ECGB"
+    [4:6]    format version (uint16)
+    [6:8]    reserved
+    [8:12]   header length in bytes (uint32)
+    [12:..]  UTF-8 JSON header, padded so the data starts on a 64-byte boundary
+    [data]   uncompressed: (n_leads, n_samples) columns, lead after lead
+             zlib: independently compressed chunks of `chunk_samples` samples
+             per lead, listed in header["chunks"]
+
+The header holds the sampling rate, lead order, storage dtype, per-lead
+sample counts and calibration (physical = stored * scale + offset).
+Uncompressed captures are memory-mapped on read, so a report that only needs
+the last 13 s of a long capture never reads the rest of the file.
+
+Usage:
+    from ecg.ecg_capture import write_capture, read_capture, convert_json_directory
+
+    write_capture("capture.ecgb", leads, sampling_rate=500)   # leads: (12, n)
+    capture = read_capture("capture.ecgb")
+    lead_ii = capture.lead("II", start=-6500)                 # last 13 s at 500 Hz
+
+    convert_json_directory("reports/ecg_data")                # legacy JSON -> .ecgb
+
+    python -m ecg.ecg_capture reports/ecg_data [--compress] [--remove-json]
+"""
+
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .sample_timeline import flag_runs
+from .sampling_clock import resolve_sampling_rate
+
+CAPTURE_MAGIC = b"ECGB"
+CAPTURE_VERSION = 1
+CAPTURE_EXTENSION = ".ecgb"
+DEFAULT_CHUNK_SAMPLES = 4096
+LEAD_NAMES = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
+
+_PREAMBLE = struct.Struct("<4sHHI")
+_DATA_ALIGNMENT = 64
+_DTYPES = {"int16": np.dtype("<i2"), "float32": np.dtype("<f4")}
+_INT16_MAX = 32767
+
+
+def _as_lead_list(leads, lead_names):
+    """Normalise (n_leads, n) arrays or {name: samples} dicts to (names, [1-D arrays])."""
+    if isinstance(leads, dict):
+        names = list(lead_names) if lead_names else list(leads.keys())
+        arrays = [np.asarray(leads.get(name, []), dtype=float).ravel() for name in names]
+    else:
+        arrays = [np.asarray(lead, dtype=float).ravel() for lead in leads]
+        names = list(lead_names) if lead_names else LEAD_NAMES[:len(arrays)]
+        if len(names) != len(arrays):
+            raise ValueError(f"Got {len(arrays)} leads but {len(names)} lead names")
+    return names, arrays
+
+
+def _choose_storage(arrays, dtype):
+    """
+    Pick the storage dtype and per-lead calibration.
+
+    'auto' stores int16 when every sample is a finite integer in int16 range
+    (raw ADC counts - lossless), otherwise float32. Forcing 'int16' on other
+    data quantises each lead over its own range.
+    """
+    if dtype not in ("auto", "int16", "float32"):
+        raise ValueError(f"Unsupported capture dtype: {dtype}")
+
+    values = [a for a in arrays if a.size]
+    lossless_int16 = all(
+        np.all(np.isfinite(a)) and np.all(a == np.round(a)) and np.all(np.abs(a) <= _INT16_MAX)
+        for a in values
+    )
+    if dtype == "auto":
+        dtype = "int16" if lossless_int16 else "float32"
+
+    scale = [1.0] * len(arrays)
+    offset = [0.0] * len(arrays)
+    if dtype == "int16" and not lossless_int16:
+        for i, a in enumerate(arrays):
+            finite = a[np.isfinite(a)] if a.size else a
+            if finite.size == 0:
+                continue
+            lo, hi = float(finite.min()), float(finite.max())
+            offset[i] = (lo + hi) / 2.0
+            scale[i] = (hi - lo) / (2 * _INT16_MAX) if hi > lo else 1.0
+    return dtype, scale, offset
+
+
+def write_capture(path, leads, sampling_rate, lead_names=None, dtype="auto", compression=None,
+                  chunk_samples=DEFAULT_CHUNK_SAMPLES, timestamp=None, calibration=None, metadata=None):
+    """
+    Write leads to a binary capture file.
+
+    Args:
+        path: Output file path
+        leads: (n_leads, n_samples) array, list of 1-D arrays, or {lead_name: samples}
+            (leads may have different lengths)
+        sampling_rate: Sampling rate in Hz
+        lead_names: Lead order (defaults to the standard 12-lead order or the dict order)
+        dtype: 'auto', 'int16' or 'float32'
+        compression: None or 'zlib' (chunked; disables memory-mapped reads)
+        chunk_samples: Samples per compressed chunk
+        timestamp: Acquisition time string (defaults to now)
+        calibration: Optional extra calibration info stored in the header
+            (e.g. {'adc_per_mv': {...}})
+        metadata: Optional JSON-serialisable dict stored in the header
+
+    Returns:
+        The path written
+    """
+    if compression not in (None, "zlib"):
+        raise ValueError(f"Unsupported capture compression: {compression}")
+    names, arrays = _as_lead_list(leads, lead_names)
+    dtype, scale, offset = _choose_storage(arrays, dtype)
+    np_dtype = _DTYPES[dtype]
+    lengths = [int(a.size) for a in arrays]
+    n_samples = max(lengths) if lengths else 0
+
+    # Columnar block: one row per lead, short leads zero-padded
+    stored = np.zeros((len(arrays), n_samples), dtype=np_dtype)
+    for i, a in enumerate(arrays):
+        if not a.size:
+            continue
+        values = (a - offset[i]) / scale[i] if (scale[i] != 1.0 or offset[i] != 0.0) else a
+        if dtype == "int16":
+            values = np.clip(np.round(np.nan_to_num(values)), -_INT16_MAX, _INT16_MAX)
+        stored[i, :a.size] = values
+
+    chunks = []
+    payload = []
+    if compression == "zlib":
+        chunk_samples = max(1, int(chunk_samples))
+        position = 0
+        for lead in range(len(arrays)):
+            for start in range(0, n_samples, chunk_samples):
+                blob = zlib.compress(stored[lead, start:start + chunk_samples].tobytes(), 6)
+                chunks.append([lead, start, position, len(blob)])
+                payload.append(blob)
+                position += len(blob)
+
+    cal = {"units": "adc", "scale": scale, "offset": offset}
+    if calibration:
+        cal.update(calibration)
+    header = {
+        "format": "ecg-capture",
+        "version": CAPTURE_VERSION,
+        "timestamp": timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "sampling_rate": float(sampling_rate),
+        "lead_names": names,
+        "dtype": dtype,
+        "n_samples": n_samples,
+        "lead_lengths": lengths,
+        "calibration": cal,
+        "compression": compression,
+        "chunk_samples": int(chunk_samples) if compression else None,
+        "chunks": chunks,
+        "metadata": metadata or {},
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    pad = (-(_PREAMBLE.size + len(header_bytes))) % _DATA_ALIGNMENT
+    header_bytes += b" " * pad
+
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(CAPTURE_MAGIC, CAPTURE_VERSION, 0, len(header_bytes)))
+        f.write(header_bytes)
+        if compression == "zlib":
+            for blob in payload:
+                f.write(blob)
+        else:
+            f.write(stored.tobytes())
+    return path
+
+
+def is_capture_file(path) -> bool:
+    """True if path starts with the binary capture magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(CAPTURE_MAGIC)) == CAPTURE_MAGIC
+    except OSError:
+        return False
+
+
+class ECGCapture:
+    """Read access to a binary capture (memory-mapped when uncompressed)."""
+
+    def __init__(self, path, mmap=True):
+        """
+        Args:
+            path: Capture file path
+            mmap: Memory-map uncompressed data instead of reading it into RAM
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, _, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+            if magic != CAPTURE_MAGIC:
+                raise ValueError(f"Not an ECG capture file: {path}")
+            if version > CAPTURE_VERSION:
+                raise ValueError(f"Unsupported ECG capture version {version}: {path}")
+            self.header = json.loads(f.read(header_len).decode("utf-8"))
+        self.data_offset = _PREAMBLE.size + header_len
+        self.lead_names = list(self.header["lead_names"])
+        self.sampling_rate = float(self.header["sampling_rate"])
+        self.timestamp = self.header.get("timestamp")
+        self.n_samples = int(self.header["n_samples"])
+        self.lead_lengths = [int(n) for n in self.header["lead_lengths"]]
+        self.dtype = _DTYPES[self.header["dtype"]]
+        self.compression = self.header.get("compression")
+        calibration = self.header.get("calibration", {})
+        self.calibration = calibration
+        self._scale = calibration.get("scale", [1.0] * len(self.lead_names))
+        self._offset = calibration.get("offset", [0.0] * len(self.lead_names))
+        self._mmap = None
+        self._chunks = {}
+
+        if self.compression is None:
+            shape = (len(self.lead_names), self.n_samples)
+            if mmap and self.n_samples > 0:
+                self._mmap = np.memmap(path, dtype=self.dtype, mode="c", offset=self.data_offset, shape=shape)
+            else:
+                with open(path, "rb") as f:
+                    f.seek(self.data_offset)
+                    raw = f.read(shape[0] * shape[1] * self.dtype.itemsize)
+                self._mmap = np.frombuffer(raw, dtype=self.dtype).reshape(shape)
+        else:
+            for lead, start, position, length in self.header.get("chunks", []):
+                self._chunks.setdefault(lead, []).append((start, position, length))
+
+    def _lead_index(self, lead) -> int:
+        if isinstance(lead, str):
+            return self.lead_names.index(lead)
+        return int(lead)
+
+    def raw(self, lead, start=0, stop=None) -> np.ndarray:
+        """
+        Stored (uncalibrated) samples of one lead.
+
+        Uncompressed captures return a copy-on-write memory-mapped view (edits
+        never reach the file); compressed
+        captures decompress only the chunks overlapping [start, stop).
+        """
+        index = self._lead_index(lead)
+        start, stop, _ = slice(start, stop).indices(self.lead_lengths[index])
+        if stop <= start:
+            return np.zeros(0, dtype=self.dtype)
+        if self._mmap is not None:
+            return self._mmap[index, start:stop]
+
+        parts = []
+        with open(self.path, "rb") as f:
+            for chunk_start, position, length in self._chunks.get(index, []):
+                chunk_len = self.header["chunk_samples"]
+                if chunk_start >= stop or chunk_start + chunk_len <= start:
+                    continue
+                f.seek(self.data_offset + position)
+                chunk = np.frombuffer(zlib.decompress(f.read(length)), dtype=self.dtype)
+                lo = max(start - chunk_start, 0)
+                hi = min(stop - chunk_start, len(chunk))
+                parts.append(chunk[lo:hi])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype)
+
+    def lead(self, lead, start=0, stop=None) -> np.ndarray:
+        """
+        Calibrated samples of one lead (by name or index).
+
+        Lossless int16 / float32 captures return the stored samples directly
+        (zero-copy for memory-mapped files).
+        """
+        index = self._lead_index(lead)
+        values = self.raw(index, start, stop)
+        scale, offset = self._scale[index], self._offset[index]
+        if scale == 1.0 and offset == 0.0:
+            return values
+        return values.astype(np.float64) * scale + offset
+
+    def to_dict(self) -> Dict[str, object]:
+        """
+        Same structure load_ecg_data_from_file() returned for JSON captures.
+
+        Leads are float64 copies, so legacy report code can do arithmetic on
+        them without int16 overflow; use lead() for zero-copy access.
+        """
+        data = dict(self.header.get("metadata") or {})
+        data.update({
+            "timestamp": self.timestamp,
+            "sampling_rate": self.sampling_rate,
+            "leads": {name: np.asarray(self.lead(i), dtype=np.float64) for i, name in enumerate(self.lead_names)},
+        })
+        return data
+
+
+def read_capture(path, mmap=True) -> ECGCapture:
+    """Open a binary capture file."""
+    return ECGCapture(path, mmap=mmap)
+
+
+# ==================== REPORT GENERATOR SAVE/LOAD ====================
+
+def _collect_leads(ecg_test_page, lead_names):
+    """Per-lead sample arrays from an ECG page (ecg_buffers first, then data)."""
+    leads = {}
+    data = getattr(ecg_test_page, 'data', None)
+    # Stable copy of the live ring buffer: the acquisition thread keeps writing
+    snapshot = data.snapshot() if hasattr(data, 'snapshot') else None
+
+    for i, lead_name in enumerate(lead_names):
+        samples = None
+
+        # Priority 1: ecg_buffers (larger rolling buffer, use ALL of it)
+        buffers = getattr(ecg_test_page, 'ecg_buffers', None)
+        if buffers is not None and i < len(buffers):
+            buffer = buffers[i]
+            if isinstance(buffer, np.ndarray) and len(buffer) > 0:
+                samples = buffer
+
+        # Priority 2: ecg_test_page.data (ring buffer or list of lead arrays)
+        if samples is None and data is not None and i < len(data):
+            if snapshot is not None:
+                samples = snapshot[i]
+            else:
+                lead_data = data[i]
+                if isinstance(lead_data, (np.ndarray, list, tuple)):
+                    samples = np.asarray(lead_data, dtype=float)
+
+        leads[lead_name] = samples if samples is not None else np.zeros(0)
+    return leads
+
+
+def _acquisition_metadata(ecg_test_page, leads):
+    """Packet-loss statistics and sample flags of the live page, for the capture header."""
+    metadata = {}
+    try:
+        get_loss_stats = getattr(ecg_test_page, 'get_loss_stats', None)
+        loss = get_loss_stats() if callable(get_loss_stats) else None
+        if loss:
+            metadata['acquisition_loss'] = {k: v for k, v in loss.items() if k != 'last_second'}
+        sample_mask = getattr(ecg_test_page, 'sample_mask', None)
+        n = len(leads.get('II', []))
+        if callable(sample_mask) and n:
+            mask = sample_mask(n)
+            if len(mask) == n:
+                # [start, length, flags] runs, see sample_timeline.mask_from_runs()
+                metadata['sample_flags'] = flag_runs(mask)
+    except Exception as e:
+        print(f"⚠️ Could not collect acquisition loss metadata: {e}")
+    return metadata
+
+
+def save_ecg_data_to_file(ecg_test_page, output_file=None, compression=None):
+    """
+    Save ECG data from ecg_test_page to a binary capture file
+    Returns: path to saved file or None if failed
+
+    Example:
+        saved_file = save_ecg_data_to_file(ecg_test_page)
+        # Saved to: reports/ecg_data/ecg_data_20241119_143022.ecgb
+    """
+    if not ecg_test_page or not hasattr(ecg_test_page, 'data'):
+        print(" No ECG test page data available to save")
+        return None
+
+    # Create output directory
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+    ecg_data_dir = os.path.join(base_dir, 'reports', 'ecg_data')
+    os.makedirs(ecg_data_dir, exist_ok=True)
+
+    # Generate filename with timestamp
+    if output_file is None:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = os.path.join(ecg_data_dir, f'ecg_data_{timestamp}{CAPTURE_EXTENSION}')
+
+    sampling_rate = resolve_sampling_rate(ecg_test_page)
+
+    try:
+        leads = _collect_leads(ecg_test_page, LEAD_NAMES)
+
+        # Check if we have sufficient data for report generation
+        sample_counts = [len(samples) for samples in leads.values() if len(samples)]
+        if sample_counts:
+            max_samples = max(sample_counts)
+            print(f"📊 Buffer analysis: Max samples={max_samples}, Min samples={min(sample_counts)}")
+            expected_samples_for_13_2s = int(13.2 * sampling_rate)
+            if max_samples < expected_samples_for_13_2s:
+                print(f" WARNING: Buffer has only {max_samples} samples, need {expected_samples_for_13_2s} for 13.2s window")
+                print(f"   Current time window: {max_samples/sampling_rate:.2f}s")
+                print(f"    TIP: Run ECG for at least 15-20 seconds to accumulate sufficient data")
+
+        write_capture(output_file, leads, sampling_rate, lead_names=LEAD_NAMES, compression=compression,
+                      metadata=_acquisition_metadata(ecg_test_page, leads))
+        print(f"Saved ECG data to: {output_file}")
+        print(f"   Sampling rate: {sampling_rate} Hz")
+        print(f"   Total data points per lead: {[len(samples) for samples in leads.values()]}")
+        return output_file
+    except Exception as e:
+        print(f" Error saving ECG data: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def _load_json_capture(file_path):
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+    # Convert lists back to numpy arrays
+    if 'leads' in data:
+        for lead_name in data['leads']:
+            if isinstance(data['leads'][lead_name], list):
+                data['leads'][lead_name] = np.array(data['leads'][lead_name])
+    return data
+
+
+def load_ecg_data_from_file(file_path):
+    """
+    Load ECG data from a binary capture or a legacy JSON file
+    Returns: dict with 'leads', 'sampling_rate', 'timestamp' or None if failed
+
+    Example:
+        data = load_ecg_data_from_file('reports/ecg_data/ecg_data_20241119_143022.ecgb')
+        # Returns: {'leads': {'I': array, 'II': array, ...}, 'sampling_rate': 500.0, ...}
+    """
+    try:
+        if is_capture_file(file_path):
+            data = read_capture(file_path).to_dict()
+        else:
+            data = _load_json_capture(file_path)
+
+        print(f" Loaded ECG data from: {file_path}")
+        print(f"   Leads loaded: {list(data.get('leads', {}).keys())}")
+        print(f"   Sampling rate: {data.get('sampling_rate', 80.0)} Hz")
+        return data
+    except Exception as e:
+        print(f" Error loading ECG data: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def find_latest_ecg_data_file(ecg_data_dir) -> Optional[str]:
+    """Newest ecg_data_* capture (binary or legacy JSON) in a directory, or None."""
+    if not os.path.isdir(ecg_data_dir):
+        return None
+    files = [
+        f for f in os.listdir(ecg_data_dir)
+        if f.startswith('ecg_data_') and f.endswith((CAPTURE_EXTENSION, '.json'))
+    ]
+    if not files:
+        return None
+    # Timestamped names sort chronologically; prefer the binary copy of a converted file
+    files.sort(key=lambda f: (os.path.splitext(f)[0], f.endswith(CAPTURE_EXTENSION)), reverse=True)
+    return os.path.join(ecg_data_dir, files[0])
+
+
+# ==================== JSON CONVERTERS ====================
+
+def convert_json_capture(json_path, output_path=None, compression=None, remove_source=False):
+    """
+    Convert a legacy JSON capture to the binary format.
+
+    Args:
+        json_path: Legacy reports/ecg_data/*.json file
+        output_path: Destination (defaults to the same name with .ecgb)
+        compression: None or 'zlib'
+        remove_source: Delete the JSON file after a successful conversion
+
+    Returns:
+        Path of the binary capture
+    """
+    data = _load_json_capture(json_path)
+    leads = data.get('leads', {})
+    names = [name for name in LEAD_NAMES if name in leads] + [name for name in leads if name not in LEAD_NAMES]
+    metadata = {k: v for k, v in data.items() if k not in ('leads', 'sampling_rate', 'timestamp')}
+    if output_path is None:
+        output_path = os.path.splitext(json_path)[0] + CAPTURE_EXTENSION
+    write_capture(output_path, leads, data.get('sampling_rate', 80.0), lead_names=names,
+                  compression=compression, timestamp=data.get('timestamp'), metadata=metadata)
+    if remove_source:
+        os.remove(json_path)
+    return output_path
+
+
+def convert_json_directory(directory, compression=None, remove_source=False) -> List[str]:
+    """
+    Convert every legacy JSON capture in a directory that has no binary copy yet.
+
+    Returns:
+        Paths of the binary captures written
+    """
+    converted = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        json_path = os.path.join(directory, name)
+        output_path = os.path.splitext(json_path)[0] + CAPTURE_EXTENSION
+        if os.path.exists(output_path):
+            continue
+        try:
+            converted.append(convert_json_capture(json_path, output_path, compression, remove_source))
+        except Exception as e:
+            print(f"⚠️ Could not convert {json_path}: {e}")
+    return converted
+
+
+def export_capture_to_json(capture_path, json_path=None):
+    """Write a binary capture back out in the legacy JSON layout."""
+    capture = read_capture(capture_path)
+    data = capture.to_dict()
+    data['leads'] = {name: np.asarray(samples).tolist() for name, samples in data['leads'].items()}
+    if json_path is None:
+        json_path = os.path.splitext(capture_path)[0] + '.json'
+    with open(json_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return json_path
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert legacy JSON ECG captures to the binary format")
+    parser.add_argument("paths", nargs="+", help="JSON capture files or directories (e.g. reports/ecg_data)")
+    parser.add_argument("--compress", action="store_true", help="zlib-compress the converted captures")
+    parser.add_argument("--remove-json", action="store_true", help="delete JSON files after converting")
+    args = parser.parse_args()
+
+    compression = "zlib" if args.compress else None
+    for target in args.paths:
+        if os.path.isdir(target):
+            outputs = convert_json_directory(target, compression, args.remove_json)
+        else:
+            outputs = [convert_json_capture(target, compression=compression, remove_source=args.remove_json)]
+        for output in outputs:
+            print(f"✅ {output}")
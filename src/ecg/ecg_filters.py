@@ -28,10 +28,17 @@ Usage:
 """
 
 import numpy as np
-from scipy.signal import butter, filtfilt, iirnotch, medfilt, find_peaks
-from scipy.ndimage import uniform_filter1d
+from functools import lru_cache
+from scipy.signal import butter, filtfilt, iirnotch, medfilt, find_peaks, tf2sos
+from scipy.ndimage import median_filter, uniform_filter1d
 from typing import Union, Optional, Tuple
 
+# Filter kinds understood by design_ecg_filter()
+FILTER_AC = "ac"
+FILTER_EMG = "emg"
+FILTER_DFT = "dft"
+FILTER_DISPLAY_LOWPASS = "display_lowpass"
+
 
 def normalize_adc_signal(signal: np.ndarray, preserve_amplitude: bool = True) -> np.ndarray:
     """
@@ -157,12 +164,78 @@ def sharpen_qrs_gated(ecg: np.ndarray, fs: float = 500.0, alpha: float = 0.3) ->
         return ecg
 
 
+@lru_cache(maxsize=128)
+def design_ecg_filter(kind: str, sampling_rate: float, setting: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Design (once) the IIR filter behind an ECG filter setting.
+
+    Coefficients are cached per (kind, sampling_rate, setting), so the live
+    display path and report generators no longer redesign the same filter on
+    every call.
+
+    Args:
+        kind: FILTER_AC, FILTER_EMG, FILTER_DFT or FILTER_DISPLAY_LOWPASS
+        sampling_rate: Sampling frequency in Hz
+        setting: Filter setting string as stored in settings ("50", "150", "0.5", ...)
+
+    Returns:
+        (b, a, sos) coefficients, or None if the filter is off or the cutoff
+        is invalid for this sampling rate. Treat the arrays as read-only.
+    """
+    if not setting or setting == "off":
+        return None
+
+    nyquist = sampling_rate / 2.0
+
+    if kind == FILTER_AC:
+        # Notch filter, Q=25 (reduced from 30 to avoid ringing)
+        notch_freq = float(setting)
+        w0 = notch_freq / nyquist
+        if w0 <= 0 or w0 >= 1:
+            print(f"⚠️ AC filter frequency {notch_freq}Hz is invalid for sampling rate {sampling_rate}Hz")
+            return None
+        b, a = iirnotch(w0, 25.0)
+        sos = tf2sos(b, a)
+    elif kind == FILTER_EMG:
+        # Use 35-40 Hz range for EMG suppression (low-pass, not high-pass)
+        cutoff_freq = min(max(float(setting), 35.0), 40.0)
+        normalized_cutoff = cutoff_freq / nyquist
+        if normalized_cutoff <= 0 or normalized_cutoff >= 1:
+            print(f"⚠️ EMG filter cutoff {cutoff_freq}Hz is invalid for sampling rate {sampling_rate}Hz")
+            return None
+        b, a = butter(4, normalized_cutoff, btype='low')
+        sos = butter(4, normalized_cutoff, btype='low', output='sos')
+    elif kind == FILTER_DFT:
+        # 2nd order high-pass Butterworth (gentle for baseline)
+        cutoff_freq = float(setting)
+        normalized_cutoff = cutoff_freq / nyquist
+        if normalized_cutoff <= 0 or normalized_cutoff >= 1:
+            print(f"⚠️ DFT filter cutoff {cutoff_freq}Hz is invalid for sampling rate {sampling_rate}Hz")
+            return None
+        b, a = butter(2, normalized_cutoff, btype='high')
+        sos = butter(2, normalized_cutoff, btype='high', output='sos')
+    elif kind == FILTER_DISPLAY_LOWPASS:
+        # 6th order low-pass used by the 12-lead display smoothing chain
+        cutoff_freq = float(setting)
+        normalized_cutoff = cutoff_freq / nyquist
+        if normalized_cutoff <= 0 or normalized_cutoff >= 1:
+            return None
+        b, a = butter(6, normalized_cutoff, btype='low')
+        sos = butter(6, normalized_cutoff, btype='low', output='sos')
+    else:
+        raise ValueError(f"Unknown ECG filter kind: {kind}")
+
+    for arr in (b, a, sos):
+        arr.setflags(write=False)
+    return b, a, sos
+
+
 def apply_ac_filter(signal: np.ndarray, sampling_rate: float, ac_filter: str) -> np.ndarray:
     """
     Apply AC (Notch) Filter to remove power line interference
     
     Args:
-        signal: Input ECG signal
+        signal: Input ECG signal, or an (n_leads, n) lead matrix (filtered along the last axis)
         sampling_rate: Sampling frequency in Hz
         ac_filter: "off", "50", or "60" (Hz)
     
@@ -173,25 +246,14 @@ def apply_ac_filter(signal: np.ndarray, sampling_rate: float, ac_filter: str) ->
         return signal
     
     try:
-        notch_freq = float(ac_filter)  # 50 or 60 Hz
-        
-        # Design notch filter (bandstop filter)
-        nyquist = sampling_rate / 2.0
-        quality_factor = 25.0  # Quality factor for notch filter (reduced from 30 to avoid ringing)
-        
-        # Normalize frequency
-        w0 = notch_freq / nyquist
-        
-        # Ensure frequency is within valid range (0 < w0 < 1)
-        if w0 <= 0 or w0 >= 1:
-            print(f"⚠️ AC filter frequency {notch_freq}Hz is invalid for sampling rate {sampling_rate}Hz")
+        # Cached IIR notch design (50 or 60 Hz, Q=25)
+        design = design_ecg_filter(FILTER_AC, float(sampling_rate), str(ac_filter))
+        if design is None:
             return signal
+        b, a, _ = design
         
-        # Design IIR notch filter
-        b, a = iirnotch(w0, quality_factor)
-        
-        # Apply filter (zero-phase filtering)
-        filtered_signal = filtfilt(b, a, signal)
+        # Apply filter (zero-phase filtering; every lead of a matrix in one call)
+        filtered_signal = filtfilt(b, a, signal, axis=-1)
         
         return filtered_signal
     
@@ -206,7 +268,7 @@ def apply_emg_filter(signal: np.ndarray, sampling_rate: float, emg_filter: str)
     CORRECTED: Uses 35-40 Hz low-pass instead of high-pass to preserve QRS while removing EMG noise.
     
     Args:
-        signal: Input ECG signal
+        signal: Input ECG signal, or an (n_leads, n) lead matrix (filtered along the last axis)
         sampling_rate: Sampling frequency in Hz
         emg_filter: Cutoff frequency - "25", "35", "40", "45", "75", "100", or "150" (Hz)
     
@@ -217,29 +279,14 @@ def apply_emg_filter(signal: np.ndarray, sampling_rate: float, emg_filter: str)
         return signal
     
     try:
-        cutoff_freq = float(emg_filter)
-        # Use 35-40 Hz range for EMG suppression (low-pass, not high-pass)
-        if cutoff_freq < 35:
-            cutoff_freq = 35.0
-        elif cutoff_freq > 40:
-            cutoff_freq = 40.0
-        
-        # Design low-pass Butterworth filter
-        nyquist = sampling_rate / 2.0
-        
-        # Normalize cutoff frequency
-        normalized_cutoff = cutoff_freq / nyquist
-        
-        # Ensure cutoff is within valid range
-        if normalized_cutoff <= 0 or normalized_cutoff >= 1:
-            print(f"⚠️ EMG filter cutoff {cutoff_freq}Hz is invalid for sampling rate {sampling_rate}Hz")
+        # Cached 4th order low-pass Butterworth, cutoff clamped to 35-40 Hz
+        design = design_ecg_filter(FILTER_EMG, float(sampling_rate), str(emg_filter))
+        if design is None:
             return signal
+        b, a, _ = design
         
-        # Design 4th order low-pass Butterworth filter (zero-phase)
-        b, a = butter(4, normalized_cutoff, btype='low')
-        
-        # Apply filter (zero-phase filtering)
-        filtered_signal = filtfilt(b, a, signal)
+        # Apply filter (zero-phase filtering; every lead of a matrix in one call)
+        filtered_signal = filtfilt(b, a, signal, axis=-1)
         
         return filtered_signal
     
@@ -253,7 +300,7 @@ def apply_dft_filter(signal: np.ndarray, sampling_rate: float, dft_filter: str)
     Apply DFT Filter (High-pass filter) to remove baseline wander
     
     Args:
-        signal: Input ECG signal
+        signal: Input ECG signal, or an (n_leads, n) lead matrix (filtered along the last axis)
         sampling_rate: Sampling frequency in Hz
         dft_filter: Cutoff frequency - "off", "0.05", or "0.5" (Hz)
     
@@ -264,24 +311,14 @@ def apply_dft_filter(signal: np.ndarray, sampling_rate: float, dft_filter: str)
         return signal
     
     try:
-        cutoff_freq = float(dft_filter)  # Low cutoff frequency (0.05 or 0.5 Hz)
-        
-        # Design high-pass Butterworth filter for baseline wander removal
-        nyquist = sampling_rate / 2.0
-        
-        # Normalize cutoff frequency
-        normalized_cutoff = cutoff_freq / nyquist
-        
-        # Ensure cutoff is within valid range
-        if normalized_cutoff <= 0 or normalized_cutoff >= 1:
-            print(f"⚠️ DFT filter cutoff {cutoff_freq}Hz is invalid for sampling rate {sampling_rate}Hz")
+        # Cached 2nd order high-pass Butterworth (0.05 or 0.5 Hz)
+        design = design_ecg_filter(FILTER_DFT, float(sampling_rate), str(dft_filter))
+        if design is None:
             return signal
+        b, a, _ = design
         
-        # Design 2nd order high-pass Butterworth filter (gentle for baseline)
-        b, a = butter(2, normalized_cutoff, btype='high')
-        
-        # Apply filter (zero-phase filtering)
-        filtered_signal = filtfilt(b, a, signal)
+        # Apply filter (zero-phase filtering; every lead of a matrix in one call)
+        filtered_signal = filtfilt(b, a, signal, axis=-1)
         
         return filtered_signal
     
@@ -348,21 +385,22 @@ def apply_ecg_filters(
     3. AC Filter (power line interference removal) - last
     
     Args:
-        signal: Input ECG signal (numpy array or list)
+        signal: Input ECG signal (numpy array or list), or an (n_leads, n) lead
+            matrix - every lead is filtered along the last axis in one call per stage
         sampling_rate: Sampling frequency in Hz (default: 500)
         ac_filter: AC filter setting - "off", "50", or "60"
         emg_filter: EMG filter setting - "25", "35", "45", "75", "100", "150"
         dft_filter: DFT filter setting - "off", "0.05", or "0.5"
     
     Returns:
-        Filtered signal as numpy array
+        Filtered signal as numpy array (same shape as the input)
     """
     # Convert to numpy array if needed
     if not isinstance(signal, np.ndarray):
         signal = np.array(signal, dtype=float)
     
     # Check minimum signal length
-    if len(signal) < 10:
+    if signal.shape[-1] < 10:
         return signal
     
     # Apply filters in correct order
@@ -383,6 +421,33 @@ def apply_ecg_filters(
     return filtered
 
 
+def median_mean_baseline_windows(sampling_rate: float, n_samples: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Kernel sizes of the median + mean baseline estimator.
+    
+    Args:
+        sampling_rate: Sampling frequency in Hz
+        n_samples: Length of a finite signal (windows are capped at half of it);
+            None for a stream
+    
+    Returns:
+        tuple: (median_window, mean_window) in samples; the median window is odd
+    """
+    # Median filter: 120 ms window - reduced from 200 ms to avoid QRS erosion
+    median_window = int(120.0 * sampling_rate / 1000.0)
+    # Moving average: 800 ms (middle of the 600-1000 ms range)
+    mean_window = int(800.0 * sampling_rate / 1000.0)
+    if n_samples is not None:
+        median_window = min(median_window, n_samples // 2)
+        mean_window = min(mean_window, n_samples // 2)
+    median_window = max(3, median_window)
+    
+    # Make window odd (required for median filter)
+    if median_window % 2 == 0:
+        median_window += 1
+    return median_window, max(10, mean_window)
+
+
 def apply_baseline_wander_median_mean(signal: np.ndarray, sampling_rate: float = 500) -> np.ndarray:
     """
     GOLD STANDARD: Median Filter + Mean Filter for baseline wander removal
@@ -403,36 +468,31 @@ def apply_baseline_wander_median_mean(signal: np.ndarray, sampling_rate: float =
     - Mean filter: 600-1000 ms (300-500 samples)
     
     Args:
-        signal: Input ECG signal
+        signal: Input ECG signal, or an (n_leads, n) lead matrix (filtered along the last axis)
         sampling_rate: Sampling frequency in Hz (default: 500)
     
     Returns:
         Clean ECG signal with baseline wander removed
+    
+    For the live stream, `StreamingMedianBaseline` (streaming_filters.py)
+    computes the same baseline sample by sample without re-filtering the buffer.
     """
-    if len(signal) < 50:  # Need minimum samples
-        return signal - np.mean(signal)
+    signal = np.asarray(signal)
+    if signal.shape[-1] < 50:  # Need minimum samples
+        return signal - np.mean(signal, axis=-1, keepdims=True)
     
     try:
-        # Step 1: Median filter (120 ms window - reduced from 200 ms to avoid QRS erosion)
-        median_window_ms = 120.0  # milliseconds
-        median_window = int(median_window_ms * sampling_rate / 1000.0)
-        median_window = max(3, min(median_window, len(signal) // 2))  # Ensure odd and reasonable
-        
-        # Make window odd (required for median filter)
-        if median_window % 2 == 0:
-            median_window += 1
+        median_window, mean_window = median_mean_baseline_windows(sampling_rate, signal.shape[-1])
         
-        # Apply median filter to remove QRS influence
-        b1 = medfilt(signal, kernel_size=median_window)
-        
-        # Step 2: Moving average (600-1000 ms window)
-        # Use 800 ms as middle value: 0.8 * Fs
-        mean_window_ms = 800.0  # milliseconds
-        mean_window = int(mean_window_ms * sampling_rate / 1000.0)
-        mean_window = max(10, min(mean_window, len(b1) // 2))  # Ensure reasonable
+        # Step 1: Median filter to remove QRS influence
+        if signal.ndim == 1:
+            b1 = medfilt(signal, kernel_size=median_window)
+        else:
+            # Lead matrix: median along time only (zero-padded ends, as medfilt)
+            b1 = median_filter(signal, size=(1,) * (signal.ndim - 1) + (median_window,), mode='constant')
         
-        # Apply moving average to smooth baseline
-        baseline = uniform_filter1d(b1.astype(float), size=mean_window, mode='nearest')
+        # Step 2: Moving average to smooth baseline
+        baseline = uniform_filter1d(b1.astype(float), size=mean_window, axis=-1, mode='nearest')
         
         # Step 3: Subtract baseline from original signal
         clean_ecg = signal - baseline
@@ -442,7 +502,7 @@ def apply_baseline_wander_median_mean(signal: np.ndarray, sampling_rate: float =
     except Exception as e:
         print(f"⚠️ Error applying median+mean baseline filter: {e}")
         # Fallback: simple mean subtraction
-        return signal - np.mean(signal)
+        return signal - np.mean(signal, axis=-1, keepdims=True)
 
 
 def notch_filter_butterworth(ecg: np.ndarray, fs: float, freq: float = 50.0, q: float = 25.0) -> np.ndarray:
@@ -665,7 +725,7 @@ def apply_ecg_filters_from_settings(
     Apply ECG filters using settings from SettingsManager
     
     Args:
-        signal: Input ECG signal
+        signal: Input ECG signal, or an (n_leads, n) lead matrix
         sampling_rate: Sampling frequency in Hz
         settings_manager: SettingsManager instance (optional, will create if not provided)
     
@@ -147,157 +147,40 @@ def _build_conservative_conclusions(metrics, settings_manager=None, sampling_rat
 
 # ==================== ECG DATA SAVE/LOAD FUNCTIONS ====================
 
-def save_ecg_data_to_file(ecg_test_page, output_file=None):
-    """
-    Save ECG data from ecg_test_page.data to a JSON file
-    Returns: path to saved file or None if failed
-    
-    Example:
-        saved_file = save_ecg_data_to_file(ecg_test_page)
-        # Saved to: reports/ecg_data/ecg_data_20241119_143022.json
-    """
-    from datetime import datetime
-    
-    if not ecg_test_page or not hasattr(ecg_test_page, 'data'):
-        print(" No ECG test page data available to save")
-        return None
-    
-    # Create output directory
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    ecg_data_dir = os.path.join(base_dir, 'reports', 'ecg_data')
-    os.makedirs(ecg_data_dir, exist_ok=True)
-    
-    # Generate filename with timestamp
-    if output_file is None:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = os.path.join(ecg_data_dir, f'ecg_data_{timestamp}.json')
-    
-    # Prepare data for saving
-    lead_names = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
-    
-    saved_data = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        "sampling_rate": 80.0,  # Default, will be updated if available
-        "leads": {}
-    }
-    
-    # Get sampling rate if available
-    if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler, 'sampling_rate'):
-        if ecg_test_page.sampler.sampling_rate:
-            saved_data["sampling_rate"] = float(ecg_test_page.sampler.sampling_rate)
-    
-    # Save each lead's data - use FULL buffer (ecg_buffers if available, otherwise data)
-    # Priority: Use ecg_buffers (5000 samples) if available, otherwise use data (1000 samples)
-    
-    # Debug: Check what attributes ecg_test_page has
-    print(f"🔍 DEBUG: ecg_test_page attributes check:")
-    print(f"   has ecg_buffers: {hasattr(ecg_test_page, 'ecg_buffers')}")
-    print(f"   has data: {hasattr(ecg_test_page, 'data')}")
-    print(f"   has ptrs: {hasattr(ecg_test_page, 'ptrs')}")
-    if hasattr(ecg_test_page, 'ecg_buffers'):
-        print(f"   ecg_buffers length: {len(ecg_test_page.ecg_buffers) if ecg_test_page.ecg_buffers else 0}")
-    if hasattr(ecg_test_page, 'data'):
-        print(f"   data length: {len(ecg_test_page.data) if ecg_test_page.data else 0}")
-        if ecg_test_page.data and len(ecg_test_page.data) > 0:
-            print(f"   data[0] length: {len(ecg_test_page.data[0]) if isinstance(ecg_test_page.data[0], (list, np.ndarray)) else 'N/A'}")
-    
-    for i, lead_name in enumerate(lead_names):
-        data_to_save = []
-        
-        # Priority 1: Try to use ecg_buffers (larger buffer, 5000 samples)
-        if hasattr(ecg_test_page, 'ecg_buffers') and i < len(ecg_test_page.ecg_buffers):
-            buffer = ecg_test_page.ecg_buffers[i]
-            if isinstance(buffer, np.ndarray) and len(buffer) > 0:
-                # Check if this is a rolling buffer with ptrs
-                if hasattr(ecg_test_page, 'ptrs') and i < len(ecg_test_page.ptrs):
-                    ptr = ecg_test_page.ptrs[i]
-                    window_size = getattr(ecg_test_page, 'window_size', 1000)
-                    
-                    # For report generation: use FULL buffer (5000 samples), not just window_size (1000)
-                    # Get all available data from buffer, starting from ptr
-                    if ptr + len(buffer) <= len(buffer):
-                        # No wrap needed: get from ptr to end, then from start to ptr
-                        part1 = buffer[ptr:].tolist()
-                        part2 = buffer[:ptr].tolist()
-                        data_to_save = part1 + part2  # Full circular buffer
-                    else:
-                        # Simple case: use all buffer data
-                        data_to_save = buffer.tolist()
-                else:
-                    # No ptrs: use ALL available data (full buffer)
-                    data_to_save = buffer.tolist()
-        
-        # Priority 2: Fallback to ecg_test_page.data (smaller buffer, 1000 samples)
-        if not data_to_save and i < len(ecg_test_page.data):
-            lead_data = ecg_test_page.data[i]
-            if isinstance(lead_data, np.ndarray):
-                # Use ALL available data (not just window_size)
-                data_to_save = lead_data.tolist()
-            elif isinstance(lead_data, (list, tuple)):
-                data_to_save = list(lead_data)
-        
-        saved_data["leads"][lead_name] = data_to_save if data_to_save else []
-    
-    # Check if we have sufficient data for report generation
-    sample_counts = [len(saved_data["leads"][lead]) for lead in saved_data["leads"] if saved_data["leads"][lead]]
-    if sample_counts:
-        max_samples = max(sample_counts)
-        min_samples = min(sample_counts)
-        print(f"📊 Buffer analysis: Max samples={max_samples}, Min samples={min_samples}")
-        
-        # Calculate expected samples for 13.2s window at current sampling rate
-        sampling_rate = saved_data.get("sampling_rate", 80.0)
-        expected_samples_for_13_2s = int(13.2 * sampling_rate)
-        
-        if max_samples < expected_samples_for_13_2s:
-            print(f" WARNING: Buffer has only {max_samples} samples, need {expected_samples_for_13_2s} for 13.2s window")
-            print(f"   Current time window: {max_samples/sampling_rate:.2f}s")
-            print(f"   Expected time window: 13.2s")
-            print(f"    TIP: Run ECG for at least 15-20 seconds to accumulate sufficient data")
-    
-    # Save to file
-    try:
-        with open(output_file, 'w') as f:
-            json.dump(saved_data, f, indent=2)
-        print(f"Saved ECG data to: {output_file}")
-        print(f"   Leads saved: {list(saved_data['leads'].keys())}")
-        print(f"   Sampling rate: {saved_data['sampling_rate']} Hz")
-        print(f"   Total data points per lead: {[len(saved_data['leads'][lead]) for lead in saved_data['leads']]}")
-        return output_file
-    except Exception as e:
-        print(f" Error saving ECG data: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+# Binary capture format (reports/ecg_data/*.ecgb); legacy JSON captures still load
+from .ecg_capture import save_ecg_data_to_file, load_ecg_data_from_file
+from .sampling_clock import resolve_sampling_rate
 
-def load_ecg_data_from_file(file_path):
+
+def _summarize_arrhythmia_events(events):
     """
-    Load ECG data from JSON file
-    Returns: dict with 'leads', 'sampling_rate', 'timestamp' or None if failed
-    
-    Example:
-        data = load_ecg_data_from_file('reports/ecg_data/ecg_data_20241119_143022.json')
-        # Returns: {'leads': {'I': [...], 'II': [...]}, 'sampling_rate': 80.0, ...}
+    One conclusion line from the session's Lead II arrhythmia episodes.
+
+    Args:
+        events: [(seconds since acquisition start, duration seconds, rhythm), ...]
+            (ECGTestPage.get_arrhythmia_events); consecutive windows of one
+            rhythm are already merged into one episode
+
+    Returns:
+        str, or None when there are no events
     """
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        # Convert lists back to numpy arrays
-        if 'leads' in data:
-            for lead_name in data['leads']:
-                if isinstance(data['leads'][lead_name], list):
-                    data['leads'][lead_name] = np.array(data['leads'][lead_name])
-        
-        print(f" Loaded ECG data from: {file_path}")
-        print(f"   Leads loaded: {list(data.get('leads', {}).keys())}")
-        print(f"   Sampling rate: {data.get('sampling_rate', 80.0)} Hz")
-        return data
-    except Exception as e:
-        print(f" Error loading ECG data: {e}")
-        import traceback
-        traceback.print_exc()
+    if not events:
         return None
+    counts = {}
+    totals = {}
+    first = {}
+    for start_s, duration_s, rhythm in events:
+        counts[rhythm] = counts.get(rhythm, 0) + 1
+        totals[rhythm] = totals.get(rhythm, 0.0) + duration_s
+        first.setdefault(rhythm, start_s)
+    parts = []
+    for rhythm in sorted(counts, key=lambda r: first[r]):
+        minutes, seconds = divmod(int(first[rhythm]), 60)
+        episodes = "episode" if counts[rhythm] == 1 else "episodes"
+        parts.append(f"{rhythm}: {counts[rhythm]} {episodes}, {int(round(totals[rhythm]))} s total "
+                     f"(first at {minutes:02d}:{seconds:02d})")
+    return "Arrhythmia events: " + "; ".join(parts)
+
 
 def calculate_time_window_from_bpm_and_wave_speed(hr_bpm, wave_speed_mm_s, desired_beats=6):
     """
@@ -1139,6 +1022,14 @@ def generate_ecg_report(
         sampling_rate=computed_sampling_rate,
         recording_duration=data.get("recording_duration") or data.get("duration")
     )
+    # Lead II arrhythmia events the ECG page already detected this session (no re-analysis)
+    try:
+        if ecg_test_page is not None and hasattr(ecg_test_page, 'get_arrhythmia_events'):
+            events_line = _summarize_arrhythmia_events(ecg_test_page.get_arrhythmia_events())
+            if events_line:
+                filtered_conclusions.insert(2, events_line)
+    except Exception as e:
+        print(f" Could not add arrhythmia events to conclusions: {e}")
     # Ensure max 12
     filtered_conclusions = filtered_conclusions[:12]
 
@@ -2784,9 +2675,7 @@ def generate_ecg_report(
 
     if (p_amp_mv<=0 or qrs_amp_mv<=0 or t_amp_mv<=0) and ecg_test_page is not None and hasattr(ecg_test_page,'data'):
         try:
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler,'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             arr = None
             if len(ecg_test_page.data)>1:
                 lead_ii = ecg_test_page.data[1]
@@ -2856,9 +2745,7 @@ def generate_ecg_report(
             lead_aVF = ecg_test_page.data[5] if len(ecg_test_page.data) > 5 else None
             
             # Get sampling rate
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler, 'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             
             if lead_I is not None and lead_aVF is not None:
                 # Convert to numpy arrays
@@ -3215,9 +3102,7 @@ def generate_ecg_report(
     if (rv5_amp<=0 or sv1_amp==0.0) and ecg_test_page is not None and hasattr(ecg_test_page,'data'):
         try:
             from scipy.signal import butter, filtfilt, find_peaks
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler,'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             def _get_last(arr):
                 return arr[-int(10*fs):] if arr is not None and len(arr)>int(10*fs) else arr
             # V5 index 10, V1 index 6 - Get RAW data
@@ -19,6 +19,11 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.patches as patches
 from .arrhythmia_detector import ArrhythmiaDetector
+from .arrhythmia_timeline import ArrhythmiaTimeline
+from .pqrst_analyzer import PQRSTAnalyzer
+from .sampling_clock import resolve_sampling_rate
+from .render_scheduler import get_render_scheduler
+from .waveform_pyramid import LeadHistory
 try:
     from .ecg_filters import extract_respiration, estimate_baseline_drift
 except ImportError:
@@ -36,192 +41,6 @@ except ImportError:
     measure_qrs_duration_from_median_beat = None
     measure_qt_from_median_beat = None
 
-class PQRSTAnalyzer:
-    """Analyze ECG signal to detect P, Q, R, S, T waves and calculate metrics"""
-    
-    def __init__(self, sampling_rate=500):
-        self.fs = sampling_rate
-        self.r_peaks = []
-        self.p_peaks = []
-        self.q_peaks = []
-        self.s_peaks = []
-        self.t_peaks = []
-        
-    def analyze_signal(self, signal):
-        """Analyze ECG signal and detect all wave components"""
-        try:
-            # Filter the signal
-            filtered_signal = self._filter_signal(signal)
-            
-            # Detect R peaks first
-            self.r_peaks = self._detect_r_peaks(filtered_signal)
-            
-            if len(self.r_peaks) > 0:
-                # Detect other waves based on R peaks
-                self.p_peaks = self._detect_p_waves(filtered_signal, self.r_peaks)
-                self.q_peaks = self._detect_q_waves(filtered_signal, self.r_peaks)
-                self.s_peaks = self._detect_s_waves(filtered_signal, self.r_peaks)
-                self.t_peaks = self._detect_t_waves(filtered_signal, self.r_peaks)
-            
-            return {
-                'r_peaks': self.r_peaks,
-                'p_peaks': self.p_peaks,
-                'q_peaks': self.q_peaks,
-                's_peaks': self.s_peaks,
-                't_peaks': self.t_peaks
-            }
-        except Exception as e:
-            print(f"Error in PQRST analysis: {e}")
-            return {'r_peaks': [], 'p_peaks': [], 'q_peaks': [], 's_peaks': [], 't_peaks': []}
-    
-    def _filter_signal(self, signal):
-        """Apply bandpass filter to ECG signal with improved error handling"""
-        try:
-            if len(signal) < 10:
-                return signal
-            
-            # Ensure sampling rate is valid
-            if self.fs <= 0 or self.fs > 10000:
-                print(f"⚠️ Invalid sampling rate: {self.fs} Hz, using default 80 Hz")
-                self.fs = 80.0
-            
-            nyq = 0.5 * self.fs
-            # Ensure filter frequencies are valid
-            low = max(0.01, 0.5 / nyq)  # At least 0.5 Hz
-            high = min(0.49, 40 / nyq)  # At most 40 Hz, but below Nyquist
-            
-            if low >= high:
-                # Invalid filter parameters, return unfiltered signal
-                print(f"⚠️ Invalid filter parameters: low={low}, high={high}, fs={self.fs}")
-                return signal
-            
-            b, a = butter(4, [low, high], btype='band')
-            
-            # Check if signal is long enough for filtering
-            if len(signal) < max(len(b), len(a)) * 3:
-                # Signal too short for filtering, return as is
-                return signal
-            
-            filtered = filtfilt(b, a, signal)
-            return filtered
-        except Exception as e:
-            print(f"⚠️ Error filtering signal: {e}, returning unfiltered signal")
-            return signal
-    
-    def _detect_r_peaks(self, signal):
-        """Detect R peaks using Pan-Tompkins algorithm with improved sensitivity for serial data"""
-        try:
-            if len(signal) < 10:
-                return []
-            
-            # Filter the signal first to reduce noise
-            filtered_signal = self._filter_signal(signal)
-            
-            # Differentiate
-            diff = np.ediff1d(filtered_signal)
-            # Square
-            squared = diff ** 2
-            
-            # Moving window integration - adaptive window size based on sampling rate
-            window_size = max(3, int(0.15 * self.fs))
-            if window_size > len(squared):
-                window_size = len(squared) // 4
-            if window_size < 1:
-                window_size = 1
-            
-            mwa = np.convolve(squared, np.ones(window_size)/window_size, mode='same')
-            
-            # Adaptive threshold - more lenient for serial data
-            mean_mwa = np.mean(mwa)
-            std_mwa = np.std(mwa)
-            
-            # Use lower threshold for better sensitivity (0.3 instead of 0.5)
-            threshold = mean_mwa + 0.3 * std_mwa
-            
-            # Minimum distance between peaks - adaptive based on expected heart rate
-            # Allow for heart rates from 40-200 bpm
-            min_distance_samples = max(3, int(0.2 * self.fs))  # At least 200ms between peaks
-            
-            # Try to find peaks with the threshold
-            peaks, properties = find_peaks(mwa, height=threshold, distance=min_distance_samples)
-            
-            # If no peaks found, try with lower threshold
-            if len(peaks) == 0 and len(mwa) > 0:
-                # Lower threshold to 0.1 * std for very sensitive detection
-                lower_threshold = mean_mwa + 0.1 * std_mwa
-                peaks, _ = find_peaks(mwa, height=lower_threshold, distance=min_distance_samples)
-            
-            # Additional check: if we have very few peaks but signal has variation, try even more lenient
-            if len(peaks) < 2 and len(mwa) > 50:
-                # Check if signal has significant variation (not flatline)
-                signal_variation = np.std(filtered_signal)
-                if signal_variation > 0.01:  # Signal has variation
-                    # Use even lower threshold
-                    very_low_threshold = mean_mwa + 0.05 * std_mwa
-                    peaks, _ = find_peaks(mwa, height=very_low_threshold, distance=max(2, min_distance_samples // 2))
-            
-            return peaks
-        except Exception as e:
-            print(f"Error in R peak detection: {e}")
-            return []
-    
-    def _detect_p_waves(self, signal, r_peaks):
-        """Detect P waves before R peaks"""
-        p_peaks = []
-        for r in r_peaks:
-            # Look for P wave 120-200ms before R peak for better accuracy
-            start = max(0, r - int(0.20 * self.fs))
-            end = max(0, r - int(0.12 * self.fs))
-            if end > start:
-                segment = signal[start:end]
-                if len(segment) > 0:
-                    p_idx = start + np.argmax(segment)
-                    p_peaks.append(p_idx)
-        return p_peaks
-    
-    def _detect_q_waves(self, signal, r_peaks):
-        """Detect Q waves (negative deflection before R)"""
-        q_peaks = []
-        for r in r_peaks:
-            # Look for Q wave up to 80ms before R peak
-            start = max(0, r - int(0.08 * self.fs))
-            end = r
-            if end > start:
-                segment = signal[start:end]
-                if len(segment) > 0:
-                    # Q wave is the minimum point between the P wave end and R peak
-                    q_idx = start + np.argmin(segment)
-                    q_peaks.append(q_idx)
-        return q_peaks
-    
-    def _detect_s_waves(self, signal, r_peaks):
-        """Detect S waves (negative deflection after R)"""
-        s_peaks = []
-        for r in r_peaks:
-            # Look for S wave up to 80ms after R peak
-            start = r
-            end = min(len(signal), r + int(0.08 * self.fs))
-            if end > start:
-                segment = signal[start:end]
-                if len(segment) > 0:
-                    s_idx = start + np.argmin(segment)
-                    s_peaks.append(s_idx)
-        return s_peaks
-    
-    def _detect_t_waves(self, signal, r_peaks):
-        """Detect T waves after S waves"""
-        t_peaks = []
-        for r in r_peaks:
-            # Look for T wave 100-300ms after R peak
-            start = min(len(signal), r + int(0.1 * self.fs))
-            end = min(len(signal), r + int(0.3 * self.fs))
-            if end > start:
-                segment = signal[start:end]
-                if len(segment) > 0:
-                    t_idx = start + np.argmax(segment)
-                    t_peaks.append(t_idx)
-        return t_peaks
-
 class MetricsCard(QFrame):
     """Individual metric card with color coding and animations"""
     
@@ -328,6 +147,10 @@ class MetricsCard(QFrame):
             if 350 <= self.value <= 450: return "NORMAL"
             elif self.value < 350: return "SHORT"
             else: return "PROLONGED"
+        elif self.title == "Respiration Rate" and self.value > 0:
+            if 12 <= self.value <= 20: return "NORMAL"
+            elif self.value < 12: return "BRADYPNEA"
+            else: return "TACHYPNEA"
         else:
             return "MEASURED"
     
@@ -335,7 +158,7 @@ class MetricsCard(QFrame):
         """Get color based on status"""
         status = self.get_status()
         if status == "NORMAL": return "#2ecc71"  # Green
-        if status in ["BRADYCARDIA", "TACHYCARDIA", "PROLONGED", "WIDE"]: return "#e74c3c"  # Red
+        if status in ["BRADYCARDIA", "TACHYCARDIA", "PROLONGED", "WIDE", "BRADYPNEA", "TACHYPNEA"]: return "#e74c3c"  # Red
         if status in ["SHORT", "NARROW"]: return "#f39c12" # Orange
         return "#3498db" # Blue
     
@@ -397,13 +220,9 @@ class ExpandedLeadView(QDialog):
         self.show_markers = False
         self.show_quality = True
 
-        # Store detected arrhythmia events as (time_seconds, label)
-        self.arrhythmia_events = []
-        
-        # Heat map + history view state
-        self.heatmap_overlay = None
-        self.heatmap_time_axis = None
-        self.heatmap_window_step = 1.0
+        # Arrhythmia heat map + events, one column per 2 s of history,
+        # appended as analysis windows complete them
+        self.arrhythmia_timeline = ArrhythmiaTimeline(self.arrhythmia_detector)
 
         # History view widgets (initialized later)
         self.history_slider = None
@@ -413,6 +232,21 @@ class ExpandedLeadView(QDialog):
         self.view_window_offset = 0.0
         self.manual_view = False
         self.history_slider_active = False
+        # Time zoom limits (Ctrl + mouse wheel); beat overlays are only drawn
+        # for windows up to detail_window_duration
+        self.min_window_duration = 2.0
+        self.detail_window_duration = 30.0
+
+        # Whole-session history of this lead as a min/max pyramid, backed by
+        # the parent's full-disclosure recording; filtered display versions are
+        # cached per view configuration. Scrubbing and zooming cost O(pixels).
+        self.history = LeadHistory(sampling_rate)
+        self._history_cursor = None
+        self._history_generation = None
+        self._history_origin = 0      # parent sample index of history sample 0
+        self._ecg_data_start = 0      # history index of self.ecg_data[0]
+        if not self._sync_history():
+            self.history.extend(self.ecg_data)
 
 	    # Demo mode settings - sync with parent's demo manager
         self.demo_mode_active = False
@@ -422,9 +256,10 @@ class ExpandedLeadView(QDialog):
             self.demo_manager = parent.demo_manager
             print(f"🎬 Expanded view: Demo mode is {'ON' if self.demo_mode_active else 'OFF'}")
         
-        # Live data update
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_live_data)
+        # Live data update (driven by the shared render scheduler, skipped while hidden)
+        self.timer = get_render_scheduler().view(
+            f"expanded_lead_{id(self)}", self.update_live_data, widget=self, fps=10, min_fps=4,
+            hidden_callback=self._sync_history, hidden_fps=2)
         self.is_live = False
         
         self.setWindowTitle(f"Detailed Analysis - {lead_name}")
@@ -532,11 +367,16 @@ class ExpandedLeadView(QDialog):
     # Mouse wheel event for amplification
 
     def wheelEvent(self, event):
-        """Handle mouse wheel scrolling for amplification"""
+        """Handle mouse wheel scrolling for amplification (Ctrl + wheel zooms the time window)"""
         try:
             # Get scroll direction
             delta = event.angleDelta().y()
             
+            if event.modifiers() & Qt.ControlModifier:
+                self.zoom_time_window(1.0 / 1.25 if delta > 0 else 1.25)
+                event.accept()
+                return
+            
             # Calculate amplification change
             if delta > 0:
                 # Scroll up = amplify (zoom in)
@@ -560,6 +400,19 @@ class ExpandedLeadView(QDialog):
         except Exception as e:
             print(f"Error in wheel event: {e}")
     
+    def zoom_time_window(self, factor):
+        """Scale the visible time window (2 s up to the whole history), keeping its right edge"""
+        fs = max(1.0, float(self.sampling_rate))
+        total_duration = self.history.total_samples / fs
+        old_end = self.view_window_offset + self.view_window_duration
+        longest = max(10.0, total_duration)
+        self.view_window_duration = float(np.clip(self.view_window_duration * factor,
+                                                  self.min_window_duration, longest))
+        if self.manual_view or self.history_slider_active:
+            self.view_window_offset = max(0.0, old_end - self.view_window_duration)
+        self.update_plot()
+        self.update_history_slider()
+
     def create_ecg_plot(self, parent_layout):
         """Create the ECG plot area"""
         plot_frame = QFrame()
@@ -1084,6 +937,7 @@ class ExpandedLeadView(QDialog):
             ("PR Interval", 0, "ms", "#8e44ad"),
             ("QRS Duration", 0, "ms", "#27ae60"),
             ("P Duration", 0, "ms", "#16a085"),
+            ("Respiration Rate", 0, "br/min", "#27ae60"),
         ]
         
         for i, (title, value, unit, color) in enumerate(metrics):
@@ -1099,6 +953,7 @@ class ExpandedLeadView(QDialog):
         self.update_metric('pr_interval', 0)
         self.update_metric('qrs_duration', 0)
         self.update_metric('p_duration', 0)
+        self.update_metric('respiration_rate', 0)
     
     def start_live_mode(self):
         """Start live data updates"""
@@ -1136,14 +991,9 @@ class ExpandedLeadView(QDialog):
             parent = self.parent()
             # Align sampling rate with parent so HR/RR match dashboard
             try:
-                if hasattr(parent, 'sampler') and getattr(parent.sampler, 'sampling_rate', 0):
-                    self.sampling_rate = float(parent.sampler.sampling_rate)
-                    self.analyzer.fs = self.sampling_rate
-                    self.arrhythmia_detector.fs = self.sampling_rate
-                elif hasattr(parent, 'sampling_rate') and parent.sampling_rate:
-                    self.sampling_rate = float(parent.sampling_rate)
-                    self.analyzer.fs = self.sampling_rate
-                    self.arrhythmia_detector.fs = self.sampling_rate
+                self.sampling_rate = resolve_sampling_rate(parent)
+                self.analyzer.fs = self.sampling_rate
+                self.arrhythmia_detector.fs = self.sampling_rate
             except Exception:
                 pass
             if hasattr(parent, 'data') and len(parent.data) > 0:
@@ -1156,11 +1006,24 @@ class ExpandedLeadView(QDialog):
                     if len(new_data) > 0:
                         # Store raw clinical data for analysis
                         self.ecg_data = np.array(new_data)
+                        self._sync_history()
+                        total_written = getattr(parent.data, 'total_written', len(new_data))
+                        self._ecg_data_start = total_written - len(new_data) - self._history_origin
+                        # Remember which data epoch this copy belongs to so the
+                        # analysis can be shared through the parent's cache
+                        cache = getattr(parent, 'analysis_cache', None)
+                        self._analysis_cache = cache
+                        self._data_epoch = cache.epoch(parent.data, self.sampling_rate) if cache is not None else None
                         # Only auto-advance if user hasn't manually positioned the slider
                         if not self.manual_view and not self.history_slider_active:
-                            total_duration = len(self.ecg_data) / max(1.0, self.sampling_rate)
+                            total_duration = self.history.total_samples / max(1.0, self.sampling_rate)
                             self.view_window_offset = max(0.0, total_duration - self.view_window_duration)
                         
+                        # Respiration rate is kept up to date by the parent's stream
+                        stream = self._live_respiration()
+                        if stream is not None:
+                            self.update_metric('respiration_rate', int(round(stream.rate(lead_index))))
+                        
                         # Update plot first (visual update)
                         self.update_plot()
                         
@@ -1191,6 +1054,104 @@ class ExpandedLeadView(QDialog):
         }
         return lead_mapping.get(self.lead_name)
     
+    def lead_disconnected(self):
+        """True while the parent page reports this lead's electrode as off (hardware lead-status flag)"""
+        connected = getattr(self._parent, 'leads_connected', None) if self._parent else None
+        lead_index = self.get_lead_index()
+        if connected is None or lead_index is None or lead_index >= len(connected):
+            return False
+        return not bool(connected[lead_index])
+    
+    def _sync_history(self):
+        """Append the parent's new samples of this lead to the history pyramid
+        
+        Returns:
+            True if the history follows the parent's live buffer
+        """
+        ring = getattr(self._parent, 'data', None) if self._parent is not None else None
+        lead_index = self.get_lead_index()
+        if ring is None or not hasattr(ring, 'read_since') or lead_index is None:
+            return False
+        try:
+            generation = ring.generation[0]
+            if (self._history_cursor is None or generation != self._history_generation
+                    or ring.total_written < self._history_cursor):
+                self._attach_history(ring, lead_index)
+                return True
+            block, _, cursor, skipped = ring.read_since(self._history_cursor)
+            if skipped:
+                # Fell behind the parent's buffer: take the missed samples from
+                # disk, else hold the last value across them
+                start = self.history.total_samples
+                missed = self._read_disclosure(start, start + skipped)
+                if missed is None or len(missed) != skipped:
+                    last = self.history.read(start - 1, start)
+                    missed = np.full(skipped, last[0] if len(last) else 0.0)
+                    print(f"⚠️ Expanded view history: {skipped} samples of {self.lead_name} unavailable")
+                self.history.extend(missed)
+            self.history.extend(block[lead_index])
+            self._history_cursor = cursor
+        except Exception as e:
+            print(f"⚠️ Expanded view history update failed: {e}")
+        return True
+
+    def _attach_history(self, ring, lead_index):
+        """Restart the history from the parent's buffer, back-filled from the full-disclosure recording"""
+        self.history.reset(backing=self._read_disclosure)
+        total = ring.total_written
+        filled = ring.filled
+        older = total - filled
+        # Parent samples before the buffer are only known from disk, and only
+        # from the first sample the recording maps to (it may start later)
+        first_recorded = None
+        if self._parent is not None and hasattr(self._parent, 'disclosure_first_index'):
+            first_recorded = self._parent.disclosure_first_index()
+        self._history_origin = older
+        if first_recorded is not None and first_recorded < older:
+            self._history_origin = first_recorded
+            backfill = self._read_disclosure(0, older - first_recorded)
+            if backfill is not None and len(backfill) == older - first_recorded:
+                self.history.extend(backfill)
+            else:
+                self._history_origin = older
+        if filled:
+            self.history.extend(ring.latest(filled)[lead_index])
+        self.arrhythmia_timeline.reset(time_offset=self._history_origin / max(1.0, float(self.sampling_rate)))
+        self._history_cursor = total
+        self._history_generation = ring.generation[0]
+        print(f"📊 Expanded view history for {self.lead_name}: {self.history.total_samples} samples "
+              f"({self.history.total_samples / max(1.0, self.sampling_rate):.0f}s)")
+
+    def _read_disclosure(self, start, stop):
+        """Samples [start, stop) of this lead (history indices) from the parent's full-disclosure recording
+        
+        History index h is parent sample h + _history_origin; the parent maps
+        that to the recording (which holds the published stream, not the
+        parent's sample count) and applies the live smoothing.
+        
+        Returns:
+            1-D array, or None when the range is not on disk
+        """
+        lead_index = self.get_lead_index()
+        if lead_index is None or stop <= start or self._parent is None:
+            return None
+        if not hasattr(self._parent, 'read_disclosure_history'):
+            return None
+        return self._parent.read_disclosure_history(lead_index, start + self._history_origin,
+                                                    stop + self._history_origin)
+
+    def _display_filter_config(self):
+        """(cache key, filter) of the current display pipeline, (None, None) for the unfiltered clinical view"""
+        if not self.use_clean_view:
+            return None, None
+        fs = float(self.sampling_rate)
+
+        def clean(signal):
+            signal = self._apply_display_bandpass(signal, fs=fs, low=0.05, high=40.0)
+            return self._remove_respiration_display(signal, fs=fs, window_sec=2.0)
+
+        return ("clean", round(fs, 1)), clean
+
     def _apply_display_bandpass(self, signal, fs=500.0, low=0.05, high=40.0, order=2):
         """Display-only bandpass to remove DC drift (<0.05 Hz) and very high freq noise."""
         if len(signal) < order * 3:
@@ -1213,8 +1174,12 @@ class ExpandedLeadView(QDialog):
             win = min(win, len(signal))
             if win < 3:
                 return signal
-            kernel = np.ones(win) / win
-            baseline = np.convolve(signal, kernel, mode="same")
+            # Same result as np.convolve(signal, ones(win) / win, mode="same"),
+            # in O(n) via a running sum instead of O(n * win)
+            n = len(signal)
+            csum = np.concatenate(([0.0], np.cumsum(signal, dtype=np.float64)))
+            j = np.arange(n) + (win - 1) // 2
+            baseline = (csum[np.minimum(j, n - 1) + 1] - csum[np.maximum(j - win + 1, 0)]) / win
             return signal - baseline
         except Exception:
             return signal
@@ -1312,9 +1277,47 @@ class ExpandedLeadView(QDialog):
         
         return (y_min, y_max)
     
+    def _live_respiration(self):
+        """The parent page's StreamingRespiration while it follows the parent's live buffer, else None"""
+        parent = self._parent
+        stream = getattr(parent, 'respiration', None) if parent is not None else None
+        data = getattr(parent, 'data', None) if parent is not None else None
+        if stream is None or data is None or stream.trace_data is None or stream.trace_data.filled == 0:
+            return None
+        if stream.total_samples != getattr(data, 'total_written', -1):
+            return None
+        return stream
+
+    def _respiration_window(self, start_idx, end_idx):
+        """Respiration waveform for history samples [start_idx, end_idx)
+        
+        Read from the parent's respiration stream (cost follows the window,
+        not the session); self.respiration_data (aligned with self.ecg_data)
+        is the fallback for data that does not come from the live stream.
+        
+        Returns:
+            Respiration array, or None when none is available
+        """
+        lead_index = self.get_lead_index()
+        stream = self._live_respiration()
+        if stream is not None and lead_index is not None and lead_index < stream.n_leads:
+            origin = self._history_origin
+            return stream.window(start_idx + origin, end_idx + origin, lead=lead_index)
+        if self.respiration_data is None:
+            return None
+        resp_start = max(0, start_idx - self._ecg_data_start)
+        resp_end = max(0, end_idx - self._ecg_data_start)
+        if len(self.respiration_data) > resp_end:
+            return self.respiration_data[resp_start:resp_end]
+        if len(self.respiration_data) > resp_start:
+            return self.respiration_data[resp_start:]
+        return self.respiration_data
+
     def extract_respiration_from_ecg(self, ecg_signal):
         """Extract respiration waveform from ECG signal (optional, for display).
-        Uses ecg_filters functions if available.
+        While the parent streams respiration and ecg_signal is the current
+        self.ecg_data, the stream's trace is returned instead of re-running
+        the ecg_filters batch functions.
         
         Args:
             ecg_signal: Raw ECG signal array
@@ -1322,6 +1325,11 @@ class ExpandedLeadView(QDialog):
         Returns:
             Respiration waveform array, or None if extraction fails
         """
+        if ecg_signal is self.ecg_data:
+            start = self._ecg_data_start
+            respiration = self._respiration_window(start, start + len(ecg_signal)) if self._live_respiration() else None
+            if respiration is not None:
+                return respiration
         if extract_respiration is None or estimate_baseline_drift is None:
             return None
         
@@ -1341,17 +1349,26 @@ class ExpandedLeadView(QDialog):
             return None
     
     def update_plot(self):
-        """Update the ECG plot with new data"""
-        if len(self.ecg_data) == 0:
+        """Update the ECG plot with new data
+        
+        The trace is the min/max envelope of the visible range taken from the
+        history pyramid (filtered version cached per display configuration),
+        so its cost follows the plot width, not the window length. Beat
+        overlays (median beat, TP baseline, markers) need full-resolution
+        samples and are only drawn up to detail_window_duration.
+        """
+        history = self.history
+        if history.total_samples == 0:
             return
         
         try:
-            total_samples = len(self.ecg_data)
-            window_samples = max(1, int(self.view_window_duration * self.sampling_rate))
+            fs = max(1.0, float(self.sampling_rate))
+            total_samples = history.total_samples
+            window_samples = max(1, int(self.view_window_duration * fs))
             if window_samples > total_samples:
                 window_samples = total_samples
 
-            total_duration = total_samples / max(1.0, self.sampling_rate)
+            total_duration = total_samples / fs
             max_offset = max(0.0, total_duration - self.view_window_duration)
             # If user manually positioned slider, keep that position
             if not self.manual_view and not self.history_slider_active:
@@ -1359,28 +1376,32 @@ class ExpandedLeadView(QDialog):
             else:
                 self.view_window_offset = min(self.view_window_offset, max_offset)
 
-            start_idx = int(self.view_window_offset * self.sampling_rate)
+            start_idx = int(self.view_window_offset * fs)
             end_idx = min(total_samples, start_idx + window_samples)
             if end_idx - start_idx <= 1:
                 return
-
-            window_signal = self.ecg_data[start_idx:end_idx]
-            
-            # Ensure we have valid data
-            if len(window_signal) == 0:
-                return
             
             # ---------------- DISPLAY-ONLY PIPELINE ----------------
-            # Clinical signal (raw) is untouched; display_signal is for plotting only.
-            display_signal = window_signal.copy()
+            # Clinical signal (raw) is untouched; the display version (clean view
+            # bandpass + respiration suppression) is cached by the history.
+            filter_key, filter_fn = self._display_filter_config()
+            try:
+                width = int(self.canvas.width())
+            except Exception:
+                width = 0
+            max_points = max(400, 2 * width) if width > 0 else 1600
             try:
-                # Mode toggle (default clean)
-                if self.use_clean_view:
-                    display_signal = self._apply_display_bandpass(display_signal, fs=self.sampling_rate, low=0.05, high=40.0)
-                    display_signal = self._remove_respiration_display(display_signal, fs=self.sampling_rate, window_sec=2.0)
-                # clinical view leaves display_signal untouched
+                trace_x, trace = history.envelope(start_idx, end_idx, max_points, key=filter_key, filter_fn=filter_fn)
             except Exception as filter_error:
                 print(f"⚠️ Expanded view display filter error: {filter_error}")
+                trace_x, trace = history.envelope(start_idx, end_idx, max_points)
+
+            detail = (end_idx - start_idx) <= int(self.detail_window_duration * fs)
+            window_signal = None
+            display_signal = None
+            if detail:
+                window_signal = history.read(start_idx, end_idx)
+                display_signal = history.read(start_idx, end_idx, key=filter_key, filter_fn=filter_fn)
             
             # ---------------- DISPLAY SCALING (apply gain ONCE, last) ----------------
             wave_gain_mm = 10.0
@@ -1391,15 +1412,22 @@ class ExpandedLeadView(QDialog):
                 wave_gain_mm = 10.0
             gain = wave_gain_mm / 10.0  # 10mm/mV = 1.0x baseline
 
-            display_signal = display_signal * gain * self.amplification
-            
-            # Create time array matching the signal length
-            time = np.arange(len(display_signal), dtype=float) / self.sampling_rate + (start_idx / self.sampling_rate)
+            trace = np.asarray(trace, dtype=float) * gain * self.amplification
+            trace_time = trace_x / fs
+            if display_signal is not None:
+                display_signal = display_signal * gain * self.amplification
+                # Full-resolution time axis of the window (beat overlays)
+                time = np.arange(len(display_signal), dtype=float) / fs + (start_idx / fs)
+            else:
+                time = trace_time
+            t_start, t_end = start_idx / fs, (end_idx - 1) / fs
 
             # 🏥 Y-axis: percentile target with EMA smoothing (calm, paper-like)
             # Reduced multiplier for smaller wave display
-            if len(display_signal) > 0:
-                p99 = np.percentile(np.abs(display_signal), 99)
+            scale_source = display_signal if display_signal is not None else trace
+            scale_source = scale_source[~np.isnan(scale_source)]
+            if len(scale_source) > 0:
+                p99 = np.percentile(np.abs(scale_source), 99)
             else:
                 p99 = 1.0
             p99 = max(0.2, p99)
@@ -1414,44 +1442,29 @@ class ExpandedLeadView(QDialog):
 
             self.ax.clear()
 
-            # Heat map overlay behind waveform
-            if (
-                self.heatmap_overlay is not None
-                and self.heatmap_time_axis is not None
-                and len(self.heatmap_time_axis) > 0
-            ):
-                window_half = max(0.001, self.heatmap_window_step / 2.0)
-                extent = [
-                    self.heatmap_time_axis[0] - window_half,
-                    self.heatmap_time_axis[-1] + window_half,
-                    -ylim_val,
-                    ylim_val,
-                ]
+            # Heat map overlay behind waveform (visible columns only)
+            heatmap, heatmap_span = self.arrhythmia_timeline.overlay_for(t_start, t_end)
+            if heatmap is not None:
+                extent = [heatmap_span[0], heatmap_span[1], -ylim_val, ylim_val]
                 self.ax.imshow(
-                    self.heatmap_overlay,
+                    heatmap,
                     extent=extent,
                     aspect='auto',
                     origin='lower',
                     interpolation='nearest',
                     zorder=0,
                 )
-
-            # Ensure time and display_signal arrays have matching lengths
-            if len(time) != len(display_signal):
-                min_len = min(len(time), len(display_signal))
-                time = time[:min_len]
-                display_signal = display_signal[:min_len]
             
             # Only plot if we have valid data
             waveform_alpha = 1.0
             quality_text = None
-            if len(display_signal) > 0:
+            if len(trace) > 0:
                 # Remove NaN values for plotting (replace with interpolation or skip)
-                valid_mask = ~np.isnan(display_signal)
+                valid_mask = ~np.isnan(trace)
                 if np.any(valid_mask):
                     # Simple beat quality: peak-to-peak vs threshold
                     try:
-                        ptp = np.ptp(display_signal[valid_mask])
+                        ptp = np.ptp(trace[valid_mask])
                         if self.show_quality and ptp < 0.15:
                             waveform_alpha = 0.4
                             quality_text = "Quality: Noisy/Low"
@@ -1462,21 +1475,20 @@ class ExpandedLeadView(QDialog):
                     # Plot only valid points
                     if np.all(valid_mask):
                         # All data is valid - plot normally
-                        self.ax.plot(time, display_signal, color='#0984e3', linewidth=0.7, label='ECG Signal', zorder=1, alpha=waveform_alpha)
+                        self.ax.plot(trace_time, trace, color='#0984e3', linewidth=0.7, label='ECG Signal', zorder=1, alpha=waveform_alpha)
                     else:
                         # Some NaN values - plot segments
-                        time_valid = time[valid_mask]
-                        scaled_valid = display_signal[valid_mask]
+                        time_valid = trace_time[valid_mask]
+                        scaled_valid = trace[valid_mask]
                         if len(time_valid) > 1:
                             self.ax.plot(time_valid, scaled_valid, color='#0984e3', linewidth=0.7, label='ECG Signal', zorder=1, alpha=waveform_alpha)
                 else:
                     print(f"⚠️ All data is NaN in expanded view for lead {self.lead_name}")
             else:
-                print(f"⚠️ No data to plot in expanded view for lead {self.lead_name}: len={len(display_signal)}")
+                print(f"⚠️ No data to plot in expanded view for lead {self.lead_name}: len={len(trace)}")
             
             # Overlay vertical markers at detected arrhythmia event times within the visible window
             if hasattr(self, "arrhythmia_events") and self.arrhythmia_events:
-                t_start, t_end = time[0], time[-1]
                 for evt_time, evt_label in self.arrhythmia_events:
                     if t_start <= evt_time <= t_end:
                         # Vertical dashed red line
@@ -1509,11 +1521,7 @@ class ExpandedLeadView(QDialog):
                 color='#2c3e50'
             )
             
-            # Set x-limits only if we have valid time data
-            if len(time) > 0:
-                self.ax.set_xlim(time[0], time[-1])
-            else:
-                self.ax.set_xlim(0, 1)  # Fallback
+            self.ax.set_xlim(t_start, t_end)
             
             self.ax.grid(True, which='both', linestyle='--', linewidth=0.5, color='#bdc3c7')
             self.ax.spines['top'].set_visible(False)
@@ -1523,7 +1531,7 @@ class ExpandedLeadView(QDialog):
             
             # Median beat overlay (display-only)
             try:
-                if self.show_median_overlay and len(display_signal) > 0:
+                if detail and self.show_median_overlay and len(display_signal) > 0:
                     r_peaks_local = self.analyzer._detect_r_peaks(window_signal)
                     t_median, median_beat = self._compute_median_beat(display_signal, r_peaks_local, self.sampling_rate)
                     if t_median is not None and median_beat is not None and len(t_median) == len(median_beat):
@@ -1537,7 +1545,7 @@ class ExpandedLeadView(QDialog):
 
             # Isoelectric baseline (TP segment estimate, display units)
             try:
-                if len(display_signal) > 0:
+                if detail and len(display_signal) > 0:
                     r_peaks_local = self.analyzer._detect_r_peaks(window_signal)
                     tp_samples = []
                     pre_tp = int(0.35 * self.sampling_rate)
@@ -1556,7 +1564,7 @@ class ExpandedLeadView(QDialog):
 
             # Measurement markers (optional)
             try:
-                if self.show_markers:
+                if detail and self.show_markers:
                     analysis_local = self.analyzer.analyze_signal(window_signal)
                     r_peaks = analysis_local.get("r_peaks", [])
                     p_peaks = analysis_local.get("p_peaks", [])
@@ -1585,16 +1593,9 @@ class ExpandedLeadView(QDialog):
             # Respiration uses percentile-based dynamic Y-limits (not fixed like ECG)
             # This prevents cropping while ECG keeps its fixed Y-axis
             # No median centering, no EMA clamping - just percentile-based scaling
-            if self.show_respiration and hasattr(self, 'respiration_data') and self.respiration_data is not None:
+            respiration_window = self._respiration_window(start_idx, end_idx) if detail and self.show_respiration else None
+            if respiration_window is not None:
                 try:
-                    # Extract respiration window matching ECG window
-                    if len(self.respiration_data) > end_idx:
-                        respiration_window = self.respiration_data[start_idx:end_idx]
-                    elif len(self.respiration_data) > start_idx:
-                        respiration_window = self.respiration_data[start_idx:]
-                    else:
-                        respiration_window = self.respiration_data
-                    
                     # Ensure respiration window matches time array length
                     if len(respiration_window) > len(time):
                         respiration_window = respiration_window[:len(time)]
@@ -1657,6 +1658,7 @@ class ExpandedLeadView(QDialog):
     def closeEvent(self, event):
         """Handle window close event"""
         self.stop_live_mode()
+        self.timer.deleteLater()
         event.accept()
 
     # Start/Stop Acquisition from Expanded Lead View
@@ -1793,6 +1795,17 @@ class ExpandedLeadView(QDialog):
         
         parent_layout.addWidget(arrhythmia_frame)
     
+    def _analyze_signal_cached(self):
+        """PQRST analysis of self.ecg_data, shared per data epoch while following live data"""
+        cache = getattr(self, '_analysis_cache', None)
+        epoch = getattr(self, '_data_epoch', None)
+        lead_index = self.get_lead_index()
+        if cache is None or epoch is None or lead_index is None:
+            return self.analyzer.analyze_signal(self.ecg_data)
+        ecg_data = self.ecg_data
+        return cache.get('pqrst', epoch, lead_index, self.sampling_rate,
+                         lambda: self.analyzer.analyze_signal(ecg_data))
+
     def analyze_ecg(self):
         """Analyze the ECG signal and update metrics"""
         if self.ecg_data.size == 0:
@@ -1808,8 +1821,14 @@ class ExpandedLeadView(QDialog):
                     self.arrhythmia_list.setText("Collecting data...")
                 return
             
+            # No PQRST / arrhythmia analysis on a lead whose electrode is off
+            if self.lead_disconnected():
+                if hasattr(self, 'arrhythmia_list'):
+                    self.arrhythmia_list.setText("Lead off - check electrode connection.")
+                return
+            
             # Analyze signal for PQRST waves
-            analysis = self.analyzer.analyze_signal(self.ecg_data)
+            analysis = self._analyze_signal_cached()
             self.calculate_metrics(analysis)
             
             # Check if serial data has actually started flowing (not just initial state)
@@ -1841,28 +1860,12 @@ class ExpandedLeadView(QDialog):
             print(f"📊 Arrhythmia detection result for {self.lead_name}: {arrhythmias}")
             self.update_arrhythmia_display(arrhythmias)
             
-            # Generate heat map data (optional - don't break if method doesn't exist)
+            # Extend the heat map with the windows this analysis completes
             try:
-                if len(analysis.get('r_peaks', [])) > 0:
-                    # Check if method exists before calling
-                    if hasattr(self.arrhythmia_detector, 'detect_arrhythmias_with_probabilities'):
-                        heat_map_data = self.arrhythmia_detector.detect_arrhythmias_with_probabilities(
-                            self.ecg_data, analysis['r_peaks'], window_size=2.0
-                        )
-                        self.prepare_heatmap_overlay(heat_map_data)
-                    else:
-                        # Method doesn't exist, clear heatmap
-                        self.heatmap_overlay = None
-                        self.heatmap_time_axis = None
-                else:
-                    # No R-peaks detected, clear heatmap
-                    self.heatmap_overlay = None
-                    self.heatmap_time_axis = None
+                self.prepare_heatmap_overlay(analysis, has_received_serial_data=has_received_serial_data)
             except Exception as heatmap_error:
                 # Heatmap is optional - don't break arrhythmia display
                 print(f"⚠️ Heatmap generation error (non-critical): {heatmap_error}")
-                self.heatmap_overlay = None
-                self.heatmap_time_axis = None
             
             self.update_plot_with_markers(analysis)
             
@@ -1881,7 +1884,7 @@ class ExpandedLeadView(QDialog):
                 if len(self.ecg_data) > 0:
                     # Try to get r_peaks from analyzer if analysis failed
                     try:
-                        temp_analysis = self.analyzer.analyze_signal(self.ecg_data)
+                        temp_analysis = self._analyze_signal_cached()
                         r_peaks = temp_analysis.get('r_peaks', [])
                     except:
                         r_peaks = []
@@ -2136,82 +2139,27 @@ class ExpandedLeadView(QDialog):
         except Exception as e:
             print(f"Error updating plot markers: {e}")
 
-    def prepare_heatmap_overlay(self, heat_map_data):
-        """Convert arrhythmia probabilities into a background overlay and record event times."""
-        # Clear previous events each time we recompute the heatmap
-        self.arrhythmia_events = []
-
-        colors = {
-            "Normal Sinus Rhythm": "#2ecc71",
-            "Atrial Fibrillation": "#e74c3c",
-            "Ventricular Tachycardia": "#8e44ad",
-            "Premature Ventricular Contractions": "#f39c12",
-            "Sinus Bradycardia": "#3498db",
-            "Sinus Tachycardia": "#e67e22",
-            "Irregular Rhythm": "#95a5a6"
-        }
-        arrhythmia_types = list(colors.keys())
-
-        if not heat_map_data:
-            self.heatmap_overlay = None
-            self.heatmap_time_axis = None
-            return
-
-        # Pick any available series to establish window count/time axis
-        base_series = None
-        for arr_type in arrhythmia_types:
-            series = heat_map_data.get(arr_type)
-            if series:
-                base_series = series
-                break
-
-        if not base_series:
-            self.heatmap_overlay = None
-            self.heatmap_time_axis = None
-            return
-
-        num_windows = len(base_series)
-        overlay = np.ones((120, num_windows, 4))
-        time_axis = []
+    def prepare_heatmap_overlay(self, analysis, has_received_serial_data=False):
+        """Append heat map columns (and arrhythmia events) for the windows this analysis completes
+        
+        Columns already classified are kept, so the cost per analysis pass is
+        the few new 2 s windows, not the whole session. The timeline belongs to
+        this view (shading only); report events come from the ECG page's own
+        Lead II timeline.
+        """
+        return self.arrhythmia_timeline.update(self.ecg_data, self._ecg_data_start, analysis,
+                                               has_received_serial_data=has_received_serial_data)
 
-        for idx in range(num_windows):
-            time_value = base_series[idx][0] if idx < len(base_series) else idx * 2.0
-            time_axis.append(time_value)
-            
-            best_type = "Irregular Rhythm"
-            best_prob = 0.0
-            for arr_type in arrhythmia_types:
-                arr_list = heat_map_data.get(arr_type, [])
-                if idx < len(arr_list):
-                    _, prob = arr_list[idx]
-                    if prob > best_prob:
-                        best_prob = prob
-                        best_type = arr_type
-
-            color_hex = colors.get(best_type, "#95a5a6")
-            rgb = tuple(int(color_hex[i:i+2], 16) / 255.0 for i in (1, 3, 5))
-            opacity = 0.2 + 0.8 * max(0.0, min(1.0, best_prob))
-            overlay[:, idx, 0] = rgb[0]
-            overlay[:, idx, 1] = rgb[1]
-            overlay[:, idx, 2] = rgb[2]
-            overlay[:, idx, 3] = opacity
-
-            # Record an arrhythmia event when a non-normal rhythm dominates this window
-            if best_type != "Normal Sinus Rhythm" and best_prob >= 0.7:
-                self.arrhythmia_events.append((float(time_value), best_type))
-        self.heatmap_overlay = overlay
-        self.heatmap_time_axis = np.array(time_axis)
-        if len(self.heatmap_time_axis) > 1:
-            diffs = np.diff(self.heatmap_time_axis)
-            self.heatmap_window_step = max(0.1, float(np.median(diffs)))
-        else:
-            self.heatmap_window_step = 2.0
+    @property
+    def arrhythmia_events(self):
+        """Start of each detected arrhythmia episode as (time_seconds on the history axis, rhythm)"""
+        return self.arrhythmia_timeline.events
 
     def update_history_slider(self):
         """Adjust slider bounds to match available history"""
         if not hasattr(self, 'history_slider'):
             return
-        total_duration = len(self.ecg_data) / max(1.0, self.sampling_rate)
+        total_duration = self.history.total_samples / max(1.0, self.sampling_rate)
         max_offset = max(0.0, total_duration - self.view_window_duration)
         slider_max = int(max_offset * 1000)
         current_val = int(min(self.view_window_offset, max_offset) * 1000)
@@ -2241,7 +2189,7 @@ class ExpandedLeadView(QDialog):
         print(f"📊 View window offset set to: {self.view_window_offset:.2f}s")
         self.update_plot()
         if self.history_slider_label:
-            total_duration = len(self.ecg_data) / max(1.0, self.sampling_rate)
+            total_duration = self.history.total_samples / max(1.0, self.sampling_rate)
             start_time = max(0.0, min(self.view_window_offset, total_duration))
             end_time = min(start_time + self.view_window_duration, total_duration)
             self.history_slider_label.setText(f"{start_time:0.1f}s – {end_time:0.1f}s")
@@ -2255,8 +2203,8 @@ class ExpandedLeadView(QDialog):
         if self.history_slider_label:
             self.history_slider_label.setText("LIVE")
         # Update plot to show latest data
-        if len(self.ecg_data) > 0:
-            total_duration = len(self.ecg_data) / max(1.0, self.sampling_rate)
+        if self.history.total_samples > 0:
+            total_duration = self.history.total_samples / max(1.0, self.sampling_rate)
             self.view_window_offset = max(0.0, total_duration - self.view_window_duration)
             self.update_plot()
             self.update_history_slider()
@@ -19,157 +19,11 @@ matplotlib.use('Agg')
 
 # ==================== ECG DATA SAVE/LOAD FUNCTIONS ====================
 
-def save_ecg_data_to_file(ecg_test_page, output_file=None):
-    """
-    Save ECG data from ecg_test_page.data to a JSON file
-    Returns: path to saved file or None if failed
-    
-    Example:
-        saved_file = save_ecg_data_to_file(ecg_test_page)
-        # Saved to: reports/ecg_data/ecg_data_20241119_143022.json
-    """
-    from datetime import datetime
-    
-    if not ecg_test_page or not hasattr(ecg_test_page, 'data'):
-        print(" No ECG test page data available to save")
-        return None
-    
-    # Create output directory
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    ecg_data_dir = os.path.join(base_dir, 'reports', 'ecg_data')
-    os.makedirs(ecg_data_dir, exist_ok=True)
-    
-    # Generate filename with timestamp
-    if output_file is None:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = os.path.join(ecg_data_dir, f'ecg_data_{timestamp}.json')
-    
-    # Prepare data for saving
-    lead_names = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
-    
-    saved_data = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        "sampling_rate": 80.0,  # Default, will be updated if available
-        "leads": {}
-    }
-    
-    # Get sampling rate if available
-    if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler, 'sampling_rate'):
-        if ecg_test_page.sampler.sampling_rate:
-            saved_data["sampling_rate"] = float(ecg_test_page.sampler.sampling_rate)
-    
-    # Save each lead's data - use FULL buffer (ecg_buffers if available, otherwise data)
-    # Priority: Use ecg_buffers (5000 samples) if available, otherwise use data (1000 samples)
-    
-    # Debug: Check what attributes ecg_test_page has
-    print(f"🔍 DEBUG: ecg_test_page attributes check:")
-    print(f"   has ecg_buffers: {hasattr(ecg_test_page, 'ecg_buffers')}")
-    print(f"   has data: {hasattr(ecg_test_page, 'data')}")
-    print(f"   has ptrs: {hasattr(ecg_test_page, 'ptrs')}")
-    if hasattr(ecg_test_page, 'ecg_buffers'):
-        print(f"   ecg_buffers length: {len(ecg_test_page.ecg_buffers) if ecg_test_page.ecg_buffers else 0}")
-    if hasattr(ecg_test_page, 'data'):
-        print(f"   data length: {len(ecg_test_page.data) if ecg_test_page.data else 0}")
-        if ecg_test_page.data and len(ecg_test_page.data) > 0:
-            print(f"   data[0] length: {len(ecg_test_page.data[0]) if isinstance(ecg_test_page.data[0], (list, np.ndarray)) else 'N/A'}")
-    
-    for i, lead_name in enumerate(lead_names):
-        data_to_save = []
-        
-        # Priority 1: Try to use ecg_buffers (larger buffer, 5000 samples)
-        if hasattr(ecg_test_page, 'ecg_buffers') and i < len(ecg_test_page.ecg_buffers):
-            buffer = ecg_test_page.ecg_buffers[i]
-            if isinstance(buffer, np.ndarray) and len(buffer) > 0:
-                # Check if this is a rolling buffer with ptrs
-                if hasattr(ecg_test_page, 'ptrs') and i < len(ecg_test_page.ptrs):
-                    ptr = ecg_test_page.ptrs[i]
-                    window_size = getattr(ecg_test_page, 'window_size', 1000)
-                    
-                    # For report generation: use FULL buffer (5000 samples), not just window_size (1000)
-                    # Get all available data from buffer, starting from ptr
-                    if ptr + len(buffer) <= len(buffer):
-                        # No wrap needed: get from ptr to end, then from start to ptr
-                        part1 = buffer[ptr:].tolist()
-                        part2 = buffer[:ptr].tolist()
-                        data_to_save = part1 + part2  # Full circular buffer
-                    else:
-                        # Simple case: use all buffer data
-                        data_to_save = buffer.tolist()
-                else:
-                    # No ptrs: use ALL available data (full buffer)
-                    data_to_save = buffer.tolist()
-        
-        # Priority 2: Fallback to ecg_test_page.data (smaller buffer, 1000 samples)
-        if not data_to_save and i < len(ecg_test_page.data):
-            lead_data = ecg_test_page.data[i]
-            if isinstance(lead_data, np.ndarray):
-                # Use ALL available data (not just window_size)
-                data_to_save = lead_data.tolist()
-            elif isinstance(lead_data, (list, tuple)):
-                data_to_save = list(lead_data)
-        
-        saved_data["leads"][lead_name] = data_to_save if data_to_save else []
-    
-    # Check if we have sufficient data for report generation
-    sample_counts = [len(saved_data["leads"][lead]) for lead in saved_data["leads"] if saved_data["leads"][lead]]
-    if sample_counts:
-        max_samples = max(sample_counts)
-        min_samples = min(sample_counts)
-        print(f"📊 Buffer analysis: Max samples={max_samples}, Min samples={min_samples}")
-        
-        # Calculate expected samples for 13.2s window at current sampling rate
-        sampling_rate = saved_data.get("sampling_rate", 80.0)
-        expected_samples_for_13_2s = int(13.2 * sampling_rate)
-        
-        if max_samples < expected_samples_for_13_2s:
-            print(f" WARNING: Buffer has only {max_samples} samples, need {expected_samples_for_13_2s} for 13.2s window")
-            print(f"   Current time window: {max_samples/sampling_rate:.2f}s")
-            print(f"   Expected time window: 13.2s")
-            print(f"    TIP: Run ECG for at least 15-20 seconds to accumulate sufficient data")
-    
-    # Save to file
-    try:
-        with open(output_file, 'w') as f:
-            json.dump(saved_data, f, indent=2)
-        print(f"Saved ECG data to: {output_file}")
-        print(f"   Leads saved: {list(saved_data['leads'].keys())}")
-        print(f"   Sampling rate: {saved_data['sampling_rate']} Hz")
-        print(f"   Total data points per lead: {[len(saved_data['leads'][lead]) for lead in saved_data['leads']]}")
-        return output_file
-    except Exception as e:
-        print(f" Error saving ECG data: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+# Binary capture format (reports/ecg_data/*.ecgb); legacy JSON captures still load
+from .ecg_capture import save_ecg_data_to_file, load_ecg_data_from_file
+from .sampling_clock import resolve_sampling_rate
+from .timed_signal import as_timed_signal
 
-def load_ecg_data_from_file(file_path):
-    """
-    Load ECG data from JSON file
-    Returns: dict with 'leads', 'sampling_rate', 'timestamp' or None if failed
-    
-    Example:
-        data = load_ecg_data_from_file('reports/ecg_data/ecg_data_20241119_143022.json')
-        # Returns: {'leads': {'I': [...], 'II': [...]}, 'sampling_rate': 80.0, ...}
-    """
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        # Convert lists back to numpy arrays
-        if 'leads' in data:
-            for lead_name in data['leads']:
-                if isinstance(data['leads'][lead_name], list):
-                    data['leads'][lead_name] = np.array(data['leads'][lead_name])
-        
-        print(f" Loaded ECG data from: {file_path}")
-        print(f"   Leads loaded: {list(data.get('leads', {}).keys())}")
-        print(f"   Sampling rate: {data.get('sampling_rate', 80.0)} Hz")
-        return data
-    except Exception as e:
-        print(f" Error loading ECG data: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
 
 def calculate_time_window_from_bpm_and_wave_speed(hr_bpm, wave_speed_mm_s, desired_beats=6):
     """
@@ -2421,9 +2275,7 @@ def generate_ecg_report(filename="ecg_report.pdf", data=None, lead_images=None,
 
     if (p_amp_mv<=0 or qrs_amp_mv<=0 or t_amp_mv<=0) and ecg_test_page is not None and hasattr(ecg_test_page,'data'):
         try:
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler,'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             arr = None
             if len(ecg_test_page.data)>1:
                 lead_ii = ecg_test_page.data[1]
@@ -2452,9 +2304,7 @@ def generate_ecg_report(filename="ecg_report.pdf", data=None, lead_images=None,
             lead_aVF = ecg_test_page.data[5] if len(ecg_test_page.data) > 5 else None
             
             # Get sampling rate
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler, 'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             
             if lead_I is not None and lead_aVF is not None:
                 # Convert to numpy arrays
@@ -2794,9 +2644,7 @@ def generate_ecg_report(filename="ecg_report.pdf", data=None, lead_images=None,
     if (rv5_amp<=0 or sv1_amp==0.0) and ecg_test_page is not None and hasattr(ecg_test_page,'data'):
         try:
             from scipy.signal import butter, filtfilt, find_peaks
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler,'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             def _get_last(arr):
                 return arr[-int(10*fs):] if arr is not None and len(arr)>int(10*fs) else arr
             # V5 index 10, V1 index 6 - Get RAW data
@@ -3339,7 +3187,8 @@ def generate_ecg_report(filename="ecg_report.pdf", data=None, lead_images=None,
 # ==================== HRV ECG REPORT GENERATION ====================
 # COMPLETE ECG REPORT FORMAT - Same as generate_ecg_report() but with 5 one-minute Lead II graphs
 
-def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, data=None, patient=None, settings_manager=None):
+def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, data=None, patient=None, settings_manager=None,
+                            hrv_metrics=None):
     """
     Generate HRV ECG report PDF with EXACT SAME format as main 12-lead ECG report
     Only difference: Page 2 shows 5 one-minute Lead II graphs in LANDSCAPE mode instead of 12 leads
@@ -3347,15 +3196,28 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
     
     Parameters:
         filename: Output PDF filename
-        lead_ii_data: List of {'time': seconds, 'value': adc_value} dictionaries (5 minutes of Lead II)
+        lead_ii_data: 5 minutes of Lead II as a TimedSignal (ecg/timed_signal.py), or
+            the legacy list of {'time': seconds, 'value': adc_value} dictionaries
         data: Metrics dictionary (HR, PR, QRS, etc.) - same format as main report
         patient: Patient details dictionary
         settings_manager: Settings manager for wave_speed, wave_gain, etc.
+        hrv_metrics: Optional HRVEngine.report_metrics() of the same 5 minutes
+            (ECGTestPage.get_hrv_metrics(report=True)); per-minute RR/HR and the
+            HRV metrics then come from the live beat stream instead of
+            re-detecting R-peaks on lead_ii_data; its 'respiration_rate'
+            (streaming ECG-derived respiration) is added to the metrics file
     """
     
     if lead_ii_data is None or len(lead_ii_data) == 0:
         print("⚠️ No Lead II data provided for HRV ECG report")
         return None
+    # One float32 array with timestamps; strips and RR segments below are views of it
+    lead_ii_data = as_timed_signal(lead_ii_data)
+    
+    # Per-minute average RR from the live HRV engine (None = detect from lead_ii_data)
+    engine_rr_per_minute = None
+    if hrv_metrics and len(hrv_metrics.get('rr_per_minute') or []) >= 5:
+        engine_rr_per_minute = list(hrv_metrics['rr_per_minute'][:5])
     
     # ==================== INITIALIZE (EXACT SAME AS MAIN REPORT) ====================
     
@@ -3503,7 +3365,7 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
         
         try:
             from scipy.signal import find_peaks
-            values = np.array([d['value'] for d in segment_data], dtype=float)
+            values = np.asarray(segment_data.values, dtype=float)
             if np.std(values) < 1e-6:
                 return None, None, []
             
@@ -3544,12 +3406,17 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
             minute_start = seg_idx * 60.0
             seg_start = minute_start
             seg_end = minute_start + segment_duration
-            seg_data = [d for d in lead_ii_data if seg_start <= d['time'] < seg_end]
+            seg_data = lead_ii_data.between(seg_start, seg_end)
             
             if len(seg_data) > 5500:
                 seg_data = seg_data[:5500]
             
-            if len(seg_data) > 100:
+            if engine_rr_per_minute is not None and engine_rr_per_minute[seg_idx]:
+                # Average of every beat in this minute from the live HRV engine
+                avg_rr = engine_rr_per_minute[seg_idx]
+                hr_per_minute_for_report.append(60000 / avg_rr)
+                avg_rr_per_minute.append(avg_rr)
+            elif len(seg_data) > 100:
                 avg_rr, hr_val, rr_intervals_list = calculate_rr_from_segment_early(seg_data, sampling_rate)
                 if avg_rr is not None and hr_val is not None:
                     hr_per_minute_for_report.append(hr_val)
@@ -3848,7 +3715,7 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
     # ==================== REPORT OVERVIEW (EXACT SAME AS MAIN REPORT) ====================
     
     story.append(Paragraph("<b>Report Overview</b>", styles['Heading3']))
-    total_duration = max(d['time'] for d in lead_ii_data) if lead_ii_data else 0
+    total_duration = lead_ii_data.end_time if lead_ii_data else 0
     
     # Page 1: Use metrics.json values for other metrics, but HRV-specific average for Heart Rate
     page1_hr = original_metrics_from_json.get("HR", 0) if original_metrics_from_json.get("HR", 0) > 0 else data.get("HR_avg", 0)
@@ -4058,7 +3925,7 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
         segment_end = minute_start + segment_duration  # First 10 seconds of this minute
         
         # Filter data for this segment (first 10 seconds of each minute)
-        full_segment_data = [d for d in lead_ii_data if segment_start <= d['time'] < segment_end]
+        full_segment_data = lead_ii_data.between(segment_start, segment_end)
         
         # LIMIT: Use only first 5,500 samples per strip
         if len(full_segment_data) > samples_per_strip:
@@ -4104,7 +3971,7 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
             
             # Get ECG data for this segment
             if len(segment_data) > 0:
-                values = np.array([d['value'] for d in segment_data], dtype=float)
+                values = np.asarray(segment_data.values, dtype=float)
                 
                 # Create time array for drawing
                 t = np.linspace(x_pos, x_pos + ecg_width, len(values))
@@ -4418,7 +4285,7 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
     # Calculate per-minute RR intervals and HR for bar charts
     # 🎯 CONSISTENCY: Use same configuration as ECG graphs (5,500 samples, 11 seconds)
     segment_duration = 11.0  # Same as ECG graphs: 11 seconds per strip
-    total_duration = max(d['time'] for d in lead_ii_data) if lead_ii_data else 0
+    total_duration = lead_ii_data.end_time if lead_ii_data else 0
     num_segments = 5  # Always 5 strips
     
     rr_per_minute = []
@@ -4434,7 +4301,7 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
             from scipy.signal import find_peaks
             
             # Extract values from segment
-            values = np.array([d['value'] for d in segment_data], dtype=float)
+            values = np.asarray(segment_data.values, dtype=float)
             
             # Normalize data for peak detection
             if np.std(values) < 1e-6:
@@ -4494,7 +4361,7 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
             hr_from_mean = 60000 / mean_rr if mean_rr > 0 else None
             
             # Expected HR based on segment duration and number of peaks
-            segment_duration_sec = (segment_data[-1]['time'] - segment_data[0]['time']) if len(segment_data) > 1 else 11.0
+            segment_duration_sec = segment_data.time_span if len(segment_data) > 1 else 11.0
             expected_hr_from_peaks = (len(peaks) / segment_duration_sec) * 60 if segment_duration_sec > 0 else None
             
             # Debug output to verify dynamic calculation
@@ -4531,13 +4398,19 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
         minute_start = seg_idx * 60.0
         seg_start = minute_start
         seg_end = minute_start + segment_duration  # First 11 seconds
-        seg_data = [d for d in lead_ii_data if seg_start <= d['time'] < seg_end]
+        seg_data = lead_ii_data.between(seg_start, seg_end)
         
         # LIMIT: Use only first 5,500 samples (consistent with ECG graphs)
         if len(seg_data) > 5500:
             seg_data = seg_data[:5500]
         
-        if len(seg_data) > 100:
+        if engine_rr_per_minute is not None and engine_rr_per_minute[seg_idx]:
+            # Live HRV engine: average of every beat in this minute (no re-detection)
+            avg_rr = engine_rr_per_minute[seg_idx]
+            rr_per_minute.append(avg_rr)
+            hr_per_minute.append(60000 / avg_rr)
+            print(f"📊 Minute {seg_idx + 1}: Avg RR {avg_rr:.2f} ms, HR {60000 / avg_rr:.2f} bpm (live HRV engine)")
+        elif len(seg_data) > 100:
             # DYNAMIC: Calculate actual RR intervals from R-peaks in this segment
             avg_rr, hr_val, rr_intervals_list = calculate_rr_from_segment(seg_data, sampling_rate)
             
@@ -4717,14 +4590,24 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
     from scipy import signal
     
     # Extract Lead II values for HRV calculation
-    lead_ii_values = np.array([d['value'] for d in lead_ii_data]) if lead_ii_data else np.array([])
+    lead_ii_values = np.asarray(lead_ii_data.values, dtype=float) if lead_ii_data else np.array([])
     
     # Initialize rr_intervals_calc and average_nn_intervals for later use in saving metrics
     rr_intervals_calc = None
     average_nn_intervals = None
     sdann = None  # SDANN: Standard Deviation of Average NN intervals
     
-    if len(lead_ii_values) > 100:
+    hrv_from_engine = bool(hrv_metrics) and hrv_metrics.get('beats', 0) > 2
+    if hrv_from_engine:
+        # Beat-by-beat values of the live HRV engine (ecg/hrv_engine.py) - no second pass
+        average_nn_intervals = float(hrv_metrics['mean_nn'])
+        sdnn = float(hrv_metrics['sdnn'])
+        sdann = hrv_metrics.get('sdann')
+        rmssd = float(hrv_metrics['rmssd'])
+        nn50_count = int(hrv_metrics['nn50'])
+        pnn50 = float(hrv_metrics['pnn50'])
+        mean_hr_calc = hrv_metrics['mean_hr'] or 80
+    elif len(lead_ii_values) > 100:
         # Detect R-peaks using simple peak detection
         from scipy.signal import find_peaks
         # Normalize data
@@ -4827,10 +4710,20 @@ def generate_hrv_ecg_report(filename="hrv_ecg_report.pdf", lead_ii_data=None, da
             f.write(f"NN50 (Number of NN intervals > 50ms different): {int(nn50_count)}\n")
             f.write(f"pNN50 (Percentage of NN50): {pnn50:.2f}%\n")
             f.write(f"Mean Heart Rate: {mean_hr_calc:.2f} bpm\n")
+            if hrv_metrics and hrv_metrics.get('respiration_rate'):
+                f.write(f"Respiration Rate (ECG-derived): {hrv_metrics['respiration_rate']:.1f} breaths/min\n")
             f.write("-" * 50 + "\n")
             
             # Add calculation details
-            if len(lead_ii_values) > 100:
+            if hrv_from_engine:
+                f.write(f"\nCalculation Details:\n")
+                f.write(f"Source: live HRV engine (streaming R-peak detection)\n")
+                f.write(f"NN intervals used: {hrv_metrics['beats']}\n")
+                f.write(f"Poincare SD1 / SD2: {hrv_metrics['sd1']:.2f} / {hrv_metrics['sd2']:.2f} ms\n")
+                if hrv_metrics.get('lf_hf') is not None:
+                    f.write(f"LF / HF power: {hrv_metrics['lf']:.1f} / {hrv_metrics['hf']:.1f} ms^2 "
+                            f"(LF/HF {hrv_metrics['lf_hf']:.2f}, Lomb-Scargle)\n")
+            elif len(lead_ii_values) > 100:
                 f.write(f"\nCalculation Details:\n")
                 f.write(f"Total Lead II samples: {len(lead_ii_values)}\n")
                 # Check if rr_intervals_calc is available and has valid data
@@ -0,0 +1,311 @@
+"""
+Incremental HRV Engine
+
+The dashboard stress/HRV panel used to re-detect R-peaks and run np.std over
+the whole RR list on every tick, and the 5-minute HRV report re-detected
+peaks per minute segment. `HRVEngine` is fed the shared beat stream of
+`StreamingQRSDetector` instead and keeps every HRV measure up to date per
+beat:
+
+    - time domain (O(1) per beat): running mean / variance of the NN
+      intervals (SDNN) and of their successive differences (SDSD, RMSSD),
+      and the NN50 count (pNN50), over a sliding time window. Beats leaving
+      the window are removed from the accumulators, not re-summed.
+    - Poincare SD1 / SD2, derived from SDNN and SDSD
+    - frequency domain: Lomb-Scargle periodogram of the (unevenly sampled)
+      NN series, VLF/LF/HF band powers and LF/HF. Recomputed lazily, only
+      when new beats arrived since the last spectrum.
+
+A beat whose RR is 0 (first beat, or first beat after a gap/reset) or
+outside [min_rr_ms, max_rr_ms] is not an NN interval and breaks the
+successive-difference chain, so no difference spans a gap or an artifact.
+
+Usage:
+    from ecg.hrv_engine import HRVEngine
+
+    engine = HRVEngine(window_seconds=300)
+    engine.sync(beat_detector)            # pull new beats (StreamingQRSDetector)
+    engine.add_rr(time_s, rr_ms)          # or push beats directly
+
+    metrics = engine.metrics()            # {'sdnn': ..., 'rmssd': ..., 'lf_hf': ...}
+    report = engine.report_metrics()      # + per-minute RR / HR for the HRV report
+"""
+
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Frequency bands (Hz), Task Force of the ESC/NASPE (1996)
+VLF_BAND = (0.003, 0.04)
+LF_BAND = (0.04, 0.15)
+HF_BAND = (0.15, 0.4)
+
+
+class _RunningStats:
+    """Welford mean / variance with removal (sliding windows)."""
+
+    __slots__ = ('n', 'mean', '_m2', 'sum_sq')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.sum_sq = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        self.sum_sq += x * x
+
+    def remove(self, x: float) -> None:
+        if self.n <= 1:
+            self.__init__()
+            return
+        self.n -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.n
+        self._m2 = max(0.0, self._m2 - delta * (x - self.mean))
+        self.sum_sq = max(0.0, self.sum_sq - x * x)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (same as np.std)."""
+        return float(np.sqrt(self._m2 / self.n)) if self.n > 0 else 0.0
+
+
+class HRVEngine:
+    """Sliding-window HRV (time, Poincare and Lomb-Scargle frequency domain) fed beat by beat."""
+
+    def __init__(self, window_seconds: float = 300.0, min_rr_ms: float = 240.0, max_rr_ms: float = 2000.0,
+                 min_spectrum_seconds: float = 60.0, spectrum_resolution_hz: float = 0.001):
+        """
+        Args:
+            window_seconds: Sliding window of beats the metrics cover
+            min_rr_ms: Shortest RR accepted as an NN interval
+            max_rr_ms: Longest RR accepted as an NN interval
+            min_spectrum_seconds: NN series span needed before LF/HF is reported
+            spectrum_resolution_hz: Frequency grid step of the periodogram
+        """
+        self.window_seconds = float(window_seconds)
+        self.min_rr_ms = float(min_rr_ms)
+        self.max_rr_ms = float(max_rr_ms)
+        self.min_spectrum_seconds = float(min_spectrum_seconds)
+        self._freqs = np.arange(VLF_BAND[0], HF_BAND[1] + spectrum_resolution_hz / 2, spectrum_resolution_hz)
+        self._df = float(spectrum_resolution_hz)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all beats."""
+        # Window entries: [time_s, rr_ms, diff_ms or None]; rr_ms None = not an NN interval
+        self._window = deque()
+        self._nn = _RunningStats()
+        self._diffs = _RunningStats()
+        self._nn50 = 0
+        self._last_time = None
+        self._cursor = 0
+        self._source = None
+        self._fs = None
+        self.beats_seen = 0
+        self._spectrum = None
+        self._spectrum_beats = -1
+
+    # ------------------------------------------------------------------ #
+    # Beat input
+    # ------------------------------------------------------------------ #
+
+    def sync(self, detector) -> int:
+        """
+        Pull the beats a StreamingQRSDetector published since the last call.
+
+        Args:
+            detector: StreamingQRSDetector (beats_since / sampling_rate)
+
+        Returns:
+            Number of beats added
+        """
+        fs = detector.sampling_rate
+        if detector is not self._source or fs != self._fs:
+            # New detector or sampling rate: beat times are no longer comparable
+            self.reset()
+            self._source, self._fs = detector, fs
+            self._cursor = max(0, detector.beats_published - len(detector.beats))
+        beats, self._cursor = detector.beats_since(self._cursor)
+        for beat in beats:
+            self.add_rr(beat.sample_index / fs, beat.rr_ms)
+        return len(beats)
+
+    def add_rr(self, time_s: float, rr_ms: float) -> None:
+        """
+        Add one beat.
+
+        Args:
+            time_s: Time of the R-peak (seconds, any monotonic origin)
+            rr_ms: RR interval to the previous beat; 0 for the first beat after a gap
+        """
+        time_s = float(time_s)
+        if self._last_time is not None and time_s < self._last_time:
+            # Stream restarted behind the window (buffer reset)
+            cursor, source, fs = self._cursor, self._source, self._fs
+            self.reset()
+            self._cursor, self._source, self._fs = cursor, source, fs
+        self._last_time = time_s
+        self.beats_seen += 1
+
+        rr = float(rr_ms) if self.min_rr_ms <= rr_ms <= self.max_rr_ms else None
+        diff = None
+        if rr is not None:
+            self._nn.add(rr)
+            previous = self._window[-1][1] if self._window else None
+            if previous is not None:
+                diff = rr - previous
+                self._add_diff(diff)
+        self._window.append([time_s, rr, diff])
+
+        horizon = time_s - self.window_seconds
+        while self._window and self._window[0][0] < horizon:
+            self._evict()
+
+    def _add_diff(self, diff: float) -> None:
+        self._diffs.add(diff)
+        if abs(diff) > 50.0:
+            self._nn50 += 1
+
+    def _remove_diff(self, diff: float) -> None:
+        self._diffs.remove(diff)
+        if abs(diff) > 50.0:
+            self._nn50 -= 1
+
+    def _evict(self) -> None:
+        _, rr, diff = self._window.popleft()
+        if rr is not None:
+            self._nn.remove(rr)
+        if diff is not None:
+            self._remove_diff(diff)
+        if self._window and self._window[0][2] is not None:
+            # The new oldest beat's difference referred to the evicted beat
+            self._remove_diff(self._window[0][2])
+            self._window[0][2] = None
+
+    # ------------------------------------------------------------------ #
+    # Results
+    # ------------------------------------------------------------------ #
+
+    @property
+    def nn_count(self) -> int:
+        return self._nn.n
+
+    @property
+    def sdnn(self) -> float:
+        return self._nn.std
+
+    @property
+    def rmssd(self) -> float:
+        n = self._diffs.n
+        return float(np.sqrt(self._diffs.sum_sq / n)) if n else 0.0
+
+    def nn_series(self):
+        """(times_s, nn_ms) arrays of the NN intervals in the window."""
+        pairs = [(t, rr) for t, rr, _ in self._window if rr is not None]
+        if not pairs:
+            return np.zeros(0), np.zeros(0)
+        times, nn = zip(*pairs)
+        return np.asarray(times, dtype=float), np.asarray(nn, dtype=float)
+
+    def frequency_domain(self) -> Dict[str, Optional[float]]:
+        """
+        VLF/LF/HF band powers (ms^2) from a Lomb-Scargle periodogram of the NN
+        series. Cached until the next beat arrives.
+
+        Returns:
+            dict: vlf, lf, hf, lf_hf, lf_nu, hf_nu (None while the window is too short)
+        """
+        if self._spectrum_beats == self.beats_seen and self._spectrum is not None:
+            return self._spectrum
+        result = {'vlf': None, 'lf': None, 'hf': None, 'lf_hf': None, 'lf_nu': None, 'hf_nu': None}
+        times, nn = self.nn_series()
+        if len(nn) >= 16 and times[-1] - times[0] >= self.min_spectrum_seconds:
+            try:
+                from scipy.signal import lombscargle
+                power = lombscargle(times, nn - nn.mean(), 2.0 * np.pi * self._freqs)
+                # One-sided PSD (ms^2/Hz): a band's power sums to its share of the NN variance
+                psd = power * 2.0 * (times[-1] - times[0]) / len(nn)
+                bands = {}
+                for name, (lo, hi) in (('vlf', VLF_BAND), ('lf', LF_BAND), ('hf', HF_BAND)):
+                    in_band = (self._freqs >= lo) & (self._freqs < hi)
+                    bands[name] = float(np.sum(psd[in_band]) * self._df)
+                result.update(bands)
+                if bands['hf'] > 0:
+                    result['lf_hf'] = bands['lf'] / bands['hf']
+                if bands['lf'] + bands['hf'] > 0:
+                    result['lf_nu'] = 100.0 * bands['lf'] / (bands['lf'] + bands['hf'])
+                    result['hf_nu'] = 100.0 * bands['hf'] / (bands['lf'] + bands['hf'])
+            except Exception as e:
+                print(f"⚠️ HRV frequency-domain analysis skipped: {e}")
+        self._spectrum = result
+        self._spectrum_beats = self.beats_seen
+        return result
+
+    def metrics(self, frequency: bool = True) -> Dict[str, Optional[float]]:
+        """
+        Current HRV of the window.
+
+        Args:
+            frequency: Include the (lazily recomputed) frequency-domain bands
+
+        Returns:
+            dict: beats, mean_nn, sdnn, sdsd, rmssd, nn50, pnn50, sd1, sd2,
+            mean_hr and (optionally) vlf, lf, hf, lf_hf, lf_nu, hf_nu
+        """
+        sdnn = self.sdnn
+        sdsd = self._diffs.std
+        sd1_sq = 0.5 * sdsd * sdsd
+        result = {
+            'beats': self._nn.n,
+            'mean_nn': self._nn.mean if self._nn.n else 0.0,
+            'sdnn': sdnn,
+            'sdsd': sdsd,
+            'rmssd': self.rmssd,
+            'nn50': self._nn50,
+            'pnn50': 100.0 * self._nn50 / self._diffs.n if self._diffs.n else 0.0,
+            'sd1': float(np.sqrt(sd1_sq)),
+            'sd2': float(np.sqrt(max(0.0, 2.0 * sdnn * sdnn - sd1_sq))),
+            'mean_hr': 60000.0 / self._nn.mean if self._nn.n and self._nn.mean > 0 else 0.0,
+        }
+        if frequency:
+            result.update(self.frequency_domain())
+        return result
+
+    def segment_means(self, segments: int = 5, segment_seconds: float = 60.0) -> List[Optional[float]]:
+        """
+        Mean NN interval (ms) of consecutive segments ending at the newest beat
+        (oldest first; None for a segment without NN intervals).
+        """
+        times, nn = self.nn_series()
+        means = []
+        if not len(nn):
+            return [None] * segments
+        end = times[-1] + 1e-6
+        for k in range(segments, 0, -1):
+            lo, hi = end - k * segment_seconds, end - (k - 1) * segment_seconds
+            in_segment = nn[(times >= lo) & (times < hi)]
+            means.append(float(in_segment.mean()) if len(in_segment) else None)
+        return means
+
+    def report_metrics(self, segments: int = 5, segment_seconds: float = 60.0) -> Dict:
+        """
+        metrics() plus the per-minute values the 5-minute HRV report prints.
+
+        Returns:
+            dict: metrics() keys, 'rr_per_minute' / 'hr_per_minute' (one value per
+            segment, None where a segment had no beats) and 'sdann'
+        """
+        result = self.metrics()
+        rr_per_minute = self.segment_means(segments, segment_seconds)
+        result['rr_per_minute'] = rr_per_minute
+        result['hr_per_minute'] = [60000.0 / rr if rr else None for rr in rr_per_minute]
+        valid = [rr for rr in rr_per_minute if rr]
+        result['sdann'] = float(np.std(valid)) if len(valid) > 1 else 0.0
+        return result
@@ -19,157 +19,11 @@ matplotlib.use('Agg')
 
 # ==================== ECG DATA SAVE/LOAD FUNCTIONS ====================
 
-def save_ecg_data_to_file(ecg_test_page, output_file=None):
-    """
-    Save ECG data from ecg_test_page.data to a JSON file
-    Returns: path to saved file or None if failed
-    
-    Example:
-        saved_file = save_ecg_data_to_file(ecg_test_page)
-        # Saved to: reports/ecg_data/ecg_data_20241119_143022.json
-    """
-    from datetime import datetime
-    
-    if not ecg_test_page or not hasattr(ecg_test_page, 'data'):
-        print(" No ECG test page data available to save")
-        return None
-    
-    # Create output directory
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-    ecg_data_dir = os.path.join(base_dir, 'reports', 'ecg_data')
-    os.makedirs(ecg_data_dir, exist_ok=True)
-    
-    # Generate filename with timestamp
-    if output_file is None:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_file = os.path.join(ecg_data_dir, f'ecg_data_{timestamp}.json')
-    
-    # Prepare data for saving
-    lead_names = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
-    
-    saved_data = {
-        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        "sampling_rate": 80.0,  # Default, will be updated if available
-        "leads": {}
-    }
-    
-    # Get sampling rate if available
-    if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler, 'sampling_rate'):
-        if ecg_test_page.sampler.sampling_rate:
-            saved_data["sampling_rate"] = float(ecg_test_page.sampler.sampling_rate)
-    
-    # Save each lead's data - use FULL buffer (ecg_buffers if available, otherwise data)
-    # Priority: Use ecg_buffers (5000 samples) if available, otherwise use data (1000 samples)
-    
-    # Debug: Check what attributes ecg_test_page has
-    print(f"🔍 DEBUG: ecg_test_page attributes check:")
-    print(f"   has ecg_buffers: {hasattr(ecg_test_page, 'ecg_buffers')}")
-    print(f"   has data: {hasattr(ecg_test_page, 'data')}")
-    print(f"   has ptrs: {hasattr(ecg_test_page, 'ptrs')}")
-    if hasattr(ecg_test_page, 'ecg_buffers'):
-        print(f"   ecg_buffers length: {len(ecg_test_page.ecg_buffers) if ecg_test_page.ecg_buffers else 0}")
-    if hasattr(ecg_test_page, 'data'):
-        print(f"   data length: {len(ecg_test_page.data) if ecg_test_page.data else 0}")
-        if ecg_test_page.data and len(ecg_test_page.data) > 0:
-            print(f"   data[0] length: {len(ecg_test_page.data[0]) if isinstance(ecg_test_page.data[0], (list, np.ndarray)) else 'N/A'}")
-    
-    for i, lead_name in enumerate(lead_names):
-        data_to_save = []
-        
-        # Priority 1: Try to use ecg_buffers (larger buffer, 5000 samples)
-        if hasattr(ecg_test_page, 'ecg_buffers') and i < len(ecg_test_page.ecg_buffers):
-            buffer = ecg_test_page.ecg_buffers[i]
-            if isinstance(buffer, np.ndarray) and len(buffer) > 0:
-                # Check if this is a rolling buffer with ptrs
-                if hasattr(ecg_test_page, 'ptrs') and i < len(ecg_test_page.ptrs):
-                    ptr = ecg_test_page.ptrs[i]
-                    window_size = getattr(ecg_test_page, 'window_size', 1000)
-                    
-                    # For report generation: use FULL buffer (5000 samples), not just window_size (1000)
-                    # Get all available data from buffer, starting from ptr
-                    if ptr + len(buffer) <= len(buffer):
-                        # No wrap needed: get from ptr to end, then from start to ptr
-                        part1 = buffer[ptr:].tolist()
-                        part2 = buffer[:ptr].tolist()
-                        data_to_save = part1 + part2  # Full circular buffer
-                    else:
-                        # Simple case: use all buffer data
-                        data_to_save = buffer.tolist()
-                else:
-                    # No ptrs: use ALL available data (full buffer)
-                    data_to_save = buffer.tolist()
-        
-        # Priority 2: Fallback to ecg_test_page.data (smaller buffer, 1000 samples)
-        if not data_to_save and i < len(ecg_test_page.data):
-            lead_data = ecg_test_page.data[i]
-            if isinstance(lead_data, np.ndarray):
-                # Use ALL available data (not just window_size)
-                data_to_save = lead_data.tolist()
-            elif isinstance(lead_data, (list, tuple)):
-                data_to_save = list(lead_data)
-        
-        saved_data["leads"][lead_name] = data_to_save if data_to_save else []
-    
-    # Check if we have sufficient data for report generation
-    sample_counts = [len(saved_data["leads"][lead]) for lead in saved_data["leads"] if saved_data["leads"][lead]]
-    if sample_counts:
-        max_samples = max(sample_counts)
-        min_samples = min(sample_counts)
-        print(f"📊 Buffer analysis: Max samples={max_samples}, Min samples={min_samples}")
-        
-        # Calculate expected samples for 13.2s window at current sampling rate
-        sampling_rate = saved_data.get("sampling_rate", 80.0)
-        expected_samples_for_13_2s = int(13.2 * sampling_rate)
-        
-        if max_samples < expected_samples_for_13_2s:
-            print(f" WARNING: Buffer has only {max_samples} samples, need {expected_samples_for_13_2s} for 13.2s window")
-            print(f"   Current time window: {max_samples/sampling_rate:.2f}s")
-            print(f"   Expected time window: 13.2s")
-            print(f"    TIP: Run ECG for at least 15-20 seconds to accumulate sufficient data")
-    
-    # Save to file
-    try:
-        with open(output_file, 'w') as f:
-            json.dump(saved_data, f, indent=2)
-        print(f"Saved ECG data to: {output_file}")
-        print(f"   Leads saved: {list(saved_data['leads'].keys())}")
-        print(f"   Sampling rate: {saved_data['sampling_rate']} Hz")
-        print(f"   Total data points per lead: {[len(saved_data['leads'][lead]) for lead in saved_data['leads']]}")
-        return output_file
-    except Exception as e:
-        print(f" Error saving ECG data: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+# Binary capture format (reports/ecg_data/*.ecgb); legacy JSON captures still load
+from .ecg_capture import save_ecg_data_to_file, load_ecg_data_from_file, find_latest_ecg_data_file
+from .sampling_clock import resolve_sampling_rate
+from .timed_signal import as_timed_signal
 
-def load_ecg_data_from_file(file_path):
-    """
-    Load ECG data from JSON file
-    Returns: dict with 'leads', 'sampling_rate', 'timestamp' or None if failed
-    
-    Example:
-        data = load_ecg_data_from_file('reports/ecg_data/ecg_data_20241119_143022.json')
-        # Returns: {'leads': {'I': [...], 'II': [...]}, 'sampling_rate': 80.0, ...}
-    """
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        # Convert lists back to numpy arrays
-        if 'leads' in data:
-            for lead_name in data['leads']:
-                if isinstance(data['leads'][lead_name], list):
-                    data['leads'][lead_name] = np.array(data['leads'][lead_name])
-        
-        print(f" Loaded ECG data from: {file_path}")
-        print(f"   Leads loaded: {list(data.get('leads', {}).keys())}")
-        print(f"   Sampling rate: {data.get('sampling_rate', 80.0)} Hz")
-        return data
-    except Exception as e:
-        print(f" Error loading ECG data: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
 
 def calculate_time_window_from_bpm_and_wave_speed(hr_bpm, wave_speed_mm_s, desired_beats=6):
     """
@@ -2426,9 +2280,7 @@ def generate_ecg_report(filename="ecg_report.pdf", data=None, lead_images=None,
 
     if (p_amp_mv<=0 or qrs_amp_mv<=0 or t_amp_mv<=0) and ecg_test_page is not None and hasattr(ecg_test_page,'data'):
         try:
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler,'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             arr = None
             if len(ecg_test_page.data)>1:
                 lead_ii = ecg_test_page.data[1]
@@ -2457,9 +2309,7 @@ def generate_ecg_report(filename="ecg_report.pdf", data=None, lead_images=None,
             lead_aVF = ecg_test_page.data[5] if len(ecg_test_page.data) > 5 else None
             
             # Get sampling rate
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler, 'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             
             if lead_I is not None and lead_aVF is not None:
                 # Convert to numpy arrays
@@ -2799,9 +2649,7 @@ def generate_ecg_report(filename="ecg_report.pdf", data=None, lead_images=None,
     if (rv5_amp<=0 or sv1_amp==0.0) and ecg_test_page is not None and hasattr(ecg_test_page,'data'):
         try:
             from scipy.signal import butter, filtfilt, find_peaks
-            fs = 250.0
-            if hasattr(ecg_test_page, 'sampler') and hasattr(ecg_test_page.sampler,'sampling_rate') and ecg_test_page.sampler.sampling_rate:
-                fs = float(ecg_test_page.sampler.sampling_rate)
+            fs = resolve_sampling_rate(ecg_test_page)
             def _get_last(arr):
                 return arr[-int(10*fs):] if arr is not None and len(arr)>int(10*fs) else arr
             # V5 index 10, V1 index 6
@@ -3348,18 +3196,15 @@ def generate_hyperkalemia_report(filename, analysis_results, lead_ii_data, sampl
     Expects:
       - analysis_results: dict with keys like heart_rate, pr_interval_ms, qrs_duration_ms,
         qt_interval_ms, qtc_ms, st_segment_ms, qrs_axis, patient (optional)
-      - lead_ii_data: sequence of ADC samples for Lead II or list of dicts with {"value": ..., "time": ...}
+      - lead_ii_data: TimedSignal, sequence of ADC samples for Lead II (at sampling_rate) or
+        list of dicts with {"value": ..., "time": ...}
       - ecg_data_file: Optional path to saved ECG data file with V1-V6 leads
     """
-    if not lead_ii_data:
+    # Normalize Lead II samples to one float32 array with timestamps
+    lead_ii_signal = as_timed_signal(lead_ii_data, sampling_rate) if lead_ii_data is not None else None
+    if not lead_ii_signal:
         raise ValueError("No Lead II data provided for hyperkalemia report")
-
-    # Normalize Lead II samples to a numpy array
-    first_item = lead_ii_data[0]
-    if isinstance(first_item, dict) and "value" in first_item:
-        lead_ii_array = np.array([d.get("value", 0) for d in lead_ii_data], dtype=float)
-    else:
-        lead_ii_array = np.array(lead_ii_data, dtype=float)
+    lead_ii_array = np.asarray(lead_ii_signal.values, dtype=float)
 
     # Minimal stub that mimics the ecg_test_page shape used by generate_ecg_report
     class _Sampler:
@@ -3396,21 +3241,6 @@ def generate_hyperkalemia_report(filename, analysis_results, lead_ii_data, sampl
     # Optional patient info passthrough
     patient = analysis_results.get("patient", {}) if isinstance(analysis_results, dict) else {}
 
-    # Convert lead_ii_data to the format expected by generate_hyperkalemia_ecg_report
-    # If it's already a list of dicts with 'time' and 'value', use as is
-    # Otherwise, create time-based dicts
-    if lead_ii_data and isinstance(lead_ii_data[0], dict) and "value" in lead_ii_data[0]:
-        # Already in correct format
-        formatted_lead_ii_data = lead_ii_data
-    else:
-        # Convert array to list of dicts with time and value
-        formatted_lead_ii_data = []
-        for i, value in enumerate(lead_ii_array):
-            formatted_lead_ii_data.append({
-                'time': i / sampling_rate,  # Time in seconds
-                'value': float(value)
-            })
-    
     # Generate using the Hyperkalemia-specific report generator (with logging and landscape Page 2)
     from utils.settings_manager import SettingsManager
     settings_manager = SettingsManager()
@@ -3419,7 +3249,7 @@ def generate_hyperkalemia_report(filename, analysis_results, lead_ii_data, sampl
     
     return generate_hyperkalemia_ecg_report(
         filename=filename,
-        lead_ii_data=formatted_lead_ii_data,
+        lead_ii_data=lead_ii_signal,
         data=data,
         patient=patient,
         settings_manager=settings_manager,
@@ -3438,7 +3268,8 @@ def generate_hyperkalemia_ecg_report(filename="hyperkalemia_ecg_report.pdf", lea
     
     Parameters:
         filename: Output PDF filename
-        lead_ii_data: List of {'time': seconds, 'value': adc_value} dictionaries (5 minutes of Lead II)
+        lead_ii_data: 5 minutes of Lead II as a TimedSignal (ecg/timed_signal.py), or
+            the legacy list of {'time': seconds, 'value': adc_value} dictionaries
         data: Metrics dictionary (HR, PR, QRS, etc.) - same format as main report
         patient: Patient details dictionary
         settings_manager: Settings manager for wave_speed, wave_gain, etc.
@@ -3453,6 +3284,8 @@ def generate_hyperkalemia_ecg_report(filename="hyperkalemia_ecg_report.pdf", lea
     if lead_ii_data is None or len(lead_ii_data) == 0:
         print("⚠️ No Lead II data provided for Hyperkalemia ECG report")
         return None
+    # One float32 array with timestamps; RR segments below are views of it
+    lead_ii_data = as_timed_signal(lead_ii_data)
     
     # ==================== INITIALIZE (EXACT SAME AS MAIN REPORT) ====================
     
@@ -3596,7 +3429,7 @@ def generate_hyperkalemia_ecg_report(filename="hyperkalemia_ecg_report.pdf", lea
         
         try:
             from scipy.signal import find_peaks
-            values = np.array([d['value'] for d in segment_data], dtype=float)
+            values = np.asarray(segment_data.values, dtype=float)
             if np.std(values) < 1e-6:
                 return None, None, []
             
@@ -3637,7 +3470,7 @@ def generate_hyperkalemia_ecg_report(filename="hyperkalemia_ecg_report.pdf", lea
             minute_start = seg_idx * 60.0
             seg_start = minute_start
             seg_end = minute_start + segment_duration
-            seg_data = [d for d in lead_ii_data if seg_start <= d['time'] < seg_end]
+            seg_data = lead_ii_data.between(seg_start, seg_end)
             
             if len(seg_data) > 5500:
                 seg_data = seg_data[:5500]
@@ -3976,7 +3809,7 @@ def generate_hyperkalemia_ecg_report(filename="hyperkalemia_ecg_report.pdf", lea
     # ==================== REPORT OVERVIEW (EXACT SAME AS MAIN REPORT) ====================
     
     story.append(Paragraph("<b>Report Overview</b>", styles['Heading3']))
-    total_duration = max(d['time'] for d in lead_ii_data) if lead_ii_data else 0
+    total_duration = lead_ii_data.end_time if lead_ii_data else 0
     
     # Page 1: Use metrics.json values for other metrics, but Hyperkalemia-specific average for Heart Rate
     page1_hr = original_metrics_from_json.get("HR", 0) if original_metrics_from_json.get("HR", 0) > 0 else data.get("HR_avg", 0)
@@ -4170,25 +4003,17 @@ def generate_hyperkalemia_ecg_report(filename="hyperkalemia_ecg_report.pdf", lea
     
     # Priority 1: Use provided ecg_data_file if available
     if ecg_data_file and os.path.exists(ecg_data_file):
-        try:
-            with open(ecg_data_file, 'r') as f:
-                saved_ecg_data = json.load(f)
-        except Exception as e:
-            print(f"⚠️ Could not load provided ECG data file: {e}")
+        saved_ecg_data = load_ecg_data_from_file(ecg_data_file)
+        if not saved_ecg_data:
+            print(f"⚠️ Could not load provided ECG data file: {ecg_data_file}")
     
-    # Priority 2: Find latest ECG data file if no file was provided
+    # Priority 2: Find latest ECG data file (binary or legacy JSON) if no file was provided
     if not saved_ecg_data:
-        ecg_data_dir = os.path.join(reports_dir, 'ecg_data')
-        if os.path.exists(ecg_data_dir):
-            ecg_files = [f for f in os.listdir(ecg_data_dir) if f.startswith('ecg_data_') and f.endswith('.json')]
-            if ecg_files:
-                ecg_files.sort(reverse=True)  # Latest first
-                latest_file = os.path.join(ecg_data_dir, ecg_files[0])
-                try:
-                    with open(latest_file, 'r') as f:
-                        saved_ecg_data = json.load(f)
-                except Exception as e:
-                    print(f"⚠️ Could not load ECG data: {e}")
+        latest_file = find_latest_ecg_data_file(os.path.join(reports_dir, 'ecg_data'))
+        if latest_file:
+            saved_ecg_data = load_ecg_data_from_file(latest_file)
+            if not saved_ecg_data:
+                print(f"⚠️ Could not load ECG data: {latest_file}")
     
     # Lead-specific ADC per box multipliers (from main report)
     adc_per_box_config = {
@@ -4461,7 +4286,7 @@ def generate_hyperkalemia_ecg_report(filename="hyperkalemia_ecg_report.pdf", lea
     # Draw Lead II at bottom (full width)
     if lead_ii_data and len(lead_ii_data) > 0:
         # Get first segment of Lead II data (first 10 seconds or available)
-        lead_ii_values = np.array([d['value'] for d in lead_ii_data[:5500]], dtype=float)
+        lead_ii_values = np.asarray(lead_ii_data[:5500].values, dtype=float)
         
         graph_x = lead_ii_x + 10 - (4 * mm_unit)  # shift 4mm further left
         graph_y = lead_ii_y
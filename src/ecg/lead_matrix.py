@@ -0,0 +1,152 @@
+"""
+Lead Matrix Helpers
+
+The live 12-lead display used to walk the leads one by one every frame:
+copy the lead, estimate its baseline, re-center, filter, decimate, scale and
+compute y-range statistics - twelve rounds of small NumPy calls and
+temporaries at 30 FPS. These helpers do each stage once for all leads on a
+`(n_leads, n)` float32 lead matrix, along axis=-1:
+
+    - `as_lead_matrix()`: (n_leads, n) float32 view/copy of the newest samples
+      (ECGRingBuffer, array or list of lead arrays)
+    - `DisplayBaselineAnchor`: per-lead slow baseline anchor + zero-centering
+      of the display path, as (n_leads,) state arrays
+    - `robust_amplitude()`: percentile center, inner spread and peak
+      deviation of every lead (y-range scaling)
+
+Filtering (`apply_ecg_filters`, `apply_baseline_wander_median_mean`) and
+min/max decimation (`minmax_envelope`, `MinMaxDecimator.envelope`) take the
+same lead matrices directly.
+
+Usage:
+    from ecg.lead_matrix import DisplayBaselineAnchor, as_lead_matrix, robust_amplitude
+
+    window = as_lead_matrix(ring_buffer, n=1500)         # (12, 1500) float32
+    anchor = DisplayBaselineAnchor(n_leads=12)
+    centered, offset = anchor.apply(window, fs, leads=connected)
+    center, spread, peak = robust_amplitude(centered * gain)
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def as_lead_matrix(leads, n: Optional[int] = None, dtype=np.float32) -> np.ndarray:
+    """
+    Newest n samples of every lead as one (n_leads, n) array.
+
+    Args:
+        leads: ECGRingBuffer, (n_leads, m) array, or a list of 1-D lead arrays
+            (shorter leads are not padded; all leads are cut to the shortest)
+        n: Samples to keep (all if None)
+        dtype: Element type (no copy when the input already matches)
+
+    Returns:
+        (n_leads, n) array, oldest sample first
+    """
+    if hasattr(leads, 'latest'):
+        matrix = leads.latest(n)
+    elif isinstance(leads, np.ndarray):
+        matrix = leads if leads.ndim == 2 else leads.reshape(1, -1)
+    else:
+        rows = [np.asarray(lead).reshape(-1) for lead in leads]
+        shortest = min((len(r) for r in rows), default=0)
+        matrix = np.stack([r[len(r) - shortest:] for r in rows]) if rows else np.zeros((0, 0))
+    if n is not None and matrix.shape[-1] > n:
+        matrix = matrix[:, matrix.shape[-1] - int(n):]
+    return np.asarray(matrix, dtype=dtype)
+
+
+def trailing_mean(matrix: np.ndarray, n: int) -> np.ndarray:
+    """Mean of the newest n samples of every lead (float64, NaN-aware)."""
+    n = max(1, min(int(n), matrix.shape[-1]))
+    tail = matrix[..., matrix.shape[-1] - n:]
+    if np.isnan(tail).any():
+        with np.errstate(invalid='ignore'):
+            return np.nanmean(tail, axis=-1, dtype=np.float64)
+    return tail.mean(axis=-1, dtype=np.float64)
+
+
+class DisplayBaselineAnchor:
+    """
+    Per-lead display baseline: a slow EMA of the 2 s moving-average baseline
+    (very-low-frequency drift only, so respiration does not make the trace
+    "breathe") followed by a faster EMA zero-centering of what remains.
+    """
+
+    def __init__(self, n_leads: int = 12, alpha_slow: float = 0.0005, alpha_zero: float = 0.01,
+                 baseline_seconds: float = 2.0):
+        """
+        Args:
+            n_leads: Number of leads
+            alpha_slow: EMA weight of the baseline anchor (~4 s time constant at 500 Hz)
+            alpha_zero: EMA weight of the zero-centering reference (visual only)
+            baseline_seconds: Moving-average length of the baseline estimate
+        """
+        self.alpha_slow = float(alpha_slow)
+        self.alpha_zero = float(alpha_zero)
+        self.baseline_seconds = float(baseline_seconds)
+        self.anchors = np.zeros(int(n_leads))
+        self.zero_refs = np.zeros(int(n_leads))
+
+    def reset(self) -> None:
+        self.anchors[:] = 0.0
+        self.zero_refs[:] = 0.0
+
+    def apply(self, window: np.ndarray, sampling_rate: float, leads: Optional[np.ndarray] = None,
+              history: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Update the anchors of the selected leads and re-center the window.
+
+        Args:
+            window: (n_leads, n) samples to display
+            sampling_rate: Sampling rate in Hz
+            leads: Optional (n_leads,) bool mask; other leads keep their state
+            history: Optional (n_leads, m) samples the baseline and DC are
+                measured on (default: the window itself)
+
+        Returns:
+            tuple: ((n_leads, n) float32 centered window, (n_leads,) offset
+            that was subtracted from each lead)
+        """
+        history = window if history is None else history
+        update = np.ones(len(self.anchors), dtype=bool) if leads is None else np.asarray(leads, dtype=bool)
+        if history.shape[-1] > 0 and update.any():
+            rows = np.flatnonzero(update)
+            if history.shape[-1] < 10:
+                estimate = trailing_mean(history[rows], history.shape[-1])
+            else:
+                estimate = trailing_mean(history[rows], int(self.baseline_seconds * sampling_rate))
+            a = self.alpha_slow
+            self.anchors[rows] = (1 - a) * self.anchors[rows] + a * estimate
+            dc = trailing_mean(history[rows], history.shape[-1]) - self.anchors[rows]
+            z = self.alpha_zero
+            self.zero_refs[rows] = (1 - z) * self.zero_refs[rows] + z * dc
+        offset = self.anchors + self.zero_refs
+        centered = np.subtract(window, offset[:window.shape[0], None].astype(np.float32), dtype=np.float32)
+        return centered, offset[:window.shape[0]]
+
+
+def robust_amplitude(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Robust amplitude statistics of every lead (finite input, e.g. after nan_to_num).
+
+    Returns:
+        tuple of (n_leads,) arrays:
+            - center: midpoint of the 1st and 99th percentiles
+            - spread: standard deviation of the samples between them
+            - peak: largest |sample - center|
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape[-1] == 0:
+        zeros = np.zeros(matrix.shape[:-1])
+        return zeros, zeros, zeros
+    p1, p99 = np.percentile(matrix, [1, 99], axis=-1)
+    center = (p1 + p99) / 2.0
+    inside = (matrix >= p1[..., None]) & (matrix <= p99[..., None])
+    count = np.maximum(inside.sum(axis=-1), 1)
+    inner_mean = np.where(inside, matrix, 0.0).sum(axis=-1) / count
+    spread = np.sqrt(np.where(inside, (matrix - inner_mean[..., None]) ** 2, 0.0).sum(axis=-1) / count)
+    peak = np.max(np.abs(matrix - center[..., None]), axis=-1)
+    return center, spread, peak
@@ -0,0 +1,270 @@
+"""
+Bulk ECG Packet Decoder
+
+Decodes the 22-byte hardware packet stream in one vectorized pass instead of
+one `parse_packet` call per frame.
+
+Packet layout (22 bytes):
+    [0]      START_BYTE (0xE8)
+    [1..4]   header bytes
+    [5..20]  8 leads as MSB/LSB pairs: I, II, V1, V2, V3, V4, V5, V6
+    [21]     END_BYTE (0x8E)
+
+Each lead value is 12 bits: (MSB & 0x1F) << 7 | (LSB & 0x7F).
+Bit 0x20 of the MSB is the electrode-connected flag. `pack_lead_status`
+folds the 8 flags of a frame into one uint8 lead-status bitmask (bit i set
+when electrode LEAD_NAMES_DIRECT[i] is connected); `lead_status_connected`
+expands it to the 12 display leads (derived limb leads need both I and II).
+
+Usage:
+    from ecg.packet_decoder import decode_frames
+
+    samples, connected, consumed = decode_frames(buf)
+    del buf[:consumed]
+    # samples: (n_packets, 12) in LEAD_ORDER
+    # connected: (n_packets, 8) bool in LEAD_NAMES_DIRECT order
+
+    # Same, plus where frames went missing (bytes skipped between valid frames)
+    samples, connected, consumed, lost_before, tail_skipped = decode_frames_with_loss(buf, carry)
+
+    status = pack_lead_status(connected)          # (n_packets,) uint8
+    leads_on = lead_status_connected(status)      # (n_packets, 12) bool in LEAD_ORDER
+
+    packets = encode_frames(direct)   # (n, 8) 12-bit values -> framed bytes
+"""
+
+import numpy as np
+from typing import Tuple, Union
+
+# Packet parsing constants
+PACKET_SIZE = 22
+START_BYTE = 0xE8
+END_BYTE = 0x8E
+FIRST_MSB_OFFSET = 5
+LEAD_NAMES_DIRECT = ["I", "II", "V1", "V2", "V3", "V4", "V5", "V6"]
+LEAD_ORDER = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
+
+# Lead-status bitmask with every electrode connected
+LEAD_STATUS_ALL = (1 << len(LEAD_NAMES_DIRECT)) - 1
+
+# Status bits each LEAD_ORDER lead depends on (III/aVR/aVL/aVF are computed from I and II)
+_DIRECT_BIT = {name: 1 << i for i, name in enumerate(LEAD_NAMES_DIRECT)}
+_LIMB_BITS = _DIRECT_BIT["I"] | _DIRECT_BIT["II"]
+LEAD_STATUS_REQUIRED = np.array([_DIRECT_BIT.get(name, _LIMB_BITS) for name in LEAD_ORDER], dtype=np.uint8)
+
+_FRAME_OFFSETS = np.arange(PACKET_SIZE)
+_MSB_COLUMNS = slice(FIRST_MSB_OFFSET, FIRST_MSB_OFFSET + 2 * len(LEAD_NAMES_DIRECT), 2)
+_LSB_COLUMNS = slice(FIRST_MSB_OFFSET + 1, FIRST_MSB_OFFSET + 2 * len(LEAD_NAMES_DIRECT), 2)
+
+
+def find_frame_starts(data: np.ndarray) -> np.ndarray:
+    """
+    Locate the start offset of every valid frame in a byte array.
+
+    A frame is valid when it begins with START_BYTE and has END_BYTE exactly
+    PACKET_SIZE - 1 bytes later. Overlapping candidates (a stray 0xE8 inside a
+    frame) are resolved greedily from the left, the same way a sequential
+    scanner would.
+
+    Args:
+        data: uint8 array of received bytes
+
+    Returns:
+        Sorted int array of non-overlapping frame start offsets
+    """
+    if data.size < PACKET_SIZE:
+        return np.empty(0, dtype=np.intp)
+
+    last_start = data.size - PACKET_SIZE
+    candidates = np.flatnonzero(data[:last_start + 1] == START_BYTE)
+    if candidates.size == 0:
+        return candidates
+
+    starts = candidates[data[candidates + PACKET_SIZE - 1] == END_BYTE]
+    if starts.size < 2 or np.all(np.diff(starts) >= PACKET_SIZE):
+        return starts
+
+    # Rare path: overlapping candidates, keep the left-most of each overlap
+    keep = []
+    next_free = -1
+    for s in starts.tolist():
+        if s >= next_free:
+            keep.append(s)
+            next_free = s + PACKET_SIZE
+    return np.asarray(keep, dtype=np.intp)
+
+
+def decode_frame_matrix(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode an (n, PACKET_SIZE) matrix of validated frames.
+
+    Args:
+        frames: uint8 array, one frame per row
+
+    Returns:
+        tuple: (samples, connected)
+            - samples: (n, 12) float32 lead values in LEAD_ORDER, including
+              derived III, aVR, aVL and aVF
+            - connected: (n, 8) bool electrode-connected flags in
+              LEAD_NAMES_DIRECT order
+    """
+    msb = frames[:, _MSB_COLUMNS]
+    lsb = frames[:, _LSB_COLUMNS]
+    direct = ((msb & 0x1F).astype(np.int32) << 7) | (lsb & 0x7F)
+    connected = (msb & 0x20) != 0
+
+    direct = direct.astype(np.float32)
+    lead_i = direct[:, 0]
+    lead_ii = direct[:, 1]
+
+    samples = np.empty((frames.shape[0], len(LEAD_ORDER)), dtype=np.float32)
+    samples[:, 0] = lead_i
+    samples[:, 1] = lead_ii
+    samples[:, 2] = lead_ii - lead_i                      # III
+    samples[:, 3] = -(lead_i + lead_ii) / 2               # aVR
+    samples[:, 4] = (lead_i - samples[:, 2]) / 2          # aVL
+    samples[:, 5] = (lead_ii + samples[:, 2]) / 2         # aVF
+    samples[:, 6:] = direct[:, 2:]                        # V1..V6
+    return samples, connected
+
+
+def decode_frames(buf: Union[bytes, bytearray, memoryview, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Decode every complete frame in a receive buffer in a single pass.
+
+    Args:
+        buf: Raw bytes received from the serial port
+
+    Returns:
+        tuple: (samples, connected, consumed)
+            - samples: (n_packets, 12) float32 array in LEAD_ORDER
+            - connected: (n_packets, 8) bool array in LEAD_NAMES_DIRECT order
+            - consumed: Number of leading bytes the caller can discard. Bytes
+              after it may still hold the start of an incomplete frame.
+    """
+    samples, connected, consumed, _starts = _decode(buf)
+    return samples, connected, consumed
+
+
+def _decode(buf):
+    data = np.frombuffer(buf, dtype=np.uint8) if not isinstance(buf, np.ndarray) else buf
+    n_bytes = data.size
+
+    starts = find_frame_starts(data)
+    if starts.size:
+        frames = data[starts[:, None] + _FRAME_OFFSETS]
+        samples, connected = decode_frame_matrix(frames)
+        scan_from = int(starts[-1]) + PACKET_SIZE
+    else:
+        samples = np.empty((0, len(LEAD_ORDER)), dtype=np.float32)
+        connected = np.empty((0, len(LEAD_NAMES_DIRECT)), dtype=bool)
+        scan_from = 0
+
+    # Every start position that still had room for a full frame has been
+    # checked, so only the final PACKET_SIZE - 1 bytes can hold a partial frame.
+    tail_from = max(scan_from, n_bytes - (PACKET_SIZE - 1))
+    pending = np.flatnonzero(data[tail_from:] == START_BYTE)
+    consumed = tail_from + int(pending[0]) if pending.size else n_bytes
+    return samples, connected, consumed, starts
+
+
+def decode_frames_with_loss(buf, leading_skipped: int = 0):
+    """
+    decode_frames() plus the position of lost frames.
+
+    Valid frames are contiguous in an intact stream, so every run of bytes
+    skipped between two frames (a dropped byte, a corrupt frame, a damaged
+    start/end marker) stands for at least one lost frame:
+    max(1, round(skipped / PACKET_SIZE)).
+
+    Args:
+        buf: Raw bytes received from the serial port
+        leading_skipped: Bytes discarded at the end of the previous call
+            (`tail_skipped`), counted against the first frame of this call
+
+    Returns:
+        tuple: (samples, connected, consumed, lost_before, tail_skipped)
+            - samples, connected, consumed: as decode_frames()
+            - lost_before: (n_packets,) int array, frames lost immediately
+              before each decoded frame
+            - tail_skipped: Bytes discarded after the last frame (pass back
+              as `leading_skipped` on the next call)
+    """
+    samples, connected, consumed, starts = _decode(buf)
+    if starts.size == 0:
+        return samples, connected, consumed, np.zeros(0, dtype=np.int64), int(leading_skipped) + consumed
+
+    skipped = np.empty(starts.size, dtype=np.int64)
+    skipped[0] = int(starts[0]) + int(leading_skipped)
+    skipped[1:] = np.diff(starts) - PACKET_SIZE
+    lost_before = np.where(skipped > 0, np.maximum(1, np.rint(skipped / PACKET_SIZE)), 0).astype(np.int64)
+    tail_skipped = max(0, consumed - (int(starts[-1]) + PACKET_SIZE))
+    return samples, connected, consumed, lost_before, tail_skipped
+
+
+def pack_lead_status(connected: np.ndarray) -> np.ndarray:
+    """
+    Fold per-electrode connected flags into one status byte per sample.
+
+    Args:
+        connected: (n, 8) bool array in LEAD_NAMES_DIRECT order
+
+    Returns:
+        (n,) uint8 bitmask, bit i set when LEAD_NAMES_DIRECT[i] is connected
+    """
+    connected = np.asarray(connected, dtype=bool).reshape(-1, len(LEAD_NAMES_DIRECT))
+    return np.packbits(connected, axis=1, bitorder='little')[:, 0]
+
+
+def lead_status_connected(status) -> np.ndarray:
+    """
+    Expand lead-status bytes to per-lead connected flags.
+
+    Args:
+        status: (n,) uint8 bitmask from pack_lead_status (or a scalar)
+
+    Returns:
+        (n, 12) bool array in LEAD_ORDER ((12,) for a scalar)
+    """
+    status = np.asarray(status, dtype=np.uint8)
+    return (status[..., None] & LEAD_STATUS_REQUIRED) == LEAD_STATUS_REQUIRED
+
+
+def samples_to_packets(samples: np.ndarray) -> list:
+    """
+    Convert decoded samples back to the legacy list-of-dicts packet format.
+
+    Args:
+        samples: (n_packets, 12) array in LEAD_ORDER
+
+    Returns:
+        List of {lead_name: value} dictionaries, one per packet
+    """
+    return [dict(zip(LEAD_ORDER, row)) for row in samples.tolist()]
+
+
+def encode_frames(direct: np.ndarray, connected=True, header: bytes = b"\x00\x00\x00\x00") -> bytes:
+    """
+    Build the 22-byte packet stream for direct lead values (inverse of decode_frames).
+
+    Used by the virtual ECG device; values are clipped to 12 bits.
+
+    Args:
+        direct: (n, 8) lead values in LEAD_NAMES_DIRECT order
+        connected: Electrode-connected flag, scalar or (n, 8) bool array
+        header: The 4 header bytes written after START_BYTE
+
+    Returns:
+        n * PACKET_SIZE bytes
+    """
+    direct = np.clip(np.rint(np.asarray(direct, dtype=np.float64)), 0, 0xFFF).astype(np.uint16)
+    direct = direct.reshape(-1, len(LEAD_NAMES_DIRECT))
+    n = direct.shape[0]
+    frames = np.zeros((n, PACKET_SIZE), dtype=np.uint8)
+    frames[:, 0] = START_BYTE
+    frames[:, 1:FIRST_MSB_OFFSET] = np.frombuffer(bytes(header)[:FIRST_MSB_OFFSET - 1], dtype=np.uint8)
+    flags = np.broadcast_to(np.asarray(connected, dtype=bool), direct.shape)
+    frames[:, _MSB_COLUMNS] = ((direct >> 7) & 0x1F) | np.where(flags, 0x20, 0)
+    frames[:, _LSB_COLUMNS] = direct & 0x7F
+    frames[:, -1] = END_BYTE
+    return frames.tobytes()
@@ -0,0 +1,206 @@
+"""
+PQRST Wave Analyzer
+
+Single-lead P/Q/R/S/T fiducial detection used by the expanded lead view and
+the arrhythmia detector. Kept free of Qt so offline tools and benchmarks can
+run the same analysis headless.
+
+Usage:
+    from ecg.pqrst_analyzer import PQRSTAnalyzer
+
+    analysis = PQRSTAnalyzer(sampling_rate=500).analyze_signal(lead_ii)
+    r_peaks = analysis['r_peaks']
+"""
+
+import numpy as np
+from scipy.signal import butter, filtfilt, find_peaks
+
+from .sampling_clock import resolve_sampling_rate
+
+
+class PQRSTAnalyzer:
+    """Analyze ECG signal to detect P, Q, R, S, T waves and calculate metrics"""
+    
+    def __init__(self, sampling_rate=500):
+        self.fs = sampling_rate
+        self.r_peaks = []
+        self.p_peaks = []
+        self.q_peaks = []
+        self.s_peaks = []
+        self.t_peaks = []
+        
+    def analyze_signal(self, signal):
+        """Analyze ECG signal and detect all wave components"""
+        try:
+            # Filter the signal
+            filtered_signal = self._filter_signal(signal)
+            
+            # Detect R peaks first
+            self.r_peaks = self._detect_r_peaks(filtered_signal)
+            
+            if len(self.r_peaks) > 0:
+                # Detect other waves based on R peaks
+                self.p_peaks = self._detect_p_waves(filtered_signal, self.r_peaks)
+                self.q_peaks = self._detect_q_waves(filtered_signal, self.r_peaks)
+                self.s_peaks = self._detect_s_waves(filtered_signal, self.r_peaks)
+                self.t_peaks = self._detect_t_waves(filtered_signal, self.r_peaks)
+            
+            return {
+                'r_peaks': self.r_peaks,
+                'p_peaks': self.p_peaks,
+                'q_peaks': self.q_peaks,
+                's_peaks': self.s_peaks,
+                't_peaks': self.t_peaks
+            }
+        except Exception as e:
+            print(f"Error in PQRST analysis: {e}")
+            return {'r_peaks': [], 'p_peaks': [], 'q_peaks': [], 's_peaks': [], 't_peaks': []}
+    
+    def _filter_signal(self, signal):
+        """Apply bandpass filter to ECG signal with improved error handling"""
+        try:
+            if len(signal) < 10:
+                return signal
+            
+            # Ensure sampling rate is valid
+            if self.fs <= 0 or self.fs > 10000:
+                fallback = resolve_sampling_rate()
+                print(f"⚠️ Invalid sampling rate: {self.fs} Hz, using {fallback:.1f} Hz")
+                self.fs = fallback
+            
+            nyq = 0.5 * self.fs
+            # Ensure filter frequencies are valid
+            low = max(0.01, 0.5 / nyq)  # At least 0.5 Hz
+            high = min(0.49, 40 / nyq)  # At most 40 Hz, but below Nyquist
+            
+            if low >= high:
+                # Invalid filter parameters, return unfiltered signal
+                print(f"⚠️ Invalid filter parameters: low={low}, high={high}, fs={self.fs}")
+                return signal
+            
+            b, a = butter(4, [low, high], btype='band')
+            
+            # Check if signal is long enough for filtering
+            if len(signal) < max(len(b), len(a)) * 3:
+                # Signal too short for filtering, return as is
+                return signal
+            
+            filtered = filtfilt(b, a, signal)
+            return filtered
+        except Exception as e:
+            print(f"⚠️ Error filtering signal: {e}, returning unfiltered signal")
+            return signal
+    
+    def _detect_r_peaks(self, signal):
+        """Detect R peaks using Pan-Tompkins algorithm with improved sensitivity for serial data"""
+        try:
+            if len(signal) < 10:
+                return []
+            
+            # Filter the signal first to reduce noise
+            filtered_signal = self._filter_signal(signal)
+            
+            # Differentiate
+            diff = np.ediff1d(filtered_signal)
+            # Square
+            squared = diff ** 2
+            
+            # Moving window integration - adaptive window size based on sampling rate
+            window_size = max(3, int(0.15 * self.fs))
+            if window_size > len(squared):
+                window_size = len(squared) // 4
+            if window_size < 1:
+                window_size = 1
+            
+            mwa = np.convolve(squared, np.ones(window_size)/window_size, mode='same')
+            
+            # Adaptive threshold - more lenient for serial data
+            mean_mwa = np.mean(mwa)
+            std_mwa = np.std(mwa)
+            
+            # Use lower threshold for better sensitivity (0.3 instead of 0.5)
+            threshold = mean_mwa + 0.3 * std_mwa
+            
+            # Minimum distance between peaks - adaptive based on expected heart rate
+            # Allow for heart rates from 40-200 bpm
+            min_distance_samples = max(3, int(0.2 * self.fs))  # At least 200ms between peaks
+            
+            # Try to find peaks with the threshold
+            peaks, properties = find_peaks(mwa, height=threshold, distance=min_distance_samples)
+            
+            # If no peaks found, try with lower threshold
+            if len(peaks) == 0 and len(mwa) > 0:
+                # Lower threshold to 0.1 * std for very sensitive detection
+                lower_threshold = mean_mwa + 0.1 * std_mwa
+                peaks, _ = find_peaks(mwa, height=lower_threshold, distance=min_distance_samples)
+            
+            # Additional check: if we have very few peaks but signal has variation, try even more lenient
+            if len(peaks) < 2 and len(mwa) > 50:
+                # Check if signal has significant variation (not flatline)
+                signal_variation = np.std(filtered_signal)
+                if signal_variation > 0.01:  # Signal has variation
+                    # Use even lower threshold
+                    very_low_threshold = mean_mwa + 0.05 * std_mwa
+                    peaks, _ = find_peaks(mwa, height=very_low_threshold, distance=max(2, min_distance_samples // 2))
+            
+            return peaks
+        except Exception as e:
+            print(f"Error in R peak detection: {e}")
+            return []
+    
+    def _detect_p_waves(self, signal, r_peaks):
+        """Detect P waves before R peaks"""
+        p_peaks = []
+        for r in r_peaks:
+            # Look for P wave 120-200ms before R peak for better accuracy
+            start = max(0, r - int(0.20 * self.fs))
+            end = max(0, r - int(0.12 * self.fs))
+            if end > start:
+                segment = signal[start:end]
+                if len(segment) > 0:
+                    p_idx = start + np.argmax(segment)
+                    p_peaks.append(p_idx)
+        return p_peaks
+    
+    def _detect_q_waves(self, signal, r_peaks):
+        """Detect Q waves (negative deflection before R)"""
+        q_peaks = []
+        for r in r_peaks:
+            # Look for Q wave up to 80ms before R peak
+            start = max(0, r - int(0.08 * self.fs))
+            end = r
+            if end > start:
+                segment = signal[start:end]
+                if len(segment) > 0:
+                    # Q wave is the minimum point between the P wave end and R peak
+                    q_idx = start + np.argmin(segment)
+                    q_peaks.append(q_idx)
+        return q_peaks
+    
+    def _detect_s_waves(self, signal, r_peaks):
+        """Detect S waves (negative deflection after R)"""
+        s_peaks = []
+        for r in r_peaks:
+            # Look for S wave up to 80ms after R peak
+            start = r
+            end = min(len(signal), r + int(0.08 * self.fs))
+            if end > start:
+                segment = signal[start:end]
+                if len(segment) > 0:
+                    s_idx = start + np.argmin(segment)
+                    s_peaks.append(s_idx)
+        return s_peaks
+    
+    def _detect_t_waves(self, signal, r_peaks):
+        """Detect T waves after S waves"""
+        t_peaks = []
+        for r in r_peaks:
+            # Look for T wave 100-300ms after R peak
+            start = min(len(signal), r + int(0.1 * self.fs))
+            end = min(len(signal), r + int(0.3 * self.fs))
+            if end > start:
+                segment = signal[start:end]
+                if len(segment) > 0:
+                    t_idx = start + np.argmax(segment)
+                    t_peaks.append(t_idx)
+        return t_peaks
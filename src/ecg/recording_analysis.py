@@ -0,0 +1,327 @@
+"""
+Recording Analysis (headless)
+
+The 12-lead clinical pipeline of ECGTestPage, without the page: R-peaks,
+12-lead median beats, PR / QRS / QT / QTc / QTcF, P / QRS / T axes, ST,
+RV5 / SV1 and the Lead II rhythm labels of ArrhythmiaDetector.
+
+ECGTestPage runs the same functions on its live ring buffer (adding the
+streaming detector's R-peaks and the packet-loss sample mask); offline tools
+such as the batch analyzer (ecg/batch_analysis.py) run them on recorded
+12-lead blocks. Nothing here imports Qt.
+
+Usage:
+    from ecg.recording_analysis import RecordingAnalyzer, analyze_lead_ii, compute_metrics
+
+    analysis = analyze_lead_ii(signals, fs)           # signals: (12, n) raw ADC samples
+    metrics = compute_metrics(analysis)               # HR, PR, QRS, QT, QTc, axes, ...
+
+    result = RecordingAnalyzer(fs).analyze(signals)   # metrics + arrhythmia labels
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .beat_detector import detect_r_peaks_full_buffer
+from .clinical_measurements import (
+    build_median_beat_set, measure_qt_from_median_beat, measure_rv5_sv1_from_median_set,
+    measure_st_deviation_from_median_beat, calculate_axis_from_median_set, calculate_qrs_t_angle,
+    measure_pr_from_median_beat, measure_qrs_duration_from_median_beat
+)
+from .packet_decoder import LEAD_ORDER
+from .sample_timeline import beats_clear_of_gaps, rr_intervals_clear_of_gaps
+
+LEAD_NAMES = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
+
+# Columns of compute_metrics(), in report order
+METRIC_NAMES = (
+    'heart_rate', 'rr_ms', 'pr_interval', 'qrs_duration', 'qt_interval', 'qtc_interval', 'qtcf_interval',
+    'p_axis', 'qrs_axis', 't_axis', 'qrs_t_angle', 'st_segment', 'rv5_mv', 'sv1_mv', 'beats',
+)
+
+# Beat-alignment lead when Lead II has too few beats (a direct chest lead, so
+# it stays usable when the limb electrodes behind II are off)
+V2_INDEX = LEAD_ORDER.index("V2")
+
+
+def _median_rr_ms(r_peaks, fs, sample_mask):
+    """Median of the physiological (200-6000 ms) RR intervals clear of gaps, or None"""
+    rr_intervals_ms = (np.diff(r_peaks) / fs * 1000.0)[rr_intervals_clear_of_gaps(r_peaks, sample_mask)]
+    valid_rr = rr_intervals_ms[(rr_intervals_ms >= 200) & (rr_intervals_ms <= 6000)]
+    return np.median(valid_rr) if len(valid_rr) > 0 else None
+
+
+def analyze_lead_ii(signals, fs, connected=None, r_peaks=None, sample_mask=None):
+    """R-peaks, 12-lead median beats and intervals of one 12-lead block
+
+    Falls back to V2 for beat alignment when Lead II has too few beats.
+
+    Args:
+        signals: (n_leads, n_samples) raw signals (no display filters)
+        fs: Sampling rate in Hz
+        connected: Optional per-lead bool flags; leads whose electrode is off
+            are neither searched for beats nor measured (all leads if None)
+        r_peaks: Optional Lead II R-peaks already detected (e.g. by the
+            streaming detector); detected on the full block if None or < 2
+        sample_mask: Optional per-sample flags (SAMPLE_INTERPOLATED /
+            SAMPLE_AFTER_GAP); beats touching a gap are kept out of RR and
+            median beats
+
+    Returns:
+        dict with r_peaks, rr_ms, median_set, reference_lead, time_axis,
+        median_beat, tp_baseline, pr_interval, qrs_duration, qt_interval and
+        st_segment, or None if there are not enough beats
+    """
+    signals = np.asarray(signals, dtype=float)
+    if signals.ndim != 2 or signals.shape[0] < 2:
+        return None
+    lead_ii_data = signals[1]
+    reference_lead = 1
+    if connected is None:
+        connected = np.ones(signals.shape[0], dtype=bool)
+    connected = np.asarray(connected, dtype=bool)
+    if len(lead_ii_data) < 100:
+        return None
+    if not connected[1]:
+        lead_ii_data = np.zeros(0)
+    elif np.all(lead_ii_data == 0) or np.std(lead_ii_data) < 0.1:
+        return None
+
+    # Detect R-peaks in raw Lead II (fallback to V2 if Lead II insufficient) - GE/Philips standard
+    from scipy.signal import butter, filtfilt, find_peaks
+    nyquist = fs / 2
+    low = 0.5 / nyquist
+    high = 40 / nyquist
+
+    if connected[1]:
+        if r_peaks is None or len(r_peaks) < 2:
+            r_peaks = detect_r_peaks_full_buffer(lead_ii_data, fs)
+    else:
+        r_peaks = np.zeros(0, dtype=int)
+
+    # Calculate BPM first (works with ≥2 beats) - needed for low BPM detection
+    # This allows BPM calculation even when we don't have enough beats for median beat
+    estimated_bpm = 60
+    if len(r_peaks) >= 2:
+        rr_ms = _median_rr_ms(r_peaks, fs, sample_mask)
+        if rr_ms is not None:
+            estimated_bpm = 60000.0 / rr_ms if rr_ms > 0 else 60
+
+    # Adaptive minimum beat requirement based on BPM and available data window
+    # At low BPM (< 40), we need longer windows, so reduce minimum beats
+    # At 10 BPM: need 6s per beat, so 2 beats = 12s (not possible in 4s buffer)
+    # At 30 BPM: need 2s per beat, so 2 beats = 4s (just possible)
+    # Strategy: Use minimum 2 beats for BPM, but require more for median beat if possible
+    min_beats_for_bpm = 2  # Always allow BPM calculation with 2 beats
+    min_beats_for_median = 8  # Preferred for median beat
+
+    # If we have low BPM (< 40), reduce median beat requirement
+    if estimated_bpm < 40:
+        # At low BPM, accept fewer beats for median (minimum 3 for basic metrics)
+        min_beats_for_median = max(3, min(8, len(r_peaks)))
+
+    # Fallback to V2 if Lead II has insufficient beats (GE/Philips standard)
+    if len(r_peaks) < min_beats_for_bpm and len(signals) > V2_INDEX and connected[V2_INDEX]:
+        lead_v2_data = signals[V2_INDEX]
+        if len(lead_v2_data) > 100 and np.std(lead_v2_data) > 0.1:
+            b, a = butter(4, [low, high], btype='band')
+            filtered_v2 = filtfilt(b, a, lead_v2_data)
+            signal_mean_v2 = np.mean(filtered_v2)
+            signal_std_v2 = np.std(filtered_v2)
+
+            # Use same adaptive detection for V2 (prioritize conservative for low BPM)
+            height_v2 = signal_mean_v2 + 0.5 * signal_std_v2
+            prominence_v2 = signal_std_v2 * 0.4
+
+            # Try conservative strategy first for V2 (best for low BPM 10-120)
+            r_peaks_v2, _ = find_peaks(
+                filtered_v2,
+                height=height_v2,
+                distance=int(0.4 * fs),  # 400ms - conservative for low BPM
+                prominence=prominence_v2
+            )
+
+            # If conservative doesn't work, try normal
+            if len(r_peaks_v2) < min_beats_for_bpm:
+                r_peaks_v2, _ = find_peaks(
+                    filtered_v2,
+                    height=height_v2,
+                    distance=int(0.3 * fs),  # 240ms - normal
+                    prominence=prominence_v2
+                )
+
+            if len(r_peaks_v2) >= min_beats_for_bpm:
+                r_peaks = r_peaks_v2
+                reference_lead = V2_INDEX  # Use V2 for beat alignment
+                # Recalculate estimated BPM from V2
+                rr_ms = _median_rr_ms(r_peaks, fs, sample_mask)
+                if rr_ms is not None:
+                    estimated_bpm = 60000.0 / rr_ms if rr_ms > 0 else 60
+                    # Update min_beats_for_median based on V2 BPM
+                    if estimated_bpm < 40:
+                        min_beats_for_median = max(3, min(8, len(r_peaks)))
+
+    # Require minimum beats for BPM calculation (≥2 beats)
+    if len(r_peaks) < min_beats_for_bpm:
+        return None
+
+    # Build median beats for all leads in one pass on the shared fiducials, with
+    # adaptive minimum beats (prefer 8, but allow fewer for low BPM)
+    # Keep bridged / missing samples out of the median beats when enough clean beats remain
+    clean_peaks = beats_clear_of_gaps(r_peaks, sample_mask, int(0.4 * fs), int(0.9 * fs))
+    beat_peaks = clean_peaks if len(clean_peaks) >= min_beats_for_median else r_peaks
+    median_set = build_median_beat_set(signals, beat_peaks, fs, reference_lead=reference_lead,
+                                       min_beats=min_beats_for_median,
+                                       leads=None if connected.all() else connected)
+    if median_set is None or median_set.lead(reference_lead) is None:
+        return None
+    time_axis = median_set.time_axis
+    median_beat_ii = median_set.lead(reference_lead)
+
+    # TP baseline using proper TP segment detection (end of T to next P) - GE/Philips standard
+    tp_baseline_ii = median_set.tp_baseline(reference_lead)
+
+    # Calculate RR interval in ms (median RR from raw signal)
+    rr_ms = _median_rr_ms(r_peaks, fs, sample_mask) if len(r_peaks) >= 2 else None
+    if rr_ms is None:
+        rr_ms = 600.0
+
+    # Measurements from the median beat (standardized functions)
+    # IMPORTANT: PR interval is calculated from Lead II (median_beat_ii) - GE/Philips standard
+    pr_interval = measure_pr_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii)
+    if pr_interval is None or pr_interval <= 0:
+        pr_interval = 0
+    qrs_duration = measure_qrs_duration_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii)
+    if qrs_duration is None or qrs_duration <= 0:
+        qrs_duration = 0
+    qt_interval = measure_qt_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii)
+    if qt_interval is None:
+        qt_interval = 0
+    st_segment = measure_st_deviation_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii, j_offset_ms=60)
+    if st_segment is None:
+        st_segment = 0.0
+
+    return {
+        'r_peaks': np.asarray(r_peaks),
+        'rr_ms': rr_ms,
+        'median_set': median_set,
+        'reference_lead': reference_lead,
+        'time_axis': time_axis,
+        'median_beat': median_beat_ii,
+        'tp_baseline': tp_baseline_ii,
+        'pr_interval': pr_interval,
+        'qrs_duration': qrs_duration,
+        'qt_interval': qt_interval,
+        'st_segment': st_segment,
+    }
+
+
+def bazett_qtc(heart_rate, qt_ms):
+    """QTc (ms) by Bazett: QTc = QT / sqrt(RR), RR from the heart rate; 0 if undefined"""
+    if not heart_rate or heart_rate <= 0 or not qt_ms or qt_ms <= 0:
+        return 0
+    rr_sec = 60.0 / heart_rate
+    return int(round(qt_ms / 1000.0 / np.sqrt(rr_sec) * 1000))
+
+
+def fridericia_qtc(qt_ms, rr_ms):
+    """QTcF (ms) by Fridericia: QTcF = QT / RR^(1/3); 0 if undefined"""
+    if not qt_ms or qt_ms <= 0 or not rr_ms or rr_ms <= 0:
+        return 0
+    return int(round(qt_ms / 1000.0 / ((rr_ms / 1000.0) ** (1.0 / 3.0)) * 1000.0))
+
+
+def _round_axis(axis_deg):
+    return int(round(axis_deg)) if axis_deg is not None else None
+
+
+def compute_metrics(analysis) -> Optional[Dict[str, object]]:
+    """
+    Report metrics of one analyze_lead_ii() result.
+
+    Same measurements as ECGTestPage.calculate_ecg_metrics, without the
+    display smoothing (heart rate median buffer, axis hysteresis), so a
+    recording always gives the same numbers.
+
+    Args:
+        analysis: analyze_lead_ii() result (or None)
+
+    Returns:
+        dict keyed by METRIC_NAMES (axes / RV5 / SV1 are None when the leads
+        they need are missing), or None without an analysis
+    """
+    if analysis is None:
+        return None
+    rr_ms = float(analysis['rr_ms'])
+    heart_rate = int(round(60000.0 / rr_ms)) if rr_ms > 0 else 0
+    qt_interval = analysis['qt_interval']
+    beat_set = analysis['median_set']
+
+    qrs_axis = calculate_axis_from_median_set(beat_set, wave_type='QRS')
+    p_axis = calculate_axis_from_median_set(beat_set, wave_type='P', pr_ms=analysis['pr_interval'] or 160)
+    t_axis = calculate_axis_from_median_set(beat_set, wave_type='T')
+    qrs_t_angle = calculate_qrs_t_angle(qrs_axis, t_axis) if qrs_axis is not None and t_axis is not None else None
+
+    rv5_mv, sv1_mv = None, None
+    if beat_set.n_leads >= 11:
+        try:
+            # Index 6 = V1, Index 10 = V5 - ADC factors for V5/V1 (Marquette standards)
+            rv5_mv, sv1_mv = measure_rv5_sv1_from_median_set(beat_set, v5_index=10, v1_index=6,
+                                                             v5_adc_per_mv=2048.0, v1_adc_per_mv=1441.0)
+        except Exception as e:
+            print(f"❌ Error calculating RV5/SV1 from median: {e}")
+
+    return {
+        'heart_rate': heart_rate,
+        'rr_ms': round(rr_ms, 1),
+        'pr_interval': analysis['pr_interval'],
+        'qrs_duration': analysis['qrs_duration'],
+        'qt_interval': qt_interval,
+        'qtc_interval': bazett_qtc(heart_rate, qt_interval),
+        'qtcf_interval': fridericia_qtc(qt_interval, rr_ms),
+        'p_axis': _round_axis(p_axis),
+        'qrs_axis': _round_axis(qrs_axis),
+        't_axis': _round_axis(t_axis),
+        'qrs_t_angle': _round_axis(qrs_t_angle),
+        'st_segment': analysis['st_segment'],
+        'rv5_mv': rv5_mv,
+        'sv1_mv': sv1_mv,
+        'beats': int(len(analysis['r_peaks'])),
+    }
+
+
+class RecordingAnalyzer:
+    """Metrics and arrhythmia labels of recorded 12-lead blocks at one sampling rate."""
+
+    def __init__(self, fs: float):
+        """
+        Args:
+            fs: Sampling rate of the blocks passed to analyze()
+        """
+        from .arrhythmia_detector import ArrhythmiaDetector
+        from .pqrst_analyzer import PQRSTAnalyzer
+        self.fs = float(fs)
+        self.pqrst = PQRSTAnalyzer(sampling_rate=self.fs)
+        self.detector = ArrhythmiaDetector(sampling_rate=self.fs)
+
+    def analyze(self, signals, connected=None) -> Dict[str, object]:
+        """
+        Analyze one block.
+
+        Args:
+            signals: (n_leads, n_samples) raw samples, Lead II in row 1
+            connected: Optional per-lead bool flags (see analyze_lead_ii)
+
+        Returns:
+            dict with 'metrics' (compute_metrics() result or None) and
+            'arrhythmias' (ArrhythmiaDetector labels for Lead II)
+        """
+        signals = np.asarray(signals, dtype=float)
+        metrics = compute_metrics(analyze_lead_ii(signals, self.fs, connected=connected))
+        labels: List[str] = []
+        if signals.ndim == 2 and signals.shape[0] > 1 and signals.shape[1] > 0:
+            lead_ii = signals[1]
+            labels = self.detector.detect_arrhythmias(lead_ii, self.pqrst.analyze_signal(lead_ii),
+                                                      has_received_serial_data=True)
+        return {'metrics': metrics, 'arrhythmias': list(labels)}
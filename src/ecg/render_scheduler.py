@@ -0,0 +1,296 @@
+"""
+Unified Render Scheduler
+
+Every live view used to own a QTimer: the 12-lead grid, the 12:1 / 6:2
+overlays, the detailed lead plot, the recording capture, the dashboard
+heartbeat and metrics, and the expanded lead dialog. The timers fired
+independently (also for hidden pages), so their redraws interleaved and on
+slow PCs they starved each other and the UI stuttered.
+
+`RenderScheduler` drives all of them from one timer tick:
+    - Coalescing: every view that is due runs in the same tick, so Qt paints
+      the results in one pass. A tick stops starting new views once the frame
+      budget is spent; the deferred ones are the most overdue next tick.
+    - Visibility: views whose widget is hidden (inactive page of a stacked
+      widget, minimized window) are skipped. A view can register a cheap
+      `hidden_callback` (e.g. keep draining acquisition data) that runs at
+      `hidden_fps` instead.
+    - Adaptive rate: each view's interval backs off when its measured render
+      cost exceeds half the interval and recovers towards the target when it
+      falls below a quarter of it.
+    - Stats: per-view frame counts, achieved fps, render-time mean/p95/max,
+      hidden skips and deferrals (`get_stats()`).
+
+`ScheduledView` keeps the QTimer calls the views already make (start(ms),
+stop(), isActive(), setInterval(), deleteLater()), so a timer is replaced by
+one registration.
+
+Usage:
+    from ecg.render_scheduler import get_render_scheduler
+
+    scheduler = get_render_scheduler()
+    self.timer = scheduler.view("ecg_12_lead", self.update_plots, widget=self, fps=30, min_fps=10)
+    self.timer.start()          # or start(33) for a 33 ms target interval
+    ...
+    print(scheduler.get_stats()["ecg_12_lead"])
+"""
+
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from PyQt5.QtCore import QObject, Qt, QTimer
+
+
+class ScheduledView:
+    """One view driven by the RenderScheduler (QTimer-compatible handle)."""
+
+    def __init__(self, scheduler, name: str, callback: Callable[[], None], widget=None, fps: float = 30.0,
+                 min_fps: Optional[float] = None, adaptive: bool = True,
+                 hidden_callback: Optional[Callable[[], None]] = None, hidden_fps: float = 5.0,
+                 history: int = 240):
+        self.scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.widget = widget
+        self.adaptive = adaptive
+        self.hidden_callback = hidden_callback
+        self.hidden_interval = 1.0 / max(0.1, float(hidden_fps))
+        self.target_interval = 1.0 / max(0.1, float(fps))
+        self.max_interval = 1.0 / max(0.1, float(min_fps)) if min_fps else self.target_interval
+        self.current_interval = self.target_interval
+        self.active = False
+        self.next_due = 0.0
+        self._cost_ema = 0.0
+        self._costs = deque(maxlen=history)
+        self._frame_times = deque(maxlen=history)
+        self.frames = 0
+        self.hidden_frames = 0
+        self.skipped_hidden = 0
+        self.deferred = 0
+        self.errors = 0
+        self.visible = True
+
+    # ------------------------------------------------------- QTimer-like API
+
+    def start(self, msec: Optional[int] = None) -> None:
+        """Activate the view; msec sets a new target interval (like QTimer.start)."""
+        if msec is not None:
+            self.setInterval(msec)
+        self.scheduler._attach(self)
+        self.active = True
+        self.next_due = time.perf_counter()
+        self.scheduler._wake()
+
+    def stop(self) -> None:
+        self.active = False
+
+    def isActive(self) -> bool:
+        return self.active
+
+    def interval(self) -> int:
+        """Current (possibly backed-off) interval in milliseconds."""
+        return int(round(self.current_interval * 1000.0))
+
+    def setInterval(self, msec: int) -> None:
+        """Set the target interval; the minimum rate never exceeds the target."""
+        self.target_interval = max(0.001, float(msec) / 1000.0)
+        self.max_interval = max(self.max_interval, self.target_interval)
+        self.current_interval = self.target_interval
+
+    def deleteLater(self) -> None:
+        """Unregister from the scheduler (start() registers it again)."""
+        self.active = False
+        self.scheduler.remove(self.name, self)
+
+    # ------------------------------------------------------------ scheduling
+
+    def is_visible(self) -> bool:
+        widget = self.widget
+        if widget is None:
+            return True
+        try:
+            if not widget.isVisible():
+                return False
+            window = widget.window()
+            return window is None or not window.isMinimized()
+        except RuntimeError:
+            # Underlying Qt object already deleted
+            self.active = False
+            return False
+
+    def run(self, now: float) -> float:
+        """Render one frame; returns its cost in seconds."""
+        t0 = time.perf_counter()
+        try:
+            self.callback()
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Render view '{self.name}' failed: {e}")
+        cost = time.perf_counter() - t0
+        self.frames += 1
+        self._costs.append(cost)
+        self._frame_times.append(now)
+        self._cost_ema = cost if self.frames == 1 else 0.8 * self._cost_ema + 0.2 * cost
+        if self.adaptive:
+            if self._cost_ema > 0.5 * self.current_interval:
+                self.current_interval = min(self.max_interval, self.current_interval * 1.25)
+            elif self._cost_ema < 0.25 * self.current_interval and self.current_interval > self.target_interval:
+                self.current_interval = max(self.target_interval, self.current_interval / 1.1)
+        self._advance(now, self.current_interval)
+        return cost
+
+    def run_hidden(self, now: float) -> float:
+        """Run the hidden-state callback (if any) or just record the skip."""
+        if self.hidden_callback is None:
+            self.skipped_hidden += 1
+            self._advance(now, self.current_interval)
+            return 0.0
+        t0 = time.perf_counter()
+        try:
+            self.hidden_callback()
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Hidden update of '{self.name}' failed: {e}")
+        self.hidden_frames += 1
+        self._advance(now, self.hidden_interval)
+        return time.perf_counter() - t0
+
+    def _advance(self, now: float, interval: float) -> None:
+        self.next_due += interval
+        if self.next_due < now:
+            # Never try to catch up missed frames
+            self.next_due = now + interval
+
+    def get_stats(self) -> Dict[str, object]:
+        costs = np.asarray(self._costs) * 1000.0
+        times = self._frame_times
+        fps = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[-1] > times[0] else 0.0
+        return {
+            'active': self.active,
+            'visible': self.visible,
+            'frames': self.frames,
+            'fps': fps,
+            'target_fps': 1.0 / self.target_interval,
+            'current_fps': 1.0 / self.current_interval,
+            'mean_ms': float(costs.mean()) if costs.size else 0.0,
+            'p95_ms': float(np.percentile(costs, 95)) if costs.size else 0.0,
+            'max_ms': float(costs.max()) if costs.size else 0.0,
+            'hidden_frames': self.hidden_frames,
+            'skipped_hidden': self.skipped_hidden,
+            'deferred': self.deferred,
+            'errors': self.errors,
+        }
+
+
+class RenderScheduler(QObject):
+    """Single tick driving every registered live view."""
+
+    def __init__(self, tick_ms: int = 15, frame_budget_ms: float = 25.0, parent=None):
+        """
+        Args:
+            tick_ms: Scheduler tick (the finest frame interval)
+            frame_budget_ms: Render time per tick after which the remaining
+                due views are deferred to the next tick
+        """
+        super().__init__(parent)
+        self.tick = tick_ms / 1000.0
+        self.frame_budget = frame_budget_ms / 1000.0
+        self._views: Dict[str, ScheduledView] = {}
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self.ticks = 0
+        self.over_budget_ticks = 0
+
+    def view(self, name: str, callback: Callable[[], None], widget=None, fps: float = 30.0,
+             min_fps: Optional[float] = None, adaptive: bool = True,
+             hidden_callback: Optional[Callable[[], None]] = None, hidden_fps: float = 5.0) -> ScheduledView:
+        """
+        Register (or replace) a view. It stays idle until start() is called.
+
+        Args:
+            name: Unique view name (re-registering a name replaces the old view)
+            callback: Renders one frame
+            widget: Widget whose visibility gates rendering (None = always render)
+            fps: Target frame rate
+            min_fps: Lowest rate the adaptive back-off may reach (default: fps)
+            adaptive: Back off when render cost exceeds half the interval
+            hidden_callback: Optional cheap update run while the widget is hidden
+            hidden_fps: Rate of hidden_callback
+
+        Returns:
+            ScheduledView handle (QTimer-like start/stop/isActive/deleteLater)
+        """
+        handle = ScheduledView(self, name, callback, widget=widget, fps=fps, min_fps=min_fps,
+                               adaptive=adaptive, hidden_callback=hidden_callback, hidden_fps=hidden_fps)
+        self._attach(handle)
+        return handle
+
+    def _attach(self, handle: ScheduledView) -> None:
+        old = self._views.get(handle.name)
+        if old is handle:
+            return
+        if old is not None:
+            old.active = False
+        self._views[handle.name] = handle
+
+    def remove(self, name: str, handle: Optional[ScheduledView] = None) -> None:
+        """Unregister a view (only if it is still `handle`, when given)."""
+        current = self._views.get(name)
+        if current is not None and (handle is None or current is handle):
+            current.active = False
+            del self._views[name]
+
+    def _wake(self) -> None:
+        if not self._timer.isActive():
+            self._timer.start(max(1, int(round(self.tick * 1000))))
+
+    def _tick(self) -> None:
+        now = time.perf_counter()
+        self.ticks += 1
+        active = [v for v in self._views.values() if v.active]
+        if not active:
+            self._timer.stop()
+            return
+        # Half a tick of slack so an interval that is not a multiple of the
+        # tick does not slip a whole tick every frame
+        due = [v for v in active if now >= v.next_due - 0.5 * self.tick]
+        due.sort(key=lambda v: v.next_due)
+        spent = 0.0
+        for v in due:
+            if spent >= self.frame_budget:
+                v.deferred += 1
+                continue
+            v.visible = v.is_visible()
+            if not v.active:
+                continue
+            spent += v.run(now) if v.visible else v.run_hidden(now)
+        if spent >= self.frame_budget:
+            self.over_budget_ticks += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, object]]:
+        """Per-view frame statistics (see ScheduledView.get_stats)."""
+        return {name: v.get_stats() for name, v in list(self._views.items())}
+
+    def summary(self) -> str:
+        """One line per active view, for console status reports."""
+        lines = []
+        for name, s in self.get_stats().items():
+            if not s['active']:
+                continue
+            lines.append(f"{name}: {s['fps']:.1f}/{s['target_fps']:.0f} fps, render p95 {s['p95_ms']:.1f} ms, "
+                         f"hidden skips {s['skipped_hidden']}, deferred {s['deferred']}")
+        return "\n".join(lines)
+
+
+_shared_scheduler = None
+
+
+def get_render_scheduler() -> RenderScheduler:
+    """Process-wide scheduler (create after the QApplication)."""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        _shared_scheduler = RenderScheduler()
+    return _shared_scheduler
@@ -0,0 +1,322 @@
+"""
+Streaming ECG-Derived Respiration (EDR)
+
+`estimate_baseline_drift()` + `extract_respiration()` + `respiration_rate()`
+in ecg_filters.py take the whole signal: a 120 ms median and a 1.8 s moving
+average at the full sampling rate, a zero-phase 0.35 Hz low-pass, and a count
+of positive zero crossings over the whole array. The expanded lead view ran
+them again on every redraw, so the cost grew with the session.
+
+`StreamingRespiration` runs the same chain on the new samples only, with all
+state kept at a low rate (~8 Hz):
+
+    - median of every 120 ms bucket (the batch median window): removes the
+      QRS and decimates in one step; the unfinished bucket is carried over
+    - running 1.8 s moving average of the bucket medians (baseline drift)
+    - causal 2nd-order Butterworth low-pass at 0.35 Hz (`sosfilt` state)
+    - slow EMA DC tracker instead of subtracting the whole-signal mean
+    - the result is appended to a fixed-size trace ring buffer per lead
+
+The respiration rate is updated per trace sample: a hysteresis zero-crossing
+detector (threshold relative to the running RMS of the trace) records each
+breath, and the rate is the mean breath interval over the last
+`rate_window_seconds`. Breath intervals outside [min_rate, max_rate] are
+rejected, and a pause longer than 60 / min_rate seconds restarts the count.
+Memory and cost per block are fixed, so the stream can run all session.
+
+The causal filters delay the trace by `delay_seconds` (~1.5 s); `window()`
+compensates for it when mapping the trace onto ECG sample indices.
+
+Usage:
+    from ecg.respiration import StreamingRespiration
+
+    respiration = StreamingRespiration(n_leads=12)
+    respiration.configure(sampling_rate=500)
+    respiration.process(block)                    # block: (12, k) raw samples, oldest first
+
+    rate = respiration.rate(lead=1)               # breaths/min on Lead II (0.0 until known)
+    trace = respiration.trace(seconds=30, lead=1) # ~8 Hz respiration waveform
+    resp = respiration.window(start, end, lead=1) # full-rate waveform for samples [start, end)
+"""
+
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+from scipy.signal import butter, group_delay, lfilter, sosfilt, sosfilt_zi
+
+from .ring_buffer import ECGRingBuffer
+
+# Same kernels / band as estimate_baseline_drift() and extract_respiration()
+MEDIAN_SECONDS = 0.12
+DRIFT_SECONDS = 1.8
+RESPIRATION_CUTOFF_HZ = 0.35
+# Breathing frequency the reported delay refers to (15 breaths/min)
+TYPICAL_RESPIRATION_HZ = 0.25
+
+
+class StreamingRespiration:
+    """Per-lead ECG-derived respiration trace and rate, updated block by block at ~8 Hz."""
+
+    def __init__(self, n_leads: int = 12, trace_seconds: float = 300.0, rate_window_seconds: float = 60.0,
+                 min_rate: float = 4.0, max_rate: float = 60.0, hysteresis: float = 0.2,
+                 dc_seconds: float = 3.0, min_breaths: int = 3, rate_tolerance: float = 0.02):
+        """
+        Args:
+            n_leads: Number of leads processed together
+            trace_seconds: Respiration trace kept per lead
+            rate_window_seconds: Breaths the rate is averaged over
+            min_rate: Slowest plausible rate (breaths/min); longer pauses restart the count
+            max_rate: Fastest plausible rate (breaths/min); shorter intervals are rejected
+            hysteresis: Zero-crossing threshold as a fraction of the trace RMS
+            dc_seconds: Time constant of the DC tracker
+            min_breaths: Breaths needed before a rate is reported
+            rate_tolerance: Relative sampling-rate change that rebuilds the filters
+        """
+        self.n_leads = int(n_leads)
+        self.trace_seconds = float(trace_seconds)
+        self.rate_window_seconds = float(rate_window_seconds)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.hysteresis = float(hysteresis)
+        self.dc_seconds = float(dc_seconds)
+        self.min_breaths = max(2, int(min_breaths))
+        self.rate_tolerance = rate_tolerance
+        self.sampling_rate = None
+        self.decimation = None
+        self.trace_rate = None
+        self.trace_data = None
+        self.total_samples = 0
+
+    def configure(self, sampling_rate: float) -> bool:
+        """
+        Set the sampling rate. Cheap to call on every block: the filters are
+        only rebuilt (and the trace restarted) when the rate moves by more
+        than `rate_tolerance`.
+
+        Returns:
+            True if the filters were rebuilt
+        """
+        if (self.sampling_rate is not None
+                and abs(sampling_rate - self.sampling_rate) <= self.rate_tolerance * self.sampling_rate):
+            return False
+        fs = float(sampling_rate)
+        decimation = max(3, int(MEDIAN_SECONDS * fs) | 1)
+        low_rate = fs / decimation
+        cutoff = RESPIRATION_CUTOFF_HZ / (low_rate / 2.0)
+        if not 0 < cutoff < 1:
+            raise ValueError(f"Sampling rate {fs} Hz is too low for respiration extraction")
+        self.sampling_rate = fs
+        self.decimation = decimation
+        self.trace_rate = low_rate
+        self._mean_window = max(1, int(round(DRIFT_SECONDS * low_rate)))
+        self._sos = butter(2, cutoff, btype='low', output='sos')
+        b, a = butter(2, cutoff, btype='low')
+        _, lowpass_delay = group_delay((b, a), w=[2.0 * np.pi * TYPICAL_RESPIRATION_HZ / low_rate])
+        # Trace samples between a bucket and its filtered value
+        self._delay = (self._mean_window - 1) / 2.0 + float(lowpass_delay[0])
+        self._dc_alpha = min(1.0, 1.0 / (self.dc_seconds * low_rate))
+        capacity = max(16, int(np.ceil(self.trace_seconds * low_rate)))
+        self.trace_data = ECGRingBuffer(capacity=capacity, n_leads=self.n_leads, track_time=False)
+        self.reset(start_index=self.total_samples)
+        return True
+
+    def reset(self, start_index: int = 0) -> None:
+        """
+        Forget all state; the next block starts a new trace.
+
+        Args:
+            start_index: Stream index of the next sample (e.g. the ring buffer's total_written)
+        """
+        self.total_samples = int(start_index)
+        self._origin = int(start_index)
+        self._partial = np.zeros((self.n_leads, 0))
+        self._primed = False
+        self._ma_history = None
+        self._zi = None
+        self._dc = None
+        self._power = np.zeros(self.n_leads)
+        self._state = np.zeros(self.n_leads, dtype=np.int8)
+        self._breaths: List[deque] = [deque() for _ in range(self.n_leads)]
+        if self.trace_data is not None:
+            self.trace_data.clear()
+
+    @property
+    def delay_seconds(self) -> float:
+        """Approximate lag of the trace behind the ECG (bucket + moving average + low-pass)."""
+        if self.decimation is None:
+            return 0.0
+        return (self._delay * self.decimation + (self.decimation - 1) / 2.0) / self.sampling_rate
+
+    # ------------------------------------------------------------------ #
+    # Input
+    # ------------------------------------------------------------------ #
+
+    def process(self, block: np.ndarray) -> int:
+        """
+        Add the next block of raw samples.
+
+        Args:
+            block: (n_leads, k) array of new samples, oldest first
+
+        Returns:
+            Number of new respiration trace samples
+        """
+        if self.decimation is None:
+            raise RuntimeError("StreamingRespiration.configure() must be called first")
+        block = np.asarray(block, dtype=np.float64)
+        if block.shape[0] != self.n_leads:
+            raise ValueError(f"Expected {self.n_leads} leads, got {block.shape[0]}")
+        self.total_samples += block.shape[1]
+        pending = np.concatenate([self._partial, block], axis=1) if self._partial.shape[1] else block
+        n_buckets = pending.shape[1] // self.decimation
+        used = n_buckets * self.decimation
+        self._partial = pending[:, used:].copy()
+        if n_buckets == 0:
+            return 0
+
+        # 120 ms bucket medians: QRS removed, ~8 Hz
+        medians = np.median(pending[:, :used].reshape(self.n_leads, n_buckets, self.decimation), axis=-1)
+        if not self._primed:
+            self._prime(medians[:, 0])
+        drift = self._moving_average(medians)
+        smooth, self._zi = sosfilt(self._sos, drift, axis=-1, zi=self._zi)
+        a = self._dc_alpha
+        dc, dc_state = lfilter([a], [1.0, a - 1.0], smooth, axis=-1, zi=((1.0 - a) * self._dc)[:, None])
+        self._dc = dc[:, -1].copy()
+        resp = smooth - dc
+        first = self.trace_data.total_written
+        self.trace_data.extend(resp.T)
+        self._update_breaths(resp, first)
+        return n_buckets
+
+    def _prime(self, first: np.ndarray) -> None:
+        # The stream start repeats the first bucket (as mode='nearest' would)
+        self._ma_history = np.repeat(first[:, None], self._mean_window - 1, axis=1)
+        self._zi = sosfilt_zi(self._sos)[:, None, :] * first[None, :, None]
+        self._dc = first.copy()
+        self._primed = True
+
+    def _moving_average(self, medians: np.ndarray) -> np.ndarray:
+        m = self._mean_window
+        series = np.concatenate([self._ma_history, medians], axis=1)
+        sums = np.cumsum(series, axis=1)
+        window_sums = sums[:, m - 1:].copy()
+        window_sums[:, 1:] -= sums[:, :-m]
+        self._ma_history = series[:, series.shape[1] - (m - 1):]
+        return window_sums / m
+
+    def _update_breaths(self, resp: np.ndarray, first_index: int) -> None:
+        """Hysteresis zero crossings (negative -> positive) of the new trace samples."""
+        alpha = min(1.0, 1.0 / (self.rate_window_seconds * self.trace_rate))
+        shortest = 60.0 / self.max_rate * self.sampling_rate
+        longest = 60.0 / self.min_rate * self.sampling_rate
+        horizon = self.rate_window_seconds * self.sampling_rate
+        for j in range(resp.shape[1]):
+            x = resp[:, j]
+            self._power += alpha * (x * x - self._power)
+            threshold = self.hysteresis * np.sqrt(self._power)
+            rising = (self._state < 0) & (x > threshold)
+            self._state[x > threshold] = 1
+            self._state[x < -threshold] = -1
+            if not rising.any():
+                continue
+            t = self.sample_index(first_index + j)
+            for lead in np.flatnonzero(rising):
+                breaths = self._breaths[lead]
+                if breaths:
+                    interval = t - breaths[-1]
+                    if interval < shortest:
+                        continue
+                    if interval > longest:
+                        breaths.clear()
+                breaths.append(t)
+                while breaths and breaths[0] < t - horizon:
+                    breaths.popleft()
+
+    # ------------------------------------------------------------------ #
+    # Results
+    # ------------------------------------------------------------------ #
+
+    def sample_index(self, trace_index):
+        """Stream sample index (float) a trace sample corresponds to, delay compensated."""
+        return (self._origin + (np.asarray(trace_index, dtype=float) - self._delay) * self.decimation
+                + (self.decimation - 1) / 2.0)
+
+    def _trace_position(self, sample_index: float) -> float:
+        # Inverse of sample_index()
+        return (sample_index - self._origin - (self.decimation - 1) / 2.0) / self.decimation + self._delay
+
+    def rate(self, lead: int = 1) -> float:
+        """
+        Respiration rate of one lead (breaths/min): mean breath interval over
+        the last `rate_window_seconds`; 0.0 until `min_breaths` breaths were
+        seen or after a pause longer than 60 / min_rate seconds.
+        """
+        if self.decimation is None:
+            return 0.0
+        breaths = self._breaths[lead]
+        if len(breaths) < self.min_breaths:
+            return 0.0
+        newest = self.sample_index(self.trace_data.total_written - 1)
+        if newest - breaths[-1] > 60.0 / self.min_rate * self.sampling_rate:
+            return 0.0
+        span = breaths[-1] - breaths[0]
+        return float(60.0 * (len(breaths) - 1) * self.sampling_rate / span) if span > 0 else 0.0
+
+    def rates(self) -> np.ndarray:
+        """(n_leads,) respiration rates (breaths/min, 0.0 where unknown)."""
+        return np.array([self.rate(lead) for lead in range(self.n_leads)])
+
+    @staticmethod
+    def _safe_scale(resp: np.ndarray) -> np.ndarray:
+        # Same +/-0.6 amplitude scaling as extract_respiration()
+        peak = float(np.max(np.abs(resp))) if len(resp) else 0.0
+        return resp * (0.6 / peak) if peak > 0.6 else resp
+
+    def trace(self, seconds: Optional[float] = None, lead: int = 1, scale: bool = True) -> np.ndarray:
+        """
+        Newest respiration trace of one lead at `trace_rate`.
+
+        Args:
+            seconds: Length to return (the whole kept trace if None)
+            lead: Lead index
+            scale: Apply extract_respiration()'s +/-0.6 amplitude scaling
+
+        Returns:
+            1-D float64 array, oldest first
+        """
+        if self.trace_data is None or self.trace_data.filled == 0:
+            return np.zeros(0)
+        n = None if seconds is None else max(1, int(round(seconds * self.trace_rate)))
+        resp = np.array(self.trace_data.latest(n)[lead], dtype=np.float64)
+        return self._safe_scale(resp) if scale else resp
+
+    def window(self, start: int, end: int, lead: int = 1, scale: bool = True) -> Optional[np.ndarray]:
+        """
+        Respiration for stream samples [start, end) at the full sampling rate
+        (linear interpolation of the trace; samples newer than the delayed
+        trace hold its last value).
+
+        Args:
+            start: First stream sample index
+            end: Stream sample index after the last one
+            lead: Lead index
+            scale: Apply extract_respiration()'s +/-0.6 amplitude scaling
+
+        Returns:
+            (end - start,) float64 array, or None when the trace does not cover the range
+        """
+        if self.trace_data is None or self.trace_data.filled == 0 or end <= start:
+            return None
+        newest = self.trace_data.total_written - 1
+        oldest = self.trace_data.total_written - self.trace_data.filled
+        # Trace samples bracketing [start, end)
+        lo = max(oldest, int(np.floor(self._trace_position(start))) - 1)
+        hi = min(newest, int(np.ceil(self._trace_position(end))) + 1)
+        if hi < lo:
+            return None
+        values = self.trace_data.latest(newest - lo + 1)[lead, :hi - lo + 1]
+        positions = self.sample_index(np.arange(lo, hi + 1))
+        resp = np.interp(np.arange(start, end, dtype=float), positions, values.astype(np.float64))
+        return self._safe_scale(resp) if scale else resp
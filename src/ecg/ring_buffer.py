@@ -0,0 +1,244 @@
+"""
+Preallocated Multi-Lead Ring Buffer
+
+Fixed-size circular storage for 12-lead ECG samples with optional per-sample
+arrival timestamps.
+
+Storage is "mirrored": every sample is written twice, at position p and at
+p + capacity. Any window of up to `capacity` consecutive samples is therefore
+one contiguous slice of the backing array, so readers get zero-copy NumPy
+views without reassembling wrapped segments.
+
+Threading model (single producer, any number of readers):
+- The producer writes sample data first and publishes it by advancing
+  `total_written` last. Readers only look at samples below the published
+  count, so no lock is needed.
+- A reader that falls more than `capacity` samples behind loses the oldest
+  samples; `read_since` reports how many were skipped.
+- Views alias live storage. Copy them (or use `snapshot`) if the data must
+  stay stable while the producer keeps writing.
+
+The buffer also behaves like the list of per-lead arrays it replaces:
+`len(ring)` is the lead count and `ring[i]` is a chronological, full-length
+copy of lead i (oldest sample first, newest at [-1]), so metrics, reports
+and the expanded view can hold on to it while acquisition continues.
+Per-frame plotting code that reads a lead and is done with it before the
+next frame uses `ring.view(i)` instead to avoid the copy.
+
+Usage:
+    ring = ECGRingBuffer(capacity=10000, n_leads=12)
+    ring.extend(samples, timestamp=time.monotonic())    # samples: (n, 12)
+
+    cursor = 0
+    block, times, cursor, skipped = ring.read_since(cursor)   # block: (12, k)
+    lead_ii_last_2s = ring.latest(1000)[1]
+    lead_ii_history = ring[1]                           # stable copy of ring.latest()[1]
+    lead_ii_frame = ring.view(1)                        # zero-copy, for the plot timer
+"""
+
+import time
+import numpy as np
+from typing import Optional, Tuple
+
+
+class ECGRingBuffer:
+    """Lock-free single-producer circular buffer for multi-lead ECG samples."""
+
+    def __init__(self, capacity: int, n_leads: int = 12, dtype=np.float32, track_time: bool = True):
+        self.n_leads = int(n_leads)
+        self.dtype = np.dtype(dtype)
+        self.track_time = track_time
+        self._resets = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.capacity = int(capacity)
+        self._data = np.zeros((self.n_leads, 2 * self.capacity), dtype=self.dtype)
+        self._times = np.zeros(2 * self.capacity, dtype=np.float64) if self.track_time else None
+        self._write_index = 0  # Total samples ever written (monotonic)
+        self._resets += 1
+
+    # ------------------------------------------------------------------ #
+    # Producer side
+    # ------------------------------------------------------------------ #
+
+    @property
+    def total_written(self) -> int:
+        """Total number of samples published since creation or last clear()."""
+        return self._write_index
+
+    @property
+    def generation(self) -> Tuple[int, int]:
+        """(reset count, total_written) - changes whenever the contents change."""
+        return self._resets, self._write_index
+
+    @property
+    def filled(self) -> int:
+        """Number of valid samples currently held (at most capacity)."""
+        return min(self._write_index, self.capacity)
+
+    def clear(self) -> None:
+        """Reset contents and counters (not safe while a producer is writing)."""
+        self._data.fill(0)
+        if self._times is not None:
+            self._times.fill(0)
+        self._write_index = 0
+        self._resets += 1
+
+    def reset(self, capacity: Optional[int] = None) -> None:
+        """Clear the buffer, optionally reallocating it with a new capacity."""
+        if capacity is None or int(capacity) == self.capacity:
+            self.clear()
+        else:
+            self._allocate(capacity)
+
+    def extend(self, block: np.ndarray, timestamp=None) -> int:
+        """
+        Append a block of samples.
+
+        Args:
+            block: (n_samples, n_leads) array, one row per sample (the layout
+                returned by the packet decoder)
+            timestamp: Arrival time for the block. Either a scalar applied to
+                every sample, an (n_samples,) array, or None for time.monotonic()
+
+        Returns:
+            Number of samples written
+        """
+        block = np.asarray(block)
+        if block.ndim == 1:
+            block = block.reshape(1, -1)
+        n = block.shape[0]
+        if n == 0:
+            return 0
+        if block.shape[1] != self.n_leads:
+            raise ValueError(f"Expected {self.n_leads} leads per sample, got {block.shape[1]}")
+
+        times = None
+        if self._times is not None:
+            if timestamp is None:
+                timestamp = time.monotonic()
+            times = np.broadcast_to(np.asarray(timestamp, dtype=np.float64), (n,))
+
+        # Only the newest `capacity` samples can survive
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            if times is not None:
+                times = times[-self.capacity:]
+            skipped = n - self.capacity
+        else:
+            skipped = 0
+
+        count = block.shape[0]
+        start = (self._write_index + skipped) % self.capacity
+        first = min(count, self.capacity - start)
+        cols = block.T
+        self._write_segment(start, cols[:, :first], None if times is None else times[:first])
+        if first < count:
+            self._write_segment(0, cols[:, first:], None if times is None else times[first:])
+
+        # Publish last so readers never see partially written samples
+        self._write_index += n
+        return n
+
+    def append(self, sample, timestamp: Optional[float] = None) -> None:
+        """Append a single multi-lead sample."""
+        self.extend(np.asarray(sample).reshape(1, -1), timestamp)
+
+    def _write_segment(self, pos: int, cols: np.ndarray, times: Optional[np.ndarray]) -> None:
+        k = cols.shape[1]
+        self._data[:, pos:pos + k] = cols
+        self._data[:, pos + self.capacity:pos + self.capacity + k] = cols
+        if times is not None:
+            self._times[pos:pos + k] = times
+            self._times[pos + self.capacity:pos + self.capacity + k] = times
+
+    # ------------------------------------------------------------------ #
+    # Reader side
+    # ------------------------------------------------------------------ #
+
+    def __len__(self) -> int:
+        """Number of leads, so the buffer can stand in for a list of lead arrays."""
+        return self.n_leads
+
+    def __getitem__(self, lead) -> np.ndarray:
+        """Chronological copy of one lead (or a lead slice) over the full capacity."""
+        return self.view(lead).copy()
+
+    def __iter__(self):
+        for lead in range(self.n_leads):
+            yield self[lead]
+
+    def view(self, lead) -> np.ndarray:
+        """
+        Chronological zero-copy view of one lead (or a lead slice) over the full capacity.
+
+        The view aliases live storage: once the producer writes again it may
+        show newer samples. Only use it for reads that finish before then
+        (e.g. one plot refresh); otherwise index the buffer for a copy.
+        """
+        return self._data[lead, self._window(self._write_index, self.capacity)]
+
+    def _window(self, end_index: int, n: int) -> slice:
+        """Storage slice holding the n samples that end at absolute end_index."""
+        end = (end_index % self.capacity) + self.capacity
+        return slice(end - n, end)
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Zero-copy (n_leads, n) view of the newest n samples, oldest first.
+
+        Before the buffer has filled, the view is padded on the left with the
+        zeros the buffer was initialised with, so its length is always n.
+        """
+        n = self.capacity if n is None else max(0, min(int(n), self.capacity))
+        return self._data[:, self._window(self._write_index, n)]
+
+    def latest_times(self, n: Optional[int] = None) -> Optional[np.ndarray]:
+        """Zero-copy view of the arrival timestamps matching latest(n)."""
+        if self._times is None:
+            return None
+        n = self.capacity if n is None else max(0, min(int(n), self.capacity))
+        return self._times[self._window(self._write_index, n)]
+
+    def read_since(self, cursor: int) -> Tuple[np.ndarray, Optional[np.ndarray], int, int]:
+        """
+        Return every sample published after `cursor`.
+
+        Args:
+            cursor: Absolute sample index the caller has already consumed up to
+                (start with 0, then pass back the returned cursor)
+
+        Returns:
+            tuple: (block, times, new_cursor, skipped)
+                - block: (n_leads, k) zero-copy view, oldest first
+                - times: (k,) timestamp view, or None if timestamps are off
+                - new_cursor: Cursor to pass on the next call
+                - skipped: Samples overwritten before the caller read them
+        """
+        end_index = self._write_index
+        oldest = max(0, end_index - self.capacity)
+        start_index = max(int(cursor), oldest)
+        skipped = start_index - int(cursor) if cursor < oldest else 0
+        k = end_index - start_index
+        window = self._window(end_index, k)
+        times = self._times[window] if self._times is not None else None
+        return self._data[:, window], times, end_index, skipped
+
+    def snapshot(self, n: Optional[int] = None, max_retries: int = 3) -> np.ndarray:
+        """
+        Stable copy of the newest n samples.
+
+        Retries if the producer wrapped over the copied region while copying.
+        """
+        n = self.capacity if n is None else max(0, min(int(n), self.capacity))
+        headroom = self.capacity - n
+        copied = None
+        for _ in range(max(1, max_retries)):
+            before = self._write_index
+            copied = self._data[:, self._window(before, n)].copy()
+            if self._write_index - before <= headroom:
+                break
+        return copied
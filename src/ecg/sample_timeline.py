@@ -0,0 +1,368 @@
+"""
+Gap-Aware Sample Timeline
+
+Lost packets used to vanish silently: the decoder returned only the frames it
+could validate, so every loss compressed the waveform and shortened the RR
+interval it fell into, and the only loss figure was `500 * elapsed -
+received`, which cannot say where samples went missing.
+
+`SampleTimeline` sits between the decoder and the acquisition ring buffer and
+keeps the stream on a per-sample timeline:
+
+    - Where: losses are located from two sources. The decoder reports bytes
+      skipped between valid frames (`decode_frames_with_loss`), and the
+      shared SamplingClock reports arrival silences with fewer samples than
+      the elapsed time implies (whole blocks lost upstream of the port).
+    - Fill: gaps up to `max_fill_seconds` are bridged by linear interpolation
+      between the neighbouring samples, so intervals keep their true length.
+      Longer gaps are not invented; the first sample after them is flagged.
+    - Mask: one uint8 per sample (SAMPLE_INTERPOLATED, SAMPLE_AFTER_GAP),
+      published in `mask` - an ECGRingBuffer aligned sample for sample with
+      the acquisition ring - so analysis and reports can honour it.
+    - Lead status: the hardware lead-status bitmask of every sample
+      (packet_decoder.pack_lead_status) is published the same way in
+      `lead_status`; filled samples take the status of the frame after the gap.
+    - Timestamps: per-sample times back-dated from the block arrival with the
+      recovered sampling rate.
+    - Stats: loss per second (recent history) and per session.
+
+Usage:
+    timeline = SampleTimeline(capacity=ring.capacity, clock=get_sampling_clock())
+    frames, mask, times = timeline.process(frames, arrival, lost_before, status)  # also publishes mask
+    ring.extend(frames, timestamp=times)
+
+    mask_block, cursor, skipped = timeline.mask_since(cursor)
+    status_block, status_cursor, _ = timeline.lead_status_since(status_cursor)
+    rr_ok = rr_intervals_clear_of_gaps(r_peaks, mask)
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .packet_decoder import LEAD_STATUS_ALL
+from .ring_buffer import ECGRingBuffer
+
+# Per-sample flags
+SAMPLE_OK = 0x00
+SAMPLE_INTERPOLATED = 0x01   # Filled in for a lost sample
+SAMPLE_AFTER_GAP = 0x02      # First real sample after an unfilled gap
+
+
+class SampleTimeline:
+    """Locates lost samples, bridges short gaps and keeps loss statistics."""
+
+    def __init__(self, capacity: int, n_leads: int = 12, clock=None, max_fill_seconds: float = 0.04,
+                 max_fill_samples: Optional[int] = None, history_seconds: int = 120):
+        """
+        Args:
+            capacity: Mask history, normally the acquisition ring capacity
+            n_leads: Leads per sample
+            clock: SamplingClock used for timing gaps, fill bounds and
+                per-sample timestamps (optional)
+            max_fill_seconds: Longest gap bridged by interpolation
+            max_fill_samples: Fixed fill bound in samples (overrides
+                max_fill_seconds)
+            history_seconds: Per-second loss buckets kept
+        """
+        self.n_leads = int(n_leads)
+        self.clock = clock
+        self.max_fill_seconds = float(max_fill_seconds)
+        self.max_fill_samples = max_fill_samples
+        self.mask = ECGRingBuffer(capacity, n_leads=1, dtype=np.uint8, track_time=False)
+        self.lead_status = ECGRingBuffer(capacity, n_leads=1, dtype=np.uint8, track_time=False)
+        self._per_second = deque(maxlen=int(history_seconds))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new session (clears mask, statistics and interpolation state)."""
+        with self._lock:
+            self.mask.clear()
+            self.lead_status.clear()
+            self._last_sample = None
+            self._last_arrival = None
+            self._last_time = None
+            self._per_second.clear()
+            self.session_start = time.time()
+            self.received = 0
+            self.lost_in_stream = 0    # Located by skipped bytes
+            self.lost_in_timing = 0    # Located by arrival silences
+            self.interpolated = 0
+            self.unfilled = 0
+            self.gap_events = 0
+
+    # ------------------------------------------------------------------ #
+    # Producer side
+    # ------------------------------------------------------------------ #
+
+    def _fill_limit(self, fs: float) -> int:
+        if self.max_fill_samples is not None:
+            return int(self.max_fill_samples)
+        return int(self.max_fill_seconds * fs) if fs else 0
+
+    def process(self, frames: np.ndarray, arrival_time: Optional[float] = None,
+                lost_before=None, lead_status=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Place a decoded block on the timeline and publish its mask.
+
+        Must be called by the acquisition producer before the block is
+        published to the data ring, so the mask of every readable sample is
+        already there.
+
+        Args:
+            frames: (n, n_leads) decoded samples
+            arrival_time: time.monotonic() arrival stamp (now if None)
+            lost_before: Optional (n,) frames lost immediately before each
+                decoded frame (from decode_frames_with_loss)
+            lead_status: Optional (n,) uint8 lead-status bitmask per frame
+                (all leads connected if None)
+
+        Returns:
+            tuple: (frames, mask, times)
+                - frames: (m, n_leads) samples with short gaps filled (m >= n)
+                - mask: (m,) uint8 sample flags
+                - times: (m,) per-sample timestamps
+        """
+        frames = np.asarray(frames)
+        n = frames.shape[0]
+        arrival = time.monotonic() if arrival_time is None else float(arrival_time)
+        if n == 0:
+            return frames, np.zeros(0, dtype=np.uint8), np.zeros(0)
+
+        lost = np.zeros(n, dtype=np.int64)
+        if lost_before is not None and len(lost_before) == n:
+            lost[:] = lost_before
+        stream_lost = int(lost.sum())
+
+        clock = self.clock
+        fs = clock.effective_rate(default=None) if clock is not None else None
+        timing_lost = 0
+        if clock is not None and self._last_arrival is not None:
+            timing_lost = clock.gap_deficit(arrival - self._last_arrival, n + stream_lost)
+            lost[0] += timing_lost
+
+        if self._last_sample is None:
+            # Session start: nothing to bridge from
+            stream_lost -= int(lost[0]) - timing_lost
+            timing_lost = 0
+            lost[0] = 0
+
+        limit = self._fill_limit(fs)
+        gap_positions = np.flatnonzero(lost)
+        if gap_positions.size == 0:
+            out = frames
+            mask = np.zeros(n, dtype=np.uint8)
+            source = None
+        else:
+            pieces, masks, sources = [], [], []
+            previous = self._last_sample
+            start = 0
+            filled = unfilled = 0
+            for i in gap_positions.tolist():
+                if i > start:
+                    pieces.append(frames[start:i])
+                    masks.append(np.zeros(i - start, dtype=np.uint8))
+                    sources.append(np.arange(start, i))
+                    previous = frames[i - 1]
+                k = int(lost[i])
+                if 0 < k <= limit:
+                    fraction = (np.arange(1, k + 1, dtype=np.float64) / (k + 1))[:, None]
+                    bridge = previous + (frames[i].astype(np.float64) - previous) * fraction
+                    pieces.append(bridge.astype(frames.dtype))
+                    masks.append(np.full(k, SAMPLE_INTERPOLATED, dtype=np.uint8))
+                    sources.append(np.full(k, i))
+                    head = np.zeros(1, dtype=np.uint8)
+                    filled += k
+                else:
+                    head = np.full(1, SAMPLE_AFTER_GAP, dtype=np.uint8)
+                    unfilled += k
+                pieces.append(frames[i:i + 1])
+                masks.append(head)
+                sources.append(np.full(1, i))
+                previous = frames[i]
+                start = i + 1
+            if start < n:
+                pieces.append(frames[start:])
+                masks.append(np.zeros(n - start, dtype=np.uint8))
+                sources.append(np.arange(start, n))
+            out = np.concatenate(pieces, axis=0)
+            mask = np.concatenate(masks)
+            source = np.concatenate(sources)
+            with self._lock:
+                self.interpolated += filled
+                self.unfilled += unfilled
+                self.gap_events += gap_positions.size
+        m = out.shape[0]
+
+        # Per-sample timestamps: the newest sample arrived with the block
+        if fs:
+            times = arrival - (m - 1 - np.arange(m)) / fs
+            if self._last_time is not None:
+                times = np.maximum(times, self._last_time)
+        else:
+            times = np.full(m, arrival)
+
+        with self._lock:
+            self.received += n
+            self.lost_in_stream += max(0, stream_lost)
+            self.lost_in_timing += timing_lost
+            self._account_second(arrival, n, max(0, stream_lost) + timing_lost, int(np.count_nonzero(mask & SAMPLE_INTERPOLATED)))
+        self._last_sample = out[-1].astype(np.float64)
+        self._last_arrival = arrival
+        self._last_time = float(times[-1])
+
+        if lead_status is not None and len(lead_status) == n:
+            status = np.asarray(lead_status, dtype=np.uint8)
+            if source is not None:
+                status = status[source]
+        else:
+            status = np.full(m, LEAD_STATUS_ALL, dtype=np.uint8)
+        self.lead_status.extend(status[:, None])
+        self.mask.extend(mask[:, None])
+        return out, mask, times
+
+    def _account_second(self, arrival: float, received: int, lost: int, interpolated: int) -> None:
+        second = int(arrival)
+        buckets = self._per_second
+        if not buckets or buckets[-1][0] != second:
+            buckets.append([second, 0, 0, 0])
+        bucket = buckets[-1]
+        bucket[1] += received
+        bucket[2] += lost
+        bucket[3] += interpolated
+
+    # ------------------------------------------------------------------ #
+    # Reader side
+    # ------------------------------------------------------------------ #
+
+    def mask_since(self, cursor: int) -> Tuple[np.ndarray, int, int]:
+        """
+        Sample flags published after `cursor` (same indexing as the data ring).
+
+        Returns:
+            tuple: (mask, new_cursor, skipped) - mask is a (k,) uint8 view
+        """
+        block, _, new_cursor, skipped = self.mask.read_since(cursor)
+        return block[0], new_cursor, skipped
+
+    def lead_status_since(self, cursor: int) -> Tuple[np.ndarray, int, int]:
+        """
+        Lead-status bitmasks published after `cursor` (same indexing as the data ring).
+
+        Returns:
+            tuple: (status, new_cursor, skipped) - status is a (k,) uint8 view
+        """
+        block, _, new_cursor, skipped = self.lead_status.read_since(cursor)
+        return block[0], new_cursor, skipped
+
+    @property
+    def lost(self) -> int:
+        return self.lost_in_stream + self.lost_in_timing
+
+    def per_second(self, seconds: Optional[int] = None) -> List[Dict[str, float]]:
+        """Loss per arrival second, oldest first (last `seconds` buckets)."""
+        with self._lock:
+            buckets = list(self._per_second)
+        if seconds is not None:
+            buckets = buckets[-int(seconds):]
+        out = []
+        for second, received, lost, interpolated in buckets:
+            total = received + lost
+            out.append({
+                'second': second,
+                'received': received,
+                'lost': lost,
+                'interpolated': interpolated,
+                'loss_percent': lost / total * 100.0 if total else 0.0,
+            })
+        return out
+
+    def get_stats(self) -> Dict[str, object]:
+        """Session loss statistics plus the last complete second."""
+        with self._lock:
+            received, lost = self.received, self.lost_in_stream + self.lost_in_timing
+            stats = {
+                'session_start': self.session_start,
+                'received': received,
+                'lost': lost,
+                'lost_in_stream': self.lost_in_stream,
+                'lost_in_timing': self.lost_in_timing,
+                'interpolated': self.interpolated,
+                'unfilled': self.unfilled,
+                'gap_events': self.gap_events,
+                'loss_percent': lost / (received + lost) * 100.0 if received + lost else 0.0,
+            }
+        recent = self.per_second(2)
+        stats['last_second'] = recent[0] if len(recent) == 2 else None
+        return stats
+
+
+# ---------------------------------------------------------------------- #
+# Mask helpers for analysis / reports
+# ---------------------------------------------------------------------- #
+
+def rr_intervals_clear_of_gaps(r_peaks, mask) -> np.ndarray:
+    """
+    Which RR intervals can be trusted.
+
+    Args:
+        r_peaks: Sorted R-peak sample positions within the masked window
+        mask: Sample flags of the same window (None = no information)
+
+    Returns:
+        (len(r_peaks) - 1,) bool array: False where the interval spans an
+        unfilled gap or either R-peak lies on an interpolated sample
+    """
+    r_peaks = np.asarray(r_peaks, dtype=np.int64)
+    n_rr = max(0, len(r_peaks) - 1)
+    if mask is None or n_rr == 0:
+        return np.ones(n_rr, dtype=bool)
+    mask = np.asarray(mask)
+    if not mask.any():
+        return np.ones(n_rr, dtype=bool)
+    peaks = np.clip(r_peaks, 0, len(mask) - 1)
+    # Unfilled gaps between consecutive peaks (prefix count of AFTER_GAP flags)
+    breaks = np.concatenate(([0], np.cumsum((mask & SAMPLE_AFTER_GAP) != 0)))
+    spans_gap = breaks[peaks[1:] + 1] - breaks[peaks[:-1] + 1] > 0
+    on_fill = (mask[peaks] & SAMPLE_INTERPOLATED) != 0
+    return ~(spans_gap | on_fill[1:] | on_fill[:-1])
+
+
+def beats_clear_of_gaps(r_peaks, mask, pre_samples: int, post_samples: int) -> np.ndarray:
+    """
+    R-peaks whose [r - pre, r + post] window holds no lost or filled sample
+    (used to keep bridged data out of median beats).
+    """
+    r_peaks = np.asarray(r_peaks, dtype=np.int64)
+    if mask is None or len(r_peaks) == 0:
+        return r_peaks
+    mask = np.asarray(mask)
+    if not mask.any():
+        return r_peaks
+    flagged = np.concatenate(([0], np.cumsum(mask != 0)))
+    lo = np.clip(r_peaks - int(pre_samples), 0, len(mask))
+    hi = np.clip(r_peaks + int(post_samples) + 1, 0, len(mask))
+    return r_peaks[flagged[hi] - flagged[lo] == 0]
+
+
+def flag_runs(mask) -> List[List[int]]:
+    """Compact [start, length, flags] runs of non-zero flags (for capture metadata)."""
+    mask = np.asarray(mask, dtype=np.uint8)
+    if mask.size == 0 or not mask.any():
+        return []
+    change = np.flatnonzero(np.diff(mask.astype(np.int16))) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [mask.size]))
+    return [[int(s), int(e - s), int(mask[s])] for s, e in zip(starts, ends) if mask[s]]
+
+
+def mask_from_runs(runs, n_samples: int) -> np.ndarray:
+    """Inverse of flag_runs()."""
+    mask = np.zeros(int(n_samples), dtype=np.uint8)
+    for start, length, flags in runs or []:
+        mask[int(start):int(start) + int(length)] = flags
+    return mask
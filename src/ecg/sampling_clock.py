@@ -0,0 +1,322 @@
+"""
+Sampling Clock Recovery
+
+The acquisition board does not report its sampling rate and its crystal
+drifts, so the rate has to be recovered from the stream itself. The old
+`SamplingRateCalculator` divided a sample count by a 5 s wall-clock window,
+and every consumer that read it before the first window closed fell back to
+its own guess (186.5, 250, 80 or 500 Hz). A wrong fs corrupts every interval,
+heart rate and filter cut-off derived from it.
+
+`SamplingClock` regresses the cumulative sample count against the monotonic
+arrival time of each block over a sliding window:
+
+    N(t) = fs * t + offset
+
+The slope is the effective sampling rate. Block arrival jitter (USB latency,
+thread scheduling) only shows up as residuals, so the estimate settles within
+a couple of seconds and keeps tracking slow crystal drift. Arrivals where far
+fewer samples came in than the elapsed time implies are recorded as gaps and
+restart the fit, so a stall never bends the slope.
+
+Two rates are published:
+    - `estimated_rate`: the latest regression slope
+    - `sampling_rate` / `stable_rate`: the estimate locked with hysteresis
+      (only moves when the estimate drifts more than `tolerance`). This is
+      the value every consumer should use; because it only changes on a real
+      rate change, cached filter designs and per-fs analysis results stay valid.
+
+One process-wide clock is shared by the acquisition thread (writer) and the
+12-lead page, dashboard, report generators and session recorder (readers).
+
+Usage:
+    from ecg.sampling_clock import get_sampling_clock, resolve_sampling_rate
+
+    clock = get_sampling_clock()
+    clock.add_samples(len(frames), arrival_time=time.monotonic())   # producer
+    fs = resolve_sampling_rate(ecg_test_page)                       # consumers
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Rate assumed before the first estimate when nothing better is known
+# (observed effective rate of the 12-lead acquisition board)
+FALLBACK_SAMPLING_RATE = 186.5
+
+# Estimates outside this range are treated as "no estimate"
+MIN_VALID_RATE = 10.0
+
+
+class SamplingClock:
+    """Sliding-window regression of sample count vs arrival time."""
+
+    def __init__(self, nominal_rate: Optional[float] = None, window_seconds: float = 10.0,
+                 min_span_seconds: float = 2.0, tolerance: float = 0.002,
+                 gap_seconds: float = 0.25, point_interval: float = 0.01,
+                 update_interval: float = 0.25, max_gap_events: int = 64):
+        """
+        Args:
+            nominal_rate: Expected rate in Hz, used until the first estimate
+                and as the drift reference (None if unknown)
+            window_seconds: Length of the regression window
+            min_span_seconds: Arrival-time span required before publishing
+            tolerance: Relative change of the estimate that moves the
+                published (stable) rate
+            gap_seconds: Minimum arrival silence considered for a gap
+            point_interval: Minimum time between regression points (blocks
+                arriving faster are merged into the next point)
+            update_interval: Minimum time between regressions
+            max_gap_events: Number of recent gap events kept
+        """
+        self.nominal_rate = float(nominal_rate) if nominal_rate else None
+        self.window_seconds = float(window_seconds)
+        self.min_span_seconds = float(min_span_seconds)
+        self.tolerance = float(tolerance)
+        self.gap_seconds = float(gap_seconds)
+        self.point_interval = float(point_interval)
+        self.update_interval = float(update_interval)
+        self._lock = threading.Lock()
+        self._gap_events = deque(maxlen=max_gap_events)
+        self.reset()
+
+    # ------------------------------------------------------------------ state
+
+    def reset(self) -> None:
+        """Forget the stream (call when acquisition restarts). Clears a pinned rate."""
+        with self._lock:
+            self._points = deque()
+            self._total = 0
+            self._last_arrival = None
+            self._last_fit = 0.0
+            self._estimate = 0.0
+            self._stable = 0.0
+            self._pinned = 0.0
+            self._jitter = 0.0
+            self._restarts = 0
+            self.gap_count = 0
+            self.missing_samples = 0
+            self._gap_events.clear()
+
+    def set_rate(self, sampling_rate: float) -> None:
+        """
+        Pin the published rate (demo / file playback, where no arrival
+        timing exists). Cleared by reset().
+        """
+        with self._lock:
+            self._pinned = float(sampling_rate) if sampling_rate and sampling_rate > 0 else 0.0
+
+    # --------------------------------------------------------------- producer
+
+    def add_sample(self) -> float:
+        return self.add_samples(1)
+
+    def add_samples(self, count: int, arrival_time: Optional[float] = None) -> float:
+        """
+        Account for a block of samples that has just arrived.
+
+        Args:
+            count: Number of samples in the block
+            arrival_time: time.monotonic() arrival stamp (now if None)
+
+        Returns:
+            The published sampling rate (0.0 until the first estimate)
+        """
+        if count <= 0:
+            return self.sampling_rate
+        t = time.monotonic() if arrival_time is None else float(arrival_time)
+        with self._lock:
+            previous = self._last_arrival
+            if previous is not None and t - previous >= self.gap_seconds:
+                self._check_gap(t - previous, count, t)
+            self._total += int(count)
+            self._last_arrival = t
+
+            points = self._points
+            if not points or t - points[-1][0] >= self.point_interval:
+                points.append((t, self._total))
+            else:
+                points[-1] = (points[-1][0], self._total)
+            while len(points) > 2 and t - points[0][0] > self.window_seconds:
+                points.popleft()
+
+            if t - self._last_fit >= self.update_interval:
+                self._last_fit = t
+                self._fit()
+            return self._published()
+
+    def gap_deficit(self, silence: float, count: int) -> int:
+        """
+        Samples that should have arrived during an arrival silence but did not.
+
+        A stall that is followed by a catch-up burst is not a gap.
+
+        Args:
+            silence: Seconds since the previous block arrived
+            count: Samples in the block that ended the silence
+
+        Returns:
+            Number of missing samples, 0 if the silence is not a gap
+        """
+        rate = self._estimate or self._stable or self.nominal_rate
+        if not rate or silence < self.gap_seconds:
+            return 0
+        missing = int(round(rate * silence)) - int(count)
+        if missing <= rate * self.gap_seconds * 0.5:
+            return 0
+        return missing
+
+    def _check_gap(self, silence: float, count: int, t: float) -> None:
+        missing = self.gap_deficit(silence, count)
+        if not missing:
+            return
+        self.gap_count += 1
+        self.missing_samples += missing
+        self._gap_events.append({
+            'time': t - silence,
+            'duration': silence,
+            'missing_samples': missing,
+            'sample_index': self._total,
+        })
+        # The count/time line has a step here - restart the fit but keep
+        # publishing the last estimate
+        self._points.clear()
+        self._restarts += 1
+
+    def _fit(self) -> None:
+        points = self._points
+        if len(points) < 5 or points[-1][0] - points[0][0] < self.min_span_seconds:
+            return
+        arr = np.asarray(points, dtype=np.float64)
+        t = arr[:, 0] - arr[0, 0]
+        n = arr[:, 1] - arr[0, 1]
+        slope, intercept = np.polyfit(t, n, 1)
+        residuals = n - (slope * t + intercept)
+        # One trimming pass against late blocks (scheduler hiccups)
+        mad = np.median(np.abs(residuals - np.median(residuals)))
+        if mad > 0:
+            keep = np.abs(residuals) <= 4.0 * 1.4826 * mad
+            if np.count_nonzero(keep) >= 5 and not np.all(keep):
+                slope, intercept = np.polyfit(t[keep], n[keep], 1)
+                residuals = n[keep] - (slope * t[keep] + intercept)
+        if not np.isfinite(slope) or slope <= MIN_VALID_RATE:
+            return
+        self._estimate = float(slope)
+        # Residual spread in seconds of arrival time
+        self._jitter = float(np.std(residuals) / slope)
+        if not self._stable or abs(self._estimate - self._stable) > self.tolerance * self._stable:
+            self._stable = float(round(self._estimate, 1))
+
+    def _published(self) -> float:
+        return self._pinned or self._stable
+
+    # -------------------------------------------------------------- consumers
+
+    @property
+    def sampling_rate(self) -> float:
+        """Published (stable or pinned) rate in Hz; 0.0 until known."""
+        return self._published()
+
+    @sampling_rate.setter
+    def sampling_rate(self, value: float) -> None:
+        self.set_rate(value)
+
+    @property
+    def stable_rate(self) -> float:
+        return self._published()
+
+    @property
+    def estimated_rate(self) -> float:
+        """Latest regression slope in Hz (0.0 until known)."""
+        return self._pinned or self._estimate
+
+    @property
+    def drift_ppm(self) -> Optional[float]:
+        """
+        Deviation of the latest estimate from the nominal rate (or, without
+        one, from the published stable rate) in parts per million.
+        """
+        reference = self.nominal_rate or self._stable
+        if not reference or not self._estimate:
+            return None
+        return (self._estimate - reference) / reference * 1e6
+
+    def effective_rate(self, default: Optional[float] = FALLBACK_SAMPLING_RATE) -> float:
+        """Published rate, else the nominal rate, else `default`."""
+        rate = self._published()
+        if rate > MIN_VALID_RATE:
+            return rate
+        if self.nominal_rate:
+            return self.nominal_rate
+        return default
+
+    def gap_events(self) -> List[Dict[str, float]]:
+        """Recent gaps (oldest first): arrival time, duration, missing samples."""
+        with self._lock:
+            return list(self._gap_events)
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            span = self._points[-1][0] - self._points[0][0] if len(self._points) > 1 else 0.0
+            return {
+                'sampling_rate': self._published(),
+                'estimated_rate': self._estimate,
+                'nominal_rate': self.nominal_rate,
+                'drift_ppm': self.drift_ppm,
+                'jitter_ms': self._jitter * 1000.0,
+                'samples': self._total,
+                'window_seconds': span,
+                'gaps': self.gap_count,
+                'missing_samples': self.missing_samples,
+                'fit_restarts': self._restarts,
+                'pinned': bool(self._pinned),
+            }
+
+
+_shared_clock = None
+_shared_lock = threading.Lock()
+
+
+def get_sampling_clock() -> SamplingClock:
+    """Process-wide clock fed by the live acquisition path."""
+    global _shared_clock
+    with _shared_lock:
+        if _shared_clock is None:
+            _shared_clock = SamplingClock()
+        return _shared_clock
+
+
+def resolve_sampling_rate(source=None, default: float = FALLBACK_SAMPLING_RATE) -> float:
+    """
+    The one place a sampling rate is looked up.
+
+    Args:
+        source: A SamplingClock, an object with a `sampler` (ECG test page),
+            an object with a numeric `sampling_rate`, or None
+        default: Returned when no rate is known anywhere
+
+    Returns:
+        Sampling rate in Hz: the source's published rate, else the shared
+        clock's, else `default`
+    """
+    candidates = []
+    if source is not None:
+        sampler = source if isinstance(source, SamplingClock) else getattr(source, 'sampler', None)
+        if sampler is not None:
+            candidates.append(sampler)
+        elif not isinstance(source, SamplingClock):
+            candidates.append(source)
+    candidates.append(get_sampling_clock())
+    for candidate in candidates:
+        try:
+            rate = float(getattr(candidate, 'sampling_rate', 0) or 0)
+        except (TypeError, ValueError):
+            continue
+        if rate > MIN_VALID_RATE and np.isfinite(rate):
+            return rate
+    shared = get_sampling_clock()
+    return shared.nominal_rate if shared.nominal_rate else default
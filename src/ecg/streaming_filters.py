@@ -0,0 +1,317 @@
+"""
+Streaming ECG Filter Bank
+
+Stateful, causal version of the AC / EMG / DFT filter chain in ecg_filters.py
+for the live display path. Coefficients come from the cached
+`design_ecg_filter()` designs and each lead keeps its own `sosfilt` state, so
+every new block of samples is filtered in O(block) instead of re-filtering
+the whole visible window on every frame.
+
+Frequency response:
+    The batch functions use zero-phase `filtfilt`, which applies each filter
+    forward and backward and so has magnitude |H(f)|^2. A causal filter cannot
+    be zero-phase; by default the bank runs every section twice in cascade,
+    which reproduces the same |H(f)|^2 magnitude response (notch depth,
+    cutoff attenuation) with a causal phase response. Pass
+    `match_filtfilt=False` to run each design once (|H(f)|, half the cost).
+
+`StreamingMedianBaseline` is the streaming form of
+`apply_baseline_wander_median_mean()` (120 ms median, then 800 ms mean,
+subtracted from the signal). Each lead keeps a sorted copy of its median
+window (bisect insert / remove: O(log k) search per sample instead of
+medfilt's O(k) per sample over the whole buffer) and the running mean is a
+moving sum over the new medians only. Both kernels are centered, so the
+corrected sample i is released once sample i + `delay` has arrived; away
+from the ends of the stream the output equals the batch function.
+
+Usage:
+    from ecg.streaming_filters import StreamingFilterBank, StreamingMedianBaseline
+
+    bank = StreamingFilterBank(n_leads=12)
+    bank.configure(sampling_rate=500, ac_filter="50", emg_filter="150", dft_filter="0.5")
+    filtered = bank.process(block)            # block: (12, k), oldest first
+    filtered = bank.process(block, leads=connected)   # skip disconnected leads
+
+    baseline = StreamingMedianBaseline(n_leads=12)
+    baseline.configure(sampling_rate=500)
+    clean = baseline.process(block)           # (12, j): samples older than `delay`
+    clean_tail = baseline.flush()             # end of a finite recording
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+
+import numpy as np
+from scipy.signal import sosfilt, sosfilt_zi
+from typing import Optional
+
+from .ecg_filters import FILTER_AC, FILTER_DFT, FILTER_EMG, design_ecg_filter, median_mean_baseline_windows
+
+
+class StreamingFilterBank:
+    """Per-lead stateful DFT -> EMG -> AC filter cascade."""
+
+    def __init__(self, n_leads: int = 12, match_filtfilt: bool = True, rate_tolerance: float = 0.02):
+        """
+        Args:
+            n_leads: Number of leads filtered together
+            match_filtfilt: Run every section twice to match the |H|^2
+                magnitude response of the zero-phase batch filters
+            rate_tolerance: Relative sampling-rate change that triggers a
+                redesign. Small jitter in the measured rate is ignored so the
+                filter state is not reset every few seconds.
+        """
+        self.n_leads = int(n_leads)
+        self.match_filtfilt = match_filtfilt
+        self.rate_tolerance = rate_tolerance
+        self.sampling_rate = None
+        self.settings = (None, None, None)
+        self._sos = None      # (n_sections, 6) or None when every filter is off
+        self._zi = None       # (n_sections, n_leads, 2) or None until primed
+        self._idle = np.zeros(self.n_leads, dtype=bool)  # Leads skipped by the last block
+
+    @property
+    def active(self) -> bool:
+        """True when at least one filter stage is enabled."""
+        return self._sos is not None
+
+    def configure(self, sampling_rate: float, ac_filter: Optional[str] = None,
+                  emg_filter: Optional[str] = None, dft_filter: Optional[str] = None) -> bool:
+        """
+        Select the filter settings. Cheap to call every frame: the cascade is
+        only rebuilt when a setting changes or the sampling rate moves by
+        more than `rate_tolerance`.
+
+        Returns:
+            True if the cascade was rebuilt (filter state restarts)
+        """
+        settings = (dft_filter or None, emg_filter or None, ac_filter or None)
+        rate_changed = (
+            self.sampling_rate is None
+            or abs(sampling_rate - self.sampling_rate) > self.rate_tolerance * self.sampling_rate
+        )
+        if not rate_changed and settings == self.settings:
+            return False
+
+        if rate_changed:
+            # Round so nearby rate estimates share one cached design
+            self.sampling_rate = float(round(sampling_rate, 1))
+        self.settings = settings
+
+        sections = []
+        for kind, setting in zip((FILTER_DFT, FILTER_EMG, FILTER_AC), settings):
+            if not setting or setting == "off":
+                continue
+            try:
+                design = design_ecg_filter(kind, self.sampling_rate, str(setting))
+            except Exception as e:
+                print(f"❌ Error designing streaming {kind} filter ({setting}): {e}")
+                design = None
+            if design is None:
+                continue
+            sos = design[2]
+            sections.append(sos)
+            if self.match_filtfilt:
+                sections.append(sos)
+
+        self._sos = np.vstack(sections) if sections else None
+        self._zi = None
+        return True
+
+    def reset(self) -> None:
+        """Forget filter state; the next block re-primes it."""
+        self._zi = None
+
+    def _prime(self, first_sample: np.ndarray) -> None:
+        # Start in steady state for a constant input equal to the first sample,
+        # so the display does not show a start-up transient.
+        zi = sosfilt_zi(self._sos)                               # (n_sections, 2)
+        self._zi = zi[:, None, :] * first_sample[None, :, None]  # (n_sections, n_leads, 2)
+        self._idle[:] = False
+
+    def process(self, block: np.ndarray, leads: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Filter the next block of samples.
+
+        Args:
+            block: (n_leads, k) array of new samples, oldest first
+            leads: Optional (n_leads,) bool mask of leads to filter (e.g.
+                electrodes reported connected). Other leads are passed through
+                unfiltered and re-primed when they come back.
+
+        Returns:
+            (n_leads, k) filtered samples (the input itself if every filter is off)
+        """
+        block = np.asarray(block)
+        if self._sos is None or block.size == 0:
+            return block
+        if block.shape[0] != self.n_leads:
+            raise ValueError(f"Expected {self.n_leads} leads, got {block.shape[0]}")
+
+        x = block.astype(np.float64, copy=False)
+        if self._zi is None:
+            self._prime(x[:, 0])
+        leads = np.ones(self.n_leads, dtype=bool) if leads is None else np.asarray(leads, dtype=bool)
+        back = np.flatnonzero(leads & self._idle)
+        if back.size:
+            self._zi[:, back, :] = sosfilt_zi(self._sos)[:, None, :] * x[back, 0][None, :, None]
+        self._idle = ~leads
+        if not self._idle.any():
+            y, self._zi = sosfilt(self._sos, x, axis=-1, zi=self._zi)
+            return y
+
+        on = np.flatnonzero(leads)
+        y = np.array(x, dtype=np.float64)
+        if on.size:
+            y[on], self._zi[:, on, :] = sosfilt(self._sos, x[on], axis=-1, zi=self._zi[:, on, :])
+        return y
+
+
+class StreamingMedianBaseline:
+    """Per-lead running median + running mean baseline removal (delayed, centered)."""
+
+    def __init__(self, n_leads: int = 12, rate_tolerance: float = 0.02):
+        """
+        Args:
+            n_leads: Number of leads filtered together
+            rate_tolerance: Relative sampling-rate change that rebuilds the windows
+        """
+        self.n_leads = int(n_leads)
+        self.rate_tolerance = rate_tolerance
+        self.sampling_rate = None
+        self.median_window = None
+        self.mean_window = None
+        self._primed = False
+
+    @property
+    def delay(self) -> int:
+        """Samples between the newest input and the newest corrected output."""
+        if self.median_window is None:
+            return 0
+        return self.median_window // 2 + self.mean_window - self.mean_window // 2 - 1
+
+    def configure(self, sampling_rate: float) -> bool:
+        """
+        Set the sampling rate. Cheap to call on every block: the windows (and
+        the filter state) are only rebuilt when the rate moves by more than
+        `rate_tolerance`.
+
+        Returns:
+            True if the windows were rebuilt (filter state restarts)
+        """
+        if (self.sampling_rate is not None
+                and abs(sampling_rate - self.sampling_rate) <= self.rate_tolerance * self.sampling_rate):
+            return False
+        self.sampling_rate = float(sampling_rate)
+        self.median_window, self.mean_window = median_mean_baseline_windows(self.sampling_rate)
+        self.reset()
+        return True
+
+    def reset(self) -> None:
+        """Forget filter state; the next block re-primes it."""
+        self._primed = False
+        self._sorted = []      # Per lead: the median window, sorted
+        self._window = []      # Per lead: the median window in arrival order
+        self._skip = 0         # Medians still to drop (centers before the first sample)
+        self._medians = None   # (n_leads, <= mean_window - 1) medians awaiting the mean
+        self._pending = None   # (n_leads, delay) input samples awaiting their baseline
+
+    def _prime(self, first_sample: np.ndarray) -> None:
+        # The stream start behaves like mode='nearest': the first sample is
+        # repeated to the left of the signal
+        k = self.median_window
+        self._sorted = [[float(v)] * k for v in first_sample]
+        self._window = [deque([float(v)] * k) for v in first_sample]
+        self._skip = k // 2
+        self._medians = None
+        self._pending = np.zeros((self.n_leads, 0))
+        self._primed = True
+
+    def _running_median(self, x: np.ndarray) -> np.ndarray:
+        """Median of the window ending at every sample of x (n_leads, k)."""
+        k = self.median_window
+        h = k // 2
+        out = np.empty(x.shape)
+        for lead in range(self.n_leads):
+            ordered, window, column = self._sorted[lead], self._window[lead], out[lead]
+            for i, value in enumerate(x[lead].tolist()):
+                del ordered[bisect_left(ordered, window.popleft())]
+                insort(ordered, value)
+                window.append(value)
+                column[i] = ordered[h]
+        return out
+
+    def _running_mean(self, medians: np.ndarray) -> np.ndarray:
+        """Mean of every complete mean_window of medians; keeps the incomplete tail."""
+        m = self.mean_window
+        if self._medians is None:
+            # First medians: repeat the first one to the left (mode='nearest')
+            self._medians = np.repeat(medians[:, :1], m // 2, axis=1)
+        series = np.concatenate([self._medians, medians], axis=1)
+        count = series.shape[1] - m + 1
+        if count <= 0:
+            self._medians = series
+            return np.zeros((self.n_leads, 0))
+        sums = np.cumsum(series, axis=1)
+        window_sums = sums[:, m - 1:].copy()
+        window_sums[:, 1:] -= sums[:, :count - 1]
+        self._medians = series[:, count:]
+        return window_sums / m
+
+    def _advance(self, medians: np.ndarray) -> np.ndarray:
+        if self._skip:
+            drop = min(self._skip, medians.shape[1])
+            medians = medians[:, drop:]
+            self._skip -= drop
+        if medians.shape[1] == 0:
+            return np.zeros((self.n_leads, 0))
+        baseline = self._running_mean(medians)
+        n = baseline.shape[1]
+        clean = self._pending[:, :n] - baseline
+        self._pending = self._pending[:, n:]
+        return clean
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Add the next block of samples.
+
+        Args:
+            block: (n_leads, k) array of new samples, oldest first
+
+        Returns:
+            (n_leads, j) baseline-corrected samples continuing the previous
+            output; they lag the input by `delay` samples
+        """
+        if self.median_window is None:
+            raise RuntimeError("StreamingMedianBaseline.configure() must be called first")
+        block = np.asarray(block, dtype=np.float64)
+        if block.shape[0] != self.n_leads:
+            raise ValueError(f"Expected {self.n_leads} leads, got {block.shape[0]}")
+        if block.shape[1] == 0:
+            return np.zeros((self.n_leads, 0))
+        if not self._primed:
+            self._prime(block[:, 0])
+        self._pending = np.concatenate([self._pending, block], axis=1)
+        return self._advance(self._running_median(block))
+
+    def flush(self) -> np.ndarray:
+        """
+        Release the last `delay` samples of a finite recording (the end
+        repeats the last sample, like mode='nearest') and restart.
+
+        Returns:
+            (n_leads, j) remaining corrected samples
+        """
+        if not self._primed or self._pending.shape[1] == 0:
+            self.reset()
+            return np.zeros((self.n_leads, 0))
+        n_left = self._pending.shape[1]
+        last = self._pending[:, -1:]
+        medians = self._running_median(np.repeat(last, self.median_window // 2, axis=1))
+        out = [self._advance(medians)]
+        if self._medians is not None:
+            tail = np.repeat(self._medians[:, -1:], self.mean_window - self.mean_window // 2 - 1, axis=1)
+            out.append(self._advance(tail))
+        clean = np.concatenate(out, axis=1)[:, :n_left]
+        self.reset()
+        return clean
@@ -0,0 +1,192 @@
+"""
+Timestamped Single-Lead Signal
+
+The 5-minute HRV and hyperkalemia reports used to receive Lead II as a list
+of {'time': seconds, 'value': adc} dicts - one Python dict (and two boxed
+floats) per sample, ~300 bytes each - and re-filtered / re-copied that list
+for every strip and every RR segment.
+
+`TimedSignal` keeps the same information in two arrays:
+    - values: contiguous float32 samples (ADC values are integers or
+      half-integers, so float32 is exact)
+    - time: implicit (t0 + i / sampling_rate) or explicit int64
+      microseconds for irregularly timestamped captures
+
+Slicing by index or by time range returns a view (no copy); `values` is a
+numpy array that can go straight into scipy.
+
+Usage:
+    from ecg.timed_signal import TimedSignal, as_timed_signal
+
+    signal = TimedSignal(samples, sampling_rate=500.0)       # implicit time
+    signal = as_timed_signal(lead_ii_dicts)                  # legacy [{'time', 'value'}, ...]
+    strip = signal.between(60.0, 71.0)[:5500]                # view
+    rr_input = strip.values                                  # float32 array
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+_US = 1_000_000
+
+
+class TimedSignal:
+    """Contiguous float32 samples with implicit or int64 (microsecond) timestamps."""
+
+    __slots__ = ('_values', '_times_us', 'sampling_rate', 't0')
+
+    def __init__(self, values, sampling_rate: Optional[float] = None, times=None, t0: float = 0.0):
+        """
+        Args:
+            values: Samples (any numeric sequence; stored as float32)
+            sampling_rate: Rate of evenly spaced samples (Hz); required
+                without times
+            times: Optional per-sample timestamps in seconds (or an int64
+                microsecond array), non-decreasing
+            t0: Time of the first sample for implicit timestamps (seconds)
+        """
+        self._values = np.ascontiguousarray(values, dtype=np.float32).reshape(-1)
+        self.t0 = float(t0)
+        self.sampling_rate = float(sampling_rate) if sampling_rate else None
+        if times is None:
+            if not self.sampling_rate:
+                raise ValueError("TimedSignal needs a sampling_rate or explicit times")
+            self._times_us = None
+        else:
+            times = np.asarray(times)
+            if times.dtype != np.int64:
+                times = np.round(np.asarray(times, dtype=np.float64) * _US).astype(np.int64)
+            if len(times) != len(self._values):
+                raise ValueError(f"{len(times)} timestamps for {len(self._values)} samples")
+            if len(times) > 1 and np.any(np.diff(times) < 0):
+                # Keep time-range lookups a binary search
+                order = np.argsort(times, kind='stable')
+                times, self._values = times[order], self._values[order]
+            self._times_us = times
+            if not self.sampling_rate and len(times) > 1 and times[-1] > times[0]:
+                self.sampling_rate = (len(times) - 1) * _US / float(times[-1] - times[0])
+
+    @classmethod
+    def from_dicts(cls, samples: List[Dict[str, float]], sampling_rate: Optional[float] = None) -> 'TimedSignal':
+        """Adapter for the legacy [{'time': seconds, 'value': adc}, ...] list."""
+        n = len(samples)
+        values = np.fromiter((d.get('value', 0) for d in samples), dtype=np.float32, count=n)
+        if n and all('time' in d for d in samples):
+            times = np.fromiter((d['time'] for d in samples), dtype=np.float64, count=n)
+            if n > 1 and times[-1] > times[0]:
+                # Evenly spaced timestamps (the usual case) are kept implicit
+                fs = (n - 1) / (times[-1] - times[0])
+                if np.max(np.abs(times - (times[0] + np.arange(n) / fs))) < 1e-6:
+                    return cls(values, sampling_rate=fs, t0=times[0])
+            return cls(values, sampling_rate=sampling_rate, times=times)
+        return cls(values, sampling_rate=sampling_rate or 250.0)
+
+    def _view(self, index: slice) -> 'TimedSignal':
+        out = TimedSignal.__new__(TimedSignal)
+        out._values = self._values[index]
+        out.sampling_rate = self.sampling_rate
+        if self._times_us is None:
+            start = range(len(self._values))[index].start if len(self._values) else 0
+            out.t0 = self.t0 + start / self.sampling_rate
+            out._times_us = None
+        else:
+            out.t0 = self.t0
+            out._times_us = self._times_us[index]
+        return out
+
+    # ------------------------------------------------------------------ #
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __bool__(self) -> bool:
+        return len(self._values) > 0
+
+    def __getitem__(self, index):
+        """Slices give a view; an integer index gives the legacy {'time', 'value'} dict."""
+        if isinstance(index, slice):
+            if index.step not in (None, 1):
+                raise ValueError("TimedSignal slices must be contiguous")
+            return self._view(index)
+        index = range(len(self._values))[index]
+        return {'time': float(self.times_at(index)), 'value': float(self._values[index])}
+
+    def __repr__(self) -> str:
+        return (f"TimedSignal(n={len(self)}, sampling_rate={self.sampling_rate}, "
+                f"start={self.start_time:.3f}s, end={self.end_time:.3f}s)")
+
+    @property
+    def values(self) -> np.ndarray:
+        """float32 samples (a view; do not modify)."""
+        return self._values
+
+    @property
+    def times(self) -> np.ndarray:
+        """Timestamps in seconds (float64; computed on access)."""
+        if self._times_us is None:
+            return self.t0 + np.arange(len(self._values)) / self.sampling_rate
+        return self._times_us / float(_US)
+
+    def times_at(self, index):
+        """Timestamp (seconds) of one sample or an index array."""
+        if self._times_us is None:
+            return self.t0 + np.asarray(index) / self.sampling_rate
+        return self._times_us[index] / float(_US)
+
+    @property
+    def start_time(self) -> float:
+        return float(self.times_at(0)) if len(self) else 0.0
+
+    @property
+    def end_time(self) -> float:
+        """Timestamp of the last sample (0 if empty)."""
+        return float(self.times_at(len(self) - 1)) if len(self) else 0.0
+
+    @property
+    def time_span(self) -> float:
+        """Seconds between the first and the last sample."""
+        return self.end_time - self.start_time
+
+    def index_at(self, t: float) -> int:
+        """Index of the first sample at or after time t (seconds)."""
+        if self._times_us is None:
+            # Same 1 us resolution as explicit timestamps
+            position = (t - self.t0 - 1e-6) * self.sampling_rate
+            return int(min(len(self), max(0, np.ceil(position))))
+        return int(np.searchsorted(self._times_us, int(round(t * _US)), side='left'))
+
+    def between(self, t_start: float, t_end: float) -> 'TimedSignal':
+        """Samples with t_start <= time < t_end, as a view."""
+        return self._view(slice(self.index_at(t_start), max(self.index_at(t_start), self.index_at(t_end))))
+
+    def to_dicts(self) -> List[Dict[str, float]]:
+        """Legacy [{'time': seconds, 'value': adc}, ...] list (for callers that still need it)."""
+        return [{'time': t, 'value': v} for t, v in zip(self.times.tolist(), self._values.tolist())]
+
+    @property
+    def nbytes(self) -> int:
+        return self._values.nbytes + (self._times_us.nbytes if self._times_us is not None else 0)
+
+
+def as_timed_signal(data, sampling_rate: Optional[float] = None) -> Optional[TimedSignal]:
+    """
+    TimedSignal from any accepted Lead II form.
+
+    Args:
+        data: TimedSignal (returned as is), legacy list of {'time', 'value'}
+            dicts, or a plain sequence / array of samples
+        sampling_rate: Rate of a plain sequence (Hz); also recorded on dict lists
+
+    Returns:
+        TimedSignal, or None for None
+    """
+    if data is None or isinstance(data, TimedSignal):
+        return data
+    if len(data) == 0:
+        return TimedSignal(np.zeros(0), sampling_rate=sampling_rate, times=None if sampling_rate else np.zeros(0))
+    if isinstance(data[0], dict):
+        return TimedSignal.from_dicts(data, sampling_rate=sampling_rate)
+    if not sampling_rate:
+        raise ValueError("A sampling_rate is needed for plain Lead II samples")
+    return TimedSignal(data, sampling_rate=sampling_rate)
@@ -53,14 +53,26 @@ from scipy.signal import find_peaks
 from utils.settings_manager import SettingsManager
 from utils.localization import translate_text
 from .demo_manager import DemoManager
+from .ring_buffer import ECGRingBuffer
+from .acquisition import AcquisitionThread
+from .streaming_filters import StreamingFilterBank
+from .display_decimator import MinMaxDecimator, bucket_size, minmax_envelope
+from .lead_matrix import DisplayBaselineAnchor, as_lead_matrix, robust_amplitude
+from .render_scheduler import get_render_scheduler
+from .beat_detector import StreamingQRSDetector
+from .hrv_engine import HRVEngine
+from .respiration import StreamingRespiration
+from .arrhythmia_detector import ArrhythmiaDetector
+from .arrhythmia_timeline import ArrhythmiaTimeline
+from .pqrst_analyzer import PQRSTAnalyzer
+from .analysis_cache import ECGAnalysisCache
+from .disclosure_recorder import DisclosureReader, FullDisclosureRecorder
+from .sampling_clock import FALLBACK_SAMPLING_RATE, SamplingClock, get_sampling_clock, resolve_sampling_rate
+from .sample_timeline import SampleTimeline, SAMPLE_AFTER_GAP, flag_runs
 from PyQt5.QtWidgets import QGraphicsDropShadowEffect
 from functools import partial # For plot clicking
-from .clinical_measurements import (
-    build_median_beat, get_tp_baseline, measure_qt_from_median_beat,
-    measure_rv5_sv1_from_median_beat, measure_st_deviation_from_median_beat,
-    calculate_axis_from_median_beat, measure_pr_from_median_beat,
-    measure_qrs_duration_from_median_beat
-)
+from .clinical_measurements import measure_rv5_sv1_from_median_set, calculate_axis_from_median_set
+from .recording_analysis import analyze_lead_ii, bazett_qtc, fridericia_qtc
 
 # --- Configuration ---
 # Increase history to keep longer segments visible in each frame.
@@ -73,22 +85,12 @@ LEAD_LABELS = [
     "V1", "V2", "V3", "V4", "V5", "V6"
 ]
 
-class SamplingRateCalculator:
-    def __init__(self, update_interval_sec=5):
-        self.sample_count = 0
-        self.last_update_time = time.monotonic()
-        self.update_interval = update_interval_sec
-        self.sampling_rate = 0
-
-    def add_sample(self):
-        self.sample_count += 1
-        current_time = time.monotonic()
-        elapsed = current_time - self.last_update_time
-        if elapsed >= self.update_interval:
-            self.sampling_rate = self.sample_count / elapsed
-            self.sample_count = 0
-            self.last_update_time = current_time
-        return self.sampling_rate
+# Kept for callers that still construct the old 5 s window counter
+SamplingRateCalculator = SamplingClock
+
+# Weights of the 7-point Gaussian used by ECGTestPage.apply_realtime_smoothing
+_SMOOTHING_WEIGHTS = np.exp(-0.5 * ((np.arange(7) - 3) / 2) ** 2)
+_SMOOTHING_WEIGHTS = _SMOOTHING_WEIGHTS / np.sum(_SMOOTHING_WEIGHTS)
 
 # ------------------------ ECG Display Gain Helper (Clinical Standard) ------------------------
 
@@ -231,11 +233,12 @@ def generate_realistic_ecg_waveform(duration_seconds=10, sampling_rate=500, hear
 # NEW PACKET-BASED SERIAL PARSING LOGIC
 # ============================================================================
 
-# Packet parsing constants
-PACKET_SIZE = 22
-START_BYTE = 0xE8
-END_BYTE = 0x8E
-LEAD_NAMES_DIRECT = ["I", "II", "V1", "V2", "V3", "V4", "V5", "V6"]
+# Packet parsing constants (shared with the bulk decoder)
+from .packet_decoder import (
+    PACKET_SIZE, START_BYTE, END_BYTE, LEAD_NAMES_DIRECT, LEAD_ORDER,
+    LEAD_STATUS_ALL, decode_frames, decode_frames_with_loss, lead_status_connected,
+    pack_lead_status, samples_to_packets
+)
 PACKET_REGEX = re.compile(r"(?i)(E8(?:[0-9A-F\s]{2,})?8E)")
 
 def hex_string_to_bytes(hex_str: str) -> bytes:
@@ -254,25 +257,27 @@ def decode_lead(msb: int, lsb: int) -> Tuple[int, bool]:
     return value, connected
 
 def parse_packet(raw: bytes) -> Dict[str, int]:
-    """Parse ECG packet and return dictionary of lead values"""
+    """Parse ECG packet and return dictionary of lead values
+    
+    The electrode-connected flags are returned as a lead-status bitmask under
+    "lead_status" (bit i set when LEAD_NAMES_DIRECT[i] is connected).
+    """
     if len(raw) != PACKET_SIZE or raw[0] != START_BYTE or raw[-1] != END_BYTE:
         return {}
 
     lead_values: Dict[str, int] = {}
+    lead_status = 0
     idx = 5  # first MSB position
 
-    print("---- New Packet ----")
-
-    for name in LEAD_NAMES_DIRECT:
+    for bit, name in enumerate(LEAD_NAMES_DIRECT):
         msb = raw[idx]
         lsb = raw[idx + 1]
         idx += 2
 
         value, connected = decode_lead(msb, lsb)
-
-        print(f"{name}: MSB={msb:02X}, LSB={lsb:02X}, value={value}, connected={connected}")
-
         lead_values[name] = value
+        if connected:
+            lead_status |= 1 << bit
 
     # Derived limb leads
     lead_i = lead_values.get("I", 0)
@@ -282,15 +287,7 @@ def parse_packet(raw: bytes) -> Dict[str, int]:
     lead_values["aVR"] = -(lead_i + lead_ii) / 2
     lead_values["aVL"] = (lead_i - lead_values["III"]) / 2
     lead_values["aVF"] = (lead_ii + lead_values["III"]) / 2
-
-    print("Derived:", {
-        "III": lead_values["III"],
-        "aVR": lead_values["aVR"],
-        "aVL": lead_values["aVL"],
-        "aVF": lead_values["aVF"],
-    })
-
-    print("---------------------\n")
+    lead_values["lead_status"] = lead_status
 
     return lead_values
 
@@ -309,12 +306,20 @@ class SerialStreamReader:
         self.last_error_time = 0
         self.crash_logger = get_crash_logger()
         self.user_details = {}  # For error reporting compatibility
-        # Packet loss tracking
+        # Packet loss tracking (frames located as lost by skipped bytes)
         self.start_time = time.time()
         self.last_packet_time = time.time()
         self.total_packets_expected = 0
         self.total_packets_lost = 0
         self.packet_loss_percent = 0.0
+        # Frames lost immediately before each frame of the last read_frames() call
+        self.last_lost_before = np.zeros(0, dtype=np.int64)
+        # Lead-status bitmask (electrode-connected flags) of each frame of the last read_frames() call
+        self.last_lead_status = np.zeros(0, dtype=np.uint8)
+        self._skipped_carry = 0
+        self._synced = False
+        # (serial read seconds, decode seconds) of the last read_frames() call
+        self.last_read_timings = (0.0, 0.0)
         print(f"🔌 SerialStreamReader initialized: Port={port}, Baud={baudrate}")
 
     def close(self) -> None:
@@ -338,6 +343,10 @@ class SerialStreamReader:
         self.total_packets_expected = 0
         self.total_packets_lost = 0
         self.packet_loss_percent = 0.0
+        self.last_lost_before = np.zeros(0, dtype=np.int64)
+        self.last_lead_status = np.zeros(0, dtype=np.uint8)
+        self._skipped_carry = 0
+        self._synced = False
         print("✅ Packet-based ECG device started - waiting for data packets...")
 
     def stop(self):
@@ -345,89 +354,85 @@ class SerialStreamReader:
         print("⏹️ Stopping packet-based ECG data acquisition...")
         self.running = False
         # Final packet loss statistics
-        if hasattr(self, 'start_time') and self.start_time > 0:
-            elapsed_time = time.time() - self.start_time
-            expected_packets = int(500 * elapsed_time)  # 500 Hz
-            total_lost = max(0, expected_packets - self.data_count)
-            loss_percent = (total_lost / expected_packets * 100) if expected_packets > 0 else 0
-            print(f"📊 Total data packets received: {self.data_count}")
-            if total_lost > 0:
-                print(f"📊 Packet loss summary: {total_lost}/{expected_packets} packets lost ({loss_percent:.2f}% loss)")
-            else:
-                print(f"✅ No packet loss detected - all {expected_packets} expected packets received")
-        else:
-            print(f"📊 Total data packets received: {self.data_count}")
+        print(f"📊 Total data packets received: {self.data_count}")
+        if self.total_packets_lost > 0:
+            print(f"📊 Packet loss summary: {self.total_packets_lost}/{self.total_packets_expected} packets lost "
+                  f"({self.packet_loss_percent:.2f}% loss)")
+        elif self.data_count:
+            print(f"✅ No corrupt or partial packets in the stream")
 
     def read_packets(self, max_packets: int = 100) -> List[Dict[str, int]]:
-        """Read and parse ECG packets from serial stream
+        """Read and parse ECG packets from serial stream (legacy dict format)
+        
+        Compatibility wrapper around read_frames() for callers that still
+        expect one {lead_name: value} dictionary per packet.
+        """
+        return samples_to_packets(self.read_frames(max_packets=max_packets))
+
+    def read_frames(self, max_packets: int = 100) -> np.ndarray:
+        """Read and decode all complete ECG packets from the serial stream
         
         At 500 Hz, hardware sends 500 packets/second = ~16.67 packets per 33ms timer interval.
-        We read up to max_packets to prevent buffer overflow and packet loss.
+        The whole receive buffer is decoded in one vectorized pass, so every
+        complete packet is returned even if more than max_packets arrived
+        (max_packets is kept for API compatibility).
+        
+        Returns:
+            (n_packets, 12) float32 array in LEAD_ORDER
         """
+        empty = np.empty((0, len(LEAD_ORDER)), dtype=np.float32)
         if not self.running:
-            return []
+            return empty
             
-        out: List[Dict[str, int]] = []
+        out = empty
+        self.last_lost_before = self.last_lost_before[:0]
+        self.last_lead_status = self.last_lead_status[:0]
         
         try:
-            # Read larger chunks to prevent buffer overflow at 500 Hz
             # At 500 Hz with 22-byte packets = 11,000 bytes/second
-            # Read up to 4096 bytes per call to catch up quickly
-            chunk = self.ser.read(4096)  # Increased from default (usually 1024)
+            # Drain everything the driver has queued; when nothing is queued,
+            # block (up to the port timeout) for one packet instead of 4 KB so
+            # the acquisition thread wakes up as soon as data arrives
+            t_read = time.perf_counter()
+            waiting = getattr(self.ser, 'in_waiting', 0) or 0
+            chunk = self.ser.read(waiting if waiting > 0 else PACKET_SIZE)
             if chunk:
                 self.buf.extend(chunk)
 
-            # Extract packets - process ALL available packets to prevent buffer overflow
-            # At 500 Hz, we need to process packets quickly to avoid accumulation
-            # Read ALL packets in buffer, not just max_packets, to prevent overflow
-            max_iterations = max_packets * 3  # Allow catching up if we fell behind
-            iteration = 0
-            while iteration < max_iterations:
-                iteration += 1
-                start_idx = self.buf.find(bytes([START_BYTE]))
-                if start_idx == -1:
-                    # No start byte found - clear buffer if it's getting too large (>100KB)
-                    if len(self.buf) > 100000:
-                        print(f"⚠️ Serial buffer overflow risk: {len(self.buf)} bytes, clearing buffer")
-                        self.buf.clear()
-                    break
-                if start_idx > 10000:
-                    # Skip too much garbage data before start byte
-                    del self.buf[:start_idx]
-                    continue
-                if len(self.buf) - start_idx < PACKET_SIZE:
-                    # Not enough data for a complete packet - keep what we have
-                    if start_idx > 0:
-                        del self.buf[:start_idx]
-                    break
-                    
-                candidate = bytes(self.buf[start_idx : start_idx + PACKET_SIZE])
-                del self.buf[: start_idx + PACKET_SIZE]
-
-                if candidate[-1] != END_BYTE:
-                    continue
-
-                parsed = parse_packet(candidate)
-                if parsed:
-                    self.data_count += 1
-                    self.last_packet_time = time.time()
-                    # Only log every 100th packet to reduce console spam
-                    if self.data_count % 100 == 0:
-                        print(f"📡 [Packet #{self.data_count}] Received valid packet with {len(parsed)} leads")
-                    out.append(parsed)
+            # Decode every complete frame in one pass and drop the consumed bytes;
+            # bytes skipped between valid frames locate the frames that were lost
+            t_decode = time.perf_counter()
+            samples, connected, consumed, lost_before, self._skipped_carry = decode_frames_with_loss(
+                self.buf, self._skipped_carry)
+            if consumed:
+                del self.buf[:consumed]
+            self.last_read_timings = (t_decode - t_read, time.perf_counter() - t_decode)
+            if len(samples) and not self._synced:
+                # Bytes before the first frame are mid-packet start-up, not loss
+                lost_before[0] = 0
+                self._synced = True
+            self.last_lost_before = lost_before
+            self.last_lead_status = pack_lead_status(connected)
+
+            if len(samples):
+                previous_count = self.data_count
+                self.data_count += len(samples)
+                self.last_packet_time = time.time()
+                # Only log every 100th packet to reduce console spam
+                if self.data_count // 100 > previous_count // 100:
+                    print(f"📡 [Packet #{self.data_count}] Decoded {len(samples)} packets in batch")
+                out = samples
             
             # Warn if buffer is accumulating too much data (indicates we're falling behind)
             if len(self.buf) > 50000:  # >50KB buffer indicates we're not reading fast enough
                 print(f"⚠️ Serial buffer accumulation: {len(self.buf)} bytes - may indicate packet loss")
             
             # Update packet loss statistics
-            if self.running and self.data_count > 0:
-                elapsed_time = time.time() - self.start_time
-                expected_packets = int(500 * elapsed_time)  # 500 Hz = 500 packets/second
-                self.total_packets_expected = expected_packets
-                self.total_packets_lost = max(0, expected_packets - self.data_count)
-                if expected_packets > 0:
-                    self.packet_loss_percent = (self.total_packets_lost / expected_packets) * 100
+            if len(lost_before):
+                self.total_packets_lost += int(lost_before.sum())
+                self.total_packets_expected = self.data_count + self.total_packets_lost
+                if self.total_packets_expected > 0:
+                    self.packet_loss_percent = (self.total_packets_lost / self.total_packets_expected) * 100
                     
         except Exception as e:
             self.error_count += 1
@@ -1207,9 +1212,11 @@ class ECGTestPage(QWidget):
         self.leads = self.LEADS_MAP[test_name]
         self.base_buffer_size = 2000  # Base buffer used for speed scaling
         self.buffer_size = self.base_buffer_size  # Increased buffer size for all leads
-        # Use GitHub version data structure: list of numpy arrays for all 12 leads
-        # Initialize data buffers with memory management
-        self.data = [np.zeros(HISTORY_LENGTH, dtype=np.float32) for _ in range(12)]
+        # Preallocated circular buffer for all 12 leads. self.data[i] is a
+        # chronological copy of lead i, so readers index it exactly like the
+        # old list of numpy arrays; per-frame plot code reads self.data.view(i)
+        # without copying. Producers call self.data.extend()
+        self.data = ECGRingBuffer(HISTORY_LENGTH, n_leads=12, track_time=False)
         
         # Track overlay state and current layout (12:1 vs 6:2)
         self._overlay_active = False
@@ -1226,17 +1233,83 @@ class ECGTestPage(QWidget):
         # Initialize crash logger
         self.crash_logger = get_crash_logger()
         self.crash_logger.log_info("ECG Test Page initialized", "ECG_TEST_PAGE_START")
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_plots)
+        # Every live view of the page (grid, overlays, detailed plot, recording)
+        # is driven by the shared render scheduler instead of its own QTimer.
+        # While the page is hidden the grid only keeps ingesting (no drawing).
+        self.render_scheduler = get_render_scheduler()
+        self.timer = self.render_scheduler.view(
+            "ecg_12_lead", self.update_plots, widget=self, fps=30, min_fps=10,
+            hidden_callback=partial(self.update_plots, render=False), hidden_fps=10)
         self.serial_reader = None
+        # Background acquisition: the serial port is drained by a dedicated
+        # thread into a preallocated ring buffer, the GUI timer only reads it
+        self.acquisition_ring = ECGRingBuffer(HISTORY_LENGTH, n_leads=len(LEAD_ORDER))
+        self.acquisition_thread = None
+        self._acquisition_cursor = 0
+        # Lost packets are located on a per-sample timeline: short gaps are
+        # bridged and every sample is flagged in a mask aligned with the ring
+        self.acquisition_timeline = SampleTimeline(HISTORY_LENGTH, n_leads=len(LEAD_ORDER),
+                                                   clock=get_sampling_clock())
+        # Per-sample side channels of self.data: row 0 the sample flags
+        # (SAMPLE_INTERPOLATED / SAMPLE_AFTER_GAP), row 1 the hardware
+        # lead-status bitmask (electrode-connected flags, see packet_decoder)
+        self.data_mask = ECGRingBuffer(HISTORY_LENGTH, n_leads=2, dtype=np.uint8, track_time=False)
+        self._data_mask_offset = 0
+        self._pending_mask = None
+        self._pending_status = None
+        # Leads with a connected electrode; disconnected leads are not filtered,
+        # analysed or drawn. Stays all-True until the hardware reports a status.
+        self.leads_connected = np.ones(len(LEAD_ORDER), dtype=bool)
+        self._lead_status_reported = False
+        # Every published sample is also streamed to disk (full disclosure) while
+        # acquiring, so long sessions can be re-reported from any time range.
+        # Recording index k is sample k of the acquisition timeline; the map
+        # holds (self.data index, recording index) wherever the offset between
+        # the two changes (recording start, samples the GUI never ingested)
+        self.disclosure_recorder = None
+        self._disclosure_reader = None
+        self._disclosure_map = []
+        self._disclosure_map_generation = None
+        self._pending_stream_index = None
+        # Live display copy of self.data with the AC notch streamed over each
+        # new block (stateful IIR), instead of re-filtering every window
+        self.display_data = ECGRingBuffer(HISTORY_LENGTH, n_leads=12, track_time=False)
+        self.display_filter_bank = StreamingFilterBank(n_leads=12)
+        # Min/max envelopes of the display stream (keyed by samples per bucket),
+        # extended with every block so a frame only decimates the new samples
+        self.display_decimators = {}
+        # Per-lead slow baseline anchor / zero-centering of the display path,
+        # updated for all leads at once on the (12, n) display window
+        self.display_anchor = DisplayBaselineAnchor(n_leads=12)
+        # Shared incremental R-peak detector on Lead II; its beat list feeds
+        # calculate_ecg_metrics and the dashboard BPM / HRV panels
+        self.beat_detector = StreamingQRSDetector()
+        # Sliding-window HRV kept up to date from the shared beat list (dashboard
+        # stress/HRV panel and the 5-minute HRV report read it)
+        self.hrv_engine = HRVEngine(window_seconds=300)
+        # ECG-derived respiration trace / rate of every lead, updated per block at
+        # ~8 Hz (expanded lead view and the HRV report read it)
+        self.respiration = StreamingRespiration(n_leads=12)
+        # Lead II arrhythmia events of the current session (report conclusions),
+        # classified one 2 s column at a time from the live stream; restarted
+        # by reset_arrhythmia_timeline() whenever a session starts
+        self.arrhythmia_timeline = ArrhythmiaTimeline(ArrhythmiaDetector(FALLBACK_SAMPLING_RATE))
+        self._arrhythmia_analyzer = PQRSTAnalyzer(self.arrhythmia_timeline.detector.fs)
+        self._arrhythmia_origin = 0
+        self._arrhythmia_generation = None
+        # Per-epoch analysis results shared with the dashboard, expanded lead
+        # view and demo manager (keyed by buffer generation, lead and fs)
+        self.analysis_cache = ECGAnalysisCache()
         self.stacked_widget = stacked_widget
-        self.sampler = SamplingRateCalculator()
+        # Shared clock-recovery estimate of the hardware sampling rate (fed by
+        # the acquisition thread, read by every fs consumer)
+        self.sampler = get_sampling_clock()
         # self.demo_fs = 500  # Increased sampling rate for more realistic ECG
         self.sampling_rate = 500  # Default sampling rate for expanded lead view
         self._latest_rhythm_interpretation = "Analyzing Rhythm..."
 
-        # Flatline detection state: track leads where we've already shown an alert
-        self._flatline_alert_shown = [False] * 12
+        # Lead-off state already reported (plot title / console) per lead
+        self._lead_off_shown = [False] * 12
         self._prev_p_axis = None  # Track P-axis for safety assertions
         self._prev_qrs_axis = None
         self._prev_t_axis = None
@@ -1609,6 +1682,7 @@ class ECGTestPage(QWidget):
         }
         
         positions = [(i, j) for i in range(4) for j in range(3)]
+        self._lead_title_colors = {}
         for i in range(len(self.leads)):
             plot_widget = pg.PlotWidget()
             plot_widget.setBackground('w')
@@ -1623,6 +1697,7 @@ class ECGTestPage(QWidget):
             lead_color = lead_colors.get(lead_name, '#000000')
             
             plot_widget.setTitle(self.leads[i], color=lead_color, size='10pt')
+            self._lead_title_colors[lead_name] = lead_color
             # Set initial and safe Y-limits; dynamic autoscale will adjust per data
             plot_widget.setYRange(-2000, 2000)
             vb = plot_widget.getViewBox()
@@ -1784,7 +1859,7 @@ class ECGTestPage(QWidget):
                 # Import and show expanded lead view
                 try:
                     from ecg.expanded_lead_view import show_expanded_lead_view
-                    show_expanded_lead_view(lead_name, ecg_data, self.sampling_rate, self)
+                    show_expanded_lead_view(lead_name, ecg_data, self.current_sampling_rate(), self)
                 except ImportError as e:
                     print(f"Error importing expanded lead view: {e}")
                     # Fallback: show a simple message
@@ -1991,186 +2066,20 @@ class ECGTestPage(QWidget):
         # This is the raw buffer - NOT display-processed data
         lead_ii_data = self.data[1]
         
-        # Check if data is all zeros or has no real signal variation
-        if len(lead_ii_data) < 100 or np.all(lead_ii_data == 0) or np.std(lead_ii_data) < 0.1:
+        # Check if data is all zeros or has no real signal variation (a disconnected
+        # Lead II is left to the V2 fallback in _analyze_lead_ii)
+        if len(lead_ii_data) < 100:
             return
-        
-        # Get sampling rate
-        fs = 186.5 # Default based on observed hardware behavior
-        if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-            fs = float(self.sampler.sampling_rate)
-        elif hasattr(self, 'sampling_rate') and self.sampling_rate > 10:
-            fs = float(self.sampling_rate)
-        
-        # Detect R-peaks in raw Lead II (fallback to V2 if Lead II insufficient) - GE/Philips standard
-        from scipy.signal import butter, filtfilt, find_peaks
-        nyquist = fs / 2
-        low = 0.5 / nyquist
-        high = 40 / nyquist
-        b, a = butter(4, [low, high], btype='band')
-        filtered_ii = filtfilt(b, a, lead_ii_data)
-        
-        signal_mean = np.mean(filtered_ii)
-        signal_std = np.std(filtered_ii)
-        
-        # Use adaptive peak detection for 10-300 BPM (same as calculate_heart_rate)
-        # Try multiple strategies and select best based on consistency
-        detection_results = []
-        height_threshold = signal_mean + 0.5 * signal_std
-        prominence_threshold = signal_std * 0.4
-        
-        # Strategy 1: Conservative (10-120 BPM)
-        # Distance set to minimum RR for highest BPM in range (120 BPM = 500ms)
-        # RR interval filtering (200-6000ms) will handle the full 10-300 BPM range
-        peaks_conservative, _ = find_peaks(
-            filtered_ii,
-            height=height_threshold,
-            distance=int(0.4 * fs),  # 400ms - prevents false peaks, allows 10-300 BPM via RR filtering
-            prominence=prominence_threshold
-        )
-        if len(peaks_conservative) >= 2:
-            rr_cons = np.diff(peaks_conservative) * (1000 / fs)
-            valid_cons = rr_cons[(rr_cons >= 200) & (rr_cons <= 6000)]
-            if len(valid_cons) > 0:
-                bpm_cons = 60000 / np.median(valid_cons)
-                std_cons = np.std(valid_cons)
-                detection_results.append(('conservative', peaks_conservative, bpm_cons, std_cons))
-        
-        # Strategy 2: Normal (100-180 BPM)
-        peaks_normal, _ = find_peaks(
-            filtered_ii,
-            height=height_threshold,
-            distance=int(0.3 * fs),  # 240ms - medium distance
-            prominence=prominence_threshold
-        )
-        if len(peaks_normal) >= 2:
-            rr_norm = np.diff(peaks_normal) * (1000 / fs)
-            valid_norm = rr_norm[(rr_norm >= 200) & (rr_norm <= 6000)]
-            if len(valid_norm) > 0:
-                bpm_norm = 60000 / np.median(valid_norm)
-                std_norm = np.std(valid_norm)
-                detection_results.append(('normal', peaks_normal, bpm_norm, std_norm))
-        
-        # Strategy 3: Tight (160-300 BPM) - CRITICAL for 300 BPM detection
-        peaks_tight, _ = find_peaks(
-            filtered_ii,
-            height=height_threshold,
-            distance=int(0.2 * fs),  # 160ms - tight distance for high BPM (300 BPM = 200ms RR)
-            prominence=prominence_threshold
-        )
-        if len(peaks_tight) >= 2:
-            rr_tight = np.diff(peaks_tight) * (1000 / fs)
-            valid_tight = rr_tight[(rr_tight >= 200) & (rr_tight <= 6000)]
-            if len(valid_tight) > 0:
-                bpm_tight = 60000 / np.median(valid_tight)
-                std_tight = np.std(valid_tight)
-                detection_results.append(('tight', peaks_tight, bpm_tight, std_tight))
-        
-        # Select best strategy based on consistency (lowest std deviation)
-        if detection_results:
-            detection_results.sort(key=lambda x: x[3])  # Sort by std
-            best_method, r_peaks, best_bpm, best_std = detection_results[0]
-        else:
-            # Fallback to conservative strategy for low BPM (10-120 BPM)
-            r_peaks, _ = find_peaks(
-                filtered_ii,
-                height=height_threshold,
-                distance=int(0.4 * fs),  # 400ms - prevents false peaks, allows 10-300 BPM via RR filtering
-                prominence=prominence_threshold
-            )
-        
-        # Calculate BPM first (works with ≥2 beats) - needed for low BPM detection
-        # This allows BPM calculation even when we don't have enough beats for median beat
-        if len(r_peaks) >= 2:
-            rr_intervals_ms = np.diff(r_peaks) / fs * 1000.0
-            valid_rr = rr_intervals_ms[(rr_intervals_ms >= 200) & (rr_intervals_ms <= 6000)]
-            if len(valid_rr) > 0:
-                rr_ms = np.median(valid_rr)
-                estimated_bpm = 60000.0 / rr_ms if rr_ms > 0 else 60
-            else:
-                estimated_bpm = 60
-        else:
-            estimated_bpm = 60
-        
-        # Adaptive minimum beat requirement based on BPM and available data window
-        # At low BPM (< 40), we need longer windows, so reduce minimum beats
-        # At 10 BPM: need 6s per beat, so 2 beats = 12s (not possible in 4s buffer)
-        # At 30 BPM: need 2s per beat, so 2 beats = 4s (just possible)
-        # Strategy: Use minimum 2 beats for BPM, but require more for median beat if possible
-        min_beats_for_bpm = 2  # Always allow BPM calculation with 2 beats
-        min_beats_for_median = 8  # Preferred for median beat
-        
-        # If we have low BPM (< 40), reduce median beat requirement
-        if estimated_bpm < 40:
-            # At low BPM, accept fewer beats for median (minimum 3 for basic metrics)
-            min_beats_for_median = max(3, min(8, len(r_peaks)))
-        
-        # Fallback to V2 if Lead II has insufficient beats (GE/Philips standard)
-        if len(r_peaks) < min_beats_for_bpm and len(self.data) > 3:
-            lead_v2_data = self.data[3]  # V2 is typically index 3
-            if len(lead_v2_data) > 100 and np.std(lead_v2_data) > 0.1:
-                filtered_v2 = filtfilt(b, a, lead_v2_data)
-                signal_mean_v2 = np.mean(filtered_v2)
-                signal_std_v2 = np.std(filtered_v2)
-                
-                # Use same adaptive detection for V2 (prioritize conservative for low BPM)
-                height_v2 = signal_mean_v2 + 0.5 * signal_std_v2
-                prominence_v2 = signal_std_v2 * 0.4
-                
-                # Try conservative strategy first for V2 (best for low BPM 10-120)
-                r_peaks_v2, _ = find_peaks(
-                    filtered_v2,
-                    height=height_v2,
-                    distance=int(0.4 * fs),  # 400ms - conservative for low BPM
-                    prominence=prominence_v2
-                )
-                
-                # If conservative doesn't work, try normal
-                if len(r_peaks_v2) < min_beats_for_bpm:
-                    r_peaks_v2, _ = find_peaks(
-                        filtered_v2,
-                        height=height_v2,
-                        distance=int(0.3 * fs),  # 240ms - normal
-                        prominence=prominence_v2
-                    )
-                
-                if len(r_peaks_v2) >= min_beats_for_bpm:
-                    r_peaks = r_peaks_v2
-                    lead_ii_data = lead_v2_data  # Use V2 for beat alignment
-                    # Recalculate estimated BPM from V2
-                    if len(r_peaks) >= 2:
-                        rr_intervals_ms = np.diff(r_peaks) / fs * 1000.0
-                        valid_rr = rr_intervals_ms[(rr_intervals_ms >= 200) & (rr_intervals_ms <= 6000)]
-                        if len(valid_rr) > 0:
-                            rr_ms = np.median(valid_rr)
-                            estimated_bpm = 60000.0 / rr_ms if rr_ms > 0 else 60
-                            # Update min_beats_for_median based on V2 BPM
-                            if estimated_bpm < 40:
-                                min_beats_for_median = max(3, min(8, len(r_peaks)))
-        
-        # Require minimum beats for BPM calculation (≥2 beats)
-        if len(r_peaks) < min_beats_for_bpm:
+        if self.leads_connected[1] and (np.all(lead_ii_data == 0) or np.std(lead_ii_data) < 0.1):
             return
         
-        # Build median beat with adaptive minimum beats (prefer 8, but allow fewer for low BPM)
-        time_axis, median_beat_ii = build_median_beat(lead_ii_data, r_peaks, fs, min_beats=min_beats_for_median)
-        if median_beat_ii is None:
+        # R-peaks, median beats and intervals are computed once per data epoch and
+        # shared with the dashboard / expanded views through the analysis cache
+        analysis = self._lead_ii_analysis()
+        if analysis is None:
             return
-        
-        # Get TP baseline using proper TP segment detection (end of T to next P) - GE/Philips standard
-        r_idx = len(median_beat_ii) // 2  # R-peak at center
-        r_mid = r_peaks[len(r_peaks) // 2]
-        # Use previous R-peak for proper TP segment detection
-        prev_r_idx = r_peaks[len(r_peaks) // 2 - 1] if len(r_peaks) > 1 else None
-        tp_baseline_ii = get_tp_baseline(lead_ii_data, r_mid, fs, prev_r_peak_idx=prev_r_idx)
-        
-        # Calculate RR interval in ms (median RR from raw signal)
-        if len(r_peaks) >= 2:
-            rr_intervals_ms = np.diff(r_peaks) / fs * 1000.0
-            valid_rr = rr_intervals_ms[(rr_intervals_ms >= 200) & (rr_intervals_ms <= 6000)]
-            rr_ms = np.median(valid_rr) if len(valid_rr) > 0 else 600.0
-        else:
-            rr_ms = 600.0
+        r_peaks = analysis['r_peaks']
+        rr_ms = analysis['rr_ms']
         
         # Calculate Heart Rate: HR = 60000 / RR (GE/Philips standard)
         heart_rate_raw = int(round(60000.0 / rr_ms)) if rr_ms > 0 else 60
@@ -2199,23 +2108,12 @@ class ECGTestPage(QWidget):
         # Use smoothed stable value for display (matches dashboard behavior)
         heart_rate = self._last_stable_hr_metrics
         
-        # Calculate PR Interval from median beat (standardized function)
-        # IMPORTANT: PR interval is calculated from Lead II (median_beat_ii) - GE/Philips standard
-        pr_interval = measure_pr_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii)
-        if pr_interval is None or pr_interval <= 0:
-            pr_interval = 0
+        # PR / QRS / QT from the Lead II median beat (GE/Philips standard)
+        pr_interval = analysis['pr_interval']
         self.pr_interval = pr_interval
-        
-        # Calculate QRS Complex duration from median beat (standardized function)
-        qrs_duration = measure_qrs_duration_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii)
-        if qrs_duration is None or qrs_duration <= 0:
-            qrs_duration = 0
+        qrs_duration = analysis['qrs_duration']
         self.last_qrs_duration = qrs_duration
-        
-        # Calculate QT Interval from median beat (GE/Philips standard)
-        qt_interval = measure_qt_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii)
-        if qt_interval is None:
-            qt_interval = 0
+        qt_interval = analysis['qt_interval']
         self.last_qt_interval = qt_interval
         
         # Calculate QTc (Bazett) and QTcF (Fridericia) using smoothed heart_rate for consistency
@@ -2235,10 +2133,8 @@ class ECGTestPage(QWidget):
         qrs_t_angle = calculate_qrs_t_angle(qrs_axis, t_axis)
         self.last_qrs_t_angle = qrs_t_angle
         
-        # Calculate ST deviation from median beat (returns mV)
-        st_segment = measure_st_deviation_from_median_beat(median_beat_ii, time_axis, fs, tp_baseline_ii, j_offset_ms=60)
-        if st_segment is None:
-            st_segment = 0.0
+        # ST deviation from median beat (mV)
+        st_segment = analysis['st_segment']
         self.last_st_segment = st_segment
         
         # Calculate RV5/SV1 from median beats
@@ -2268,6 +2164,53 @@ class ECGTestPage(QWidget):
         # Update UI metrics (dashboard only shows: BPM, PR, QRS axis, ST, QT/QTc, timer)
         self.update_ecg_metrics_display(heart_rate, pr_interval, qrs_duration, qrs_axis, st_segment, qt_interval, qtc_interval, qtcf_interval)
 
+    def _lead_ii_analysis(self):
+        """Cached Lead II analysis for the current data epoch (see _analyze_lead_ii)"""
+        if len(self.data) < 2:
+            return None
+        fs = self.current_sampling_rate()
+        return self.analysis_cache.get(
+            'lead_ii_metrics', self.analysis_cache.epoch(self.data, fs), 1, fs,
+            lambda: self._analyze_lead_ii(fs)
+        )
+
+    def get_median_beat_set(self):
+        """MedianBeatSet for the current data epoch, or None
+        
+        All 12 median beats are aligned on the same Lead II R-peaks, so axes,
+        RV5/SV1, ST and intervals are measured on consistent fiducials.
+        """
+        analysis = self._lead_ii_analysis()
+        return analysis.get('median_set') if analysis else None
+
+    def _analyze_lead_ii(self, fs):
+        """R-peaks, 12-lead median beats and intervals for the live buffer
+        
+        Uncached worker behind _lead_ii_analysis (results are shared through
+        self.analysis_cache). The measurements are recording_analysis.analyze_lead_ii,
+        fed with the streaming detector's R-peaks and the packet-loss sample mask.
+        
+        Args:
+            fs: Sampling rate in Hz
+        
+        Returns:
+            dict with r_peaks, rr_ms, median_set, reference_lead, time_axis,
+            median_beat, tp_baseline, pr_interval, qrs_duration, qt_interval and
+            st_segment, or None if there are not enough beats
+        """
+        # Stable copy of every lead: the acquisition thread keeps writing to self.data
+        signals = self.data.snapshot() if hasattr(self.data, 'snapshot') else np.asarray(self.data, dtype=float)
+        # Leads whose electrode is off are neither searched for beats nor measured
+        connected = np.array(self.leads_connected, dtype=bool)
+        # Prefer the shared streaming detector: it has already processed every
+        # sample once, so no full-buffer band-pass / find_peaks passes are needed
+        r_peaks = None
+        if connected[1] and signals.shape[1] >= 100:
+            r_peaks = self.get_live_r_peaks(signals.shape[1])
+        # Flags of samples bridged over packet loss / following an unfilled gap
+        return analyze_lead_ii(signals, fs, connected=connected, r_peaks=r_peaks,
+                               sample_mask=self.sample_mask(signals.shape[1]))
+
     def calculate_heart_rate(self, lead_data):
         """Calculate heart rate from Lead II data using R-R intervals
         
@@ -2300,52 +2243,8 @@ class ECGTestPage(QWidget):
                 print("❌ Invalid values (NaN/Inf) in lead data")
                 return 60
 
-            # Use measured sampling rate if available; default to 250 Hz (unified fallback)
-            # CRITICAL: If detection works, use detected rate (should be 500 Hz for hardware)
-            # If detection fails, use 250 Hz fallback (consistent across platforms)
-            import platform
-            is_windows = platform.system() == 'Windows'
-            platform_tag = "[Windows]" if is_windows else "[macOS/Linux]"
-            
-            fs = 250.0  # Standard fallback for all platforms
-            try:
-                if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                    detected_rate = self.sampler.sampling_rate
-                    if detected_rate > 10 and np.isfinite(detected_rate):
-                        fs = float(detected_rate)
-                        # Debug: Log sampling rate detection (first few times only)
-                        if not hasattr(self, '_fs_debug_count'):
-                            self._fs_debug_count = 0
-                        self._fs_debug_count += 1
-                        if self._fs_debug_count <= 3:
-                            print(f"🔍 {platform_tag} Heart rate calculation using detected sampling rate: {fs:.1f} Hz")
-                    else:
-                        if is_windows:
-                            print(f"⚠️ {platform_tag} Invalid detected sampling rate: {detected_rate}, using fallback 250.0 Hz")
-                elif hasattr(self, 'sampling_rate') and self.sampling_rate > 10:
-                    fs = float(self.sampling_rate)
-                    if not hasattr(self, '_fs_debug_count'):
-                        self._fs_debug_count = 0
-                    self._fs_debug_count += 1
-                    if self._fs_debug_count <= 3:
-                        print(f"🔍 {platform_tag} Heart rate calculation using sampling rate: {fs:.1f} Hz (from self.sampling_rate)")
-                else:
-                    if is_windows:
-                        print(f"⚠️ {platform_tag} Sampling rate not available, using fallback 250.0 Hz")
-            except Exception as e:
-                print(f"❌ Error getting sampling rate: {e}")
-                fs = 250.0  # Standard fallback
-                if not hasattr(self, '_fs_debug_count'):
-                    self._fs_debug_count = 0
-                self._fs_debug_count += 1
-                if self._fs_debug_count <= 3:
-                    print(f"⚠️ {platform_tag} Using default sampling rate: {fs} Hz (sampling rate detection failed)")
-            
-            # Validation
-            if fs <= 0 or not np.isfinite(fs):
-                if is_windows:
-                    print(f"⚠️ {platform_tag} Invalid sampling rate detected: {fs}, using fallback 250.0 Hz")
-                fs = 250.0  # Fallback
+            # Recovered hardware sampling rate (shared clock, one fallback)
+            fs = self.current_sampling_rate()
 
             # Apply bandpass filter to enhance R-peaks (0.5-40 Hz)
             try:
@@ -2539,7 +2438,20 @@ class ECGTestPage(QWidget):
             return 60
 
     def calculate_wave_amplitudes(self):
-        """Calculate P, QRS, and T wave amplitudes from all leads for report generation"""
+        """Calculate P, QRS, and T wave amplitudes from all leads for report generation
+        
+        Served from the shared analysis cache, so the dashboard metrics panel and
+        report generators reuse one computation per data epoch.
+        """
+        fs = self.current_sampling_rate()
+        amplitudes = self.analysis_cache.get(
+            'wave_amplitudes', self.analysis_cache.epoch(self.data, fs), 1, fs,
+            self._compute_wave_amplitudes
+        )
+        return dict(amplitudes)
+
+    def _compute_wave_amplitudes(self):
+        """Uncached worker behind calculate_wave_amplitudes()"""
         try:
             amplitudes = {
                 'p_amp': 0.0,
@@ -2559,9 +2471,7 @@ class ECGTestPage(QWidget):
                 return amplitudes
             
             # Get sampling rate - default to 250 Hz (unified fallback)
-            fs = 250.0
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                fs = float(self.sampler.sampling_rate)
+            fs = self.current_sampling_rate()
             
             # Filter signal
             from scipy.signal import butter, filtfilt
@@ -2762,9 +2672,7 @@ class ECGTestPage(QWidget):
             
             # Apply bandpass filter to enhance R-peaks (0.5-40 Hz)
             from scipy.signal import butter, filtfilt, find_peaks
-            fs = 80
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate:
-                fs = float(self.sampler.sampling_rate)
+            fs = self.current_sampling_rate()
             
             nyquist = fs / 2
             low = 0.5 / nyquist
@@ -2823,11 +2731,7 @@ class ECGTestPage(QWidget):
             
             # Apply bandpass filter to enhance R-peaks (0.5-40 Hz)
             from scipy.signal import butter, filtfilt, find_peaks
-            fs = 186.5
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                fs = float(self.sampler.sampling_rate)
-            elif hasattr(self, 'sampling_rate') and self.sampling_rate > 10:
-                fs = float(self.sampling_rate)
+            fs = self.current_sampling_rate()
             
             nyquist = fs / 2
             low = 0.5 / nyquist
@@ -2906,11 +2810,7 @@ class ECGTestPage(QWidget):
             
             # Get sampling rate
             from scipy.signal import butter, filtfilt, find_peaks
-            fs = 80  # Default to hardware sampling rate
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate:
-                fs = float(self.sampler.sampling_rate)
-            elif hasattr(self, 'sampling_rate') and self.sampling_rate:
-                fs = float(self.sampling_rate)
+            fs = self.current_sampling_rate()
             
             # Filter signal (0.5-40 Hz bandpass)
             nyquist = fs / 2
@@ -3003,11 +2903,7 @@ class ECGTestPage(QWidget):
             
             # Get sampling rate
             from scipy.signal import butter, filtfilt, find_peaks
-            fs = 186.5
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                fs = float(self.sampler.sampling_rate)
-            elif hasattr(self, 'sampling_rate') and self.sampling_rate > 10:
-                fs = float(self.sampling_rate)
+            fs = self.current_sampling_rate()
             
             # Filter signal
             nyquist = fs / 2
@@ -3088,26 +2984,7 @@ class ECGTestPage(QWidget):
     def calculate_qtc_interval(self, heart_rate, qt_interval):
         """Calculate QTc using Bazett's formula: QTc = QT / sqrt(RR)"""
         try:
-            if not heart_rate or heart_rate <= 0:
-                return 0
-            
-            if not qt_interval or qt_interval <= 0:
-                return 0
-            
-            # Calculate RR interval from heart rate (in seconds)
-            rr_interval = 60.0 / heart_rate
-            
-            # QT in seconds
-            qt_sec = qt_interval / 1000.0
-            
-            # Apply Bazett's formula: QTc = QT / sqrt(RR)
-            qtc = qt_sec / np.sqrt(rr_interval)
-            
-            # Convert back to milliseconds
-            qtc_ms = int(round(qtc * 1000))
-            
-            return qtc_ms
-            
+            return bazett_qtc(heart_rate, qt_interval)
         except Exception as e:
             return 0
 
@@ -3122,20 +2999,7 @@ class ECGTestPage(QWidget):
             QTcF in milliseconds
         """
         try:
-            if not qt_ms or qt_ms <= 0 or not rr_ms or rr_ms <= 0:
-                return 0
-            
-            # Convert to seconds
-            qt_sec = qt_ms / 1000.0
-            rr_sec = rr_ms / 1000.0
-            
-            # Fridericia formula: QTcF = QT / RR^(1/3)
-            qtcf_sec = qt_sec / (rr_sec ** (1.0 / 3.0))
-            
-            # Convert back to milliseconds
-            qtcf_ms = int(round(qtcf_sec * 1000.0))
-            
-            return qtcf_ms
+            return fridericia_qtc(qt_ms, rr_ms)
         except:
             return 0
     
@@ -3230,47 +3094,11 @@ class ECGTestPage(QWidget):
     def calculate_qrs_axis_from_median(self):
         """Calculate QRS axis from median beat vectors (GE/Philips standard)."""
         try:
-            if len(self.data) < 6:
-                return 0
-            fs = 186.5
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                fs = float(self.sampler.sampling_rate)
-            lead_i_raw = self.data[0]
-            lead_avf_raw = self.data[5]
-            lead_ii = self.data[1]
-            from scipy.signal import butter, filtfilt
-            nyquist = fs / 2
-            low = 0.5 / nyquist
-            high = 40 / nyquist
-            b, a = butter(4, [low, high], btype='band')
-            filtered_ii = filtfilt(b, a, lead_ii)
-            signal_mean = np.mean(filtered_ii)
-            signal_std = np.std(filtered_ii)
-            r_peaks, _ = find_peaks(filtered_ii, height=signal_mean + 0.5 * signal_std, distance=int(0.3 * fs), prominence=signal_std * 0.4)
-            if len(r_peaks) < 8: # Enforce 8 beats
-                return getattr(self, '_prev_qrs_axis', 0) or 0
-            _, median_i = build_median_beat(lead_i_raw, r_peaks, fs, min_beats=8)
-            _, median_avf = build_median_beat(lead_avf_raw, r_peaks, fs, min_beats=8)
-            if median_i is None or median_avf is None:
-                return getattr(self, '_prev_qrs_axis', 0) or 0
-            r_peak_idx = len(median_i) // 2
-            # Get Lead II median beat for axis calculation
-            _, median_ii = build_median_beat(lead_ii, r_peaks, fs, min_beats=8)
-            if median_ii is None:
-                return getattr(self, '_prev_qrs_axis', 0) or 0
-            # Get TP baselines for Lead I and aVF (REQUIRED for correct axis calculation)
-            r_mid = r_peaks[len(r_peaks) // 2]
-            prev_r_idx = r_peaks[len(r_peaks) // 2 - 1] if len(r_peaks) > 1 else None
-            tp_baseline_i = get_tp_baseline(lead_i_raw, r_mid, fs, prev_r_peak_idx=prev_r_idx)
-            tp_baseline_avf = get_tp_baseline(lead_avf_raw, r_mid, fs, prev_r_peak_idx=prev_r_idx)
-            
-            # Build time axis for median beat
-            time_axis_i, _ = build_median_beat(lead_i_raw, r_peaks, fs, min_beats=8)
-            if time_axis_i is None:
+            # Median beats for I / II / aVF come from the shared per-epoch MedianBeatSet
+            beat_set = self.get_median_beat_set()
+            axis_deg = calculate_axis_from_median_set(beat_set, wave_type='QRS', prev_axis=self._prev_qrs_axis)
+            if axis_deg is None:
                 return getattr(self, '_prev_qrs_axis', 0) or 0
-            
-            # Calculate QRS axis using strict wave windows and net area (integral)
-            axis_deg = calculate_axis_from_median_beat(lead_i_raw, lead_ii, lead_avf_raw, median_i, median_ii, median_avf, r_peak_idx, fs, tp_baseline_i=tp_baseline_i, tp_baseline_avf=tp_baseline_avf, time_axis=time_axis_i, wave_type='QRS', prev_axis=self._prev_qrs_axis)
             self._prev_qrs_axis = axis_deg
             return int(round(axis_deg))
         except Exception as e:
@@ -3280,63 +3108,12 @@ class ECGTestPage(QWidget):
     def calculate_p_axis_from_median(self):
         """Calculate P-wave axis from median beat vectors (GE/Philips standard)."""
         try:
-            if len(self.data) < 6:
-                return getattr(self, '_prev_p_axis', 0) or 0
-            
-            fs = 500.0
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate:
-                fs = float(self.sampler.sampling_rate)
-            
-            lead_i_raw = np.asarray(self.data[0], dtype=float)
-            lead_ii = np.asarray(self.data[1], dtype=float)
-            lead_avf_raw = np.asarray(self.data[5], dtype=float)
-            
-            # 1. R-peak detection on Lead II (Same as QRS for alignment consistency)
-            from scipy.signal import butter, filtfilt
-            nyquist = fs / 2
-            b, a = butter(4, [0.5/nyquist, 40/nyquist], btype='band')
-            filtered_ii = filtfilt(b, a, lead_ii)
-            
-            signal_mean = np.mean(filtered_ii)
-            signal_std = np.std(filtered_ii)
-            r_peaks, _ = find_peaks(
-                filtered_ii, 
-                height=signal_mean + 0.5 * signal_std, 
-                distance=int(0.25 * fs), 
-                prominence=signal_std * 0.4
-            )
-            
-            if len(r_peaks) < 8:
-                return getattr(self, '_prev_p_axis', 0) or 0
-            
-            # 2. Build Median Beats
-            _, median_i = build_median_beat(lead_i_raw, r_peaks, fs, min_beats=8)
-            _, median_ii = build_median_beat(lead_ii, r_peaks, fs, min_beats=8)
-            _, median_avf = build_median_beat(lead_avf_raw, r_peaks, fs, min_beats=8)
-            
-            if median_i is None or median_ii is None or median_avf is None:
-                return getattr(self, '_prev_p_axis', 0) or 0
-                
-            r_peak_idx = len(median_i) // 2
-            
-            # 3. TP Baselines and PR (for window shrinking)
-            r_mid = r_peaks[len(r_peaks) // 2]
-            prev_r_idx = r_peaks[len(r_peaks) // 2 - 1] if len(r_peaks) > 1 else None
-            tp_baseline_i = get_tp_baseline(lead_i_raw, r_mid, fs, prev_r_peak_idx=prev_r_idx)
-            tp_baseline_avf = get_tp_baseline(lead_avf_raw, r_mid, fs, prev_r_peak_idx=prev_r_idx)
-            
-            time_axis_i, _ = build_median_beat(lead_i_raw, r_peaks, fs, min_beats=8)
+            beat_set = self.get_median_beat_set()
             pr_ms = getattr(self, 'pr_interval', 160)
             
-            # 4. Axis Calculation (Integral Area Method)
-            axis_deg = calculate_axis_from_median_beat(
-                lead_i_raw, lead_ii, lead_avf_raw, 
-                median_i, median_ii, median_avf, 
-                r_peak_idx, fs, 
-                tp_baseline_i=tp_baseline_i, 
-                tp_baseline_avf=tp_baseline_avf, 
-                time_axis=time_axis_i, 
-                wave_type='P', 
+            # Axis Calculation (Integral Area Method, PR for window shrinking)
+            axis_deg = calculate_axis_from_median_set(
+                beat_set, wave_type='P',
                 prev_axis=getattr(self, '_prev_p_axis', None),
                 pr_ms=pr_ms
             )
@@ -3353,64 +3130,14 @@ class ECGTestPage(QWidget):
     def calculate_t_axis_from_median(self):
         """Calculate T-wave axis from median beat vectors (GE/Philips standard)."""
         try:
-            if len(self.data) < 6:
-                return getattr(self, '_prev_t_axis', 0) or 0
-            
-            fs = 500.0
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate:
-                fs = float(self.sampler.sampling_rate)
-            
-            lead_i_raw = np.asarray(self.data[0], dtype=float)
-            lead_ii = np.asarray(self.data[1], dtype=float)
-            lead_avf_raw = np.asarray(self.data[5], dtype=float)
-            
-            # 1. R-peak detection on Lead II
-            from scipy.signal import butter, filtfilt
-            nyquist = fs / 2
-            b, a = butter(4, [0.5/nyquist, 40/nyquist], btype='band')
-            filtered_ii = filtfilt(b, a, lead_ii)
-            
-            signal_mean = np.mean(filtered_ii)
-            signal_std = np.std(filtered_ii)
-            r_peaks, _ = find_peaks(
-                filtered_ii, 
-                height=signal_mean + 0.5 * signal_std, 
-                distance=int(0.25 * fs), 
-                prominence=signal_std * 0.4
+            beat_set = self.get_median_beat_set()
+            axis_deg = calculate_axis_from_median_set(
+                beat_set, wave_type='T',
+                prev_axis=getattr(self, '_prev_t_axis', None)
             )
             
-            if len(r_peaks) < 8:
-                return getattr(self, '_prev_t_axis', 0) or 0
-            
-            # 2. Build Median Beats
-            _, median_i = build_median_beat(lead_i_raw, r_peaks, fs, min_beats=8)
-            _, median_ii = build_median_beat(lead_ii, r_peaks, fs, min_beats=8)
-            _, median_avf = build_median_beat(lead_avf_raw, r_peaks, fs, min_beats=8)
-            
-            if median_i is None or median_ii is None or median_avf is None:
+            if axis_deg is None:
                 return getattr(self, '_prev_t_axis', 0) or 0
-                
-            r_peak_idx = len(median_i) // 2
-            
-            # 3. TP Baselines
-            r_mid = r_peaks[len(r_peaks) // 2]
-            prev_r_idx = r_peaks[len(r_peaks) // 2 - 1] if len(r_peaks) > 1 else None
-            tp_baseline_i = get_tp_baseline(lead_i_raw, r_mid, fs, prev_r_peak_idx=prev_r_idx)
-            tp_baseline_avf = get_tp_baseline(lead_avf_raw, r_mid, fs, prev_r_peak_idx=prev_r_idx)
-            
-            time_axis_i, _ = build_median_beat(lead_i_raw, r_peaks, fs, min_beats=8)
-            
-            # 4. Axis Calculation (Integral Area Method)
-            axis_deg = calculate_axis_from_median_beat(
-                lead_i_raw, lead_ii, lead_avf_raw, 
-                median_i, median_ii, median_avf, 
-                r_peak_idx, fs, 
-                tp_baseline_i=tp_baseline_i, 
-                tp_baseline_avf=tp_baseline_avf, 
-                time_axis=time_axis_i, 
-                wave_type='T', 
-                prev_axis=getattr(self, '_prev_t_axis', None)
-            )
             
             self._prev_t_axis = axis_deg
             return int(round(axis_deg))
@@ -3426,52 +3153,19 @@ class ECGTestPage(QWidget):
         - SV1: Most negative S nadir in V1 QRS window relative to TP baseline.
         """
         try:
-            if len(self.data) < 8:
+            if len(self.data) < 11:
                 return None, None
             
-            fs = 500.0
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate:
-                fs = float(self.sampler.sampling_rate)
-                
             # CRITICAL: Correct lead indices for 12-lead ECG
             # LEADS_MAP: ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
-            # Index 6 = V1, Index 10 = V5
-            lead_v5_raw = np.asarray(self.data[10], dtype=float) if len(self.data) > 10 else None
-            lead_v1_raw = np.asarray(self.data[6], dtype=float) if len(self.data) > 6 else None
-            lead_ii = np.asarray(self.data[1], dtype=float)
-            
-            if lead_v5_raw is None or lead_v1_raw is None:
-                return None, None
-            
-            # 1. Detect R-peaks on Lead II for alignment
-            from scipy.signal import butter, filtfilt
-            nyquist = fs / 2
-            b, a = butter(4, [0.5/nyquist, 40/nyquist], btype='band')
-            filtered_ii = filtfilt(b, a, lead_ii)
-            
-            signal_mean = np.mean(filtered_ii)
-            signal_std = np.std(filtered_ii)
-            r_peaks, _ = find_peaks(
-                filtered_ii, 
-                height=signal_mean + 0.5 * signal_std, 
-                distance=int(0.25 * fs), 
-                prominence=signal_std * 0.4
-            )
-            
-            if len(r_peaks) < 8:
-                return None, None
-                
-            # 2. Call measurement function using RAW data and shared R-peaks
+            # Index 6 = V1, Index 10 = V5 - aligned on the shared Lead II R-peaks
             # ADC factors for V5/V1 (Marquette standards)
-            rv5_mv, sv1_mv = measure_rv5_sv1_from_median_beat(
-                lead_v5_raw, lead_v1_raw, 
-                r_peaks, r_peaks, # Use shared R-peaks for alignment
-                fs, 
-                v5_adc_per_mv=2048.0, 
+            return measure_rv5_sv1_from_median_set(
+                self.get_median_beat_set(),
+                v5_index=10, v1_index=6,
+                v5_adc_per_mv=2048.0,
                 v1_adc_per_mv=1441.0
             )
-            
-            return rv5_mv, sv1_mv
         except Exception as e:
             print(f"❌ Error calculating RV5/SV1 from median: {e}")
             return None, None
@@ -3577,7 +3271,7 @@ class ECGTestPage(QWidget):
                     metrics['time_elapsed'] = self.metric_labels['time_elapsed'].text()
             
             # Get sampling rate
-            if hasattr(self, 'sampler') and self.sampler.sampling_rate > 0:
+            if self.sampler.sampling_rate > 0:
                 metrics['sampling_rate'] = f"{self.sampler.sampling_rate:.1f}"
             else:
                 metrics['sampling_rate'] = "--"
@@ -3597,14 +3291,68 @@ class ECGTestPage(QWidget):
         """Expose latest arrhythmia interpretation string for the dashboard."""
         return getattr(self, '_latest_rhythm_interpretation', "Analyzing Rhythm...")
 
+    def get_arrhythmia_events(self):
+        """Lead II arrhythmia episodes (seconds since acquisition start, duration seconds, rhythm) of the current session."""
+        timeline = getattr(self, 'arrhythmia_timeline', None)
+        if timeline is None or self._arrhythmia_generation != self.data.generation[0]:
+            # self.data was reset since (demo / buffer resize): not this session's events
+            return []
+        return timeline.session_events()
+
+    def reset_arrhythmia_timeline(self):
+        """Start the session's Lead II arrhythmia timeline at the newest sample of self.data"""
+        fs = self.current_sampling_rate()
+        self.arrhythmia_timeline.detector.fs = fs
+        self._arrhythmia_analyzer.fs = fs
+        self.arrhythmia_timeline.reset(time_offset=0.0)
+        self._arrhythmia_origin = self.data.total_written
+        self._arrhythmia_generation = self.data.generation[0]
+
+    def _update_arrhythmia_timeline(self):
+        """Classify the Lead II heat map columns that the newest samples of self.data complete
+        
+        The PQRST analysis only runs when a column is due, on that column's
+        context (plus any columns missed since the last call).
+        """
+        timeline = self.arrhythmia_timeline
+        if (self._arrhythmia_generation != self.data.generation[0]
+                or self.data.total_written < self._arrhythmia_origin):
+            # self.data was reset or reallocated: no older samples to classify
+            self.reset_arrhythmia_timeline()
+        fs = self.current_sampling_rate()
+        if timeline.detector.fs != fs:
+            # Rate converged / changed: columns of the old rate are dropped
+            timeline.detector.fs = fs
+            self._arrhythmia_analyzer.fs = fs
+            timeline.reset()
+        end = self.data.total_written - self._arrhythmia_origin
+        due = timeline.next_column_end()
+        if end < (due if due is not None else timeline.window_samples):
+            return
+        if not self.leads_connected[1]:
+            # Lead II electrode off: leave its columns blank
+            timeline.skip(end)
+            return
+        context = int(round(timeline.context_seconds * fs))
+        done = due - timeline.window_samples if due is not None else 0
+        n = min(self.data.filled, end, end - done - timeline.window_samples + context)
+        if n <= 0:
+            return
+        signal = self.data.latest(n)[1].astype(np.float64)
+        analysis = self._arrhythmia_analyzer.analyze_signal(signal)
+        reader = getattr(self, 'serial_reader', None)
+        has_received_serial_data = bool(reader and getattr(reader, 'running', False)
+                                        and getattr(reader, 'data_count', 0) >= 50)
+        timeline.update(signal, end - n, analysis, has_received_serial_data=has_received_serial_data)
+
     def update_plot_y_range(self, plot_index):
         """Update Y-axis range for a specific plot using robust stats to avoid cropping"""
         try:
             if plot_index >= len(self.data) or plot_index >= len(self.plot_widgets):
                 return
 
-            # Get the data for this plot
-            data = self.data[plot_index]
+            # Get the data for this plot (read once per refresh, no copy needed)
+            data = self.data.view(plot_index)
             
             # Remove NaN values and large outliers (robust)
             valid_data = data[~np.isnan(data)]
@@ -4059,9 +3807,7 @@ class ECGTestPage(QWidget):
             
             # Detect R peaks using Pan-Tompkins algorithm
             # Use detected sampling rate
-            fs_report = 186.5
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                fs_report = float(self.sampler.sampling_rate)
+            fs_report = self.current_sampling_rate()
             
             r_peaks = pan_tompkins(data, fs=fs_report)
             
@@ -4351,8 +4097,8 @@ class ECGTestPage(QWidget):
             self.recording_toggle.setText("STOP")
             
             # Start capture timer
-            self.recording_timer = QTimer()
-            self.recording_timer.timeout.connect(self.capture_frame)
+            self.recording_timer = self.render_scheduler.view(
+                "ecg_recording_capture", self.capture_frame, fps=30, adaptive=False)
             self.recording_timer.start(33)  # ~30 FPS
             
         except Exception as e:
@@ -4485,7 +4231,7 @@ class ECGTestPage(QWidget):
     def expand_lead(self, idx):
         lead = self.leads[idx]
         def get_lead_data():
-            return self.data[lead]
+            return self.data[idx] if idx < len(self.data) else None
         color = self.LEAD_COLORS.get(lead, "#00ff99")
         if hasattr(self, '_detailed_timer') and self._detailed_timer is not None:
             self._detailed_timer.stop()
@@ -4553,7 +4299,6 @@ class ECGTestPage(QWidget):
         self.detailed_widget.setLayout(layout)
         self.detailed_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.page_stack.setCurrentIndex(1)
-        self._detailed_timer = QTimer(self)
 
         def update_detailed_plot():
             detailed_buffer_size = 500  # Reduced to 500 samples for real-time effect
@@ -4563,7 +4308,7 @@ class ECGTestPage(QWidget):
             current_speed = self.settings_manager.get_wave_speed()
 
             # Robust: Only plot if enough data, else show blank
-            if data and len(data) >= 10:
+            if data is not None and len(data) >= 10:
                 plot_data = np.array(data[-detailed_buffer_size:])
                 x = np.arange(len(plot_data))
                 centered = plot_data - np.mean(plot_data)
@@ -4572,7 +4317,10 @@ class ECGTestPage(QWidget):
                 gain_factor = get_display_gain(current_gain)
                 centered = centered * gain_factor
 
-                line.set_data(x, centered)
+                # Min/max decimation to the canvas width keeps QRS peaks when the
+                # window holds more samples than pixels (PQRST labels below use
+                # the full-resolution samples)
+                line.set_data(*minmax_envelope(centered, self._plot_point_budget(canvas)))
                 ax.set_xlim(0, max(len(centered)-1, 1))
                 
                 ylim = 500 * gain_factor
@@ -4599,7 +4347,7 @@ class ECGTestPage(QWidget):
                 if lead == "II":
                     # Use the same detection logic as in main.py
                     from scipy.signal import find_peaks
-                    sampling_rate = 80
+                    sampling_rate = self.current_sampling_rate()
                     ecg_signal = centered
                     window_size = min(500, len(ecg_signal))
                     if len(ecg_signal) > window_size:
@@ -4735,7 +4483,8 @@ class ECGTestPage(QWidget):
                 qrs_label.setText("0 ms")
                 qtc_label.setText("0 ms")
             canvas.draw_idle()
-        self._detailed_timer.timeout.connect(update_detailed_plot)
+        self._detailed_timer = self.render_scheduler.view(
+            "ecg_detailed_lead", update_detailed_plot, widget=canvas, fps=10, min_fps=4)
         self._detailed_timer.start(100)
         update_detailed_plot()  # Draw immediately on open
 
@@ -4973,40 +4722,41 @@ class ECGTestPage(QWidget):
             print(f"❌ Error in adaptive gain: {e}")
             return np.array(data) * gain_factor
 
-    def update_plot_y_range_adaptive(self, plot_index, signal_source, data_override=None):
+    def update_plot_y_range_adaptive(self, plot_index, signal_source, data_override=None, stats=None):
         """Update Y-axis range based on signal source with adaptive scaling.
         If data_override is provided, use it for statistics (should be the plotted/scaled data).
+        stats: optional precomputed (center, spread, peak_deviation) of the plotted data
+        (robust_amplitude() of all leads at once), skipping the per-lead statistics.
         Y-axis automatically adjusts to gain to prevent cropping."""
         try:
             if plot_index >= len(self.data) or plot_index >= len(self.plot_widgets):
                 return
 
-            # Get the data for this plot
-            if data_override is not None:
-                data = np.asarray(data_override)
-                # Data is already scaled with gain, so don't apply gain again
-                data_already_scaled = True
-            else:
-                data = self.data[plot_index]
-                # Data is not scaled, will need to apply gain
-                data_already_scaled = False
-            
-            # Remove NaN values and large outliers (robust)
-            valid_data = data[~np.isnan(data)]
-            
-            if len(valid_data) == 0:
-                return
-            
             # Get current gain setting to properly scale Y-axis
             current_gain = get_display_gain(self.settings_manager.get_wave_gain())
             
-            # Use percentiles to avoid spikes from clipping the view
-            p1 = np.percentile(valid_data, 1)
-            p99 = np.percentile(valid_data, 99)
-            data_mean = (p1 + p99) / 2.0
-            data_std = np.std(valid_data[(valid_data >= p1) & (valid_data <= p99)])
-            # Maximum deviation of any point from the mean – we will always cover this
-            peak_deviation = np.max(np.abs(valid_data - data_mean)) if len(valid_data) > 0 else 0.0
+            if stats is not None:
+                data_mean, data_std, peak_deviation = (float(v) for v in stats)
+            else:
+                # Get the data for this plot
+                if data_override is not None:
+                    data = np.asarray(data_override)
+                else:
+                    data = self.data.view(plot_index)
+                
+                # Remove NaN values and large outliers (robust)
+                valid_data = data[~np.isnan(data)]
+                
+                if len(valid_data) == 0:
+                    return
+                
+                # Use percentiles to avoid spikes from clipping the view
+                p1 = np.percentile(valid_data, 1)
+                p99 = np.percentile(valid_data, 99)
+                data_mean = (p1 + p99) / 2.0
+                data_std = np.std(valid_data[(valid_data >= p1) & (valid_data <= p99)])
+                # Maximum deviation of any point from the mean – we will always cover this
+                peak_deviation = np.max(np.abs(valid_data - data_mean)) if len(valid_data) > 0 else 0.0
             
             # Calculate appropriate Y-range with adaptive padding based on signal source.
             # Goal: make peaks visually bigger but still avoid cropping by using robust stats.
@@ -5110,9 +4860,9 @@ class ECGTestPage(QWidget):
     def apply_ecg_filtering(self, signal_data):
         """Apply medical-grade ECG filtering for smooth, clean waves like professional devices"""
         try:
-            from scipy.signal import butter, filtfilt, savgol_filter, medfilt, wiener
+            from scipy.signal import sosfiltfilt, savgol_filter, medfilt, wiener
             from scipy.ndimage import gaussian_filter1d
-            from ecg.ecg_filters import apply_ecg_filters_from_settings
+            from ecg.ecg_filters import apply_ecg_filters_from_settings, design_ecg_filter, FILTER_DISPLAY_LOWPASS
             import numpy as np
             
             if len(signal_data) < 10:  # Need minimum data for filtering
@@ -5126,12 +4876,7 @@ class ECGTestPage(QWidget):
             
             # Apply AC/EMG/DFT filters based on user settings from SettingsManager
             # This applies filters in correct order: DFT -> EMG -> AC
-            sampling_rate = getattr(self, 'demo_fs', 500)  # Get sampling rate, default 500Hz
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate'):
-                try:
-                    sampling_rate = float(self.sampler.sampling_rate)
-                except:
-                    pass
+            sampling_rate = self.current_sampling_rate()
             
             # Apply user-configured AC/EMG/DFT filters
             signal = apply_ecg_filters_from_settings(
@@ -5142,12 +4887,12 @@ class ECGTestPage(QWidget):
             
             # 3. Medical-grade bandpass filter (0.5-30 Hz) - tighter range for cleaner signal
             fs = sampling_rate  # Use actual sampling rate
-            nyquist = fs / 2
             
             # Low-pass filter to remove high-frequency noise (>30 Hz) - more aggressive
-            low_cutoff = 30 / nyquist  # Reduced from 40 to 30 Hz
-            b_low, a_low = butter(6, low_cutoff, btype='low')  # Increased order to 6
-            signal = filtfilt(b_low, a_low, signal)
+            # 6th order Butterworth, designed once per sampling rate (cached)
+            design = design_ecg_filter(FILTER_DISPLAY_LOWPASS, float(fs), "30")
+            if design is not None:
+                signal = sosfiltfilt(design[2], signal)
             
             # Note: High-pass filter is now handled by DFT filter, so we skip it here
             
@@ -5231,6 +4976,295 @@ class ECGTestPage(QWidget):
             print(f"Real-time smoothing error: {e}")
             return new_value
 
+    def apply_realtime_smoothing_block(self, block):
+        """Vectorized apply_realtime_smoothing for a block of multi-lead samples
+        
+        Produces the same output as calling apply_realtime_smoothing() sample by
+        sample: a causal 7-tap Gaussian FIR once 7 samples have been seen, a
+        5-sample mean for samples 5-6 and the raw value before that.
+        
+        Args:
+            block: (n_samples, n_leads) raw samples
+        
+        Returns:
+            (n_samples, n_leads) smoothed samples
+        """
+        block = np.asarray(block, dtype=float)
+        n, n_leads = block.shape
+        if n == 0:
+            return block
+        taps = len(_SMOOTHING_WEIGHTS)
+        history = getattr(self, '_smoothing_history', None)
+        if history is None or history.shape[1] != n_leads:
+            history = np.zeros((taps - 1, n_leads))
+            self._smoothing_seen = 0
+        extended = np.vstack([history, block])
+
+        smoothed = np.zeros_like(block)
+        for k, weight in enumerate(_SMOOTHING_WEIGHTS):
+            smoothed += weight * extended[k:k + n]
+
+        # Warm-up samples use the shorter averaging of the per-sample path
+        seen = self._smoothing_seen
+        for j in range(max(0, min(n, taps - 1 - seen))):
+            count = seen + j + 1
+            row = j + taps - 1
+            smoothed[j] = extended[row - 4:row + 1].mean(axis=0) if count >= 5 else block[j]
+
+        self._smoothing_history = extended[-(taps - 1):].copy()
+        self._smoothing_seen = seen + n
+        return smoothed
+
+    def reset_realtime_smoothing(self):
+        """Forget smoothing history (call when the sample stream restarts)"""
+        self._smoothing_history = None
+        self._smoothing_seen = 0
+
+    def current_sampling_rate(self):
+        """Sampling rate every analysis and display path uses
+        
+        The stable rate published by the shared clock-recovery estimator
+        (see sampling_clock.py), else its single fallback. The value only
+        changes on a real rate change, so per-fs filter designs and cached
+        analysis results stay valid between frames.
+        """
+        return resolve_sampling_rate(self)
+
+    def _ingest_live_block(self, block, mask=None, lead_status=None, stream_index=None):
+        """Smooth a block of live samples into self.data and stream the display filters
+        
+        The AC notch ("Set Filter" selection) is run once per new sample through a
+        stateful filter bank and the result is kept in self.display_data, so the
+        plot timer no longer re-filters the whole visible window every frame.
+        
+        Args:
+            block: (n_samples, 12) raw samples in LEAD_ORDER
+            mask: Optional (n_samples,) sample flags from the acquisition timeline
+            lead_status: Optional (n_samples,) hardware lead-status bitmask
+            stream_index: Acquisition timeline index of block[0] (= its
+                full-disclosure recording index), None when not from the timeline
+        """
+        smoothed = self.apply_realtime_smoothing_block(block)
+        start = self.data.total_written
+        if stream_index is not None:
+            self._map_disclosure(start, int(stream_index))
+        if (self.data_mask.total_written + self._data_mask_offset != start
+                or self.data_mask.capacity != self.data.capacity):
+            # self.data was reset or written elsewhere - no flags for older samples
+            self.data_mask.reset(self.data.capacity)
+            history = np.zeros((self.data.filled, 2), dtype=np.uint8)
+            history[:, 1] = LEAD_STATUS_ALL
+            self.data_mask.extend(history)
+            self._data_mask_offset = start - self.data_mask.total_written
+        side = np.zeros((len(smoothed), 2), dtype=np.uint8)
+        if mask is not None and len(mask) == len(smoothed):
+            side[:, 0] = mask
+        mask = side[:, 0]
+        if lead_status is not None and len(lead_status) == len(smoothed):
+            side[:, 1] = lead_status
+        else:
+            side[:, 1] = LEAD_STATUS_ALL
+        self.data_mask.extend(side)
+        self._update_lead_connection()
+        connected = self.leads_connected
+        display = self.display_data
+        if display.total_written != self.data.total_written or display.capacity != self.data.capacity:
+            # self.data was reset or written elsewhere - restart the display stream
+            display.reset(self.data.capacity)
+            self.display_filter_bank.reset()
+        if self.beat_detector.total_samples != self.data.total_written:
+            self.beat_detector.reset(start_index=self.data.total_written)
+        if self.respiration.total_samples != self.data.total_written:
+            self.respiration.reset(start_index=self.data.total_written)
+        self.data.extend(smoothed)
+        try:
+            # No RR interval may span samples that never arrived
+            for pos in np.flatnonzero(mask & SAMPLE_AFTER_GAP):
+                self.beat_detector.mark_discontinuity(start + int(pos))
+            # Incremental QRS detection on Lead II (new samples only); with the
+            # Lead II electrode off the detector just follows the stream
+            if connected[1]:
+                self.beat_detector.configure(self.current_sampling_rate())
+                self.beat_detector.process(smoothed[:, 1])
+                self.hrv_engine.sync(self.beat_detector)
+            else:
+                self.beat_detector.reset(start_index=self.data.total_written)
+        except Exception as e:
+            print(f"⚠️ Streaming beat detection skipped: {e}")
+            self.beat_detector.reset(start_index=self.data.total_written)
+        try:
+            # ECG-derived respiration from the new samples only (~8 Hz state per lead)
+            self.respiration.configure(self.current_sampling_rate())
+            self.respiration.process(smoothed.T)
+        except Exception as e:
+            print(f"⚠️ Streaming respiration skipped: {e}")
+            self.respiration.reset(start_index=self.data.total_written)
+        try:
+            # Lead II arrhythmia columns completed by this block (one analysis per 2 s column)
+            self._update_arrhythmia_timeline()
+        except Exception as e:
+            print(f"⚠️ Arrhythmia timeline update skipped: {e}")
+        try:
+            ac_setting = self.settings_manager.get_setting("filter_ac", "off") if self.settings_manager else "off"
+            self.display_filter_bank.configure(self.current_sampling_rate(), ac_filter=ac_setting)
+            streamed_block = self.display_filter_bank.process(smoothed.T, leads=connected)
+            display.extend(streamed_block.T)
+            # Decimators that were in step before this block stay in step
+            written_before = self.data.total_written - len(smoothed)
+            for decimator in self.display_decimators.values():
+                if decimator.total_samples == written_before:
+                    decimator.extend(streamed_block)
+        except Exception as e:
+            # Display falls back to per-window filtering until the next reset
+            print(f"⚠️ Streaming display filter skipped: {e}")
+
+    def get_live_r_peaks(self, window_len):
+        """R-peaks from the shared streaming detector for the newest samples of self.data
+        
+        Args:
+            window_len: Length of a buffer holding the newest window_len samples
+        
+        Returns:
+            Array of R-peak positions inside that buffer, or None when the detector
+            is not tracking self.data (demo mode, still learning, just reset)
+        """
+        detector = getattr(self, 'beat_detector', None)
+        if detector is None or not detector.ready:
+            return None
+        if detector.total_samples != self.data.total_written:
+            return None
+        return detector.r_peaks_in_window(window_len)
+
+    def get_hrv_metrics(self, min_beats=10, report=False, frequency=False):
+        """Live HRV of the last 5 minutes from the shared beat stream
+        
+        Args:
+            min_beats: NN intervals needed before metrics are returned
+            report: Also return the per-minute RR / HR and SDANN of the HRV report
+                (and 'respiration_rate', the Lead II ECG-derived rate, once known)
+            frequency: Include the LF/HF bands on the live path; the spectrum is
+                too slow to run per beat on the GUI thread, reports always get it
+        
+        Returns:
+            HRVEngine.metrics() / report_metrics() dict, or None while too few
+            beats have been detected
+        """
+        engine = getattr(self, 'hrv_engine', None)
+        if engine is None or engine.nn_count < min_beats:
+            return None
+        if not report:
+            return engine.metrics(frequency=frequency)
+        metrics = engine.report_metrics()
+        respiration = self.get_respiration(lead=1)
+        if respiration is not None and respiration['rate'] > 0:
+            metrics['respiration_rate'] = respiration['rate']
+        return metrics
+
+    def get_respiration(self, lead=1, seconds=None):
+        """ECG-derived respiration of one lead from the streaming respiration component
+        
+        Args:
+            lead: Lead index (default Lead II)
+            seconds: Length of the returned trace (all kept trace if None)
+        
+        Returns:
+            dict with 'rate' (breaths/min, 0.0 until known), 'trace' (respiration
+            waveform) and 'sampling_rate' (Hz of the trace), or None when the
+            stream is not tracking self.data
+        """
+        stream = getattr(self, 'respiration', None)
+        if stream is None or stream.trace_data is None or stream.trace_data.filled == 0:
+            return None
+        if stream.total_samples != self.data.total_written:
+            return None
+        return {
+            'rate': stream.rate(lead),
+            'trace': stream.trace(seconds, lead=lead),
+            'sampling_rate': stream.trace_rate,
+        }
+
+    def _streamed_display_lead(self, lead_index):
+        """AC-filtered view of a lead from self.display_data
+        
+        Returns:
+            Chronological view matching self.data[lead_index], or None when the
+            streaming filter is off or out of sync (callers filter the window themselves)
+        """
+        display = getattr(self, 'display_data', None)
+        if display is None or not self.display_filter_bank.active:
+            return None
+        if display.total_written == 0 or display.total_written != self.data.total_written:
+            return None
+        return display.view(lead_index)
+
+    def _streamed_display_window(self, n_samples):
+        """(12, n_samples) view of the AC-filtered display stream, or None (see _streamed_display_lead)"""
+        display = getattr(self, 'display_data', None)
+        if display is None or not self.display_filter_bank.active:
+            return None
+        if display.total_written == 0 or display.total_written != self.data.total_written:
+            return None
+        return display.latest(n_samples)
+
+    def _plot_point_budget(self, widget=None, default=1600):
+        """Points worth drawing in a plot: two per pixel column (min/max decimation)"""
+        try:
+            width = int(widget.width()) if widget is not None else 0
+        except Exception:
+            width = 0
+        return 2 * width if width > 100 else default
+
+    def _overlay_point_budget(self, ax, default=1600):
+        """Point budget for a matplotlib overlay axes (two per pixel column)"""
+        try:
+            width = int(ax.bbox.width)
+        except Exception:
+            width = 0
+        return 2 * width if width > 100 else default
+
+    def _display_envelope(self, lead_index, n_samples, max_points):
+        """Min/max envelope of the newest n_samples of a lead's live display stream
+        
+        The stream is the one update_plots draws (self.display_data while the
+        streaming filters run, else self.data). Envelopes are maintained
+        incrementally per bucket size; a bucket size seen for the first time
+        (new wave speed or plot width) is seeded once from the buffer.
+        
+        Returns:
+            (x, y) with x in sample positions of the window, or None when the
+            display stream is not tracking self.data (callers then decimate
+            their own window with minmax_envelope)
+        """
+        if self.data.total_written == 0:
+            return None
+        spb = bucket_size(n_samples, max_points)
+        active = self.display_filter_bank.active
+        decimator = self.display_decimators.get(spb)
+        if decimator is None or decimator.total_samples != self.data.total_written or decimator.tag != active:
+            decimator = self._seed_display_decimator(spb, active)
+            if decimator is None:
+                return None
+        return decimator.envelope(n_samples, lead=lead_index)
+
+    def _seed_display_decimator(self, samples_per_bucket, filters_active, max_decimators=4):
+        display = self.display_data
+        in_step = display.total_written == self.data.total_written
+        if filters_active and not in_step:
+            return None
+        source = display if in_step else self.data
+        capacity = -(-self.data.capacity // samples_per_bucket) + 2
+        decimator = MinMaxDecimator(n_leads=len(LEAD_ORDER), samples_per_bucket=samples_per_bucket,
+                                    capacity_buckets=capacity)
+        history = source.latest()
+        decimator.reset(start_index=self.data.total_written - history.shape[1])
+        decimator.extend(history)
+        decimator.tag = filters_active
+        self.display_decimators.pop(samples_per_bucket, None)
+        self.display_decimators[samples_per_bucket] = decimator
+        while len(self.display_decimators) > max_decimators:
+            self.display_decimators.pop(next(iter(self.display_decimators)))
+        return decimator
+
     # ---------------------- Serial Port Auto-Detection ----------------------
 
     def get_available_serial_ports(self):
@@ -5337,6 +5371,7 @@ class ECGTestPage(QWidget):
                 self.show_connection_warning(f"Invalid baud rate: {baud}. Please set a valid baud rate in System Setup.")
                 return
             
+            self._stop_acquisition_thread()
             if self.serial_reader:
                 self.serial_reader.close()
             
@@ -5396,6 +5431,16 @@ class ECGTestPage(QWidget):
                 else:
                     raise e
             
+            # New stream: recover the sampling rate from scratch (also drops a
+            # rate pinned by demo mode)
+            self.sampler.reset()
+            # Electrode status is re-learned from the new stream
+            self._reset_lead_connection()
+            # Report events start with this session, not a previous one
+            self.reset_arrhythmia_timeline()
+            # Serial draining now happens off the GUI thread
+            self._start_acquisition_thread()
+            
             # Use faster timer interval for EXE builds to prevent gaps
             # Timer interval is more important than timer type for smooth plotting
             timer_interval = 33  # ~30 FPS for smoother plotting in EXE
@@ -5442,6 +5487,269 @@ class ECGTestPage(QWidget):
             print(error_msg)
             self.show_connection_warning(error_msg)
 
+    # ---------------------- Background Acquisition ----------------------
+
+    def _start_acquisition_thread(self):
+        """Start the background reader that owns the serial port"""
+        self._stop_acquisition_thread()
+        if not isinstance(self.serial_reader, SerialStreamReader):
+            return
+        self.acquisition_ring.clear()
+        self.acquisition_timeline.reset()
+        self._acquisition_cursor = 0
+        self._start_disclosure_recording()
+        self.acquisition_thread = AcquisitionThread(self.serial_reader, self.acquisition_ring,
+                                                    recorder=self.disclosure_recorder, clock=self.sampler,
+                                                    timeline=self.acquisition_timeline)
+        self.acquisition_thread.start()
+
+    def _stop_acquisition_thread(self):
+        """Stop the background reader (safe to call when none is running)"""
+        thread = getattr(self, 'acquisition_thread', None)
+        if thread is not None:
+            try:
+                thread.stop()
+            except Exception as e:
+                print(f"⚠️ Error stopping acquisition thread: {e}")
+        self.acquisition_thread = None
+        self._stop_disclosure_recording()
+
+    def _start_disclosure_recording(self):
+        """Open a new full-disclosure session (when enabled in settings)"""
+        self._stop_disclosure_recording()
+        try:
+            if str(self.settings_manager.get_setting("full_disclosure", "off")).lower() != "on":
+                return
+            recorder = FullDisclosureRecorder(sampling_rate=self.current_sampling_rate)
+            recorder.start()
+            self.disclosure_recorder = recorder
+            # Recording index 0 is the first sample the (just reset) timeline publishes
+            self._disclosure_reader = None
+            self._disclosure_map = []
+            self._disclosure_map_generation = self.data.generation[0]
+        except Exception as e:
+            print(f"⚠️ Full-disclosure recording unavailable: {e}")
+            self.disclosure_recorder = None
+
+    def _stop_disclosure_recording(self):
+        """Flush and close the full-disclosure session (safe to call when idle)"""
+        recorder = getattr(self, 'disclosure_recorder', None)
+        if recorder is not None:
+            try:
+                recorder.stop()
+            except Exception as e:
+                print(f"⚠️ Error closing full-disclosure recording: {e}")
+        self.disclosure_recorder = None
+
+    def _map_disclosure(self, data_index, stream_index):
+        """Record that self.data sample data_index is full-disclosure sample stream_index"""
+        if self.disclosure_recorder is None:
+            return
+        if self._disclosure_map_generation != self.data.generation[0]:
+            # self.data was reset: earlier data indices no longer exist
+            self._disclosure_map = []
+            self._disclosure_map_generation = self.data.generation[0]
+        if self._disclosure_map:
+            last_data, last_stream = self._disclosure_map[-1]
+            if stream_index - data_index == last_stream - last_data:
+                return
+        self._disclosure_map.append((data_index, stream_index))
+
+    def disclosure_ranges(self, start, stop):
+        """Full-disclosure sample ranges holding self.data samples [start, stop), in order
+        
+        Samples the GUI never ingested are in the recording but not in
+        self.data, so one self.data range can be several recorded runs.
+        
+        Returns:
+            [(first, last), ...] recording index ranges, or None when part of
+            the range is not recorded (before recording started, or recorded
+            before self.data was reset)
+        """
+        if stop <= start or self._disclosure_map_generation != self.data.generation[0]:
+            return None
+        runs = self._disclosure_map
+        if not runs or start < runs[0][0]:
+            return None
+        ranges = []
+        for i, (data_index, stream_index) in enumerate(runs):
+            run_end = runs[i + 1][0] if i + 1 < len(runs) else self.data.total_written
+            lo, hi = max(start, data_index), min(stop, run_end)
+            if lo < hi:
+                ranges.append((lo - data_index + stream_index, hi - data_index + stream_index))
+        if sum(hi - lo for lo, hi in ranges) != stop - start:
+            return None
+        return ranges
+
+    def disclosure_first_index(self):
+        """Oldest self.data index whose sample is in the full-disclosure recording, or None"""
+        if not self._disclosure_map or self._disclosure_map_generation != self.data.generation[0]:
+            return None
+        return self._disclosure_map[0][0]
+
+    def read_disclosure_history(self, lead_index, start, stop):
+        """Samples [start, stop) of one lead on the self.data index axis, read from the recording
+        
+        The recording holds the published (unsmoothed) samples; the live
+        7-tap smoothing of _ingest_live_block is applied here, using the
+        recorded samples before start, so the result matches self.data.
+        
+        Returns:
+            1-D array, or None when the range is not on disk
+        """
+        recorder = getattr(self, 'disclosure_recorder', None)
+        if recorder is None or not recorder.recording:
+            return None
+        taps = len(_SMOOTHING_WEIGHTS)
+        first_recorded = self.disclosure_first_index()
+        if first_recorded is None:
+            return None
+        lead_in = min(taps - 1, max(0, start - first_recorded))
+        ranges = self.disclosure_ranges(start - lead_in, stop)
+        if ranges is None:
+            return None
+        try:
+            end = ranges[-1][1]
+            reader = self._disclosure_reader
+            if reader is None or reader.session_dir != recorder.session_dir or reader.n_samples < end:
+                recorder.flush()
+                reader = self._disclosure_reader = DisclosureReader(recorder.session_dir)
+            if reader.n_samples < end:
+                return None
+            raw = np.concatenate([reader.read(lo, hi, leads=[lead_index])[0] for lo, hi in ranges])
+        except Exception as e:
+            print(f"⚠️ Full-disclosure read failed: {e}")
+            return None
+        # Causal smoothing; samples without a full lead-in keep the raw value
+        padded = np.concatenate([np.full(taps - 1 - lead_in, np.nan), raw])
+        smoothed = np.zeros(len(raw) - lead_in)
+        for k, weight in enumerate(_SMOOTHING_WEIGHTS):
+            smoothed += weight * padded[k:k + len(smoothed)]
+        return np.where(np.isnan(smoothed), raw[lead_in:], smoothed)
+
+    def _drain_acquisition(self, max_packets=100):
+        """Return all samples published since the last GUI tick as an (n, 12) array
+        
+        Falls back to reading the serial port directly when no acquisition
+        thread is running (e.g. it failed to start).
+        """
+        thread = self.acquisition_thread
+        if thread is None or not thread.running:
+            frames = self.serial_reader.read_frames(max_packets=max_packets)
+            self._pending_mask = None
+            self._pending_status = None
+            if len(frames):
+                lost_before = getattr(self.serial_reader, 'last_lost_before', None)
+                lead_status = getattr(self.serial_reader, 'last_lead_status', None)
+                arrival = time.monotonic()
+                produced = len(frames) + (int(lost_before.sum()) if lost_before is not None else 0)
+                frames, self._pending_mask, _ = self.acquisition_timeline.process(
+                    frames, arrival, lost_before, lead_status)
+                self._pending_status = self.acquisition_timeline.lead_status.latest(len(frames))[0]
+                self._pending_stream_index = self.acquisition_timeline.mask.total_written - len(frames)
+                if self.disclosure_recorder is not None:
+                    self.disclosure_recorder.append(frames, self._pending_mask)
+                self.sampler.add_samples(produced, arrival)
+            return frames
+        cursor = self._acquisition_cursor
+        block, times, self._acquisition_cursor, skipped = self.acquisition_ring.read_since(cursor)
+        self._pending_stream_index = self._acquisition_cursor - block.shape[1]
+        if skipped:
+            print(f"⚠️ Display fell behind acquisition: {skipped} samples overwritten before drawing")
+        if times is not None and len(times):
+            self._pending_display_stamp = float(times[0])
+        # The mask is published before the samples, so it covers the whole block
+        mask, _, _ = self.acquisition_timeline.mask_since(cursor)
+        self._pending_mask = mask[:block.shape[1]]
+        status, _, _ = self.acquisition_timeline.lead_status_since(cursor)
+        self._pending_status = status[:block.shape[1]]
+        return block.T
+
+    def sample_mask(self, n=None):
+        """Sample flags for the newest n samples of self.data (zeros where unknown)
+        
+        SAMPLE_INTERPOLATED marks samples bridged over a short packet loss,
+        SAMPLE_AFTER_GAP the first sample after a loss too long to bridge.
+        """
+        filled = self.data.filled if n is None else min(int(n), self.data.filled)
+        mask = self.data_mask
+        if mask.total_written + self._data_mask_offset != self.data.total_written:
+            return np.zeros(filled, dtype=np.uint8)
+        return np.array(mask.latest(filled)[0])
+
+    def lead_status(self, n=None):
+        """Hardware lead-status bitmask for the newest n samples of self.data
+        
+        Bit i is set while electrode LEAD_NAMES_DIRECT[i] is connected; use
+        packet_decoder.lead_status_connected() for the 12 display leads.
+        Samples without a hardware status read as all connected.
+        """
+        filled = self.data.filled if n is None else min(int(n), self.data.filled)
+        mask = self.data_mask
+        if mask.total_written + self._data_mask_offset != self.data.total_written:
+            return np.full(filled, LEAD_STATUS_ALL, dtype=np.uint8)
+        return np.array(mask.latest(filled)[1])
+
+    def _update_lead_connection(self, window_seconds=0.5):
+        """Refresh self.leads_connected from the newest lead-status samples
+        
+        A lead counts as off only when its electrode flag was clear for the
+        whole window, so a single glitched frame does not drop it. Boards that
+        never set the connected flags are treated as fully connected.
+        """
+        n = max(1, int(window_seconds * self.current_sampling_rate()))
+        status = self.data_mask.latest(min(n, self.data_mask.filled))[1]
+        if not len(status):
+            return
+        if not self._lead_status_reported:
+            if not np.any(status):
+                return
+            self._lead_status_reported = True
+        connected = lead_status_connected(status).any(axis=0)
+        changed = np.flatnonzero(connected != self.leads_connected)
+        self.leads_connected = connected
+        for i in changed.tolist():
+            self._show_lead_off(i, not connected[i])
+
+    def _reset_lead_connection(self):
+        """Treat every lead as connected until the hardware reports otherwise"""
+        self._lead_status_reported = False
+        self.leads_connected = np.ones(len(LEAD_ORDER), dtype=bool)
+        for i in range(len(self._lead_off_shown)):
+            self._show_lead_off(i, False)
+
+    def _show_lead_off(self, index, off):
+        """Non-blocking lead-off indicator: plot title and one console line per change"""
+        if index >= len(self.leads) or self._lead_off_shown[index] == off:
+            return
+        self._lead_off_shown[index] = off
+        lead_name = self.leads[index]
+        if off:
+            print(f"⚠️ {lead_name}: electrode disconnected - lead skipped until it reconnects")
+        else:
+            print(f"✅ {lead_name}: electrode reconnected")
+        try:
+            if index < len(getattr(self, 'plot_widgets', [])):
+                title = f"{lead_name} - LEAD OFF" if off else lead_name
+                color = '#d32f2f' if off else getattr(self, '_lead_title_colors', {}).get(lead_name, '#000000')
+                self.plot_widgets[index].setTitle(title, color=color, size='10pt')
+        except Exception as e:
+            print(f"⚠️ Could not update lead-off indicator for {lead_name}: {e}")
+
+    def get_loss_stats(self):
+        """Per-session and last-second packet loss of the acquisition timeline"""
+        timeline = getattr(self, 'acquisition_timeline', None)
+        return timeline.get_stats() if timeline is not None else {}
+
+    def get_render_stats(self):
+        """Per-view frame statistics of the shared render scheduler"""
+        return self.render_scheduler.get_stats()
+
+    def get_acquisition_stats(self):
+        """Per-stage latency counters of the acquisition pipeline (empty if idle)"""
+        thread = getattr(self, 'acquisition_thread', None)
+        return thread.get_stats() if thread is not None else {}
+
     # ---------------------- Stop Button Functionality ----------------------
 
     def stop_acquisition(self):
@@ -5452,6 +5760,7 @@ class ECGTestPage(QWidget):
             self.show_connection_warning("Please configure serial port and baud rate in System Setup first.")
             return
             
+        self._stop_acquisition_thread()
         if self.serial_reader:
             self.serial_reader.stop()
         self.timer.stop()
@@ -5483,7 +5792,7 @@ class ECGTestPage(QWidget):
             if len(lead2_data) > 100:
                 # Use same detection logic as live
                 from scipy.signal import find_peaks
-                sampling_rate = 500
+                sampling_rate = self.current_sampling_rate()
                 ecg_signal = np.array(lead2_data)
                 centered = ecg_signal - np.mean(ecg_signal)
                 # R peak detection
@@ -5810,12 +6119,7 @@ class ECGTestPage(QWidget):
         project_root = os.path.abspath(os.path.join(current_dir, '..'))
         
         # Calculate 10 seconds of data based on sampling rate
-        sampling_rate = 250  # Default sampling rate
-        if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate'):
-            try:
-                sampling_rate = float(self.sampler.sampling_rate)
-            except:
-                sampling_rate = 250
+        sampling_rate = self.current_sampling_rate()
         
         data_points_10_sec = int(sampling_rate * 10)  # 10 seconds of data
         print(f" Capturing {data_points_10_sec} data points at {sampling_rate}Hz")
@@ -6390,8 +6694,8 @@ class ECGTestPage(QWidget):
         overlay_layout.addWidget(self._overlay_canvas)
         
         # Start update timer for overlay
-        self._overlay_timer = QTimer(self)
-        self._overlay_timer.timeout.connect(self._update_overlay_plots)
+        self._overlay_timer = self.render_scheduler.view(
+            "ecg_overlay", self._update_overlay_plots, widget=self._overlay_canvas, fps=10, min_fps=4)
         self._overlay_timer.start(100)
 
     def _get_overlay_target_buffer_len(self, is_demo_mode):
@@ -6414,11 +6718,7 @@ class ECGTestPage(QWidget):
             seconds_to_show = baseline_seconds * seconds_scale
             
             # Use hardware sampling rate
-            sampling_rate = 186.5
-            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                sampling_rate = float(self.sampler.sampling_rate)
-            elif hasattr(self, 'sampling_rate') and self.sampling_rate > 10:
-                sampling_rate = float(self.sampling_rate)
+            sampling_rate = self.current_sampling_rate()
             samples_to_show = int(sampling_rate * seconds_to_show)
             
             # Return the calculated samples (same as main plots - no buffer size limit)
@@ -6449,28 +6749,20 @@ class ECGTestPage(QWidget):
         
         for idx, lead in enumerate(self.leads):
             if idx < len(self._overlay_lines):
-                if idx < len(self.data):
-                    data = self.data[idx]
+                streamed = self._streamed_display_lead(idx) if idx < len(self.data) else None
+                if streamed is not None:
+                    data = streamed
+                elif idx < len(self.data):
+                    data = self.data.view(idx)
                 else:
                     data = np.array([])
                 line = self._overlay_lines[idx]
                 ax = self._overlay_axes[idx]
 
-                # Ensure overlay line length matches current buffer size
+                # Points are placed on a 0..buffer_len-1 sample axis
                 buffer_len = target_buffer_len
-                try:
-                    xdata = line.get_xdata()
-                    current_len = len(xdata) if xdata is not None else 0
-                    if current_len != buffer_len:
-                        new_x = np.arange(buffer_len)
-                        line.set_xdata(new_x)
-                        current_len = buffer_len
-                    if current_len:
-                        buffer_len = current_len
-                except Exception as e:
-                    print(f"⚠️ Overlay line sync error (12-lead): {e}")
-                    buffer_len = target_buffer_len
                 
+                plot_x = np.arange(buffer_len)
                 plot_data = np.full(buffer_len, np.nan)
                 
                 if data is not None and len(data) > 0:
@@ -6484,18 +6776,10 @@ class ECGTestPage(QWidget):
                     # Optional AC notch filtering (match main 12-lead grid view)
                     filtered_segment = np.array(data_segment, dtype=float)
                     try:
-                        # Prefer hardware sampling rate; fall back to 186.5 Hz
-                        sampling_rate = 186.5
-                        try:
-                            if hasattr(self, "sampler") and hasattr(self.sampler, "sampling_rate") and self.sampler.sampling_rate > 10:
-                                sampling_rate = float(self.sampler.sampling_rate)
-                            elif hasattr(self, "sampling_rate") and self.sampling_rate > 10:
-                                sampling_rate = float(self.sampling_rate)
-                        except Exception:
-                            pass
+                        sampling_rate = self.current_sampling_rate()
                         
                         ac_setting = self.settings_manager.get_setting("filter_ac", "off") if hasattr(self, "settings_manager") else "off"
-                        if ac_setting and ac_setting != "off" and len(filtered_segment) >= 10:
+                        if streamed is None and ac_setting and ac_setting != "off" and len(filtered_segment) >= 10:
                             from ecg.ecg_filters import apply_ac_filter
                             filtered_segment = apply_ac_filter(filtered_segment, sampling_rate, ac_setting)
                     except Exception as filter_error:
@@ -6503,12 +6787,14 @@ class ECGTestPage(QWidget):
                     
                     # Center data around baseline before applying gain
                     centered_raw = np.array(filtered_segment, dtype=float)
+                    baseline_value = 0.0
                     if centered_raw.size:
                         finite_mask = np.isfinite(centered_raw)
                         if np.any(finite_mask):
                             baseline = np.nanmedian(centered_raw[finite_mask])
                             if np.isfinite(baseline):
                                 centered_raw = centered_raw - baseline
+                                baseline_value = baseline
                         centered_raw = np.nan_to_num(centered_raw, copy=False)
                     else:
                         centered_raw = np.zeros(buffer_len, dtype=float)
@@ -6531,20 +6817,19 @@ class ECGTestPage(QWidget):
                     if is_demo_mode and idx == 1:  # Lead II
                         print(f"🎨 Overlay demo mode: Lead {lead}, gain={gain_factor:.2f}, raw_range={np.max(np.abs(centered_raw)):.1f}, gained_range={np.max(np.abs(centered)):.1f}")
                     
-                    # Match main plots: if we have enough data, take exactly buffer_len samples
-                    # If not enough data, stretch what we have to fill buffer_len
+                    # Match main plots: exactly buffer_len samples from the end, min/max
+                    # decimated to the axes width so QRS peaks survive at every wave
+                    # speed. If not enough data, stretch what we have to fill buffer_len
                     n = len(centered)
-                    if n < buffer_len:
-                        # Stretch available data to fill buffer_len
-                        stretched = np.interp(
-                            np.linspace(0, n-1, buffer_len),
-                            np.arange(n),
-                            centered
-                        )
-                        plot_data[:] = stretched
+                    max_points = self._overlay_point_budget(ax)
+                    envelope = self._display_envelope(idx, n, max_points) if streamed is not None else None
+                    if envelope is not None:
+                        plot_x = envelope[0]
+                        plot_data = np.nan_to_num((envelope[1] - baseline_value) * gain_factor)
                     else:
-                        # Take exactly buffer_len samples from the end (same as main plots)
-                        plot_data[:] = centered[-buffer_len:]
+                        plot_x, plot_data = minmax_envelope(centered, max_points)
+                    if n < buffer_len:
+                        plot_x = plot_x * ((buffer_len - 1) / max(n - 1, 1))
                     
                     # Set Y-limits based on UN-GAINED data for both demo and real mode, so gain actually affects visual size
                     # Use raw data for Y-axis calculation, so gain changes visual size
@@ -6590,7 +6875,7 @@ class ECGTestPage(QWidget):
                 
                 # Set x-limits
                 ax.set_xlim(0, max(buffer_len - 1, 1))
-                line.set_ydata(plot_data)
+                line.set_data(plot_x, plot_data)
         
         if hasattr(self, '_overlay_canvas'):
             self._overlay_canvas.draw_idle()
@@ -7118,8 +7403,8 @@ class ECGTestPage(QWidget):
         overlay_layout.addWidget(self._overlay_canvas)
         
         # Start update timer for overlay
-        self._overlay_timer = QTimer(self)
-        self._overlay_timer.timeout.connect(self._update_two_column_plots)
+        self._overlay_timer = self.render_scheduler.view(
+            "ecg_overlay", self._update_two_column_plots, widget=self._overlay_canvas, fps=10, min_fps=4)
         self._overlay_timer.start(100)
 
     def _update_two_column_plots(self):
@@ -7138,10 +7423,12 @@ class ECGTestPage(QWidget):
         
         for idx, lead in enumerate(all_leads):
             if idx < len(self._overlay_lines):
+                streamed = None
                 if lead in self.leads:
                     lead_index = self.leads.index(lead)
                     if lead_index < len(self.data):
-                        data = self.data[lead_index]
+                        streamed = self._streamed_display_lead(lead_index)
+                        data = streamed if streamed is not None else self.data.view(lead_index)
                     else:
                         data = np.array([])
                 else:
@@ -7149,21 +7436,10 @@ class ECGTestPage(QWidget):
                 line = self._overlay_lines[idx]
                 ax = self._overlay_axes[idx]
                 
-                # Ensure overlay line length matches current buffer size
+                # Points are placed on a 0..buffer_len-1 sample axis
                 buffer_len = target_buffer_len
-                try:
-                    xdata = line.get_xdata()
-                    current_len = len(xdata) if xdata is not None else 0
-                    if current_len != buffer_len:
-                        new_x = np.arange(buffer_len)
-                        line.set_xdata(new_x)
-                        current_len = buffer_len
-                    if current_len:
-                        buffer_len = current_len
-                except Exception as e:
-                    print(f"⚠️ Overlay line sync error (6-lead): {e}")
-                    buffer_len = target_buffer_len
 
+                plot_x = np.arange(buffer_len)
                 plot_data = np.full(buffer_len, np.nan)
                 
                 if data is not None and len(data) > 0:
@@ -7177,17 +7453,10 @@ class ECGTestPage(QWidget):
                     # Optional AC notch filtering (match main 12-lead grid view)
                     filtered_segment = np.array(data_segment, dtype=float)
                     try:
-                        sampling_rate = 186.5
-                        try:
-                            if hasattr(self, "sampler") and hasattr(self.sampler, "sampling_rate") and self.sampler.sampling_rate > 10:
-                                sampling_rate = float(self.sampler.sampling_rate)
-                            elif hasattr(self, "sampling_rate") and self.sampling_rate > 10:
-                                sampling_rate = float(self.sampler.sampling_rate)
-                        except Exception:
-                            pass
+                        sampling_rate = self.current_sampling_rate()
                         
                         ac_setting = self.settings_manager.get_setting("filter_ac", "off") if hasattr(self, "settings_manager") else "off"
-                        if ac_setting and ac_setting != "off" and len(filtered_segment) >= 10:
+                        if streamed is None and ac_setting and ac_setting != "off" and len(filtered_segment) >= 10:
                             from ecg.ecg_filters import apply_ac_filter
                             filtered_segment = apply_ac_filter(filtered_segment, sampling_rate, ac_setting)
                     except Exception as filter_error:
@@ -7195,12 +7464,14 @@ class ECGTestPage(QWidget):
                     
                     # Center data around baseline before applying gain
                     centered_raw = np.array(filtered_segment, dtype=float)
+                    baseline_value = 0.0
                     if centered_raw.size:
                         finite_mask = np.isfinite(centered_raw)
                         if np.any(finite_mask):
                             baseline = np.nanmedian(centered_raw[finite_mask])
                             if np.isfinite(baseline):
                                 centered_raw = centered_raw - baseline
+                                baseline_value = baseline
                         centered_raw = np.nan_to_num(centered_raw, copy=False)
                     else:
                         centered_raw = np.zeros(buffer_len, dtype=float)
@@ -7223,20 +7494,19 @@ class ECGTestPage(QWidget):
                     if is_demo_mode and idx == 1:  # Lead II
                         print(f"🎨 6:2 Overlay demo mode: Lead {lead}, gain={gain_factor:.2f}, raw_range={np.max(np.abs(centered_raw)):.1f}, gained_range={np.max(np.abs(centered)):.1f}")
                     
-                    # Match main plots: if we have enough data, take exactly buffer_len samples
-                    # If not enough data, stretch what we have to fill buffer_len
+                    # Match main plots: exactly buffer_len samples from the end, min/max
+                    # decimated to the axes width so QRS peaks survive at every wave
+                    # speed. If not enough data, stretch what we have to fill buffer_len
                     n = len(centered)
-                    if n < buffer_len:
-                        # Stretch available data to fill buffer_len
-                        stretched = np.interp(
-                            np.linspace(0, n-1, buffer_len),
-                            np.arange(n),
-                            centered
-                        )
-                        plot_data[:] = stretched
+                    max_points = self._overlay_point_budget(ax)
+                    envelope = self._display_envelope(idx, n, max_points) if streamed is not None else None
+                    if envelope is not None:
+                        plot_x = envelope[0]
+                        plot_data = np.nan_to_num((envelope[1] - baseline_value) * gain_factor)
                     else:
-                        # Take exactly buffer_len samples from the end (same as main plots)
-                        plot_data[:] = centered[-buffer_len:]
+                        plot_x, plot_data = minmax_envelope(centered, max_points)
+                    if n < buffer_len:
+                        plot_x = plot_x * ((buffer_len - 1) / max(n - 1, 1))
                     
                     # Set Y-limits based on UN-GAINED data for both demo and real mode, so gain actually affects visual size
                     # Use raw data for Y-axis calculation, so gain changes visual size
@@ -7282,13 +7552,140 @@ class ECGTestPage(QWidget):
                 
                 # Set x-limits
                 ax.set_xlim(0, max(buffer_len - 1, 1))
-                line.set_ydata(plot_data)
+                line.set_data(plot_x, plot_data)
         
         if hasattr(self, '_overlay_canvas'):
             self._overlay_canvas.draw_idle()
 
-    def update_plots(self):
-        """Update all ECG plots with current data using PyQtGraph (GitHub version)"""
+    def _draw_demo_leads(self, seconds_to_show):
+        """Draw the newest seconds_to_show of every lead in demo mode (one lead-matrix pass)"""
+        fs = self.current_sampling_rate()
+        gain = 1.0
+        try:
+            gain = get_display_gain(self.settings_manager.get_wave_gain())
+        except Exception:
+            pass
+        n_leads = min(len(self.data_lines), len(self.data))
+        history = as_lead_matrix(self.data)[:n_leads]
+        window_len = int(max(50, min(history.shape[-1], seconds_to_show * fs)))
+        window = history[:, history.shape[-1] - window_len:]
+        try:
+            # 🫀 DISPLAY: Low-frequency baseline anchor (removes respiration from baseline),
+            # measured on the whole buffer as before
+            centered, _ = self.display_anchor.apply(window, fs, history=history)
+        except Exception as filter_error:
+            # Fallback: use original signal (baseline anchor handles it, no mean subtraction)
+            print(f"⚠️ Using fallback baseline correction: {filter_error}")
+            centered = np.array(window, dtype=np.float32)
+        src = centered * np.float32(gain)
+
+        display_len = self.buffer_size if hasattr(self, 'buffer_size') else 1000
+        if window_len > display_len:
+            # More samples than points: min/max per bucket keeps every QRS peak
+            x_samples, decimated = minmax_envelope(src, display_len)
+            x_samples = x_samples * ((display_len - 1) / (window_len - 1))
+        for i in range(n_leads):
+            try:
+                if window_len < 2:
+                    self.data_lines[i].setData(np.zeros(display_len))
+                elif window_len <= display_len:
+                    # Fewer samples than points: stretch (nothing to lose)
+                    x_src = np.linspace(0.0, 1.0, window_len)
+                    x_dst = np.linspace(0.0, 1.0, display_len)
+                    self.data_lines[i].setData(np.interp(x_dst, x_src, src[i]))
+                else:
+                    self.data_lines[i].setData(x_samples, decimated[i])
+                self.update_plot_y_range(i)
+            except Exception as e:
+                print(f"❌ Error updating plot {i}: {e}")
+                continue
+
+    def _draw_serial_leads(self, signal_source, seconds_to_show, wave_speed=25.0, seconds_scale=1.0):
+        """Draw the newest seconds_to_show of every live lead
+        
+        Baseline anchoring, the optional AC notch, min/max decimation, gain and
+        the y-range statistics run once on the (12, n) float32 display window;
+        only the per-curve setData / setRange calls remain per lead.
+        """
+        n_leads = min(len(self.leads), len(self.data_lines), len(self.data), len(self.plot_widgets))
+        if n_leads == 0:
+            return
+        sampling_rate = self.current_sampling_rate()
+        gain_factor = get_display_gain(self.settings_manager.get_wave_gain())
+        
+        # 25 mm/s → 3 s window; 12.5 mm/s → 6 s (compressed); 50 mm/s → 1.5 s (stretched)
+        samples_to_show = int(sampling_rate * seconds_to_show)
+        
+        # Prefer the stream-filtered copy (AC notch already applied per block)
+        streamed = self._streamed_display_window(samples_to_show)
+        window = (streamed if streamed is not None else as_lead_matrix(self.data, samples_to_show))[:n_leads]
+        n = window.shape[-1]
+        # Electrode off (hardware lead-status flag, shown in the plot title):
+        # nothing to filter or draw for that lead
+        drawn = np.asarray(self.leads_connected[:n_leads], dtype=bool)
+        
+        # 🫀 DISPLAY: Low-frequency baseline anchor (removes respiration from baseline)
+        # plus the visual zero-centering clamp, for every connected lead at once
+        centered, display_offset = self.display_anchor.apply(window, sampling_rate, leads=drawn)
+        
+        # Optional AC notch filtering based on "Set Filter" selection.
+        # Keeps wave peaks intact while removing 50/60 Hz power noise for machine serial data.
+        window_filtered = False
+        try:
+            ac_setting = self.settings_manager.get_setting("filter_ac", "off") if self.settings_manager else "off"
+            if streamed is None and ac_setting and ac_setting != "off" and n >= 10 and drawn.any():
+                from ecg.ecg_filters import apply_ac_filter
+                centered[drawn] = apply_ac_filter(centered[drawn], sampling_rate, ac_setting)
+                window_filtered = True
+        except Exception:
+            pass  # AC filter is optional
+        
+        # Peak-preserving min/max decimation to the plot width: the incremental
+        # envelope of the stream when it matches what is drawn (baseline offset
+        # and gain are applied afterwards), else a one-off envelope of this window
+        max_points = max(self._plot_point_budget(self.plot_widgets[i]) for i in range(n_leads))
+        envelope = None if window_filtered else self._display_envelope(None, n, max_points)
+        if envelope is not None:
+            x_samples = envelope[0]
+            centered = np.subtract(envelope[1][:n_leads], display_offset[:, None], dtype=np.float32)
+        else:
+            x_samples, centered = minmax_envelope(centered, max_points)
+        
+        # Apply gain after centering (same as demo mode)
+        scaled = np.nan_to_num(centered * np.float32(gain_factor), copy=False)
+        time_axis = x_samples / sampling_rate
+        rows = np.flatnonzero(drawn)
+        stats = dict(zip(rows.tolist(), zip(*robust_amplitude(scaled[rows])))) if rows.size else {}
+        
+        for i in range(n_leads):
+            try:
+                if not drawn[i]:
+                    self.data_lines[i].setData([], [])
+                    continue
+                # Avoid cropping: small padding and explicit x-range
+                try:
+                    vb = self.plot_widgets[i].getViewBox()
+                    if vb is not None:
+                        vb.setRange(xRange=(0.0, max(n - 1, 1) / sampling_rate), padding=0)
+                except Exception:
+                    pass
+                
+                self.data_lines[i].setData(time_axis, scaled[i])
+                self.update_plot_y_range_adaptive(i, signal_source, data_override=scaled[i], stats=stats[i])
+                
+                if i < 3 and hasattr(self, '_debug_counter') and self._debug_counter % 200 == 0:
+                    print(f"🎛️ Serial Lead {i}: speed={wave_speed:.1f}mm/s, scale={seconds_scale:.2f}, time_range={time_axis[-1]:.2f}s")
+            except Exception as e:
+                print(f"❌ Error updating plot {i}: {e}")
+                continue
+
+    def update_plots(self, render=True):
+        """Update all ECG plots with current data using PyQtGraph (GitHub version)
+        
+        Args:
+            render: False while the page is hidden - live samples are still
+                ingested and metrics kept current, but nothing is drawn
+        """
         try:
             # Memory management - check every N updates
             self.update_count += 1
@@ -7297,6 +7694,8 @@ class ECGTestPage(QWidget):
 
             # DEMO branch
             if not self.serial_reader or not self.serial_reader.running:
+                if not render:
+                    return
                 try:
                     wave_speed = float(self.settings_manager.get_wave_speed())
                 except Exception:
@@ -7307,92 +7706,7 @@ class ECGTestPage(QWidget):
                 seconds_scale = (25.0 / max(1e-6, wave_speed))
                 seconds_to_show = baseline_seconds * seconds_scale
 
-                for i in range(len(self.data_lines)):
-                    try:
-                        if i < len(self.data):
-                            raw = np.asarray(self.data[i])
-                            gain = 1.0
-                            try:
-                                gain = get_display_gain(self.settings_manager.get_wave_gain())
-                            except Exception:
-                                pass
-                            # 🫀 DISPLAY: Low-frequency baseline anchor (removes respiration from baseline)
-                            # Extract very-low-frequency baseline (< 0.3 Hz) to prevent baseline from "breathing"
-                            try:
-                                # Initialize slow anchor if needed
-                                if not hasattr(self, '_baseline_anchors'):
-                                    self._baseline_anchors = [0.0] * 12
-                                    self._baseline_alpha_slow = 0.0005  # Monitor-grade: ~4 sec time constant at 500 Hz
-                                
-                                if len(raw) > 0:
-                                    # Extract low-frequency baseline estimate (removes respiration 0.1-0.35 Hz)
-                                    baseline_estimate = self._extract_low_frequency_baseline(raw, fs)
-                                    
-                                    # Update anchor with slow EMA (tracks only very-low-frequency drift)
-                                    self._baseline_anchors[i] = (1 - self._baseline_alpha_slow) * self._baseline_anchors[i] + self._baseline_alpha_slow * baseline_estimate
-                                    
-                                    # Subtract anchor (NOT raw mean, NOT baseline estimate directly)
-                                    raw = raw - self._baseline_anchors[i]
-                                    
-                                    # Final zero-centering clamp (visual only, display path)
-                                    if not hasattr(self, '_display_zero_refs'):
-                                        self._display_zero_refs = [0.0] * 12
-                                    
-                                    zero_alpha = 0.01  # Fast convergence, visual only
-                                    current_dc = np.nanmean(raw) if len(raw) > 0 else 0.0
-                                    self._display_zero_refs[i] = (1 - zero_alpha) * self._display_zero_refs[i] + zero_alpha * current_dc
-                                    raw = raw - self._display_zero_refs[i]
-                            except Exception as filter_error:
-                                # Fallback: use original signal (baseline anchor handles it, no mean subtraction)
-                                print(f"⚠️ Using fallback baseline correction: {filter_error}")
-                            
-                            raw = raw * gain
-
-                            fs = 500
-                            if hasattr(self, 'sampler') and getattr(self.sampler, 'sampling_rate', None):
-                                try:
-                                    fs = float(self.sampler.sampling_rate)
-                                except Exception:
-                                    fs = 500
-                            window_len = int(max(50, min(len(raw), seconds_to_show * fs)))
-                            src = raw[-window_len:]
-
-                            display_len = self.buffer_size if hasattr(self, 'buffer_size') else 1000
-                            # --- Flatline detection (display-only) ---
-                            # If the recent window for this lead has almost no variation, treat as flatline
-                            if src.size >= 50:
-                                amp_range = float(np.nanmax(src) - np.nanmin(src))
-                                std_val = float(np.nanstd(src))
-                                # Thresholds are in display units after gain; very small range and std → flatline
-                                is_flat = amp_range < 5.0 and std_val < 1.0
-                                lead_name = self.leads[i] if i < len(self.leads) else f"Lead {i+1}"
-                                if is_flat and not self._flatline_alert_shown[i]:
-                                    self._flatline_alert_shown[i] = True
-                                    try:
-                                        QMessageBox.warning(
-                                            self,
-                                            "Flatline Detected",
-                                            f"{lead_name} appears flat (no significant signal).\n"
-                                            "Please check the electrode/lead connection."
-                                        )
-                                    except Exception as warn_err:
-                                        print(f"⚠️ Flatline warning failed for {lead_name}: {warn_err}")
-                                elif not is_flat:
-                                    # Reset flag when signal returns
-                                    self._flatline_alert_shown[i] = False
-
-                            if src.size < 2:
-                                resampled = np.zeros(display_len)
-                            else:
-                                x_src = np.linspace(0.0, 1.0, src.size)
-                                x_dst = np.linspace(0.0, 1.0, display_len)
-                                resampled = np.interp(x_dst, x_src, src)
-
-                            self.data_lines[i].setData(resampled)
-                            self.update_plot_y_range(i)
-                    except Exception as e:
-                        print(f"❌ Error updating plot {i}: {e}")
-                        continue
+                self._draw_demo_leads(seconds_to_show)
                 return
 
             # SERIAL branch - NEW PACKET-BASED PARSING
@@ -7402,10 +7716,8 @@ class ECGTestPage(QWidget):
             max_packets = 100  # Increased to prevent packet loss at 500 Hz
             
             # Track packet loss detection
-            if not hasattr(self, '_last_packet_count'):
-                self._last_packet_count = 0
+            if not hasattr(self, '_last_packet_time'):
                 self._last_packet_time = time.time()
-                self._expected_packets_per_second = 500  # Hardware sends at 500 Hz
             
             # Check if we're using the new packet-based reader
             is_packet_reader = isinstance(self.serial_reader, SerialStreamReader)
@@ -7413,64 +7725,59 @@ class ECGTestPage(QWidget):
             if is_packet_reader:
                 # NEW: Use packet-based reading
                 try:
-                    packets = self.serial_reader.read_packets(max_packets=max_packets)
+                    frames = self._drain_acquisition(max_packets=max_packets)
                     
-                    # Detect packet loss - comprehensive monitoring
+                    # Packet loss monitoring from the gap-aware acquisition timeline
                     current_time = time.time()
-                    if hasattr(self.serial_reader, 'data_count'):
-                        current_packet_count = self.serial_reader.data_count
-                        time_elapsed = current_time - self._last_packet_time
+                    if current_time - self._last_packet_time >= 1.0:  # Check every second
+                        loss = self.get_loss_stats()
+                        last_second = loss.get('last_second') if loss else None
                         
-                        if time_elapsed >= 1.0:  # Check every second
-                            packets_received = current_packet_count - self._last_packet_count
-                            expected_packets = int(self._expected_packets_per_second * time_elapsed)
-                            packet_loss = max(0, expected_packets - packets_received)
-                            packet_loss_percent = (packet_loss / expected_packets * 100) if expected_packets > 0 else 0
-                            
-                            # Get overall statistics from SerialStreamReader
-                            overall_loss_percent = 0.0
-                            if hasattr(self.serial_reader, 'packet_loss_percent'):
-                                overall_loss_percent = self.serial_reader.packet_loss_percent
-                            
-                            # Alert on packet loss
-                            if packet_loss_percent > 5.0:  # More than 5% packet loss in this interval
-                                print(f"⚠️ Packet loss detected: {packet_loss}/{expected_packets} packets ({packet_loss_percent:.1f}% loss) - This may cause waveform deformation")
-                                if overall_loss_percent > 0:
-                                    print(f"   Overall packet loss since start: {overall_loss_percent:.2f}% ({self.serial_reader.total_packets_lost}/{self.serial_reader.total_packets_expected} packets)")
-                            
-                            # Periodic status report (every 10 seconds)
-                            if not hasattr(self, '_last_status_report'):
-                                self._last_status_report = current_time
-                            if current_time - self._last_status_report >= 10.0:
-                                if overall_loss_percent > 0:
-                                    print(f"📊 Packet Statistics: Received {current_packet_count} packets, Lost {self.serial_reader.total_packets_lost} packets ({overall_loss_percent:.2f}% loss)")
-                                self._last_status_report = current_time
-                            
-                            self._last_packet_count = current_packet_count
-                            self._last_packet_time = current_time
-                    
-                    for packet in packets:
-                        # Packet contains all 12 leads: I, II, III, aVR, aVL, aVF, V1, V2, V3, V4, V5, V6
-                        # Map packet dict to our lead order
-                        lead_order = ["I", "II", "III", "aVR", "aVL", "aVF", "V1", "V2", "V3", "V4", "V5", "V6"]
+                        # Alert on packet loss
+                        if last_second and last_second['loss_percent'] > 5.0:  # More than 5% packet loss in the last second
+                            print(f"⚠️ Packet loss detected: {last_second['lost']} packets lost in the last second "
+                                  f"({last_second['loss_percent']:.1f}% loss, {last_second['interpolated']} bridged)")
+                            print(f"   Overall packet loss since start: {loss['loss_percent']:.2f}% "
+                                  f"({loss['lost']}/{loss['received'] + loss['lost']} packets)")
                         
-                        for i, lead_name in enumerate(lead_order):
-                            try:
-                                if i < len(self.data) and lead_name in packet:
-                                    value = packet[lead_name]
-                                    # Update circular buffer
-                                    self.data[i] = np.roll(self.data[i], -1)
-                                    # Apply smoothing
-                                    smoothed_value = self.apply_realtime_smoothing(value, i)
-                                    self.data[i][-1] = smoothed_value
-                            except Exception as e:
-                                print(f"❌ Error updating data buffer {i} ({lead_name}): {e}")
-                                continue
+                        # Periodic status report (every 10 seconds)
+                        if not hasattr(self, '_last_status_report'):
+                            self._last_status_report = current_time
+                        if current_time - self._last_status_report >= 10.0:
+                            if loss and loss['lost'] > 0:
+                                print(f"📊 Packet Statistics: Received {loss['received']} packets, Lost {loss['lost']} packets "
+                                      f"({loss['loss_percent']:.2f}% loss; {loss['interpolated']} bridged, "
+                                      f"{loss['unfilled']} left as gaps)")
+                            stats = self.get_acquisition_stats()
+                            if stats:
+                                print(f"📊 Acquisition latency: read {stats['read']['mean_ms']:.2f}ms, "
+                                      f"decode {stats['decode']['mean_ms']:.2f}ms, "
+                                      f"publish {stats['publish']['mean_ms']:.2f}ms, "
+                                      f"ingest→display {stats['ingest_to_display']['mean_ms']:.1f}ms "
+                                      f"(max {stats['ingest_to_display']['max_ms']:.1f}ms)")
+                            render_summary = self.render_scheduler.summary()
+                            if render_summary:
+                                print(f"📊 Render scheduler:\n{render_summary}")
+                            self._last_status_report = current_time
+                        
+                        self._last_packet_time = current_time
+                    
+                    if len(frames):
+                        # Each decoded row holds all 12 leads in LEAD_ORDER:
+                        # I, II, III, aVR, aVL, aVF, V1, V2, V3, V4, V5, V6
+                        try:
+                            # Smooth and append the whole block in one pass
+                            self._ingest_live_block(frames, mask=self._pending_mask,
+                                                    lead_status=self._pending_status,
+                                                    stream_index=self._pending_stream_index)
+                        except Exception as e:
+                            print(f"❌ Error updating data buffers: {e}")
                         
-                        # Update sampling rate counter
+                        # Publish the recovered sampling rate (the clock itself is fed
+                        # with arrival stamps by _drain_acquisition / the acquisition thread)
                         try:
                             if hasattr(self, 'sampler'):
-                                sampling_rate = self.sampler.add_sample()
+                                sampling_rate = self.sampler.sampling_rate
                                 if sampling_rate > 0:
                                     # Debug: Log detected sampling rate (first few times only)
                                     if not hasattr(self, '_sampling_rate_log_count'):
@@ -7489,7 +7796,7 @@ class ECGTestPage(QWidget):
                         except Exception as e:
                             print(f"❌ Error updating sampling rate: {e}")
                         
-                        packets_processed += 1
+                        packets_processed += len(frames)
                         
                 except Exception as e:
                     print(f"❌ Error reading serial packets: {e}")
@@ -7499,27 +7806,12 @@ class ECGTestPage(QWidget):
                 # FALLBACK: Old method for compatibility (if SerialECGReader is still used)
                 lines_processed = 0
                 max_attempts = 20
+                rows = []
                 while lines_processed < max_attempts:
                     try:
                         all_8_leads = self.serial_reader.read_value()
                         if all_8_leads:
-                            all_12_leads = self.calculate_12_leads_from_8_channels(all_8_leads)
-                            for i in range(len(self.leads)):
-                                try:
-                                    if i < len(self.data) and i < len(all_12_leads):
-                                        self.data[i] = np.roll(self.data[i], -1)
-                                        smoothed_value = self.apply_realtime_smoothing(all_12_leads[i], i)
-                                        self.data[i][-1] = smoothed_value
-                                except Exception as e:
-                                    print(f"❌ Error updating data buffer {i}: {e}")
-                                    continue
-                            try:
-                                if hasattr(self, 'sampler'):
-                                    sampling_rate = self.sampler.add_sample()
-                                    if sampling_rate > 0 and hasattr(self, 'metric_labels') and 'sampling_rate' in self.metric_labels:
-                                        self.metric_labels['sampling_rate'].setText(f"{sampling_rate:.1f} Hz")
-                            except Exception as e:
-                                print(f"❌ Error updating sampling rate: {e}")
+                            rows.append(self.calculate_12_leads_from_8_channels(all_8_leads))
                             lines_processed += 1
                         else:
                             break
@@ -7528,6 +7820,18 @@ class ECGTestPage(QWidget):
                         if hasattr(self, 'serial_reader') and hasattr(self.serial_reader, '_handle_serial_error'):
                             self.serial_reader._handle_serial_error(e)
                         continue
+                if rows:
+                    try:
+                        self._ingest_live_block(np.asarray(rows, dtype=float))
+                    except Exception as e:
+                        print(f"❌ Error updating data buffers: {e}")
+                    try:
+                        if hasattr(self, 'sampler'):
+                            sampling_rate = self.sampler.add_samples(len(rows))
+                            if sampling_rate > 0 and hasattr(self, 'metric_labels') and 'sampling_rate' in self.metric_labels:
+                                self.metric_labels['sampling_rate'].setText(f"{sampling_rate:.1f} Hz")
+                    except Exception as e:
+                        print(f"❌ Error updating sampling rate: {e}")
                 packets_processed = lines_processed
             
             # Update plots if we processed any packets
@@ -7556,131 +7860,17 @@ class ECGTestPage(QWidget):
                 seconds_scale = (25.0 / max(1e-6, wave_speed))
                 seconds_to_show = baseline_seconds * seconds_scale
                 
-                for i in range(len(self.leads)):
+                if render:
                     try:
-                        if i >= len(self.data_lines):
-                            continue
-                        has_data = (i < len(self.data) and len(self.data[i]) > 0)
-                        if has_data:
-                            # Calculate gain factor: higher mm/mV = higher gain (10mm/mV = 1.0x baseline)
-                            gain_factor = get_display_gain(self.settings_manager.get_wave_gain())
-                            scaled_data = self.apply_adaptive_gain(self.data[i], signal_source, gain_factor)
-
-                            # Build time axis and apply wave-speed scaling
-                            sampling_rate = 186.5
-                            if hasattr(self, 'sampler') and hasattr(self.sampler, 'sampling_rate') and self.sampler.sampling_rate > 10:
-                                sampling_rate = float(self.sampler.sampling_rate)
-                            elif hasattr(self, 'sampling_rate') and self.sampling_rate > 10:
-                                sampling_rate = float(self.sampling_rate)
-                            
-                            # Calculate how many samples to show based on wave speed
-                            # 25 mm/s → 10s window
-                            # 12.5 mm/s → 20s window (show more data, compressed)
-                            # 50 mm/s → 5s window (show less data, stretched)
-                            samples_to_show = int(sampling_rate * seconds_to_show)
-                            
-                            # Take only the most recent samples_to_show from the buffer (before gain application)
-                            raw_data = self.data[i]
-                            if len(raw_data) > samples_to_show:
-                                data_slice = raw_data[-samples_to_show:]
-                            else:
-                                data_slice = raw_data
-                            
-                            # 🫀 DISPLAY: Low-frequency baseline anchor (removes respiration from baseline)
-                            # Extract very-low-frequency baseline (< 0.3 Hz) to prevent baseline from "breathing"
-                            filtered_slice = np.array(data_slice, dtype=float)
-                            try:
-                                # Initialize slow anchor if needed
-                                if not hasattr(self, '_baseline_anchors'):
-                                    self._baseline_anchors = [0.0] * 12
-                                    self._baseline_alpha_slow = 0.0005  # Monitor-grade: ~4 sec time constant at 500 Hz
-                                
-                                if len(filtered_slice) > 0:
-                                    # Extract low-frequency baseline estimate (removes respiration 0.1-0.35 Hz)
-                                    baseline_estimate = self._extract_low_frequency_baseline(filtered_slice, sampling_rate)
-                                    
-                                    # Update anchor with slow EMA (tracks only very-low-frequency drift)
-                                    self._baseline_anchors[i] = (1 - self._baseline_alpha_slow) * self._baseline_anchors[i] + self._baseline_alpha_slow * baseline_estimate
-                                    
-                                    # Subtract anchor (NOT raw mean)
-                                    filtered_slice = filtered_slice - self._baseline_anchors[i]
-                                    
-                                    # Final zero-centering clamp (visual only, display path)
-                                    if not hasattr(self, '_display_zero_refs'):
-                                        self._display_zero_refs = [0.0] * 12
-                                    
-                                    zero_alpha = 0.01  # Fast convergence, visual only
-                                    current_dc = np.nanmean(filtered_slice) if len(filtered_slice) > 0 else 0.0
-                                    self._display_zero_refs[i] = (1 - zero_alpha) * self._display_zero_refs[i] + zero_alpha * current_dc
-                                    filtered_slice = filtered_slice - self._display_zero_refs[i]
-                            except Exception as filter_error:
-                                # Fallback: use original signal (baseline anchor handles it, no mean subtraction)
-                                print(f"⚠️ Using fallback baseline correction for lead {self.leads[i] if hasattr(self, 'leads') else i}: {filter_error}")
-                            
-                            # Optional AC notch filtering based on "Set Filter" selection.
-                            # Keeps wave peaks intact while removing 50/60 Hz power noise for machine serial data.
-                            try:
-                                ac_setting = self.settings_manager.get_setting("filter_ac", "off") if self.settings_manager else "off"
-                                if ac_setting and ac_setting != "off" and len(filtered_slice) >= 10:
-                                    from ecg.ecg_filters import apply_ac_filter
-                                    filtered_slice = apply_ac_filter(filtered_slice, sampling_rate, ac_setting)
-                            except Exception as filter_error:
-                                pass  # AC filter is optional
-                            
-                            # Apply wave gain
-                            gain_factor = get_display_gain(self.settings_manager.get_wave_gain())
-                            
-                            # Signal is already baseline-corrected by median+mean filter
-                            centered_slice = filtered_slice
-                            
-                            # Apply gain after centering (same as demo mode)
-                            scaled_data = centered_slice * gain_factor
-                            scaled_data = np.nan_to_num(scaled_data, copy=False)
-
-                            # --- Flatline detection (serial/display path) ---
-                            if scaled_data.size >= 50:
-                                amp_range = float(np.nanmax(scaled_data) - np.nanmin(scaled_data))
-                                std_val = float(np.nanstd(scaled_data))
-                                # Very small range and std → likely flatline / disconnected lead
-                                is_flat = amp_range < 5.0 and std_val < 1.0
-                                lead_name = self.leads[i] if i < len(self.leads) else f"Lead {i+1}"
-                                if is_flat and not self._flatline_alert_shown[i]:
-                                    self._flatline_alert_shown[i] = True
-                                    try:
-                                        QMessageBox.warning(
-                                            self,
-                                            "Flatline Detected",
-                                            f"{lead_name} appears flat (no significant signal).\n"
-                                            f"Please check the electrode/lead connection."
-                                        )
-                                    except Exception as warn_err:
-                                        print(f"⚠️ Flatline warning failed for {lead_name}: {warn_err}")
-                                elif not is_flat:
-                                    # Reset flag when signal returns
-                                    self._flatline_alert_shown[i] = False
-                            
-                            n = len(scaled_data)
-                            time_axis = np.arange(n, dtype=float) / sampling_rate
-                            
-                            # Avoid cropping: small padding and explicit x-range
-                            try:
-                                vb = self.plot_widgets[i].getViewBox()
-                                if vb is not None:
-                                    vb.setRange(xRange=(time_axis[0], time_axis[-1]), padding=0)
-                            except Exception:
-                                pass
-
-                            self.data_lines[i].setData(time_axis, scaled_data)
-                            self.update_plot_y_range_adaptive(i, signal_source, data_override=scaled_data)
-
-                            if i < 3 and hasattr(self, '_debug_counter') and self._debug_counter % 200 == 0:
-                                print(f"🎛️ Serial Lead {i}: speed={wave_speed:.1f}mm/s, scale={seconds_scale:.2f}, time_range={time_axis[-1]:.2f}s")
-                        else:
-                            self.data_lines[i].setData(self.data[i] if i < len(self.data) else [])
-                            self.update_plot_y_range(i)
+                        self._draw_serial_leads(signal_source, seconds_to_show, wave_speed, seconds_scale)
                     except Exception as e:
-                        print(f"❌ Error updating plot {i}: {e}")
-                        continue
+                        print(f"❌ Error updating plots: {e}")
+                # Ingest-to-display latency of the oldest sample drawn this tick
+                stamp = getattr(self, '_pending_display_stamp', None)
+                if render and stamp is not None and self.acquisition_thread is not None:
+                    self.acquisition_thread.record_display_latency(stamp)
+                    self._pending_display_stamp = None
+
                 # Calculate ECG metrics more frequently for faster BPM updates in EXE
                 # Reduced from every 5 updates to every 3 updates for better responsiveness
                 if self.update_count % 3 == 0:
@@ -7704,8 +7894,8 @@ class ECGTestPage(QWidget):
             self.crash_logger.log_crash("Critical error in update_plots", e, "Real-time ECG plotting")
             try:
                 if hasattr(self, 'data') and self.data:
-                    for i in range(len(self.data)):
-                        self.data[i] = np.zeros(self.buffer_size if hasattr(self, 'buffer_size') else 1000)
+                    self.data.reset(self.buffer_size if hasattr(self, 'buffer_size') else 1000)
+                    self.reset_realtime_smoothing()
             except Exception as recovery_error:
                 self.crash_logger.log_error("Failed to recover from update_plots error", recovery_error, "Data reset")
     
@@ -7726,12 +7916,11 @@ class ECGTestPage(QWidget):
                 # Force garbage collection
                 gc.collect()
                 
-                # Trim data buffers if they're too large
-                for i, data_buffer in enumerate(self.data):
-                    if len(data_buffer) > self.max_buffer_size:
-                        # Keep only the most recent data
-                        self.data[i] = data_buffer[-self.max_buffer_size:].copy()
-                        print(f"📉 Trimmed data buffer {i} to {len(self.data[i])} samples")
+                # Lead data lives in a fixed-capacity ring buffer, so it never
+                # needs trimming; just keep it within the configured maximum
+                if self.data.capacity > self.max_buffer_size:
+                    self.data.reset(self.max_buffer_size)
+                    print(f"📉 Reallocated lead buffer to {self.max_buffer_size} samples")
                 
                 # Check memory after cleanup
                 memory_after = process.memory_info().rss / 1024 / 1024
@@ -7804,6 +7993,9 @@ class ECGTestPage(QWidget):
                 self.elapsed_timer.stop()
                 self.elapsed_timer.deleteLater()
             
+            # Stop background acquisition before closing the port it reads from
+            self._stop_acquisition_thread()
+            
             # Close serial connection
             if hasattr(self, 'serial_reader') and self.serial_reader:
                 try:
@@ -0,0 +1,322 @@
+"""
+Virtual ECG Serial Device
+
+A pty-backed stand-in for the acquisition hardware, so SerialStreamReader
+(22-byte packets) and SerialECGReader (text lines) can be driven at a
+controlled rate without a device attached.
+
+The device thread writes to the master side of a pseudo-terminal; readers
+open `device.port` (the slave side) exactly like a real serial port.
+
+Sources:
+    - synthetic_direct_leads(): generated PQRST waveforms
+    - load_direct_leads(path): recorded captures (.ecgb / legacy .json via
+      ecg_capture, CSV with lead-name headers such as dummycsv.csv, or
+      whitespace-separated 8-column ADC dumps such as adc_data_raw.txt)
+    The source is looped for as long as the device runs.
+
+Impairments:
+    - jitter_ms: random +/- delay added to each burst
+    - drop_byte_rate: probability that a packet loses one random byte
+    - corrupt_frame_rate: probability that a packet's END_BYTE is damaged
+    Impaired packets are rejected by the decoder, so the device also logs the
+    send time of every intact packet; the k-th decoded sample maps to
+    `intact_send_time(k)` for end-to-end latency measurements.
+
+POSIX only (uses os.openpty).
+
+Usage:
+    from ecg.virtual_device import VirtualECGDevice, synthetic_direct_leads
+
+    device = VirtualECGDevice(synthetic_direct_leads(10, 500), sampling_rate=500, jitter_ms=1.0)
+    device.start()
+    reader = SerialStreamReader(device.port, 115200)
+    ...
+    device.stop()
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from .packet_decoder import LEAD_NAMES_DIRECT, PACKET_SIZE, END_BYTE, encode_frames
+
+SUPPORTED_RATES = (250, 500, 1000)
+ADC_BASELINE = 2000.0
+
+
+def synthetic_direct_leads(seconds: float = 10.0, sampling_rate: float = 500.0, heart_rate: float = 72.0,
+                           amplitude: float = 600.0, noise: float = 4.0, seed: Optional[int] = 0) -> np.ndarray:
+    """
+    Generate a periodic PQRST waveform for the 8 directly measured leads.
+
+    Returns:
+        (n, 8) 12-bit ADC values in LEAD_NAMES_DIRECT order (baseline 2000)
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sampling_rate)
+    t = np.arange(n) / sampling_rate
+    phase = (t * heart_rate / 60.0) % 1.0
+    rr = 60.0 / heart_rate
+
+    def wave(center, width, height):
+        return height * np.exp(-0.5 * ((phase - center) * rr / width) ** 2)
+
+    beat = (wave(0.18, 0.025, 0.12) - wave(0.285, 0.008, 0.1) + wave(0.30, 0.010, 1.0)
+            - wave(0.315, 0.010, 0.25) + wave(0.55, 0.045, 0.3))
+    # Per-lead gain so the leads are not identical (I, II, V1..V6)
+    gains = np.array([0.6, 1.0, -0.5, 0.3, 0.8, 1.2, 1.1, 0.9])
+    direct = ADC_BASELINE + amplitude * beat[:, None] * gains[None, :]
+    direct += 0.05 * amplitude * np.sin(2 * np.pi * 0.3 * t)[:, None]  # Baseline wander
+    direct += rng.normal(0.0, noise, direct.shape)
+    return np.clip(np.rint(direct), 0, 0xFFF)
+
+
+def load_direct_leads(path: str) -> np.ndarray:
+    """
+    Load a recording as (n, 8) direct-lead ADC values for replay.
+
+    Supports binary / JSON captures, CSV files with lead-name headers, and
+    whitespace-separated files whose first 8 numeric columns are in packet
+    (LEAD_NAMES_DIRECT) order.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.ecgb', '.json'):
+        from .ecg_capture import load_ecg_data_from_file
+        data = load_ecg_data_from_file(path)
+        if not data or 'leads' not in data:
+            raise ValueError(f"Could not load capture: {path}")
+        leads = [np.asarray(data['leads'].get(name, []), dtype=float) for name in LEAD_NAMES_DIRECT]
+        n = min(len(lead) for lead in leads)
+        return np.column_stack([lead[:n] for lead in leads])
+
+    with open(path, 'r') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"Empty recording: {path}")
+
+    first = lines[0].replace(',', '\t').split()
+    if all(name in first for name in LEAD_NAMES_DIRECT):
+        columns = [first.index(name) for name in LEAD_NAMES_DIRECT]
+        rows = [line.replace(',', '\t').split() for line in lines[1:]]
+        return np.array([[float(row[c]) for c in columns] for row in rows if len(row) == len(first)])
+
+    rows = []
+    for line in lines:
+        values = []
+        for token in line.replace(',', ' ').split():
+            try:
+                values.append(float(token))
+            except ValueError:
+                pass
+        if len(values) >= len(LEAD_NAMES_DIRECT):
+            rows.append(values[:len(LEAD_NAMES_DIRECT)])
+    if not rows:
+        raise ValueError(f"No 8-column sample rows in {path}")
+    return np.array(rows)
+
+
+class VirtualECGDevice:
+    """Paced packet (or text line) emitter on a pseudo-terminal."""
+
+    def __init__(self, source: Optional[np.ndarray] = None, sampling_rate: float = 500.0,
+                 protocol: str = "packet", burst_ms: float = 2.0, jitter_ms: float = 0.0,
+                 drop_byte_rate: float = 0.0, corrupt_frame_rate: float = 0.0,
+                 log_capacity: int = 1_000_000, seed: Optional[int] = None):
+        """
+        Args:
+            source: (n, 8) direct-lead values to loop (default: 10 s synthetic)
+            sampling_rate: Packets per second (250, 500 or 1000 Hz)
+            protocol: 'packet' (22-byte frames) or 'text' (8 values per line)
+            burst_ms: Nominal interval between writes; packets due in that
+                interval are written together, like a USB-serial bridge
+            jitter_ms: Maximum random deviation added to each write time
+            drop_byte_rate: Probability per packet of losing one byte
+            corrupt_frame_rate: Probability per packet of a damaged END_BYTE
+            log_capacity: Intact packets whose send time is kept for latency
+                measurements (older entries are overwritten)
+            seed: Random seed for reproducible impairments
+        """
+        if sampling_rate not in SUPPORTED_RATES:
+            print(f"⚠️ Virtual ECG device: {sampling_rate} Hz is not one of {SUPPORTED_RATES}")
+        if protocol not in ("packet", "text"):
+            raise ValueError(f"Unsupported virtual device protocol: {protocol}")
+        if source is None:
+            source = synthetic_direct_leads(10.0, sampling_rate)
+        source = np.asarray(source, dtype=float).reshape(-1, len(LEAD_NAMES_DIRECT))
+        if source.shape[0] == 0:
+            raise ValueError("Virtual ECG device needs at least one sample")
+
+        self.sampling_rate = float(sampling_rate)
+        self.protocol = protocol
+        self.burst_ms = burst_ms
+        self.jitter_ms = jitter_ms
+        self.drop_byte_rate = drop_byte_rate
+        self.corrupt_frame_rate = corrupt_frame_rate
+        self._rng = np.random.default_rng(seed)
+
+        # Pre-encode one loop of the source so the device thread only slices bytes
+        if protocol == "packet":
+            self._stream = encode_frames(source)
+            self._unit = PACKET_SIZE
+        else:
+            lines = [" ".join(str(int(v)) for v in row) + "\r\n" for row in np.rint(source)]
+            self._lines = [line.encode("ascii") for line in lines]
+            self._stream = None
+            self._unit = None
+        self._n_source = source.shape[0]
+
+        self.packets_sent = 0
+        self.packets_dropped = 0       # Packets that lost a byte
+        self.packets_corrupted = 0
+        self.bytes_written = 0
+        self.write_stalls = 0          # Writes that found the pty full (reader too slow)
+        self._log = np.zeros(max(1, int(log_capacity)), dtype=np.float64)
+        self.intact_sent = 0
+
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.start_time = None
+
+    # ------------------------------------------------------------------ #
+    # Lifecycle
+    # ------------------------------------------------------------------ #
+
+    def open(self) -> str:
+        """Create the pseudo-terminal. Returns the port path readers should open."""
+        if self._master is not None:
+            return self.port
+        if not hasattr(os, 'openpty'):
+            raise RuntimeError("The virtual ECG device needs a POSIX pty (not available on this platform)")
+        import tty
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # No newline translation or echo
+        self.port = os.ttyname(self._slave)
+        return self.port
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> str:
+        """Open the pty (if needed) and start emitting. Returns the port path."""
+        self.open()
+        if self.running:
+            return self.port
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="VirtualECGDevice", daemon=True)
+        self._thread.start()
+        print(f"🧪 Virtual ECG device on {self.port} ({self.sampling_rate:g} Hz, {self.protocol})")
+        return self.port
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop emitting and close the pty."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    # ------------------------------------------------------------------ #
+    # Emission
+    # ------------------------------------------------------------------ #
+
+    def _packet_bytes(self, first: int, count: int):
+        """Bytes for packets [first, first + count) of the looped source, plus intact flags."""
+        index = (first + np.arange(count)) % self._n_source
+        if self.protocol == "text":
+            units = [self._lines[i] for i in index]
+        else:
+            stream = self._stream
+            unit = self._unit
+            units = [stream[i * unit:(i + 1) * unit] for i in index]
+
+        intact = np.ones(count, dtype=bool)
+        if self.drop_byte_rate > 0 or self.corrupt_frame_rate > 0:
+            drops = self._rng.random(count) < self.drop_byte_rate
+            corrupt = self._rng.random(count) < self.corrupt_frame_rate
+            for i in np.flatnonzero(drops | corrupt):
+                packet = bytearray(units[i])
+                if corrupt[i]:
+                    packet[-1] = (END_BYTE + 1 + int(self._rng.integers(0, 254))) % 256 if self.protocol == "packet" else ord('x')
+                    self.packets_corrupted += 1
+                if drops[i]:
+                    del packet[int(self._rng.integers(0, len(packet)))]
+                    self.packets_dropped += 1
+                units[i] = bytes(packet)
+                intact[i] = False
+        return b"".join(units), intact
+
+    def _run(self) -> None:
+        interval = self.burst_ms / 1000.0
+        jitter = self.jitter_ms / 1000.0
+        self.start_time = time.perf_counter()
+        next_write = self.start_time
+        while not self._stop_event.is_set():
+            now = time.perf_counter()
+            due = int((now - self.start_time) * self.sampling_rate)
+            count = due - self.packets_sent
+            if count > 0:
+                payload, intact = self._packet_bytes(self.packets_sent, count)
+                try:
+                    t_send = time.perf_counter()
+                    view = memoryview(payload)
+                    while view and not self._stop_event.is_set():
+                        written = os.write(self._master, view)
+                        if written < len(view):
+                            self.write_stalls += 1
+                        view = view[written:]
+                except OSError as e:
+                    print(f"❌ Virtual ECG device write failed: {e}")
+                    break
+                self.bytes_written += len(payload)
+                self.packets_sent += count
+                self._log_intact(t_send, int(intact.sum()))
+
+            next_write += interval
+            if jitter > 0:
+                next_write += float(self._rng.uniform(-jitter, jitter))
+            delay = next_write - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                next_write = time.perf_counter()
+
+    def _log_intact(self, t_send: float, count: int) -> None:
+        if count <= 0:
+            return
+        capacity = len(self._log)
+        index = (self.intact_sent + np.arange(count)) % capacity
+        self._log[index] = t_send
+        self.intact_sent += count
+
+    def intact_send_time(self, sample_index: int) -> Optional[float]:
+        """time.perf_counter() at which the sample_index-th intact packet was written."""
+        if sample_index < 0 or sample_index >= self.intact_sent or sample_index < self.intact_sent - len(self._log):
+            return None
+        return float(self._log[sample_index % len(self._log)])
+
+    def get_stats(self):
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        return {
+            'sampling_rate': self.sampling_rate,
+            'elapsed_s': elapsed,
+            'packets_sent': self.packets_sent,
+            'packets_intact': self.intact_sent,
+            'packets_dropped': self.packets_dropped,
+            'packets_corrupted': self.packets_corrupted,
+            'bytes_written': self.bytes_written,
+            'write_stalls': self.write_stalls,
+        }
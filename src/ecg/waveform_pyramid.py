@@ -0,0 +1,429 @@
+"""
+Multi-Resolution Waveform Pyramid
+
+The expanded lead view used to slice its window out of one in-memory copy of
+the lead, re-filter it and hand every sample to the plot, so the cost of a
+scrub or zoom grew with the window: fine for 10 s, unusable for minutes or
+hours of a session.
+
+`MinMaxPyramid` keeps a min/max level-of-detail pyramid of one lead:
+    - level 0 folds `base_bucket` samples into one bucket (first and second
+      extreme in time order, as in display_decimator), every further level
+      folds `fanout` buckets of the level below
+    - it is extended incrementally; completed buckets never change, so each
+      new block only reduces its own samples (plus one bucket per level)
+    - the newest `resident_samples` raw samples stay in memory; older ones
+      are read through an optional `backing` reader (e.g. the on-disk
+      full-disclosure recording)
+
+`envelope(start, stop, max_points)` picks the finest level that still fits
+the point budget and returns at most max_points points, so drawing any range
+costs O(pixels), not O(samples). Ranges that fit the budget are drawn from
+the raw samples.
+
+`LeadHistory` pairs the raw pyramid with one pyramid per display
+configuration (e.g. the clean-view bandpass at the current sampling rate).
+Filtered pyramids are built the first time a configuration is requested and
+then follow the stream: the zero-phase display filters run over fixed
+segments with `pad_seconds` of context on each side, and only the newest,
+not yet padded tail is filtered on demand.
+
+Usage:
+    from ecg.waveform_pyramid import LeadHistory
+
+    history = LeadHistory(sampling_rate=500, backing=read_old_samples)
+    history.extend(new_samples)                                    # 1-D, oldest first
+    x, y = history.envelope(start, stop, max_points=1600)          # raw
+    x, y = history.envelope(start, stop, 1600, key=("clean", 500.0), filter_fn=clean)
+    window = history.read(start, stop, key=("clean", 500.0), filter_fn=clean)
+"""
+
+import math
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import numpy as np
+
+from .display_decimator import _bucket_positions, _reduce_buckets, minmax_envelope
+from .ring_buffer import ECGRingBuffer
+
+
+class _BucketLevel:
+    """Growable (first, second) extreme arrays of one pyramid level."""
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self.first = np.empty(capacity, dtype=dtype)
+        self.second = np.empty(capacity, dtype=dtype)
+        self.n = 0
+
+    def append(self, first: np.ndarray, second: np.ndarray) -> None:
+        k = len(first)
+        if self.n + k > len(self.first):
+            size = max(2 * len(self.first), self.n + k)
+            for name in ('first', 'second'):
+                grown = np.empty(size, dtype=self.first.dtype)
+                grown[:self.n] = getattr(self, name)[:self.n]
+                setattr(self, name, grown)
+        self.first[self.n:self.n + k] = first
+        self.second[self.n:self.n + k] = second
+        self.n += k
+
+
+class MinMaxPyramid:
+    """Incremental min/max level-of-detail pyramid of one lead."""
+
+    def __init__(self, base_bucket: int = 8, fanout: int = 4, resident_samples: int = 300000,
+                 backing: Optional[Callable[[int, int], np.ndarray]] = None, dtype=np.float32):
+        """
+        Args:
+            base_bucket: Samples folded into one level-0 bucket
+            fanout: Buckets of one level folded into one bucket of the next
+            resident_samples: Newest raw samples kept in memory
+            backing: Optional reader(start, stop) -> 1-D samples (or None if
+                unavailable) for raw samples that are no longer resident
+            dtype: Storage dtype of samples and bucket extremes
+        """
+        self.base_bucket = max(2, int(base_bucket))
+        self.fanout = max(2, int(fanout))
+        self.backing = backing
+        self.dtype = np.dtype(dtype)
+        self._raw = ECGRingBuffer(max(self.base_bucket, int(resident_samples)), n_leads=1,
+                                  dtype=self.dtype, track_time=False)
+        self._pending = np.zeros(self.base_bucket, dtype=self.dtype)
+        self._fill = 0
+        self._levels = []
+        self.total_samples = 0
+
+    def bucket_samples(self, level: int) -> int:
+        """Samples covered by one bucket of `level`."""
+        return self.base_bucket * self.fanout ** level
+
+    @property
+    def levels(self) -> int:
+        return len(self._levels)
+
+    @property
+    def resident_start(self) -> int:
+        """Index of the oldest sample still held in memory."""
+        return self.total_samples - self._raw.filled
+
+    def extend(self, samples) -> None:
+        """
+        Append samples and fold them into the pyramid.
+
+        Args:
+            samples: 1-D new samples, oldest first
+        """
+        samples = np.asarray(samples, dtype=self.dtype).ravel()
+        k = len(samples)
+        if k == 0:
+            return
+        self._raw.extend(samples[:, None])
+        self.total_samples += k
+
+        base = self.base_bucket
+        pos = 0
+        if self._fill:
+            take = min(base - self._fill, k)
+            self._pending[self._fill:self._fill + take] = samples[:take]
+            self._fill += take
+            pos = take
+            if self._fill == base:
+                self._push_base(self._pending[None, :])
+                self._fill = 0
+        full = (k - pos) // base
+        if full:
+            end = pos + full * base
+            self._push_base(samples[pos:end].reshape(full, base))
+            pos = end
+        tail = k - pos
+        if tail:
+            self._pending[:tail] = samples[pos:]
+            self._fill = tail
+        self._cascade()
+
+    def _push_base(self, body: np.ndarray) -> None:
+        if not self._levels:
+            self._levels.append(_BucketLevel(self.dtype))
+        first, second = _reduce_buckets(body)
+        self._levels[0].append(first, second)
+
+    def _cascade(self) -> None:
+        """Fold completed groups of `fanout` buckets into the level above."""
+        fanout = self.fanout
+        level = 0
+        while level < len(self._levels):
+            below = self._levels[level]
+            done = self._levels[level + 1].n if level + 1 < len(self._levels) else 0
+            groups = below.n // fanout - done
+            if groups <= 0:
+                break
+            if level + 1 == len(self._levels):
+                self._levels.append(_BucketLevel(self.dtype))
+            lo, hi = done * fanout, (done + groups) * fanout
+            # Interleaved extremes are in time order, so the reduction keeps it
+            body = np.empty((groups, 2 * fanout), dtype=self.dtype)
+            body[:, 0::2] = below.first[lo:hi].reshape(groups, fanout)
+            body[:, 1::2] = below.second[lo:hi].reshape(groups, fanout)
+            first, second = _reduce_buckets(body)
+            self._levels[level + 1].append(first, second)
+            level += 1
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        """
+        Raw samples [start, stop).
+
+        Returns:
+            1-D array of length stop - start (clipped to the stream); samples
+            that are neither resident nor readable through `backing` are NaN
+        """
+        start = max(0, int(start))
+        stop = min(self.total_samples, int(stop))
+        if stop <= start:
+            return np.zeros(0, dtype=self.dtype)
+        out = np.full(stop - start, np.nan, dtype=self.dtype)
+        resident = self.resident_start
+        if start < resident and self.backing is not None:
+            old_stop = min(stop, resident)
+            try:
+                old = self.backing(start, old_stop)
+                if old is not None:
+                    old = np.asarray(old, dtype=self.dtype).ravel()[:old_stop - start]
+                    out[:len(old)] = old
+            except Exception as e:
+                print(f"⚠️ Waveform history read failed: {e}")
+        if stop > resident:
+            first = max(start, resident)
+            view = self._raw.latest(self.total_samples - first)[0]
+            out[first - start:] = view[:stop - first]
+        return out
+
+    def envelope(self, start: int, stop: int, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Min/max envelope of samples [start, stop) in at most max_points points.
+
+        Returns:
+            tuple: (x, y)
+                - x: (m,) absolute sample positions
+                - y: (m,) values
+        """
+        start = max(0, int(start))
+        stop = min(self.total_samples, int(stop))
+        n = stop - start
+        if n <= 0:
+            return np.zeros(0), np.zeros(0, dtype=self.dtype)
+        per_point = int(math.ceil(n / max(1, int(max_points) // 2)))
+        level = -1
+        while level + 1 < len(self._levels) and self.bucket_samples(level + 1) <= per_point:
+            level += 1
+        x, y = self._gather(level, start, stop)
+        if len(y) > max_points:
+            # Finest fitting level holds up to `fanout` times the budget
+            ix, y = minmax_envelope(y, max_points)
+            x = np.interp(ix, np.arange(len(x)), x)
+        return x, y
+
+    def _gather(self, level: int, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        """All points of `level` over [start, stop); the part the level does not cover yet comes from finer levels."""
+        if level < 0:
+            return np.arange(start, stop, dtype=np.float64), self.read(start, stop)
+        size = self.bucket_samples(level)
+        data = self._levels[level]
+        covered = data.n * size
+        xs, ys = [], []
+        if start < covered:
+            b0 = start // size
+            b1 = min(data.n, -(-stop // size))
+            starts = size * np.arange(b0, b1, dtype=np.float64)
+            xs.append(np.clip(_bucket_positions(starts, size), start, stop - 1))
+            y = np.empty(2 * (b1 - b0), dtype=self.dtype)
+            y[0::2] = data.first[b0:b1]
+            y[1::2] = data.second[b0:b1]
+            ys.append(y)
+        if stop > covered:
+            x_tail, y_tail = self._gather(level - 1, max(start, covered), stop)
+            xs.append(x_tail)
+            ys.append(y_tail)
+        return np.concatenate(xs), np.concatenate(ys)
+
+
+class _FilteredStream:
+    """One display configuration: its filter and the pyramid of its output."""
+
+    def __init__(self, filter_fn, pyramid):
+        self.filter_fn = filter_fn
+        self.pyramid = pyramid
+        self.tail = None   # (total_samples, filtered tail) of the last on-demand filtering
+
+    @property
+    def end(self) -> int:
+        """Samples already filtered into the pyramid."""
+        return self.pyramid.total_samples
+
+
+class LeadHistory:
+    """Raw and per-configuration filtered min/max pyramids of one lead."""
+
+    def __init__(self, sampling_rate: float = 500.0, base_bucket: int = 8, fanout: int = 4,
+                 resident_seconds: float = 600.0, segment_seconds: float = 10.0, pad_seconds: float = 2.0,
+                 max_configs: int = 4, backing: Optional[Callable[[int, int], np.ndarray]] = None):
+        """
+        Args:
+            sampling_rate: Sampling rate in Hz (sizes the segments and memory)
+            base_bucket: Samples per level-0 bucket
+            fanout: Buckets folded per pyramid level
+            resident_seconds: Raw (and filtered) history kept in memory
+            segment_seconds: Length of the segments the display filters run over
+            pad_seconds: Context filtered on each side of a segment and discarded
+            max_configs: Filtered configurations cached (least recently used evicted)
+            backing: Optional reader(start, stop) -> 1-D raw samples for
+                history that is no longer resident
+        """
+        self.sampling_rate = float(sampling_rate) if sampling_rate and sampling_rate > 0 else 500.0
+        self.base_bucket = base_bucket
+        self.fanout = fanout
+        self.resident_samples = int(resident_seconds * self.sampling_rate)
+        self.segment_samples = max(64, int(segment_seconds * self.sampling_rate))
+        self.pad_samples = max(0, int(pad_seconds * self.sampling_rate))
+        self.max_configs = max(1, int(max_configs))
+        self.raw = MinMaxPyramid(base_bucket, fanout, self.resident_samples, backing=backing)
+        self._filtered = OrderedDict()
+
+    @property
+    def total_samples(self) -> int:
+        return self.raw.total_samples
+
+    @property
+    def duration(self) -> float:
+        """History length in seconds."""
+        return self.total_samples / self.sampling_rate
+
+    def reset(self, backing: Optional[Callable[[int, int], np.ndarray]] = None) -> None:
+        """Forget the history and every cached filtered configuration."""
+        self.raw = MinMaxPyramid(self.base_bucket, self.fanout, self.resident_samples, backing=backing)
+        self._filtered.clear()
+
+    def extend(self, samples) -> None:
+        """
+        Append new raw samples; cached filtered configurations follow.
+
+        Args:
+            samples: 1-D new samples, oldest first
+        """
+        self.raw.extend(samples)
+        for stream in self._filtered.values():
+            self._advance(stream)
+
+    # ------------------------------------------------------------------ #
+    # Filtered configurations
+    # ------------------------------------------------------------------ #
+
+    def _stream(self, key: Hashable, filter_fn: Callable[[np.ndarray], np.ndarray]) -> _FilteredStream:
+        stream = self._filtered.get(key)
+        if stream is None:
+            pyramid = MinMaxPyramid(self.base_bucket, self.fanout, self.resident_samples)
+            stream = _FilteredStream(filter_fn, pyramid)
+            # Filtered samples that are no longer resident are re-filtered from raw
+            pyramid.backing = lambda a, b, s=stream: self._filter_range(s, a, b)
+            self._filtered[key] = stream
+            while len(self._filtered) > self.max_configs:
+                self._filtered.popitem(last=False)
+            self._advance(stream)
+        else:
+            self._filtered.move_to_end(key)
+        return stream
+
+    def _filter_range(self, stream: _FilteredStream, start: int, stop: int) -> np.ndarray:
+        """Filter raw [start, stop) with up to pad_samples of context on each side."""
+        total = self.total_samples
+        lo = max(0, start - self.pad_samples)
+        hi = min(total, stop + self.pad_samples)
+        raw = self.raw.read(lo, hi).astype(np.float64)
+        filtered = np.asarray(stream.filter_fn(raw), dtype=np.float64)
+        return filtered[start - lo:stop - lo]
+
+    def _advance(self, stream: _FilteredStream) -> None:
+        """Filter every segment whose right-hand context has arrived."""
+        seg = self.segment_samples
+        while stream.end + seg + self.pad_samples <= self.total_samples:
+            stream.pyramid.extend(self._filter_range(stream, stream.end, stream.end + seg))
+            stream.tail = None
+
+    def _tail(self, stream: _FilteredStream) -> np.ndarray:
+        """Filtered samples past the last complete segment (filtered on demand, cached per length)."""
+        total = self.total_samples
+        if stream.tail is None or stream.tail[0] != total:
+            stream.tail = (total, self._filter_range(stream, stream.end, total))
+        return stream.tail[1]
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+
+    def read(self, start: int, stop: int, key: Optional[Hashable] = None,
+             filter_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> np.ndarray:
+        """
+        Full-resolution samples [start, stop), raw or of a filtered configuration.
+
+        Args:
+            start, stop: Absolute sample range
+            key: Display configuration (None = raw)
+            filter_fn: Filter of the configuration (used when it is first seen)
+        """
+        if key is None or filter_fn is None:
+            return self.raw.read(start, stop)
+        start = max(0, int(start))
+        stop = min(self.total_samples, int(stop))
+        if stop <= start:
+            return np.zeros(0)
+        stream = self._stream(key, filter_fn)
+        end = stream.end
+        parts = []
+        if start < end:
+            parts.append(stream.pyramid.read(start, min(stop, end)))
+        if stop > end:
+            parts.append(self._tail(stream)[max(start, end) - end:stop - end])
+        return np.concatenate(parts)
+
+    def envelope(self, start: int, stop: int, max_points: int, key: Optional[Hashable] = None,
+                 filter_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Min/max envelope of [start, stop) in at most max_points points.
+
+        Args:
+            start, stop: Absolute sample range
+            max_points: Point budget (about twice the plot width in pixels)
+            key: Display configuration (None = raw)
+            filter_fn: Filter of the configuration (used when it is first seen)
+
+        Returns:
+            tuple: (x, y) - x absolute sample positions, y values
+        """
+        if key is None or filter_fn is None:
+            return self.raw.envelope(start, stop, max_points)
+        start = max(0, int(start))
+        stop = min(self.total_samples, int(stop))
+        if stop <= start:
+            return np.zeros(0), np.zeros(0)
+        stream = self._stream(key, filter_fn)
+        end = stream.end
+        if stop <= end:
+            return stream.pyramid.envelope(start, stop, max_points)
+        # Live edge: the unsegmented tail shares the budget by length
+        tail_start = max(start, end)
+        tail = self._tail(stream)[tail_start - end:stop - end]
+        head_points = int(max_points * (tail_start - start) / (stop - start))
+        tail_x, tail_y = minmax_envelope(tail, max(2, max_points - head_points))
+        tail_x = tail_x + tail_start
+        if tail_start == start:
+            return tail_x, tail_y
+        head_x, head_y = stream.pyramid.envelope(start, end, max(2, head_points))
+        return np.concatenate([head_x, tail_x]), np.concatenate([head_y, tail_y])
+
+    def get_stats(self):
+        return {
+            'samples': self.total_samples,
+            'resident_samples': self.total_samples - self.raw.resident_start,
+            'levels': self.raw.levels,
+            'configs': list(self._filtered.keys()),
+        }
@@ -69,14 +69,8 @@ class SessionRecorder:
             data = getattr(ecg_test_page, 'data', []) or []
             if not leads or not data:
                 return {}
-            fs = 80.0
-            try:
-                if hasattr(ecg_test_page, 'sampler') and getattr(ecg_test_page.sampler, 'sampling_rate', None):
-                    fs = float(ecg_test_page.sampler.sampling_rate)
-                    if fs <= 0 or fs > 2000:
-                        fs = 80.0
-            except Exception:
-                fs = 80.0
+            from ecg.sampling_clock import resolve_sampling_rate
+            fs = resolve_sampling_rate(ecg_test_page)
             window = max(1, int(seconds * fs))
             out: Dict[str, List[float]] = {}
             for i, lead_name in enumerate(leads):
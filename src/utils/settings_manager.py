@@ -23,6 +23,7 @@ class SettingsManager:
             # System Setup settings
             "system_beat_vol": "on",
             "system_language": "en",
+            "full_disclosure": "off",  # "on": stream every sample to reports/disclosure while acquiring
 
             # Factory Maintain settings
             "factory_calibration": "skip",